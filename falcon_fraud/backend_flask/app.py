@@ -1,30 +1,41 @@
-from flask import Flask, request, jsonify
-import joblib
-import pandas as pd
-import numpy as np
+from flask import Flask, Response, request, jsonify, stream_with_context
 import yaml
 from datetime import datetime, timedelta
-from utils.feature_engineering import get_timestamp, get_hour, get_geo_distance, is_new_beneficiary
+from utils.feature_engineering import get_timestamp, get_hour, get_geo_distance
+from utils.tiered_history import TieredTxnHistory
+from utils.sql_history import SqlTxnHistory
+from utils.txn_history import PendingHistory
+from utils.velocity import VelocityCounters, PendingVelocity
+from utils.txn_log import TxnLogWriter, iter_txn_log
+from utils.merchant_table import MerchantTable, DEFAULT_CATEGORY, DEFAULT_DEVICE
+from utils.micro_batcher import MicroBatcher
+from utils.artifacts import memory_report
+from utils.model_registry import ModelRegistry, ModelLoader
+from utils.write_behind import WriteBehindQueue
+from utils.db_profile import engine_options, apply_profile
+from utils.listings import (
+    pending_reviews, keyset_page, keyset_stream, parse_fields, transactions_query, transaction_json,
+    TRANSACTION_FIELDS,
+)
+from utils.analytics import (
+    top_risky_beneficiaries, time_trends, top_risky_users, record_transaction, record_status_change,
+)
 import os
+import atexit
+from collections import deque
 import traceback
 import requests
-from decision_logic import assign_risk
+from decision_logic import decide_many, rbi_violation, RISK_LEVELS, DECISIONS, GEO_ANOMALY_KM
 from flask_sqlalchemy import SQLAlchemy
 from models import db, User, Transaction, AdminAction, Notification, OTPSession
+import migrations
 from sqlalchemy.exc import SQLAlchemyError
 from flask_cors import CORS
 import random
 import hashlib
-from sqlalchemy import func, desc
 
 app = Flask(__name__)
-CORS(app)
-
-# Config: Use SQLite for demo, or set DATABASE_URL env var for production
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///fraud_detection.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-db.init_app(app)
+CORS(app, expose_headers=["X-Next-Cursor"])
 
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
@@ -33,267 +44,363 @@ config_path = os.path.join(os.path.dirname(__file__), "config", "features_config
 with open(config_path) as f:
     config = yaml.safe_load(f)
 
-# ✅ Load models + scalers
+# Config: Use SQLite for demo, or set DATABASE_URL env var for production
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///fraud_detection.db')
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# ⚙️ Engine profile: pool sizing for server databases, PRAGMAs for SQLite
+database_config = config["database"]
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(database_config, app.config['SQLALCHEMY_DATABASE_URI'])
+
+db.init_app(app)
+with app.app_context():
+    apply_profile(db.engine, database_config)
+
+# ✅ Load the active model bundle from the versioned registry.
+# The loose pickles under model_paths seed the registry on first start.
 model_paths = config["model_paths"]
 model_paths = {k: os.path.join(ROOT_DIR, v) for k, v in model_paths.items()}
-rf_model = joblib.load(model_paths["rf"])
-iso_model = joblib.load(model_paths["iso"])
-rf_scaler = joblib.load(model_paths["rf_scaler"])
-iso_scaler = joblib.load(model_paths["iso_scaler"])
-label_encoders = joblib.load(model_paths["encoders"])
-iso_risk_scaler = joblib.load(model_paths["iso_risk_scaler"])
-
-# ✅ Load merchant metadata
-merchant_df = pd.read_csv("merchant_metadata_enriched.csv")
-
-# ✅ Load previous txn log for is_new_beneficiary logic
-txn_log_path = "database/txn_log.csv"
-if os.path.exists(txn_log_path):
-    txn_df = pd.read_csv(txn_log_path)
+inference_config = config["inference"]
+mmap_mode = "r" if inference_config["mmap_artifacts"] else None
+registry_config = config["model_registry"]
+model_registry = ModelRegistry(os.path.join(ROOT_DIR, registry_config["root"]))
+model_registry.bootstrap(model_paths, fold_scalers=inference_config["fold_scalers"])
+
+# Recent scored rows, replayed through a new bundle before it goes live
+recent_rows = deque(maxlen=registry_config["warmup_rows"])
+model_loader = ModelLoader(model_registry, config, warmup_rows=lambda: list(recent_rows))
+model_loader.activate_first_loadable()
+model_loader.start()
+atexit.register(model_loader.close)
+
+# ✅ Load the packed merchant table (built by scripts/build_merchant_table.py)
+data_paths = {k: os.path.join(ROOT_DIR, v) for k, v in config["data_paths"].items()}
+if os.path.exists(data_paths["merchant_table"]):
+    merchant_table = MerchantTable.load(data_paths["merchant_table"], mmap_mode=mmap_mode)
 else:
-    columns = ["sender_account", "beneficiary_account", "timestamp", "beneficiary_name", "beneficiary_branch", "beneficiary_bank_name", "sender_name"]
-    txn_df = pd.DataFrame(columns=columns)
-
-# �� Risk score mapping
-def assign_risk(score, config):
-    if score < config["decision_logic"]["review_threshold"]:
-        return "✅ Low Risk"
-    elif score < config["decision_logic"]["block_threshold"]:
-        return "⚠️ Medium Risk"
-    else:
-        return "❌ High Risk"
-
-# 🧠 Final Decision Logic
-def final_decision(rf_pred, risk_level, geo_anomaly=False, rapid_repeat=False, amount=0, risk_score=0.0):
-    if risk_level == "❌ High Risk" and amount < 200 and risk_score < 80:
-        return "🔍 Send to Admin"
-    if rf_pred == 0 and risk_level != "❌ High Risk" and amount < 1000:
-        return "✅ Auto-approved"
-    if risk_level == "❌ High Risk" and amount >= 200:
-        return "🚫 Block & Review"
-    if rf_pred == 1:
-        if geo_anomaly or rapid_repeat or amount > 100000:
-            return "🚫 Block & Review"
-        return "🔍 Send to Admin"
-    if geo_anomaly and amount > 100000:
-        return "🔍 Send to Admin"
-    return "✅ Auto-approved"
+    print("⚠️ Packed merchant table not found, building it from the CSV")
+    merchant_table = MerchantTable.from_csv(data_paths["merchant_metadata"])
+
+# ✅ Stream the append-only txn log into the history store and velocity counters.
+# Sources the store already holds (compacted to cold, or loaded into SQL) are skipped.
+log_config = config["txn_log"]
+history_config = config["history"]
+velocity_config = config["velocity"]
+if history_config["backend"] == "sql":
+    with app.app_context():
+        txn_history = SqlTxnHistory.from_config(history_config, db.engine)
+else:
+    txn_history = TieredTxnHistory.from_config(history_config)
+velocity = VelocityCounters.from_config(velocity_config)
+if history_config["hot_window_days"] * 86400 < velocity.longest_window_secs:
+    raise ValueError("history.hot_window_days must cover the longest velocity window")
+unknown_velocity = set(velocity_config["features"]) - set(velocity.feature_names())
+if unknown_velocity:
+    raise ValueError(f"Unknown velocity features: {sorted(unknown_velocity)}")
+
+replay_start = datetime.utcnow()
+velocity_since = replay_start - timedelta(seconds=velocity.longest_window_secs)
+for source, chunk in iter_txn_log(log_config["dir"], log_config["legacy_path"], skip=txn_history.replayed_sources()):
+    txn_history.ingest(chunk, source=source, now=replay_start)
+    velocity.ingest(chunk, since=velocity_since)
+txn_history.finish_replay()
+atexit.register(txn_history.close)
+
+txn_log_writer = TxnLogWriter(
+    log_config["dir"],
+    fsync_every=log_config["fsync_every"],
+    fsync_interval_secs=log_config["fsync_interval_secs"],
+    max_segment_bytes=int(log_config["max_segment_mb"] * 1024 * 1024),
+    rotate_daily=log_config["rotate_daily"]
+)
+atexit.register(txn_log_writer.close)
+
+# ✅ Write-behind queue for side-effect rows (notifications, audit)
+write_behind_config = config["write_behind"]
+with app.app_context():
+    write_behind = WriteBehindQueue.from_config(write_behind_config, db.engine)
+atexit.register(write_behind.close)
 
 # 🧠 Lookup merchant_category and device_type
 def infer_metadata(beneficiary_account):
-    row = merchant_df[merchant_df["beneficiary_account"] == beneficiary_account]
-    if not row.empty:
+    merchant = merchant_table.lookup(beneficiary_account)
+    if merchant is not None:
         return (
-            row.iloc[0]["merchant_category"],
-            row.iloc[0]["device_type"],
-            float(row.iloc[0]["merchant_lat"]),
-            float(row.iloc[0]["merchant_lon"])
+            merchant.merchant_category,
+            merchant.device_type,
+            merchant.merchant_lat,
+            merchant.merchant_lon
         )
-    return "P2P", "Mobile", 19.076, 72.8777
-
-def is_rapid_repeat(sender, beneficiary, df, threshold=3, minutes=60):
-    now = datetime.now()
-    df = df.copy()
-    if df.empty:
-        return False
-    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
-    recent = df[
-        (df["sender_account"] == sender) &
-        (df["beneficiary_account"] == beneficiary) &
-        (df["timestamp"] >= now - timedelta(minutes=minutes))
-    ]
-    return len(recent) >= threshold
+    return DEFAULT_CATEGORY, DEFAULT_DEVICE, 19.076, 72.8777
 
 def get_beneficiary_coords_from_ifsc(ifsc):
     return 19.076, 72.8777
 
-def get_time_since_last_txn(sender, txn_df, current_time):
-    user_txns = txn_df[txn_df["sender_account"] == sender]
-    if user_txns.empty:
-        return 0.0
-    user_txns["timestamp"] = pd.to_datetime(user_txns["timestamp"])
-    last_time = user_txns["timestamp"].max()
-    delta = (current_time - last_time).total_seconds() / 60
-    return round(delta, 2)
-
-def get_time_diff_mins(sender, beneficiary, txn_df, current_time):
-    df = txn_df[
-        (txn_df["sender_account"] == sender) &
-        (txn_df["beneficiary_account"] == beneficiary)
+# 🏦 RBI channel limits
+def apply_rbi_rules(data, type_field="transaction_type"):
+    reason = rbi_violation(data.get(type_field), data.get("amount", 0))
+    data["rbi_violation"] = bool(reason)
+    data["violation_reason"] = reason
+    return data
+
+def rbi_block_response(reason):
+    return {
+        "rf_prediction": 1,
+        "anomaly_score": 0.0,
+        "risk_score": 100.0,
+        "risk_level": "❌ High Risk",
+        "final_decision": "🚫 Block & Review",
+        "violation_reason": reason
+    }
+
+OPTIONAL_FIELDS = ["beneficiary_name", "beneficiary_branch", "beneficiary_bank_name", "sender_name", "sender_address"]
+
+# 🧮 History, merchant and geo features for one transaction (fills data in place)
+def engineer_features(data, timestamp, history=txn_history, counters=velocity):
+    data["timestamp"] = timestamp.isoformat()
+    data["hour"] = get_hour(timestamp)
+
+    data["time_diff_mins"] = history.time_diff_mins(data["sender_account"], data["beneficiary_account"], timestamp)
+    data["time_since_last_txn"] = history.time_since_last_txn(data["sender_account"], timestamp)
+
+    data["merchant_category"], data["device_type"], data["merchant_lat"], data["merchant_lon"] = infer_metadata(data["beneficiary_account"])
+    data["beneficiary_lat"], data["beneficiary_lon"] = data["merchant_lat"], data["merchant_lon"]
+
+    coord_m = (data["merchant_lat"], data["merchant_lon"])
+    coord_b = (data["beneficiary_lat"], data["beneficiary_lon"])
+    data["distance_km"] = get_geo_distance(coord_m, coord_b, cached=True)
+
+    merchant_coords = (data["merchant_lat"], data["merchant_lon"])
+    device_coords = (data["device_lat"], data["device_lon"])
+    data["distance_km_md"] = get_geo_distance(merchant_coords, device_coords)
+    data["geo_distance_km"] = get_geo_distance((data.get("sender_lat", 0), data.get("sender_lon", 0)), device_coords)
+    data["geo_anomaly"] = data["geo_distance_km"] > GEO_ANOMALY_KM
+    data["is_new_beneficiary"] = history.is_new_beneficiary(data["sender_account"], data["beneficiary_account"])
+    rapid = velocity_config["rapid_repeat"]
+    data["is_rapid_repeat"] = counters.count(
+        rapid["scope"], data["sender_account"], data["beneficiary_account"], rapid["window"], timestamp
+    ) >= rapid["min_count"]
+    if velocity_config["features"]:
+        data.update(counters.features(data["sender_account"], data["beneficiary_account"], timestamp, velocity_config["features"]))
+    return data
+
+# 🔮 One scaler / RF / ISO call for any number of feature rows.
+# The bundle is read once, so a hot-swap never splits a batch across versions.
+def score_rows(rows):
+    bundle = model_loader.bundle
+    results = bundle.score_rows(rows)
+    recent_rows.extend(rows)
+    return results
+
+def score_batch(rows):
+    rf_preds, anomaly_scores, risk_scores = score_rows(rows)
+    risk_levels, decisions = decide_many(
+        rf_preds, risk_scores, [data.get("amount", 0) for data in rows], config,
+        geo_anomaly=[data.get("geo_anomaly", False) for data in rows],
+        rapid_repeat=[data.get("is_rapid_repeat", False) for data in rows]
+    )
+    return [
+        {
+            "rf_prediction": int(rf_preds[k]),
+            "anomaly_score": round(float(anomaly_scores[k]), 3),
+            "risk_score": round(float(risk_scores[k]), 2),
+            "risk_level": RISK_LEVELS[risk_levels[k]],
+            "final_decision": DECISIONS[decisions[k]]
+        }
+        for k in range(len(rows))
     ]
-    if df.empty:
-        return 0.0
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    last_time = df["timestamp"].max()
-    delta = (current_time - last_time).total_seconds() / 60
-    return round(delta, 2)
+
+# 📦 Optional micro-batching of concurrent single-row requests
+micro_config = config["micro_batching"]
+if micro_config["enabled"]:
+    batcher = MicroBatcher(
+        score_batch,
+        max_batch_size=micro_config["max_batch_size"],
+        max_wait_ms=micro_config["max_wait_ms"]
+    )
+    atexit.register(batcher.close)
+else:
+    batcher = None
+
+def score_one(data):
+    if batcher is not None:
+        return batcher.submit(data)
+    return score_batch([data])[0]
+
+def log_transaction(data, timestamp):
+    txn_log_row = {
+        "sender_account": data["sender_account"],
+        "beneficiary_account": data["beneficiary_account"],
+        "timestamp": data["timestamp"],
+        "beneficiary_name": data["beneficiary_name"],
+        "beneficiary_branch": data["beneficiary_branch"],
+        "beneficiary_bank_name": data["beneficiary_bank_name"],
+        "sender_name": data["sender_name"],
+        "amount": data["amount"]
+    }
+    txn_log_writer.append(txn_log_row)
+    add_to_history(data, timestamp)
+
+def add_to_history(data, timestamp, history=txn_history, counters=velocity):
+    history.add(data["sender_account"], data["beneficiary_account"], timestamp)
+    counters.add(data["sender_account"], data["beneficiary_account"], timestamp, data["amount"])
+
+# 📝 Side-effect rows go into the request's own commit ("sync") or, once that
+# commit has succeeded, to the write-behind queue ("async")
+def add_side_effect(kind, model, **values):
+    if write_behind_config["durability"][kind] == "async":
+        db.session.info.setdefault("write_behind", []).append((model.__table__, values))
+    else:
+        db.session.add(model(**values))
+
+def commit_unit_of_work():
+    db.session.commit()
+    for table, values in db.session.info.pop("write_behind", []):
+        write_behind.put(table, values)
+
+# 📥 Validate one /predict payload and compute its features against history/counters.
+# Returns (data, timestamp, None) when it needs scoring, or (None, None, (body, status)) otherwise.
+# Nothing is logged here: callers log once scoring has succeeded.
+def prepare_prediction(data, history=txn_history, counters=velocity):
+    # ✅ Fallback for missing device_lat/lon
+    if data is None:
+        data = {}
+    if "device_lat" not in data or "device_lon" not in data:
+        data["device_lat"] = 19.076
+        data["device_lon"] = 72.8777
+        print("⚠️ Fallback device location used: Mumbai")
+
+    if "transaction_type" not in data and "channel" in data:
+        data["transaction_type"] = data["channel"]
+
+    data = apply_rbi_rules(data)
+    if data["rbi_violation"]:
+        return None, None, (rbi_block_response(data["violation_reason"]), 200)
+
+    for field in OPTIONAL_FIELDS:
+        data[field] = data.get(field, "")
+
+    missing = [f for f in config["required_user_inputs"] if f not in data]
+    if missing:
+        return None, None, ({"error": f"Missing fields: {missing}"}, 400)
+
+    timestamp = get_timestamp()
+    for coord in ["sender_lat", "sender_lon"]:
+        data[coord] = data.get("device_" + coord.split("_")[1], 0.0)
+    engineer_features(data, timestamp, history, counters)
+    return data, timestamp, None
 
 @app.route("/predict", methods=["POST"])
 def predict():
     try:
         data = request.json
-
-        # ✅ Fallback for missing device_lat/lon
-        if data is None:
-            data = {}
-        if "device_lat" not in data or "device_lon" not in data:
-            data["device_lat"] = 19.076
-            data["device_lon"] = 72.8777
-            print("⚠️ Fallback device location used: Mumbai")
-
-        test_mode = data.get("test_mode", False)
-
         print("📥 Incoming JSON:", data)
-        if "transaction_type" not in data and "channel" in data:
-            data["transaction_type"] = data["channel"]
-
-        def apply_rbi_rules(data):
-            txn_type = data.get("transaction_type")
-            amount = data.get("amount", 0)
-            if txn_type == "RTGS" and amount < 200000:
-                data["rbi_violation"] = True
-                data["violation_reason"] = "RTGS below ₹2 lakh"
-            elif txn_type == "IMPS" and amount > 500000:
-                data["rbi_violation"] = True
-                data["violation_reason"] = "IMPS above ₹5 lakh"
-            elif txn_type == "UPI" and amount > 100000:
-                data["rbi_violation"] = True
-                data["violation_reason"] = "UPI above ₹1 lakh"
-            else:
-                data["rbi_violation"] = False
-                data["violation_reason"] = ""
-            return data
 
-        data = apply_rbi_rules(data)
+        data, timestamp, early = prepare_prediction(data)
+        if early is not None:
+            body, status = early
+            return jsonify(body), status
 
-        if data["rbi_violation"]:
-            return jsonify({
-                "rf_prediction": 1,
-                "anomaly_score": 0.0,
-                "risk_score": 100.0,
-                "risk_level": "❌ High Risk",
-                "final_decision": "🚫 Block & Review",
-                "violation_reason": data["violation_reason"]
-            }), 200
-
-        optional_fields = [
-            "beneficiary_name",
-            "beneficiary_branch",
-            "beneficiary_bank_name",
-            "sender_name",
-            "sender_address"
-        ]
-        for field in optional_fields:
-            data[field] = data.get(field, "")
+        result = score_one(data)
+        if not data.get("test_mode", False):
+            log_transaction(data, timestamp)
+        return jsonify(result)
 
-        required_fields = config["required_user_inputs"]
-        missing = [f for f in required_fields if f not in data]
-        if missing:
-            return jsonify({"error": f"Missing fields: {missing}"}), 400
-
-        timestamp = get_timestamp()
-        data["timestamp"] = timestamp.isoformat()
-        data["hour"] = get_hour(timestamp)
-
-        for coord in ["sender_lat", "sender_lon"]:
-            data[coord] = data.get("device_" + coord.split("_")[1], 0.0)
-
-        data["time_diff_mins"] = get_time_diff_mins(
-            data["sender_account"], data["beneficiary_account"], txn_df, timestamp)
-        data["time_since_last_txn"] = get_time_since_last_txn(
-            data["sender_account"], txn_df, timestamp)
-
-        data["merchant_category"], data["device_type"], data["merchant_lat"], data["merchant_lon"] = infer_metadata(data["beneficiary_account"])
-        data["beneficiary_lat"], data["beneficiary_lon"] = infer_metadata(data["beneficiary_account"])[2], infer_metadata(data["beneficiary_account"])[3]
-
-        coord_m = (data["merchant_lat"], data["merchant_lon"])
-        coord_b = (data["beneficiary_lat"], data["beneficiary_lon"])
-        data["distance_km"] = get_geo_distance(coord_m, coord_b)
-
-        merchant_coords = (data["merchant_lat"], data["merchant_lon"])
-        device_coords = (data["device_lat"], data["device_lon"])
-        data["distance_km_md"] = get_geo_distance(merchant_coords, device_coords)
-        data["geo_distance_km"] = get_geo_distance((data["sender_lat"], data["sender_lon"]), (data["device_lat"], data["device_lon"]))
-        data["geo_anomaly"] = data["geo_distance_km"] > 200
-        data["is_new_beneficiary"] = is_new_beneficiary(data["sender_account"], data["beneficiary_account"], txn_df)
-
-        for cat_col in config["features"]["categorical"]:
-            data[cat_col] = data.get(cat_col, "Unknown")
-
-        df = pd.DataFrame([data])
-
-        for col in config["features"]["categorical"]:
-            le = label_encoders[col]
-            value = df[col].iloc[0]
-            if value not in le.classes_:
-                if "Unknown" not in le.classes_:
-                    le.classes_ = np.append(le.classes_, "Unknown")
-                value = "Unknown"
-            df[col + config["encoding_suffix"]] = le.transform([value])
-
-        feature_cols = (
-            config["features"]["numerical"] +
-            [col + config["encoding_suffix"] for col in config["features"]["categorical"]]
-        )
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
 
-        missing_features = [f for f in feature_cols if f not in df.columns]
-        if missing_features:
-            return jsonify({"error": f"Missing features in DataFrame: {missing_features}"}), 500
-
-        X = pd.DataFrame([df[feature_cols].iloc[0].values], columns=feature_cols)
-        X_rf_scaled = rf_scaler.transform(X)
-        rf_pred = int(rf_model.predict(X_rf_scaled)[0])
-
-        X_iso_scaled = iso_scaler.transform(X)
-        anomaly_score = iso_model.decision_function(X_iso_scaled)[0]
-        risk_score = float(iso_risk_scaler.transform([[-anomaly_score]])[0][0])
-        risk_level = assign_risk(risk_score, config)
-        is_repeat = is_rapid_repeat(
-            data.get("sender_account", ""),
-            data.get("beneficiary_account", ""),
-            txn_df
-        )
-        data["is_rapid_repeat"] = is_repeat
-
-        decision = final_decision(
-            rf_pred,
-            risk_level,
-            geo_anomaly=data.get("geo_anomaly", False),
-            rapid_repeat=is_repeat,
-            amount=data.get("amount", 0),
-            risk_score=risk_score
-        )
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    try:
+        items = request.json
+        if isinstance(items, dict):
+            items = items.get("transactions")
+        if not isinstance(items, list):
+            return jsonify({"error": "Expected a JSON array of transactions"}), 400
+        max_size = config["batch"]["max_size"]
+        if len(items) > max_size:
+            return jsonify({"error": f"Batch of {len(items)} exceeds max_size {max_size}"}), 400
+
+        results = [None] * len(items)
+        to_score = []
+        # Items prepared so far, seen by the later ones as a sequence of single
+        # /predict calls would see them; logged only once the batch is scored
+        history, counters = PendingHistory(txn_history), PendingVelocity(velocity)
+        for i, item in enumerate(items):
+            if item is not None and not isinstance(item, dict):
+                results[i] = {"error": "Transaction must be a JSON object", "status": 400}
+                continue
+            try:
+                data, timestamp, early = prepare_prediction(item, history, counters)
+            except Exception as e:
+                traceback.print_exc()
+                results[i] = {"error": str(e), "status": 500}
+                continue
+            if early is not None:
+                body, status = early
+                results[i] = dict(body, status=status)
+            else:
+                to_score.append((i, data, timestamp))
+                if not data.get("test_mode", False):
+                    add_to_history(data, timestamp, history, counters)
 
-        if not test_mode:
-            txn_log_row = {
-                "sender_account": data["sender_account"],
-                "beneficiary_account": data["beneficiary_account"],
-                "timestamp": data["timestamp"],
-                "beneficiary_name": data["beneficiary_name"],
-                "beneficiary_branch": data["beneficiary_branch"],
-                "beneficiary_bank_name": data["beneficiary_bank_name"],
-                "sender_name": data["sender_name"]
-            }
-            txn_df.loc[len(txn_df)] = txn_log_row
-            os.makedirs(os.path.dirname(txn_log_path), exist_ok=True)
-            txn_df.to_csv(txn_log_path, index=False)
-
-        if data["amount"] >= 5000000:
-            decision = "🔍 Send to Admin"
-            risk_level = "⚠️ Medium Risk" if risk_score < config["decision_logic"]["block_threshold"] else "❌ High Risk"
+        if to_score:
+            scored = score_batch([data for _, data, _ in to_score])
+            for (i, data, timestamp), result in zip(to_score, scored):
+                results[i] = dict(result, status=200)
+                if not data.get("test_mode", False):
+                    log_transaction(data, timestamp)
 
-        return jsonify({
-            "rf_prediction": rf_pred,
-            "anomaly_score": round(anomaly_score, 3),
-            "risk_score": round(risk_score, 2),
-            "risk_level": risk_level,
-            "final_decision": decision
-        })
+        return jsonify({"results": results})
 
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+@app.route("/metrics/batcher", methods=["GET"])
+def batcher_metrics():
+    if batcher is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(batcher.stats(), enabled=True))
+
+@app.route("/metrics/memory", methods=["GET"])
+def memory_metrics():
+    report = memory_report([model_registry.root, os.path.dirname(data_paths["merchant_table"])])
+    report["mmap_artifacts"] = bool(mmap_mode)
+    report["sklearn_loaded"] = model_loader.bundle.rf_model is not None
+    return jsonify(report)
+
+@app.route("/metrics/write-behind", methods=["GET"])
+def write_behind_metrics():
+    return jsonify(write_behind.stats())
+
+@app.route("/metrics/history", methods=["GET"])
+def history_metrics():
+    return jsonify(txn_history.stats())
+
+@app.route("/admin/models", methods=["GET"])
+def model_status():
+    return jsonify(model_loader.status())
+
+@app.route("/admin/models/activate", methods=["POST"])
+def activate_model():
+    version = (request.get_json(silent=True) or {}).get("version")
+    if not version:
+        return jsonify({"error": "version is required"}), 400
+    try:
+        return jsonify(model_loader.activate(version))
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e), "active": model_loader.bundle.version}), 409
+
+@app.route("/admin/models/rollback", methods=["POST"])
+def rollback_model():
+    try:
+        return jsonify(model_loader.rollback())
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e), "active": model_loader.bundle.version}), 409
+
 @app.route('/api/transactions', methods=['POST'])
 def create_transaction():
     data = request.get_json()
@@ -339,15 +446,18 @@ def create_transaction():
         txn.details = details
         txn.risk_score = fraud_response['risk_score']
         txn.status = status
+        txn.created_at = datetime.utcnow()
         db.session.add(txn)
-        db.session.commit()
+        record_transaction(db.session, txn)
         
         # Create notification for user
-        notification = Notification()
-        notification.user_id = user_id
-        notification.message = f"Transaction {status}. Risk Score: {fraud_response['risk_score']:.2f}"
-        db.session.add(notification)
-        db.session.commit()
+        add_side_effect(
+            "notifications", Notification,
+            user_id=user_id,
+            message=f"Transaction {status}. Risk Score: {fraud_response['risk_score']:.2f}",
+            created_at=datetime.utcnow()
+        )
+        commit_unit_of_work()
         
         return jsonify({
             'id': txn.id,
@@ -363,127 +473,30 @@ def create_transaction():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# Newest first; streamed whole, or one page with ?limit= (see list_transactions)
 @app.route('/api/transactions', methods=['GET'])
 def get_user_transactions():
     user_id = request.args.get('user_id')
     if not user_id:
         return jsonify({'error': 'user_id required'}), 400
-    txns = Transaction.query.filter_by(user_id=user_id).order_by(Transaction.created_at.desc()).all()
-    return jsonify([
-        {
-            'id': txn.id,
-            'amount': str(txn.amount),
-            'status': txn.status,
-            'risk_score': txn.risk_score,
-            'details': txn.details,
-            'created_at': txn.created_at.isoformat()
-        } for txn in txns
-    ])
+    return list_transactions(
+        user_id=user_id, default_fields=('id', 'amount', 'status', 'risk_score', 'created_at')
+    )
 
 def predict_fraud(data):
     """Internal function to run fraud detection"""
     try:
         # Apply RBI rules
-        def apply_rbi_rules(data):
-            txn_type = data.get("channel")
-            amount = data.get("amount", 0)
-            if txn_type == "RTGS" and amount < 200000:
-                data["rbi_violation"] = True
-                data["violation_reason"] = "RTGS below ₹2 lakh"
-            elif txn_type == "IMPS" and amount > 500000:
-                data["rbi_violation"] = True
-                data["violation_reason"] = "IMPS above ₹5 lakh"
-            elif txn_type == "UPI" and amount > 100000:
-                data["rbi_violation"] = True
-                data["violation_reason"] = "UPI above ₹1 lakh"
-            else:
-                data["rbi_violation"] = False
-                data["violation_reason"] = ""
-            return data
-
-        data = apply_rbi_rules(data)
-
+        data = apply_rbi_rules(data, type_field="channel")
         if data["rbi_violation"]:
-            return {
-                "rf_prediction": 1,
-                "anomaly_score": 0.0,
-                "risk_score": 100.0,
-                "risk_level": "❌ High Risk",
-                "final_decision": "🚫 Block & Review",
-                "violation_reason": data["violation_reason"]
-            }
+            return rbi_block_response(data["violation_reason"])
 
         # Feature engineering
-        timestamp = get_timestamp()
-        data["timestamp"] = timestamp.isoformat()
-        data["hour"] = get_hour(timestamp)
         data["transaction_type"] = data.get("channel", "NEFT")
-
-        # Add missing fields
-        optional_fields = ["beneficiary_name", "beneficiary_branch", "beneficiary_bank_name", "sender_name", "sender_address"]
-        for field in optional_fields:
+        for field in OPTIONAL_FIELDS:
             data[field] = data.get(field, "")
-
-        # Feature engineering
-        data["time_diff_mins"] = get_time_diff_mins(data["sender_account"], data["beneficiary_account"], txn_df, timestamp)
-        data["time_since_last_txn"] = get_time_since_last_txn(data["sender_account"], txn_df, timestamp)
-        data["merchant_category"], data["device_type"], data["merchant_lat"], data["merchant_lon"] = infer_metadata(data["beneficiary_account"])
-        data["beneficiary_lat"], data["beneficiary_lon"] = infer_metadata(data["beneficiary_account"])[2], infer_metadata(data["beneficiary_account"])[3]
-        
-        # Distance calculations
-        coord_m = (data["merchant_lat"], data["merchant_lon"])
-        coord_b = (data["beneficiary_lat"], data["beneficiary_lon"])
-        data["distance_km"] = get_geo_distance(coord_m, coord_b)
-        merchant_coords = (data["merchant_lat"], data["merchant_lon"])
-        device_coords = (data["device_lat"], data["device_lon"])
-        data["distance_km_md"] = get_geo_distance(merchant_coords, device_coords)
-        data["geo_distance_km"] = get_geo_distance((data.get("sender_lat", 0), data.get("sender_lon", 0)), (data["device_lat"], data["device_lon"]))
-        data["geo_anomaly"] = data["geo_distance_km"] > 200
-        data["is_new_beneficiary"] = is_new_beneficiary(data["sender_account"], data["beneficiary_account"], txn_df)
-
-        # Prepare features for ML models
-        for cat_col in config["features"]["categorical"]:
-            data[cat_col] = data.get(cat_col, "Unknown")
-
-        df = pd.DataFrame([data])
-
-        for col in config["features"]["categorical"]:
-            le = label_encoders[col]
-            value = df[col].iloc[0]
-            if value not in le.classes_:
-                if "Unknown" not in le.classes_:
-                    le.classes_ = np.append(le.classes_, "Unknown")
-                value = "Unknown"
-            df[col + config["encoding_suffix"]] = le.transform([value])
-
-        feature_cols = (
-            config["features"]["numerical"] +
-            [col + config["encoding_suffix"] for col in config["features"]["categorical"]]
-        )
-
-        X = pd.DataFrame([df[feature_cols].iloc[0].values], columns=feature_cols)
-        X_rf_scaled = rf_scaler.transform(X)
-        rf_pred = int(rf_model.predict(X_rf_scaled)[0])
-
-        X_iso_scaled = iso_scaler.transform(X)
-        anomaly_score = iso_model.decision_function(X_iso_scaled)[0]
-        risk_score = float(iso_risk_scaler.transform([[-anomaly_score]])[0][0])
-        risk_level = assign_risk(risk_score, config)
-        
-        is_repeat = is_rapid_repeat(data.get("sender_account", ""), data.get("beneficiary_account", ""), txn_df)
-        decision = final_decision(rf_pred, risk_level, geo_anomaly=data.get("geo_anomaly", False), rapid_repeat=is_repeat, amount=data.get("amount", 0), risk_score=risk_score)
-
-        if data["amount"] >= 5000000:
-            decision = "🔍 Send to Admin"
-            risk_level = "⚠️ Medium Risk" if risk_score < config["decision_logic"]["block_threshold"] else "❌ High Risk"
-
-        return {
-            "rf_prediction": rf_pred,
-            "anomaly_score": round(anomaly_score, 3),
-            "risk_score": round(risk_score, 2),
-            "risk_level": risk_level,
-            "final_decision": decision
-        }
+        engineer_features(data, get_timestamp())
+        return score_one(data)
 
     except Exception as e:
         traceback.print_exc()
@@ -605,29 +618,98 @@ def verify_otp():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-# Get pending admin reviews
+# 📄 ?limit= for the paginated list endpoints
+def page_limit():
+    listings_config = config["listings"]
+    limit = request.args.get('limit', listings_config["default_limit"])
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError(f"limit must be an integer, got {limit!r}")
+    return max(1, min(limit, listings_config["max_limit"]))
+
+def float_arg(name):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {value!r}")
+
+# 📜 Transaction listings, newest first.
+#    ?fields=a,b    columns to send; details is only sent when asked for
+#    ?format=ndjson one object per line instead of a JSON array
+#    ?limit=&cursor= one keyset page, next cursor in X-Next-Cursor;
+#                   without ?limit every row is streamed a chunk at a time,
+#                   so memory stays flat however many rows there are
+def list_transactions(user_id, default_fields):
+    try:
+        fields = parse_fields(request.args.get('fields'), TRANSACTION_FIELDS, default_fields)
+        fmt = request.args.get('format', 'json')
+        if fmt not in ('json', 'ndjson'):
+            raise ValueError(f"format must be json or ndjson, got {fmt!r}")
+        query, cursor = transactions_query(fields, user_id), request.args.get('cursor')
+        headers = {}
+        if 'limit' in request.args:
+            rows, next_cursor = keyset_page(db.session, query, Transaction.created_at, Transaction.id,
+                                            cursor, page_limit(), descending=True)
+            chunks = [rows]
+            if next_cursor:
+                headers['X-Next-Cursor'] = next_cursor
+        else:
+            chunks = keyset_stream(db.session, query, Transaction.created_at, Transaction.id, cursor,
+                                   descending=True, chunk_rows=config["listings"]["stream_chunk_rows"])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except SQLAlchemyError as e:
+        return jsonify({'error': str(e)}), 500
+
+    def generate():
+        sep = '\n' if fmt == 'ndjson' else ','
+        first = True
+        if fmt == 'json':
+            yield '['
+        for rows in chunks:
+            if not rows:
+                continue
+            body = sep.join(app.json.dumps(transaction_json(row, fields)) for row in rows)
+            yield body + '\n' if fmt == 'ndjson' else (body if first else ',' + body)
+            first = False
+        if fmt == 'json':
+            yield ']'
+
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers=headers)
+
+# Get pending admin reviews, oldest first, one page at a time.
+# The body stays a plain list; the cursor for the next page is in X-Next-Cursor.
 @app.route('/api/admin/pending-reviews', methods=['GET'])
 def get_pending_reviews():
     try:
-        pending_transactions = Transaction.query.filter_by(status='pending_admin_review').all()
-        
-        reviews = []
-        for txn in pending_transactions:
-            user = User.query.get(txn.user_id)
-            reviews.append({
-                'id': txn.id,
-                'user_name': user.name if user else 'Unknown',
-                'user_phone': user.phone if user else 'Unknown',
-                'amount': str(txn.amount),
-                'details': txn.details,
-                'risk_score': txn.risk_score,
-                'created_at': txn.created_at.isoformat()
-            })
-        
-        return jsonify(reviews), 200
+        limit = page_limit()
+        filters = {name: float_arg(name) for name in ('min_risk', 'max_risk', 'min_amount', 'max_amount')}
+        rows, next_cursor = pending_reviews(db.session, request.args.get('cursor'), limit, **filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except SQLAlchemyError as e:
         return jsonify({'error': str(e)}), 500
 
+    response = jsonify([
+        {
+            'id': row.id,
+            'user_name': row.user_name if row.user_found is not None else 'Unknown',
+            'user_phone': row.user_phone if row.user_found is not None else 'Unknown',
+            'amount': str(row.amount),
+            'details': row.details,
+            'risk_score': row.risk_score,
+            'created_at': row.created_at.isoformat()
+        } for row in rows
+    ])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
+
 # Admin review action
 @app.route('/api/admin/review', methods=['POST'])
 def admin_review():
@@ -646,25 +728,29 @@ def admin_review():
             return jsonify({'error': 'Transaction not found'}), 404
         
         # Update transaction status
+        old_status = transaction.status
         transaction.status = action
+        record_status_change(db.session, transaction, old_status)
         
         # Create admin action record
-        admin_action = AdminAction(
+        add_side_effect(
+            "audit", AdminAction,
             admin_id=admin_id,
             transaction_id=transaction_id,
             action=action,
-            note=note
+            note=note,
+            timestamp=datetime.utcnow()
         )
-        db.session.add(admin_action)
         
         # Create notification for user
-        notification = Notification(
+        add_side_effect(
+            "notifications", Notification,
             user_id=transaction.user_id,
-            message=f"Your transaction has been {action}. {note}"
+            message=f"Your transaction has been {action}. {note}",
+            created_at=datetime.utcnow()
         )
-        db.session.add(notification)
         
-        db.session.commit()
+        commit_unit_of_work()
         
         return jsonify({
             'message': f'Transaction {action} successfully',
@@ -692,43 +778,24 @@ def get_notifications(user_id):
 # Get all transactions (for admin analytics)
 @app.route('/api/all-transactions', methods=['GET'])
 def get_all_transactions():
-    try:
-        transactions = Transaction.query.order_by(Transaction.created_at.desc()).all()
-        return jsonify([
-            {
-                'id': txn.id,
-                'user_id': txn.user_id,
-                'amount': str(txn.amount),
-                'status': txn.status,
-                'risk_score': txn.risk_score,
-                'details': txn.details,
-                'created_at': txn.created_at.isoformat()
-            } for txn in transactions
-        ]), 200
-    except SQLAlchemyError as e:
-        return jsonify({'error': str(e)}), 500
+    return list_transactions(
+        user_id=None, default_fields=('id', 'user_id', 'amount', 'status', 'risk_score', 'created_at')
+    )
 
 # === ADMIN ANALYTICS ENDPOINTS ===
 @app.route('/api/admin/analytics/time-trends', methods=['GET'])
 def analytics_time_trends():
-    # Returns daily risk score averages and counts
-    results = db.session.query(
-        func.date(Transaction.created_at).label('date'),
-        func.avg(Transaction.risk_score).label('avg_risk_score'),
-        func.count(Transaction.id).label('txn_count')
-    ).group_by(func.date(Transaction.created_at)).order_by('date').all()
+    # Returns daily risk score averages and counts, from the daily rollup
+    results = time_trends(db.session)
     return jsonify([
-        {'date': str(r.date), 'avg_risk_score': float(r.avg_risk_score or 0), 'txn_count': r.txn_count}
+        {'date': str(r.day), 'avg_risk_score': float(r.avg_risk_score or 0), 'txn_count': r.txn_count}
         for r in results
     ])
 
 @app.route('/api/admin/analytics/top-risky-users', methods=['GET'])
 def analytics_top_risky_users():
-    # Returns users with most high-risk transactions
-    high_risk = db.session.query(
-        Transaction.user_id,
-        func.count(Transaction.id).label('high_risk_count')
-    ).filter(Transaction.risk_score >= 80).group_by(Transaction.user_id).order_by(desc('high_risk_count')).limit(10).all()
+    # Returns users with most high-risk transactions, from the per-user rollup
+    high_risk = top_risky_users(db.session)
     users = {u.id: u for u in User.query.filter(User.id.in_([r.user_id for r in high_risk])).all()}
     return jsonify([
         {'user_id': r.user_id, 'user_name': users.get(r.user_id).name if users.get(r.user_id) else 'Unknown', 'high_risk_count': r.high_risk_count}
@@ -738,11 +805,7 @@ def analytics_top_risky_users():
 @app.route('/api/admin/analytics/top-risky-beneficiaries', methods=['GET'])
 def analytics_top_risky_beneficiaries():
     # Returns beneficiaries with most high-risk transactions
-    txns = Transaction.query.filter(Transaction.risk_score >= 80).all()
-    from collections import Counter
-    beneficiaries = [t.details.get('beneficiary_account', 'Unknown') for t in txns if t.details]
-    counter = Counter(beneficiaries)
-    top = counter.most_common(10)
+    top = top_risky_beneficiaries(db.session)
     return jsonify([
         {'beneficiary_account': b, 'high_risk_count': c}
         for b, c in top
@@ -797,7 +860,7 @@ def index():
 # CLI command to initialize the database
 def create_db():
     with app.app_context():
-        db.create_all()
+        migrations.upgrade(db.engine)
         print('Database tables created.')
 
 if __name__ == '__main__':
@@ -1,3 +1,29 @@
+# backend_flask/decision_logic.py
+#
+# The rules that turn model outputs into a risk level and a decision, in
+# two forms: scalar functions for one transaction, and array versions
+# (decide_many) for batches and offline scoring.  The array versions
+# return int8 codes indexing RISK_LEVELS / DECISIONS and must agree with
+# decide_one element for element; tests/test_decision_logic.py checks it.
+import numpy as np
+
+RISK_LEVELS = ["✅ Low Risk", "⚠️ Medium Risk", "❌ High Risk"]
+LOW, MEDIUM, HIGH = range(3)
+DECISIONS = ["✅ Auto-approved", "🔍 Send to Admin", "🚫 Block & Review"]
+APPROVE, ADMIN, BLOCK = range(3)
+
+# 🏦 RBI channel limits: channel -> (reason, amount is out of bounds)
+RBI_LIMITS = {
+    "RTGS": ("RTGS below ₹2 lakh", lambda amount: amount < 200000),
+    "IMPS": ("IMPS above ₹5 lakh", lambda amount: amount > 500000),
+    "UPI": ("UPI above ₹1 lakh", lambda amount: amount > 100000),
+}
+RBI_REASONS = [""] + [reason for reason, _ in RBI_LIMITS.values()]
+
+GEO_ANOMALY_KM = 200           # sender to device distance that counts as a geo anomaly
+ADMIN_OVERRIDE_AMOUNT = 5000000  # ≥ ₹50 lakh always goes to a human
+
+
 # 🧠 Final Decision Logic
 def final_decision(rf_pred, risk_level, geo_anomaly=False, rapid_repeat=False, amount=0, risk_score=0.0):
     # 🔸 Special case: small amount but flagged as high risk
@@ -23,8 +49,7 @@ def final_decision(rf_pred, risk_level, geo_anomaly=False, rapid_repeat=False, a
         return "🔍 Send to Admin"
 
     return "✅ Auto-approved"
-  
-  # backend_flask/decision_logic.py
+
 
 def assign_risk(score, config):
     if score < config["decision_logic"]["review_threshold"]:
@@ -33,3 +58,83 @@ def assign_risk(score, config):
         return "⚠️ Medium Risk"
     else:
         return "❌ High Risk"
+
+
+def rbi_violation(channel, amount):
+    """Why ``amount`` breaks the RBI limit of ``channel``, or "" when it doesn't."""
+    if channel in RBI_LIMITS:
+        reason, breaks = RBI_LIMITS[channel]
+        if breaks(amount):
+            return reason
+    return ""
+
+
+def decide_one(rf_pred, risk_score, amount, config, geo_anomaly=False, rapid_repeat=False, channel=None):
+    """(risk_level, decision) for one transaction: RBI limits, the model rules, then the ₹50 lakh override."""
+    if channel is not None and rbi_violation(channel, amount):
+        return "❌ High Risk", "🚫 Block & Review"
+    risk_level = assign_risk(risk_score, config)
+    decision = final_decision(rf_pred, risk_level, geo_anomaly=geo_anomaly, rapid_repeat=rapid_repeat,
+                              amount=amount, risk_score=risk_score)
+    if amount >= ADMIN_OVERRIDE_AMOUNT:
+        decision = "🔍 Send to Admin"
+        risk_level = "⚠️ Medium Risk" if risk_score < config["decision_logic"]["block_threshold"] else "❌ High Risk"
+    return risk_level, decision
+
+
+# 📊 Array versions
+
+def assign_risk_many(risk_score, config):
+    thresholds = config["decision_logic"]
+    return np.select(
+        [risk_score < thresholds["review_threshold"], risk_score < thresholds["block_threshold"]],
+        [LOW, MEDIUM], default=HIGH,
+    ).astype("i1")
+
+
+def final_decision_many(rf_pred, risk_level, geo_anomaly, rapid_repeat, amount, risk_score):
+    high = risk_level == HIGH
+    fraud = rf_pred == 1
+    # Same order as final_decision: the first matching rule wins
+    return np.select(
+        [
+            high & (amount < 200) & (risk_score < 80),
+            (rf_pred == 0) & ~high & (amount < 1000),
+            high & (amount >= 200),
+            fraud & (geo_anomaly | rapid_repeat | (amount > 100000)),
+            fraud,
+            geo_anomaly & (amount > 100000),
+        ],
+        [ADMIN, APPROVE, BLOCK, BLOCK, ADMIN, ADMIN], default=APPROVE,
+    ).astype("i1")
+
+
+def rbi_violations(channel, amount):
+    """Index into RBI_REASONS per transaction; 0 where the limits hold."""
+    codes = np.zeros(len(amount), dtype="i1")
+    for code, (name, (_, breaks)) in enumerate(RBI_LIMITS.items(), start=1):
+        codes[(channel == name) & breaks(amount)] = code
+    return codes
+
+
+def decide_many(rf_pred, risk_score, amount, config, geo_anomaly=None, rapid_repeat=None, channel=None):
+    """Array decide_one: (risk_level, decision) int8 codes into RISK_LEVELS / DECISIONS."""
+    rf_pred = np.asarray(rf_pred)
+    risk_score = np.asarray(risk_score, dtype="f8")
+    amount = np.asarray(amount, dtype="f8")
+    no_flag = np.zeros(len(amount), dtype=bool)
+    geo_anomaly = no_flag if geo_anomaly is None else np.asarray(geo_anomaly, dtype=bool)
+    rapid_repeat = no_flag if rapid_repeat is None else np.asarray(rapid_repeat, dtype=bool)
+
+    risk_level = assign_risk_many(risk_score, config)
+    decision = final_decision_many(rf_pred, risk_level, geo_anomaly, rapid_repeat, amount, risk_score)
+
+    override = amount >= ADMIN_OVERRIDE_AMOUNT
+    decision[override] = ADMIN
+    risk_level[override] = np.where(risk_score[override] < config["decision_logic"]["block_threshold"], MEDIUM, HIGH)
+
+    if channel is not None:
+        rbi = rbi_violations(np.asarray(channel, dtype=str), amount) > 0
+        risk_level[rbi] = HIGH
+        decision[rbi] = BLOCK
+    return risk_level, decision
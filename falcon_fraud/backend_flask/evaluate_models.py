@@ -1,42 +1,46 @@
 import pandas as pd
 import numpy as np
 import joblib
+import os
 import yaml
 import matplotlib.pyplot as plt
 from sklearn.metrics import ConfusionMatrixDisplay, classification_report, accuracy_score
-from sklearn.preprocessing import MinMaxScaler
+from utils.dataset_cache import load_training_dataset
+from utils.model_registry import ModelRegistry
+
+# Config paths are relative to the project root
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
 # 📁 Load Config
-with open("config/features_config.yaml", "r") as f:
+with open(os.path.join(os.path.dirname(__file__), "config", "features_config.yaml"), "r") as f:
     config = yaml.safe_load(f)
 
-# 📦 Load Models + Scalers + Encoders
-rf_model = joblib.load(config["rf_fraud_model"])
-iso_model = joblib.load(config["iso_forest_model"])
-rf_scaler = joblib.load(config["scalers"]["rf_scaler"])
-iso_scaler = joblib.load(config["scalers"]["iso_scaler"])
-label_encoders = joblib.load(config["encoders_path"])
-iso_risk_scaler = joblib.load("models/iso_risk_scaler.pkl")
+# 📦 Load Models + Scalers + Encoders of the active registry version (loose model_paths until there is one)
+registry = ModelRegistry(os.path.join(ROOT_DIR, config["model_registry"]["root"]))
+if registry.current():
+    model_paths = registry.paths(registry.current())
+    print(f"📦 Evaluating model bundle {registry.current()}")
+else:
+    model_paths = {k: os.path.join(ROOT_DIR, v) for k, v in config["model_paths"].items()}
 
-# 📄 Load Dataset
-df = pd.read_csv("transactionsnew2.csv")
-df.fillna(0, inplace=True)
+rf_model = joblib.load(model_paths["rf"])
+iso_model = joblib.load(model_paths["iso"])
+rf_scaler = joblib.load(model_paths["rf_scaler"])
+iso_scaler = joblib.load(model_paths["iso_scaler"])
+label_encoders = joblib.load(model_paths["encoders"])
+iso_risk_scaler = joblib.load(model_paths["iso_risk_scaler"])
 
-# 🔁 Encode Categorical Columns
-for col in config["features"]["categorical"]:
-    le = label_encoders[col]
-    df[col] = df[col].astype(str)
-    df[col + config["encoding_suffix"]] = le.transform(
-        df[col].apply(lambda x: x if x in le.classes_ else "Unknown")
-    )
+# 📄 Load Dataset from the cache, encoded with the saved encoders (unseen -> "Unknown")
+cache_config = config["dataset_cache"]
+dataset = load_training_dataset(
+    os.path.join(ROOT_DIR, cache_config["source"]), os.path.join(ROOT_DIR, cache_config["dir"]),
+    config, label=cache_config["label"]
+)
 
 # 🎯 Feature Columns
-feature_cols = (
-    config["features"]["numerical"] +
-    [col + config["encoding_suffix"] for col in config["features"]["categorical"]]
-)
-X = df[feature_cols]
-y = df["is_fraud"]
+feature_cols = dataset.feature_cols
+X = dataset.features(label_encoders=label_encoders)
+y = pd.Series(dataset.y)
 
 # 🔢 Scale Features
 X_rf_scaled = rf_scaler.transform(X)
@@ -1,10 +1,16 @@
-import pandas as pd
+import os
+import yaml
+from utils.dataset_cache import load_training_dataset
 
-# 📄 Load your main transaction dataset
-df = pd.read_csv("transactionsnew2.csv")
+with open(os.path.join(os.path.dirname(__file__), "config", "features_config.yaml"), "r") as f:
+    config = yaml.safe_load(f)
+
+# 📄 Load your main transaction dataset (typed columns from the dataset cache)
+cache_config = config["dataset_cache"]
+dataset = load_training_dataset(cache_config["source"], cache_config["dir"], config, label=cache_config["label"])
 
 # ✅ Extract relevant columns
-merchant_df = df[["beneficiary_account", "merchant_name", "merchant_category", "device_type"]]
+merchant_df = dataset.frame(["beneficiary_account", "merchant_name", "merchant_category", "device_type"])
 
 # 🧹 Drop duplicates and missing
 merchant_df = merchant_df.dropna(subset=["beneficiary_account", "merchant_name"])
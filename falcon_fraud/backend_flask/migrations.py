@@ -0,0 +1,123 @@
+"""Idempotent schema upgrades for databases created by older versions.
+
+``db.create_all()`` only creates missing tables; it never touches a table
+that already exists, so columns and indexes added to models.py later would
+never reach an existing database.  ``upgrade`` creates missing tables, adds
+missing (nullable) columns and any declared index the database doesn't
+have yet, and then runs the data migrations that haven't run before.  It
+is safe to run on every start.
+
+A data migration fills new columns or derived tables from existing rows.
+Each one runs in a single transaction together with its row in
+``data_migrations``, so it either completes and is recorded or is rerun
+on the next start.  (DDL can't share that transaction: SQLite's Python
+driver commits ALTER TABLE on its own.)
+"""
+from datetime import datetime
+
+from sqlalchemy import bindparam, delete, func, insert, inspect, select, text
+
+from models import db, DataMigration, Transaction, TxnHistoryEntry, promoted_details
+from utils.analytics import rebuild_rollups
+from utils.txn_history import NO_BENEFICIARY
+
+BACKFILL_BATCH_ROWS = 5000
+
+
+def backfill_promoted_details(conn):
+    """Fill Transaction's promoted columns from details, in id order."""
+    table = Transaction.__table__
+    update = table.update().where(table.c.id == bindparam('_id'))
+    last_id, filled = 0, 0
+    while True:
+        rows = conn.execute(
+            select(table.c.id, table.c.details)
+            .where(table.c.id > last_id).order_by(table.c.id).limit(BACKFILL_BATCH_ROWS)
+        ).all()
+        if not rows:
+            return filled
+        updates = [{'_id': row.id, **promoted_details(row.details)} for row in rows if row.details]
+        if updates:
+            conn.execute(update, updates)
+        filled += len(updates)
+        last_id = rows[-1].id
+
+
+def txn_history_no_null_beneficiary(conn):
+    """Store missing beneficiaries as NO_BENEFICIARY, dropping the rows replays duplicated.
+
+    The unique (sender, beneficiary, ts) index never matched NULL beneficiaries,
+    so every replay inserted those rows again; keep the first of each.
+    """
+    table = TxnHistoryEntry.__table__
+    missing = table.c.beneficiary_account.is_(None) | (table.c.beneficiary_account == NO_BENEFICIARY)
+    # A derived table, so MySQL accepts the subquery on the table being deleted from
+    first = (
+        select(func.min(table.c.id).label('id'))
+        .where(missing).group_by(table.c.sender_account, table.c.ts).subquery()
+    )
+    conn.execute(delete(table).where(missing, table.c.id.notin_(select(first.c.id))))
+    return conn.execute(
+        table.update().where(table.c.beneficiary_account.is_(None)).values(beneficiary_account=NO_BENEFICIARY)
+    ).rowcount
+
+
+# In order; names are recorded in data_migrations, so never rename one
+DATA_MIGRATIONS = [
+    ('transactions_promoted_details', backfill_promoted_details),
+    ('analytics_rollups', rebuild_rollups),
+    ('txn_history_no_null_beneficiary', txn_history_no_null_beneficiary),
+]
+
+
+def add_missing_columns(engine, inspector):
+    added = []
+    quote = engine.dialect.identifier_preparer.quote
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable:
+                    raise RuntimeError(f"Can't add NOT NULL column {table.name}.{column.name} to an existing table")
+                conn.execute(text(
+                    f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} "
+                    f"{column.type.compile(engine.dialect)}"
+                ))
+                added.append(f"{table.name}.{column.name}")
+                print(f"🛠️ Added column {table.name}.{column.name}")
+    return added
+
+
+def run_data_migrations(engine):
+    applied = []
+    with engine.connect() as conn:
+        done = set(conn.execute(select(DataMigration.name)).scalars())
+    for name, migrate in DATA_MIGRATIONS:
+        if name in done:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(insert(DataMigration).values(name=name, applied_at=datetime.utcnow()))
+        applied.append(name)
+        print(f"🛠️ Ran data migration {name}")
+    return applied
+
+
+def upgrade(engine):
+    db.metadata.create_all(engine)
+    inspector = inspect(engine)
+    if add_missing_columns(engine, inspector):
+        inspector = inspect(engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(engine)
+                created.append(index.name)
+    for name in created:
+        print(f"🛠️ Created index {name}")
+    run_data_migrations(engine)
+    return created
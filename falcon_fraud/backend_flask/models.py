@@ -1,5 +1,6 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import validates
 
 db = SQLAlchemy()
 
@@ -23,6 +24,41 @@ class Transaction(db.Model):
     risk_score = db.Column(db.Float, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Copied out of details (see promoted_details) so SQL can filter and group on them
+    beneficiary_account = db.Column(db.String(64), nullable=True, index=True)
+    sender_account = db.Column(db.String(64), nullable=True, index=True)
+    channel = db.Column(db.String(20), nullable=True, index=True)
+    __table_args__ = (
+        # Keyset pagination of a status queue (admin pending reviews)
+        db.Index('ix_transactions_status_created_id', 'status', 'created_at', 'id'),
+        # Newest-first listings, all transactions and per user
+        db.Index('ix_transactions_created_id', 'created_at', 'id'),
+        db.Index('ix_transactions_user_created_id', 'user_id', 'created_at', 'id'),
+        # Covers the high-risk beneficiary aggregation
+        db.Index('ix_transactions_risk_beneficiary', 'risk_score', 'beneficiary_account'),
+    )
+
+    @validates('details')
+    def _promote_details(self, key, details):
+        for column, value in promoted_details(details).items():
+            setattr(self, column, value)
+        return details
+
+# details keys promoted to Transaction columns; the first key present wins
+PROMOTED_DETAILS = {
+    'beneficiary_account': ('beneficiaryAccount', 'beneficiary_account'),
+    'sender_account': ('senderAccount', 'sender_account'),
+    'channel': ('channel',),
+}
+
+def promoted_details(details):
+    values = {}
+    for column, keys in PROMOTED_DETAILS.items():
+        value = None
+        if isinstance(details, dict):
+            value = next((details[k] for k in keys if details.get(k) is not None), None)
+        values[column] = None if value is None else str(value)
+    return values
 
 class AdminAction(db.Model):
     __tablename__ = 'admin_actions'
@@ -32,6 +68,10 @@ class AdminAction(db.Model):
     action = db.Column(db.String(20), nullable=False)  # 'approved', 'rejected', 'note'
     note = db.Column(db.Text, nullable=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        # Audit log, newest first
+        db.Index('ix_admin_actions_timestamp', 'timestamp'),
+    )
 
 class Notification(db.Model):
     __tablename__ = 'notifications'
@@ -40,6 +80,10 @@ class Notification(db.Model):
     message = db.Column(db.Text, nullable=False)
     read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        # A user's latest notifications
+        db.Index('ix_notifications_user_created', 'user_id', 'created_at'),
+    )
 
 class OTPSession(db.Model):
     __tablename__ = 'otp_sessions'
@@ -47,4 +91,49 @@ class OTPSession(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     otp = db.Column(db.String(10), nullable=False)
     expires_at = db.Column(db.DateTime, nullable=False)
-    used = db.Column(db.Boolean, default=False) 
\ No newline at end of file
+    used = db.Column(db.Boolean, default=False)
+    __table_args__ = (
+        # OTP verification: equality on the first three, range on expires_at
+        db.Index('ix_otp_sessions_lookup', 'user_id', 'otp', 'used', 'expires_at'),
+    )
+
+# Shared transaction history behind utils.sql_history.SqlTxnHistory
+class TxnHistoryEntry(db.Model):
+    __tablename__ = 'txn_history'
+    id = db.Column(db.Integer, primary_key=True)
+    sender_account = db.Column(db.String(64), nullable=False)
+    beneficiary_account = db.Column(db.String(64), nullable=False)  # NO_BENEFICIARY ('') if missing
+    ts = db.Column(db.BigInteger, nullable=False)  # µs since the epoch, NO_TIME if unparseable
+    __table_args__ = (
+        db.Index('ix_txn_history_sender_ts', 'sender_account', 'ts'),
+        # Unique so replaying a txn log segment twice is a no-op
+        db.Index('ux_txn_history_pair_ts', 'sender_account', 'beneficiary_account', 'ts', unique=True),
+    )
+
+class TxnHistorySource(db.Model):
+    __tablename__ = 'txn_history_sources'
+    source = db.Column(db.String(255), primary_key=True)
+    loaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Data migrations (backfills, seeds) that migrations.upgrade has finished
+class DataMigration(db.Model):
+    __tablename__ = 'data_migrations'
+    name = db.Column(db.String(100), primary_key=True)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Admin analytics rollups, kept current by utils.analytics as transactions are written
+class DailyStatusRollup(db.Model):
+    __tablename__ = 'rollup_daily_status'
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    txn_count = db.Column(db.Integer, nullable=False, default=0)
+    risk_score_sum = db.Column(db.Float, nullable=False, default=0)
+    risk_score_count = db.Column(db.Integer, nullable=False, default=0)  # rows that have a risk score
+
+class UserRiskRollup(db.Model):
+    __tablename__ = 'rollup_user_high_risk'
+    user_id = db.Column(db.Integer, primary_key=True)
+    high_risk_count = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (
+        db.Index('ix_rollup_user_high_risk_count', 'high_risk_count', 'user_id'),
+    )
@@ -0,0 +1,40 @@
+# tests/conftest.py
+
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+import yaml
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "config", "features_config.yaml")
+with open(CONFIG_PATH) as f:
+    CONFIG = yaml.safe_load(f)
+FEATURES = CONFIG["features"]
+
+
+@pytest.fixture(scope="session")
+def config():
+    """features_config.yaml, shared by the whole session; copy it before changing anything."""
+    return CONFIG
+
+
+@pytest.fixture(scope="session")
+def make_transactions():
+    """Factory for synthetic training rows of the configured features.
+
+    Numericals are standard normal, categoricals are drawn from
+    ``categories`` (one list for every column or a {column: list} dict) and
+    is_fraud is amount > 1.2 plus 3% noise.  Pass ``rng`` to go on drawing
+    extra columns from the same generator.
+    """
+    def make(n, seed=0, categories=("A", "B", "C"), rng=None):
+        rng = np.random.default_rng(seed) if rng is None else rng
+        df = pd.DataFrame({col: rng.normal(size=n).round(3) for col in FEATURES["numerical"]})
+        for col in FEATURES["categorical"]:
+            choices = categories[col] if isinstance(categories, dict) else categories
+            df[col] = rng.choice(list(choices), size=n)
+        df["is_fraud"] = ((df["amount"] > 1.2) | (rng.random(n) < 0.03)).astype(int)
+        return df
+    return make
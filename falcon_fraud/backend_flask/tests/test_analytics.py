@@ -0,0 +1,197 @@
+# tests/test_analytics.py
+
+import json
+import random
+import pytest
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, desc, event, func, inspect, text
+from sqlalchemy.orm import Session
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import migrations
+from models import db, Transaction
+from utils.analytics import (
+    top_risky_beneficiaries, time_trends, top_risky_users, record_transaction, record_status_change,
+    rebuild_rollups,
+)
+
+PROMOTED = ("beneficiary_account", "sender_account", "channel")
+
+
+def random_details(rng, i):
+    details = {"senderAccount": f"S{rng.randint(1, 9)}", "channel": rng.choice(["NEFT", "UPI", "IMPS"])}
+    if i % 11:
+        # Few accounts so there are ties on the count
+        details["beneficiaryAccount"] = f"B{rng.randint(1, 15)}"
+    return details
+
+
+def old_schema_db(tmp_path, n=400, seed=9):
+    """A database as the previous release left it: no promoted columns."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for index in Transaction.__table__.indexes:
+            if set(index.columns.keys()) & set(PROMOTED):
+                conn.execute(text(f"DROP INDEX {index.name}"))
+        for column in PROMOTED:
+            conn.execute(text(f"ALTER TABLE transactions DROP COLUMN {column}"))
+        rng = random.Random(seed)
+        conn.execute(text(
+            "INSERT INTO transactions (user_id, amount, details, status, risk_score, created_at) "
+            "VALUES (:user_id, :amount, :details, 'approved', :risk_score, :created_at)"
+        ), [
+            {"user_id": rng.randint(1, 20), "amount": 100, "details": json.dumps(random_details(rng, i)),
+             "risk_score": rng.uniform(0, 100), "created_at": f"2025-07-0{1 + i % 5} 10:00:00.000000"}
+            for i in range(n)
+        ])
+    return engine
+
+
+def counter_top(engine):
+    with Session(engine) as session:
+        txns = session.query(Transaction).filter(Transaction.risk_score >= 80).order_by(Transaction.id).all()
+    return Counter(t.details.get("beneficiaryAccount", "Unknown") for t in txns if t.details).most_common(10)
+
+
+def test_upgrade_backfills_and_group_by_matches_counter(tmp_path):
+    engine = old_schema_db(tmp_path)
+    migrations.upgrade(engine)
+    assert set(PROMOTED) <= {c["name"] for c in inspect(engine).get_columns("transactions")}
+    with Session(engine) as session:
+        txns = session.query(Transaction).all()
+        top = [tuple(r) for r in top_risky_beneficiaries(session)]
+    for t in txns:
+        assert (t.beneficiary_account, t.sender_account, t.channel) == (
+            t.details.get("beneficiaryAccount"), t.details.get("senderAccount"), t.details.get("channel"))
+    assert top == counter_top(engine)
+    assert migrations.upgrade(engine) == []
+
+    # The rollups were seeded from the existing rows
+    with Session(engine) as session:
+        assert rollup_views(session) == full_scan_views(session)
+
+
+def test_orm_writes_promote_details_and_query_is_covered(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    migrations.upgrade(engine)
+    rng = random.Random(3)
+    with Session(engine) as session:
+        for i in range(300):
+            session.add(Transaction(user_id=1, amount=100, details=random_details(rng, i), risk_score=rng.uniform(0, 100)))
+        session.commit()
+        top = [tuple(r) for r in top_risky_beneficiaries(session)]
+    assert top == counter_top(engine)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, params, *a: statements.append((sql, params)))
+    with Session(engine) as session:
+        top_risky_beneficiaries(session)
+    sql, params = statements[-1]
+    with engine.connect() as conn:
+        plan = " ".join(str(row) for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params))
+    assert "COVERING INDEX ix_transactions_risk_beneficiary" in plan
+
+
+def test_transactions_with_empty_details_are_not_counted(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    migrations.upgrade(engine)
+    rng = random.Random(4)
+    with Session(engine) as session:
+        # Empty or missing details first, so they would also win the tie order
+        for details in [None, {}, [], None, {}] * 4:
+            session.add(Transaction(user_id=1, amount=100, details=details, risk_score=95))
+        for i in range(200):
+            session.add(Transaction(user_id=1, amount=100, details=random_details(rng, i), risk_score=rng.uniform(0, 100)))
+        session.commit()
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO transactions (user_id, amount, status, risk_score) VALUES (1, 100, 'approved', 99)"))
+    with Session(engine) as session:
+        top = [tuple(r) for r in top_risky_beneficiaries(session)]
+    assert top == counter_top(engine)
+    assert dict(top).get("Unknown", 0) < 20
+
+
+def full_scan_views(session):
+    """What the dashboard used to compute from transactions on every load."""
+    trends = session.query(
+        func.date(Transaction.created_at).label('date'),
+        func.avg(Transaction.risk_score).label('avg_risk_score'),
+        func.count(Transaction.id).label('txn_count')
+    ).group_by(func.date(Transaction.created_at)).order_by('date').all()
+    users = session.query(
+        Transaction.user_id,
+        func.count(Transaction.id).label('high_risk_count')
+    ).filter(Transaction.risk_score >= 80).group_by(Transaction.user_id).order_by(
+        desc('high_risk_count'), Transaction.user_id).limit(10).all()
+    return ([(str(r.date), round(r.avg_risk_score or 0, 6), r.txn_count) for r in trends],
+            [tuple(r) for r in users])
+
+
+def rollup_views(session):
+    return ([(str(r.day), round(r.avg_risk_score or 0, 6), r.txn_count) for r in time_trends(session)],
+            [tuple(r) for r in top_risky_users(session)])
+
+
+def test_rollups_follow_creates_and_reviews(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    migrations.upgrade(engine)
+    rng = random.Random(5)
+    with Session(engine) as session:
+        txns = []
+        for i in range(400):
+            if txns and rng.random() < 0.3:
+                txn = rng.choice(txns)
+                old_status = txn.status
+                txn.status = rng.choice(["approved", "rejected", old_status])
+                record_status_change(session, txn, old_status)
+            else:
+                txn = Transaction(
+                    user_id=rng.randint(1, 30), amount=100, details=random_details(rng, i),
+                    status=rng.choice(["approved", "blocked", "pending_admin_review"]),
+                    risk_score=None if i % 17 == 0 else rng.uniform(0, 100),
+                    created_at=datetime(2025, 7, 1) + timedelta(hours=rng.randint(0, 24 * 6)),
+                )
+                session.add(txn)
+                record_transaction(session, txn)
+                txns.append(txn)
+            if i % 50 == 0:
+                session.commit()
+        session.commit()
+
+        expected = full_scan_views(session)
+        assert len(expected[0]) >= 6
+        assert rollup_views(session) == expected
+        rebuild_rollups(session)
+        assert rollup_views(session) == expected
+
+        # A rolled-back write leaves the rollups alone
+        txn = Transaction(user_id=1, amount=5, details={}, status="blocked", risk_score=99,
+                          created_at=datetime(2025, 7, 1))
+        session.add(txn)
+        record_transaction(session, txn)
+        session.rollback()
+        assert rollup_views(session) == expected
+
+
+def test_failed_data_migration_is_rerun(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    calls = []
+
+    def flaky(conn):
+        calls.append(1)
+        conn.execute(text("INSERT INTO users (name, email, password_hash, role) VALUES ('x', 'x@example.com', 'x', 'user')"))
+        if len(calls) == 1:
+            raise RuntimeError("interrupted")
+
+    monkeypatch.setattr(migrations, "DATA_MIGRATIONS", migrations.DATA_MIGRATIONS + [("flaky", flaky)])
+    with pytest.raises(RuntimeError):
+        migrations.upgrade(engine)
+    migrations.upgrade(engine)
+    migrations.upgrade(engine)
+    assert len(calls) == 2
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM users")).scalar() == 1
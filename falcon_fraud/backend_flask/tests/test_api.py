@@ -40,3 +40,23 @@ def test_rapid_repeat():
     payload = load_payload("rapid_repeat")
     res = requests.post(API_URL, json=payload)
     assert res.status_code == 200
+
+def test_batch_matches_single_items():
+    payloads = [load_payload(name) for name in ["legit_txn", "fraud_txn", "missing_fields", "geo_anomaly"]]
+    for p in payloads:
+        p["test_mode"] = True
+    res = requests.post(API_URL + "/batch", json=payloads)
+    assert res.status_code == 200
+    results = res.json()["results"]
+    assert len(results) == len(payloads)
+    assert results[2]["status"] == 400 and "error" in results[2]
+    for payload, result in zip(payloads, results):
+        single = requests.post(API_URL, json=payload)
+        assert result["status"] == single.status_code
+        if single.status_code == 200:
+            assert result["final_decision"] == single.json()["final_decision"]
+            assert result["risk_score"] == single.json()["risk_score"]
+
+def test_batch_rejects_non_array():
+    res = requests.post(API_URL + "/batch", json={"amount": 10})
+    assert res.status_code == 400
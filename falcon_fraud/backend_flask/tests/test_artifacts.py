@@ -0,0 +1,53 @@
+# tests/test_artifacts.py
+
+import numpy as np
+import joblib
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from sklearn.ensemble import RandomForestClassifier, IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+from utils.artifacts import build_compiled_models, load_compiled_models, memory_report
+
+
+def write_models(tmp_path, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(300, 5))
+    y = (X[:, 0] > 0).astype(int)
+    scaler = StandardScaler().fit(X)
+    paths = {name: str(tmp_path / f"{name}.pkl") for name in ("rf", "iso", "rf_scaler", "iso_scaler")}
+    joblib.dump(RandomForestClassifier(n_estimators=5, random_state=seed).fit(scaler.transform(X), y), paths["rf"])
+    joblib.dump(IsolationForest(n_estimators=5, random_state=seed).fit(scaler.transform(X)), paths["iso"])
+    joblib.dump(scaler, paths["rf_scaler"])
+    joblib.dump(scaler, paths["iso_scaler"])
+    return paths
+
+
+def test_artifacts_are_mapped_and_invalidated_by_new_pickles(tmp_path):
+    paths = write_models(tmp_path)
+    artifacts_dir = str(tmp_path / "compiled")
+    assert load_compiled_models(paths, artifacts_dir) is None
+
+    build_compiled_models(paths, artifacts_dir)
+    rf, iso = load_compiled_models(paths, artifacts_dir)
+    assert isinstance(rf.feature, np.memmap) and isinstance(iso.path_length, np.memmap)
+    assert load_compiled_models(paths, artifacts_dir, fold_scalers=False) is None
+
+    # Retrained pickles make the old artifacts stale
+    write_models(tmp_path, seed=1)
+    assert load_compiled_models(paths, artifacts_dir) is None
+
+
+def test_memory_report_counts_mapped_artifacts(tmp_path):
+    paths = write_models(tmp_path)
+    artifacts_dir = str(tmp_path / "compiled")
+    build_compiled_models(paths, artifacts_dir)
+    rf, _ = load_compiled_models(paths, artifacts_dir)
+    rf.predict(np.zeros((1, 5)))
+
+    report = memory_report([artifacts_dir])
+    assert report["pid"] == os.getpid()
+    if os.path.exists("/proc/self/smaps_rollup"):
+        assert report["rss_mb"] >= report["artifacts"]["rss_mb"]
+        assert report["artifacts"]["mappings"] > 0
@@ -0,0 +1,179 @@
+# tests/test_batch_scoring.py
+
+import numpy as np
+import pandas as pd
+import joblib
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from sklearn.ensemble import RandomForestClassifier, IsolationForest
+from sklearn.preprocessing import LabelEncoder, MinMaxScaler, StandardScaler
+
+from decision_logic import DECISIONS, RISK_LEVELS, decide_one
+from utils.batch_scoring import load_scored, score_file
+
+CATEGORIES = ["NEFT", "POS", "Travel", "UPI"]
+
+
+def make_csv(make_transactions, path, n, seed=0):
+    """Rupee amounts, geo distances and rapid repeats that reach every decision branch."""
+    rng = np.random.default_rng(seed)
+    df = make_transactions(n, categories=CATEGORIES, rng=rng)
+    df["amount"] = rng.integers(100, 200_000, size=n)
+    df.loc[rng.random(n) < 0.01, "amount"] = 6_000_000
+    df["geo_distance_km"] = rng.uniform(0, 400, size=n).round(1)
+    df["hour"] = rng.integers(0, 24, size=n).astype(float)
+    df.loc[rng.random(n) < 0.05, "time_since_last_txn"] = np.nan
+    df.insert(0, "transaction_id", [f"T{i:06d}" for i in range(n)])
+    df["is_fraud"] = (df["amount"] > 120_000).astype(int)
+    df["is_rapid_repeat"] = rng.random(n) < 0.1
+    df.to_csv(path, index=False)
+    return df
+
+
+def write_bundle(directory, df, config):
+    categorical = config["features"]["categorical"]
+    X = df[config["features"]["numerical"]].fillna(0).copy()
+    encoders = {col: LabelEncoder().fit(CATEGORIES) for col in categorical}
+    for col in categorical:
+        X[col + config["encoding_suffix"]] = encoders[col].transform(df[col])
+    scaler = StandardScaler().fit(X)
+    iso = IsolationForest(n_estimators=10, random_state=0).fit(scaler.transform(X))
+    objects = {
+        "rf": RandomForestClassifier(n_estimators=10, max_depth=4, random_state=0).fit(
+            scaler.transform(X), df["amount"] > 60_000),
+        "iso": iso,
+        "rf_scaler": scaler,
+        "iso_scaler": scaler,
+        "encoders": encoders,
+        "iso_risk_scaler": MinMaxScaler((0, 100)).fit(-iso.decision_function(scaler.transform(X)).reshape(-1, 1)),
+    }
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for key, obj in objects.items():
+        paths[key] = os.path.join(directory, key + ".pkl")
+        joblib.dump(obj, paths[key])
+    return paths
+
+
+def whole_file_reference(df, paths, config):
+    """Every row at once through sklearn, then decide_one row by row."""
+    categorical = config["features"]["categorical"]
+    df = df.fillna(0)
+    encoders = joblib.load(paths["encoders"])
+    for col in categorical:
+        df[col + config["encoding_suffix"]] = encoders[col].transform(df[col])
+    X = df[config["features"]["numerical"] + [col + config["encoding_suffix"] for col in categorical]]
+    df["rf_pred"] = joblib.load(paths["rf"]).predict(joblib.load(paths["rf_scaler"]).transform(X))
+    anomaly_scores = joblib.load(paths["iso"]).decision_function(joblib.load(paths["iso_scaler"]).transform(X))
+    df["risk_score"] = joblib.load(paths["iso_risk_scaler"]).transform(-anomaly_scores.reshape(-1, 1)).flatten()
+    decided = [
+        decide_one(row.rf_pred, row.risk_score, row.amount, config, geo_anomaly=row.geo_distance_km > 200,
+                   rapid_repeat=bool(row.is_rapid_repeat), channel=row.transaction_type)
+        for row in df.itertuples()
+    ]
+    df["risk_level"] = [risk_level for risk_level, _ in decided]
+    df["final_decision"] = [decision for _, decision in decided]
+    return df
+
+
+@pytest.fixture(scope="module")
+def batch_config(config):
+    return lambda chunk_rows: {
+        **config, "batch_scoring": {**config["batch_scoring"], "chunk_rows": chunk_rows, "in_flight": 1}
+    }
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory, config, make_transactions):
+    root = tmp_path_factory.mktemp("batch")
+    df = make_csv(make_transactions, str(root / "txns.csv"), 2_500)
+    return str(root / "txns.csv"), df, write_bundle(str(root / "models"), df, config)
+
+
+def test_matches_the_whole_file_export(dataset, batch_config, config, tmp_path):
+    csv_path, df, paths = dataset
+    expected = whole_file_reference(df.copy(), paths, config)
+    assert set(expected["final_decision"]) == set(DECISIONS)   # every branch is exercised
+
+    review_path = str(tmp_path / "review.csv")
+    progress = score_file(csv_path, str(tmp_path / "out"), review_path, paths, batch_config(400),
+                          workers=2, report=lambda line: None)
+    assert progress["complete"] and progress["rows"] == len(df)
+    assert progress["counts"] == expected["final_decision"].value_counts().reindex(DECISIONS, fill_value=0).to_dict()
+
+    scored = load_scored(str(tmp_path / "out"), ("row", "rf_pred", "risk_score", "risk_level", "final_decision", "transaction_id"))
+    assert (scored["row"] == np.arange(len(df))).all()
+    assert (scored["transaction_id"] == df["transaction_id"]).all()
+    assert (scored["rf_pred"] == expected["rf_pred"]).all()
+    assert np.allclose(scored["risk_score"], expected["risk_score"])
+    assert (np.asarray(RISK_LEVELS)[scored["risk_level"]] == expected["risk_level"]).all()
+    assert (np.asarray(DECISIONS)[scored["final_decision"]] == expected["final_decision"]).all()
+
+    review = pd.read_csv(review_path)
+    flagged = expected[expected["final_decision"] == "🔍 Send to Admin"]
+    assert list(review["transaction_id"]) == list(flagged["transaction_id"])
+    assert (review["human_verdict"] == "🕒 Pending").all()
+    assert np.allclose(review["risk_score"], flagged["risk_score"])
+    assert list(review["transaction_type"]) == list(flagged["transaction_type"])
+
+
+def test_chunk_size_does_not_change_the_output(dataset, batch_config, tmp_path):
+    csv_path, _, paths = dataset
+    outputs = []
+    for chunk_rows in (333, 2_500, 10_000):
+        out, review_path = str(tmp_path / f"out{chunk_rows}"), str(tmp_path / f"review{chunk_rows}.csv")
+        score_file(csv_path, out, review_path, paths, batch_config(chunk_rows), workers=2, report=lambda line: None)
+        with open(review_path, "rb") as f:
+            outputs.append((load_scored(out)["final_decision"].tolist(), f.read()))
+    assert outputs[0] == outputs[1] == outputs[2]
+
+
+def test_resumes_after_a_crash(dataset, batch_config, tmp_path):
+    csv_path, _, paths = dataset
+    out, review_path = str(tmp_path / "out"), str(tmp_path / "review.csv")
+    score_file(csv_path, str(tmp_path / "clean"), str(tmp_path / "clean.csv"), paths, batch_config(300),
+               workers=1, report=lambda line: None)
+
+    def crash_after_three(line):
+        if line.startswith("📦 Chunk 2"):
+            raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        score_file(csv_path, out, review_path, paths, batch_config(300), workers=2, report=crash_after_three)
+    with open(review_path, "ab") as f:
+        f.write(b"T999999,half a row")               # torn write past the last commit
+
+    lines = []
+    progress = score_file(csv_path, out, review_path, paths, batch_config(300), workers=2, report=lines.append)
+    assert lines[0].startswith("↩️ Resuming at chunk 3")
+    assert progress["rows"] == 2_500
+    with open(review_path, "rb") as f, open(str(tmp_path / "clean.csv"), "rb") as clean:
+        assert f.read() == clean.read()
+    assert (load_scored(out)["row"] == np.arange(2_500)).all()
+
+    with pytest.raises(RuntimeError):
+        score_file(csv_path, out, review_path, paths, batch_config(500), workers=1, report=lambda line: None)
+
+
+def test_review_queue_selection_follows_the_app_rules(dataset, batch_config, config, tmp_path):
+    """Pins the review set since the export took on the app's rules; it feeds both retrain scripts."""
+    csv_path, df, paths = dataset
+    review_path = str(tmp_path / "review.csv")
+    score_file(csv_path, str(tmp_path / "out"), review_path, paths, batch_config(1_000), workers=1,
+               report=lambda line: None)
+    review = set(pd.read_csv(review_path)["transaction_id"])
+
+    expected = whole_file_reference(df.copy(), paths, config).set_index("transaction_id")
+    fraud = expected["rf_pred"] == 1
+    high = expected["risk_score"] >= config["decision_logic"]["block_threshold"]
+    # The export's own rules before: predicted fraud, not high risk, at most ₹1 lakh
+    old = set(expected.index[fraud & ~high & (expected["amount"] <= 100000)])
+
+    added, removed = expected.loc[sorted(review - old)], expected.loc[sorted(old - review)]
+    assert (len(review), len(added), len(removed)) == (244, 22, 269)
+    # ≥ ₹50 lakh now always goes to a human ...
+    assert (added["amount"] >= 5_000_000).all()
+    # ... and predicted fraud with a geo anomaly or a rapid repeat is blocked instead
+    assert (removed["rf_pred"] == 1).all()
+    assert ((removed["geo_distance_km"] > 200) | removed["is_rapid_repeat"]).all()
@@ -0,0 +1,132 @@
+# tests/test_dataset_cache.py
+
+import json
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from sklearn.preprocessing import LabelEncoder
+
+from utils.dataset_cache import load_training_dataset, prune_dataset_cache, stale_builds
+
+# Per-column categories, with missing merchant categories
+CATEGORIES = {
+    "transaction_type": ["NEFT", "UPI", "IMPS"],
+    "merchant_category": ["Travel", "Gaming", None],
+    "device_type": ["POS", "Mobile"],
+}
+
+
+@pytest.fixture
+def make_csv(make_transactions):
+    def make(path, seed=0):
+        rng = np.random.default_rng(seed)
+        df = make_transactions(500, categories=CATEGORIES, rng=rng)
+        df.loc[rng.random(len(df)) < 0.05, "time_since_last_txn"] = np.nan
+        df["merchant_name"] = [f"Merchant {i % 37}" for i in range(len(df))]
+        df.to_csv(path, index=False)
+    return make
+
+
+def old_encoding(csv_path, config):
+    """What the training scripts did to the raw CSV."""
+    numerical, categorical = config["features"]["numerical"], config["features"]["categorical"]
+    df = pd.read_csv(csv_path)
+    df.fillna(0, inplace=True)
+    encoders = {}
+    for col in categorical:
+        df[col] = df[col].astype(str)
+        unique_values = df[col].unique().tolist()
+        if "Unknown" not in unique_values:
+            unique_values.append("Unknown")
+        encoders[col] = LabelEncoder().fit(unique_values)
+        df[col + config["encoding_suffix"]] = encoders[col].transform(df[col])
+    X = df[numerical + [col + config["encoding_suffix"] for col in categorical]]
+    return X, df["is_fraud"], encoders
+
+
+def test_cache_matches_the_scripts_encoding(tmp_path, config, make_csv):
+    csv_path = str(tmp_path / "txns.csv")
+    make_csv(csv_path)
+    dataset = load_training_dataset(csv_path, str(tmp_path / "cache"), config, report=lambda line: None)
+    X, y, encoders = old_encoding(csv_path, config)
+
+    assert dataset.feature_cols == list(X.columns)
+    assert isinstance(dataset.X, np.memmap) and dataset.X.dtype == np.float32
+    assert np.array_equal(dataset.X, X.to_numpy(dtype="f4"))
+    assert np.array_equal(dataset.y, y)
+    for col in config["features"]["categorical"]:
+        assert list(dataset.label_encoders[col].classes_) == list(encoders[col].classes_)
+
+    frame = dataset.frame(["merchant_name", "amount", "merchant_category"])
+    assert isinstance(frame["merchant_name"].dtype, pd.CategoricalDtype)
+    assert frame["amount"].dtype == np.float64
+    raw = pd.read_csv(csv_path)
+    assert frame["merchant_category"].isna().sum() == raw["merchant_category"].isna().sum()
+    assert list(frame["merchant_name"]) == list(raw["merchant_name"])
+
+    rows = np.array([5, 3, 400])
+    assert np.array_equal(dataset.features(rows).to_numpy(), dataset.X[rows])
+
+
+def test_recodes_for_other_encoders(tmp_path, config, make_csv):
+    numerical, categorical = config["features"]["numerical"], config["features"]["categorical"]
+    csv_path = str(tmp_path / "txns.csv")
+    make_csv(csv_path)
+    dataset = load_training_dataset(csv_path, str(tmp_path / "cache"), config, report=lambda line: None)
+    saved = {col: LabelEncoder().fit(["IMPS", "NEFT", "POS", "Travel", "Unknown"]) for col in categorical}
+
+    X = dataset.features(label_encoders=saved)
+    raw = pd.read_csv(csv_path).fillna(0)
+    for col in categorical:
+        values = raw[col].astype(str).where(raw[col].astype(str).isin(saved[col].classes_), "Unknown")
+        assert np.array_equal(X[col + config["encoding_suffix"]], saved[col].transform(values))
+    assert np.array_equal(X[numerical], dataset.X[:, :len(numerical)])
+
+
+def test_rebuilds_only_when_inputs_change(tmp_path, config, make_csv):
+    numerical, categorical = config["features"]["numerical"], config["features"]["categorical"]
+    csv_path, cache_dir = str(tmp_path / "txns.csv"), str(tmp_path / "cache")
+    make_csv(csv_path)
+    built = []
+    first = load_training_dataset(csv_path, cache_dir, config, report=built.append)
+    again = load_training_dataset(csv_path, cache_dir, config, report=built.append)
+    assert again.path == first.path and len(built) == 2   # one build: start and done lines
+
+    fewer = {**config, "features": {**config["features"], "numerical": numerical[:-1]}}
+    assert load_training_dataset(csv_path, cache_dir, fewer, report=built.append).X.shape[1] == len(numerical) - 1 + len(categorical)
+
+    make_csv(csv_path, seed=1)
+    changed = load_training_dataset(csv_path, cache_dir, config, report=built.append)
+    assert changed.path != first.path and len(built) == 7
+    assert built[-1].startswith("🧹 1 build(s) of older versions")
+    # Nothing is removed until asked
+    assert len(os.listdir(cache_dir)) == 3
+
+
+def test_pruning_keeps_other_labels_feature_lists_and_files(tmp_path, config, make_csv):
+    csv_path, cache_dir = str(tmp_path / "txns.csv"), str(tmp_path / "cache")
+    other_csv = str(tmp_path / "other" / "txns.csv")
+    os.makedirs(os.path.dirname(other_csv))
+    make_csv(csv_path)
+    make_csv(other_csv, seed=2)
+    quiet = lambda line: None
+    old = load_training_dataset(csv_path, cache_dir, config, report=quiet)
+    fewer = {**config, "features": {**config["features"], "numerical": config["features"]["numerical"][:-1]}}
+    kept = [
+        load_training_dataset(csv_path, cache_dir, fewer, report=quiet),
+        load_training_dataset(csv_path, cache_dir, config, label="merchant_lat", report=quiet),
+        load_training_dataset(other_csv, cache_dir, config, report=quiet),
+    ]
+
+    make_csv(csv_path, seed=1)
+    current = load_training_dataset(csv_path, cache_dir, config, report=quiet)
+    assert stale_builds(csv_path, cache_dir, config) == [old.path]
+    with open(os.path.join(old.path, "meta.json")) as f:
+        assert json.load(f)["source"] == os.path.abspath(csv_path)
+
+    assert prune_dataset_cache(csv_path, cache_dir, config) == [old.path]
+    assert sorted(os.listdir(cache_dir)) == sorted(os.path.basename(d.path) for d in kept + [current])
+    assert stale_builds(csv_path, cache_dir, config) == []
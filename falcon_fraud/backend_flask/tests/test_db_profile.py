@@ -0,0 +1,64 @@
+# tests/test_db_profile.py
+
+import yaml
+from datetime import datetime
+from sqlalchemy import create_engine, text
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import migrations
+from utils.db_profile import apply_profile, engine_options
+from utils.sql_history import enable_wal
+
+with open(os.path.join(os.path.dirname(__file__), "..", "config", "features_config.yaml")) as f:
+    DATABASE_CONFIG = yaml.safe_load(f)["database"]
+
+
+def pragma(engine, name):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+def test_sqlite_connections_get_the_profile(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    apply_profile(engine, DATABASE_CONFIG)
+    enable_wal(engine, busy_timeout_ms=1234)   # adds to the profile, doesn't stack a second listener
+    assert pragma(engine, "journal_mode") == "wal"
+    assert pragma(engine, "synchronous") == 1  # NORMAL
+    assert pragma(engine, "busy_timeout") == 1234
+    assert pragma(engine, "mmap_size") == DATABASE_CONFIG["sqlite"]["mmap_size_mb"] * 2**20
+    assert pragma(engine, "cache_size") == -DATABASE_CONFIG["sqlite"]["cache_size_mb"] * 1024
+    assert pragma(engine, "temp_store") == 2   # MEMORY
+
+    plain = create_engine(f"sqlite:///{tmp_path / 'plain.db'}")
+    apply_profile(plain, {**DATABASE_CONFIG, "profile": "default"})
+    assert pragma(plain, "journal_mode") == "delete"
+
+
+def test_pool_options_only_for_server_databases():
+    assert engine_options(DATABASE_CONFIG, "sqlite:///fraud_detection.db") == {}
+    options = engine_options(DATABASE_CONFIG, "postgresql://app@db/fraud")
+    assert options["pool_size"] == DATABASE_CONFIG["pool"]["size"]
+    assert options["pool_pre_ping"] is True
+    assert engine_options({**DATABASE_CONFIG, "profile": "default"}, "postgresql://app@db/fraud") == {}
+
+
+def test_hot_queries_use_an_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    migrations.upgrade(engine)
+    now = datetime(2025, 7, 1).isoformat(" ")
+    queries = {
+        "ix_notifications_user_created":
+            "SELECT * FROM notifications WHERE user_id = 3 ORDER BY created_at DESC LIMIT 10",
+        "ix_otp_sessions_lookup":
+            f"SELECT * FROM otp_sessions WHERE user_id = 3 AND otp = '123456' AND used = 0 AND expires_at > '{now}' LIMIT 1",
+        "ix_admin_actions_timestamp":
+            "SELECT * FROM admin_actions ORDER BY timestamp DESC LIMIT 100",
+        "ix_transactions_created_id":
+            "SELECT * FROM transactions ORDER BY created_at DESC LIMIT 200",
+    }
+    with engine.connect() as conn:
+        for index, sql in queries.items():
+            plan = " ".join(str(row) for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+            assert index in plan and "TEMP B-TREE" not in plan, (sql, plan)
@@ -0,0 +1,68 @@
+# tests/test_decision_logic.py
+
+import itertools
+import numpy as np
+import sys
+import os
+import yaml
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from decision_logic import (
+    DECISIONS, RBI_REASONS, RISK_LEVELS, decide_many, decide_one, rbi_violation, rbi_violations,
+)
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "config", "features_config.yaml")
+with open(CONFIG_PATH) as f:
+    config = yaml.safe_load(f)
+
+# Every threshold in the rules, and a value either side of it
+RISK_SCORES = [0.0, 39.99, 40.0, 40.01, 69.99, 70.0, 70.01, 79.99, 80.0, 80.01, 100.0, float("nan")]
+AMOUNTS = [0, 150, 199.99, 200, 200.01, 999.99, 1000, 99999.99, 100000, 100000.01, 199999.99, 200000,
+           500000, 500000.01, 4999999.99, 5000000, 7500000]
+CHANNELS = ["NEFT", "RTGS", "IMPS", "UPI", "ATM"]
+
+
+def check(rf_pred, risk_score, amount, geo_anomaly, rapid_repeat, channel):
+    risk_level, decision = decide_many(rf_pred, risk_score, amount, config, geo_anomaly=geo_anomaly,
+                                       rapid_repeat=rapid_repeat, channel=channel)
+    expected = [
+        decide_one(*row[:3], config, geo_anomaly=row[3], rapid_repeat=row[4], channel=row[5])
+        for row in zip(rf_pred, risk_score, amount, geo_anomaly, rapid_repeat, channel)
+    ]
+    got = list(zip(np.asarray(RISK_LEVELS)[risk_level], np.asarray(DECISIONS)[decision]))
+    mismatches = [(row, e, g) for row, e, g in zip(
+        zip(rf_pred, risk_score, amount, geo_anomaly, rapid_repeat, channel), expected, got) if e != g]
+    assert not mismatches, mismatches[:5]
+
+
+def test_exhaustive_grid_matches_scalar_path():
+    grid = list(itertools.product([0, 1], RISK_SCORES, AMOUNTS, [False, True], [False, True], CHANNELS))
+    check(*(list(column) for column in zip(*grid)))
+
+
+def test_random_grid_matches_scalar_path():
+    rng = np.random.default_rng(7)
+    n = 50_000
+    amount = np.where(rng.random(n) < 0.7, rng.uniform(0, 2000, n), rng.uniform(0, 8_000_000, n)).round(2)
+    check(
+        rng.integers(0, 2, n).tolist(),
+        rng.uniform(0, 100, n).round(1).tolist(),   # lands on the thresholds too
+        amount.tolist(),
+        (rng.random(n) < 0.2).tolist(),
+        (rng.random(n) < 0.2).tolist(),
+        rng.choice(CHANNELS, n).tolist(),
+    )
+
+
+def test_without_channel_skips_rbi_limits():
+    risk_level, decision = decide_many([0], [10.0], [150000], config)
+    assert (RISK_LEVELS[risk_level[0]], DECISIONS[decision[0]]) == decide_one(0, 10.0, 150000, config)
+    assert DECISIONS[decision[0]] == "✅ Auto-approved"
+
+
+def test_rbi_reasons_match_scalar():
+    pairs = list(itertools.product(CHANNELS + [None], AMOUNTS))
+    codes = rbi_violations(np.array([c for c, _ in pairs], dtype=object), np.array([a for _, a in pairs], dtype="f8"))
+    assert [RBI_REASONS[code] for code in codes] == [rbi_violation(c, a) for c, a in pairs]
+    assert rbi_violation("UPI", 150000) == "UPI above ₹1 lakh"
+    assert rbi_violation("RTGS", 150000) == "RTGS below ₹2 lakh"
@@ -0,0 +1,94 @@
+# tests/test_feature_plan.py
+
+import numpy as np
+import pandas as pd
+import sys
+import os
+import yaml
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from sklearn.preprocessing import LabelEncoder
+
+from utils.feature_plan import FeaturePlan
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "config", "features_config.yaml")
+with open(CONFIG_PATH) as f:
+    config = yaml.safe_load(f)
+
+
+def make_encoders():
+    return {
+        "transaction_type": LabelEncoder().fit(["NEFT", "RTGS", "Unknown"]),
+        "merchant_category": LabelEncoder().fit(["Gaming", "Travel", "Unknown"]),
+        # No "Unknown" class: the old path appended it, giving code len(classes_)
+        "device_type": LabelEncoder().fit(["ATM", "Mobile", "POS"]),
+    }
+
+
+def make_txn(i, **overrides):
+    txn = {col: float(i + k) for k, col in enumerate(config["features"]["numerical"])}
+    txn.update({"transaction_type": "NEFT", "merchant_category": "Travel", "device_type": "POS"})
+    txn.update(overrides)
+    return txn
+
+
+def dataframe_features(rows, encoders):
+    # The per-request DataFrame path the plan replaces
+    df = pd.DataFrame(rows)
+    for col in config["features"]["categorical"]:
+        le = encoders[col]
+        classes = list(le.classes_) + ([] if "Unknown" in le.classes_ else ["Unknown"])
+        df[col + config["encoding_suffix"]] = [classes.index(v if v in classes else "Unknown") for v in df[col]]
+    cols = config["features"]["numerical"] + [c + config["encoding_suffix"] for c in config["features"]["categorical"]]
+    return df[cols].to_numpy(dtype=float)
+
+
+def test_plan_matches_dataframe_encoding():
+    encoders = make_encoders()
+    plan = FeaturePlan(config, encoders)
+    rows = [
+        make_txn(0),
+        make_txn(1, transaction_type="UPI", merchant_category="Crypto"),
+        make_txn(2, device_type="Tablet"),
+    ]
+    assert np.array_equal(plan.matrix(rows), dataframe_features(rows, encoders))
+    assert np.array_equal(plan.row(rows[1])[0], dataframe_features(rows, encoders)[1])
+
+
+def test_unknown_fallback_does_not_mutate_encoders():
+    encoders = make_encoders()
+    plan = FeaturePlan(config, encoders)
+    row = plan.row(make_txn(0, device_type="Smartwatch"))
+    assert row[0, -1] == 3
+    assert list(encoders["device_type"].classes_) == ["ATM", "Mobile", "POS"]
+
+
+def test_missing_numerical_feature_raises():
+    plan = FeaturePlan(config, make_encoders())
+    txn = make_txn(0)
+    del txn["hour"]
+    try:
+        plan.row(txn)
+        assert False, "expected KeyError"
+    except KeyError as e:
+        assert "hour" in str(e)
+
+
+def test_frame_matches_rows_for_csv_dtypes():
+    plan = FeaturePlan(config, make_encoders())
+    rows = [
+        make_txn(0),
+        make_txn(1, transaction_type="UPI", merchant_category="Crypto"),
+        make_txn(2, device_type="Tablet"),
+        make_txn(3, device_type="ATM"),
+    ]
+    df = pd.DataFrame(rows)
+    for col in config["features"]["categorical"]:
+        df[col] = df[col].astype("category")
+    assert np.array_equal(plan.frame(df), plan.matrix(rows))
+
+    # Empty CSV cells: 0 for numbers, Unknown for categories
+    df.loc[1, "hour"] = np.nan
+    df.loc[1, "device_type"] = np.nan
+    X = plan.frame(df)
+    assert X[1, plan.columns.index("hour")] == 0
+    assert X[1, -1] == plan.unknown_codes["device_type"]
@@ -0,0 +1,44 @@
+# tests/test_geo.py
+
+import numpy as np
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from geopy.distance import geodesic
+
+from utils.geo import distance_km, distance_km_array, cached_distance_km
+from utils.feature_engineering import get_geo_distance
+
+
+def random_pairs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(8, 35, n), rng.uniform(68, 97, n),
+            rng.uniform(8, 35, n), rng.uniform(68, 97, n))
+
+
+def test_ellipsoidal_within_10m_of_geodesic():
+    lat1, lon1, lat2, lon2 = random_pairs(500)
+    expected = np.array([geodesic((a, b), (c, d)).km for a, b, c, d in zip(lat1, lon1, lat2, lon2)])
+    assert np.abs(distance_km_array(lat1, lon1, lat2, lon2) - expected).max() < 0.01
+
+
+def test_haversine_within_documented_bound():
+    lat1, lon1, lat2, lon2 = random_pairs(500, seed=1)
+    expected = np.array([geodesic((a, b), (c, d)).km for a, b, c, d in zip(lat1, lon1, lat2, lon2)])
+    got = distance_km_array(lat1, lon1, lat2, lon2, mode="haversine")
+    assert (np.abs(got - expected) / expected).max() < 0.0056
+
+
+def test_scalar_matches_array_path():
+    lat1, lon1, lat2, lon2 = random_pairs(50, seed=2)
+    batch = distance_km_array(lat1, lon1, lat2, lon2)
+    for i in range(50):
+        assert abs(distance_km((lat1[i], lon1[i]), (lat2[i], lon2[i])) - batch[i]) < 1e-9
+
+
+def test_edge_cases():
+    assert distance_km((19.076, 72.8777), (19.076, 72.8777)) == 0.0
+    assert cached_distance_km((19.076, 72.8777), (19.076, 72.8777)) == 0.0
+    assert np.isnan(distance_km_array([95.0], [0.0], [0.0], [0.0])[0])
+    # Invalid coordinates fall back to 0.0 like the geopy version did
+    assert get_geo_distance((95.0, 0.0), (0.0, 0.0)) == 0.0
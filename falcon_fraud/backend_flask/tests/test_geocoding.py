@@ -0,0 +1,116 @@
+# tests/test_geocoding.py
+
+import numpy as np
+import pandas as pd
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.geocoding import (GeocodeCache, OfflineGeocoder, RateLimiter, city_query, geocode_queries,
+                             merchant_coordinates)
+
+TABLE = {"MUMBAI, India": (19.07, 72.87), "PUNE, India": (18.52, 73.85), "India": (22.35, 78.67)}
+
+
+def merchants():
+    return pd.DataFrame({
+        "beneficiary_account": range(8),
+        "beneficiary_city": ["MUMBAI", "Pune", "MUMBAI ", None, "ATLANTIS", "PUNE", "MUMBAI", "FLAKY"],
+    })
+
+
+class FlakyGeocoder(OfflineGeocoder):
+    def __init__(self, table, failing):
+        super().__init__(table)
+        self.failing = set(failing)
+
+    def geocode(self, query):
+        if query in self.failing:
+            raise TimeoutError(query)
+        return super().geocode(query)
+
+
+def run(df, geocoder, cache_path, **kwargs):
+    cache = GeocodeCache(cache_path, geocoder.name)
+    queries = [city_query(city) for city in df["beneficiary_city"].unique()]
+    stats = geocode_queries(queries, geocoder, cache, workers=3, rate_per_sec=0, report=lambda line: None, **kwargs)
+    cache.close()
+    return merchant_coordinates(df, cache), stats
+
+
+def test_each_city_is_looked_up_once_and_cached(tmp_path):
+    df, geocoder = merchants(), OfflineGeocoder(TABLE)
+    enriched, stats = run(df, geocoder, str(tmp_path / "geo" / "cache.jsonl"))
+    assert geocoder.calls == 5   # MUMBAI, PUNE, India, ATLANTIS, FLAKY
+    assert stats == dict(stats, queries=5, cached=0, found=3, not_found=2, errors=0)
+    assert enriched["merchant_lat"].tolist() == [19.07, 18.52, 19.07, 22.35, 0.0, 18.52, 19.07, 0.0]
+    assert enriched["merchant_lon"].tolist()[:4] == [72.87, 73.85, 72.87, 78.67]
+
+    # Rerun: everything, "not found" included, comes from the cache on disk
+    again, stats = run(df, OfflineGeocoder({}), str(tmp_path / "geo" / "cache.jsonl"))
+    assert stats["cached"] == 5 and stats["found"] == stats["not_found"] == 0
+    assert again.equals(enriched)
+
+    retried, stats = run(df, OfflineGeocoder({"ATLANTIS, India": (1.0, 2.0)}), str(tmp_path / "geo" / "cache.jsonl"),
+                         retry_missing=True)
+    assert stats["found"] == 1 and retried["merchant_lat"].tolist()[4] == 1.0
+
+
+def test_failed_and_torn_lookups_are_retried_next_run(tmp_path):
+    cache_path = str(tmp_path / "cache.jsonl")
+    flaky = FlakyGeocoder(dict(TABLE, **{"FLAKY, India": (10.0, 20.0)}), failing=["FLAKY, India"])
+    enriched, stats = run(merchants(), flaky, cache_path, retries=1)
+    assert stats["errors"] == 1 and flaky.calls == 4
+    assert enriched["merchant_lat"].tolist()[7] == 0.0
+
+    # A crash mid-write leaves a torn last line
+    lines = [line for line in open(cache_path).read().splitlines() if not line.startswith('{"query": "PUNE')]
+    with open(cache_path, "w") as f:
+        f.write("\n".join(lines) + '\n{"query": "PUNE, India", "fou')
+
+    flaky.failing.clear()
+    flaky.calls = 0
+    enriched, stats = run(merchants(), flaky, cache_path)
+    assert flaky.calls == 2 and stats["errors"] == 0   # FLAKY and the torn PUNE
+    assert enriched["merchant_lat"].tolist() == [19.07, 18.52, 19.07, 22.35, 0.0, 18.52, 19.07, 10.0]
+    reloaded = GeocodeCache(cache_path, "offline")
+    reloaded.close()
+    assert len(reloaded) == 5
+
+
+class StandInNominatim(OfflineGeocoder):
+    name = "nominatim"
+
+
+def test_misses_only_count_for_the_geocoder_that_missed(tmp_path):
+    cache_path = str(tmp_path / "cache.jsonl")
+    run(merchants(), OfflineGeocoder(TABLE), cache_path)   # ATLANTIS and FLAKY not found offline
+
+    online = StandInNominatim({"ATLANTIS, India": (1.0, 2.0)})
+    enriched, stats = run(merchants(), online, cache_path)
+    assert online.calls == 2 and stats == dict(stats, cached=3, found=1, not_found=1)
+    assert enriched["merchant_lat"].tolist()[4] == 1.0
+
+    # Offline coordinates are reused online; each geocoder keeps its own misses
+    online.calls = 0
+    run(merchants(), online, cache_path)
+    assert online.calls == 0
+    offline = OfflineGeocoder({})
+    _, stats = run(merchants(), offline, cache_path)
+    assert offline.calls == 0 and stats["cached"] == 5
+
+
+def test_rate_limiter_spaces_calls_across_threads():
+    now, sleeps = [100.0], []
+
+    def sleep(secs):
+        sleeps.append(secs)
+
+    limiter = RateLimiter(4.0, clock=lambda: now[0], sleep=sleep)
+    for _ in range(5):
+        limiter.wait()
+    assert np.allclose(sleeps, [0.25, 0.5, 0.75, 1.0])
+    now[0] += 10
+    limiter.wait()
+    assert len(sleeps) == 4
+    assert RateLimiter(0).interval == 0.0
@@ -0,0 +1,91 @@
+# tests/test_incremental.py
+
+import copy
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.dataset_cache import encode_categorical, fit_encoder, load_training_dataset
+from utils.feature_plan import FeaturePlan
+from utils.incremental import FEEDBACK_VERDICTS, extend_encoders, gate, incremental_round
+from utils.training import train_models
+
+
+@pytest.fixture(scope="module")
+def config(config):
+    config = copy.deepcopy(config)
+    config["incremental_training"].update(new_trees=10, min_trees=50, max_trees=200, replay_rows=600, holdout_rows=300)
+    return config
+
+
+def make_feedback(make_transactions, n, seed, categories):
+    df = make_transactions(n, seed, categories)
+    df["human_verdict"] = np.where(df.pop("is_fraud") == 1, "❌ Fraud", "✅ Not Fraud")
+    df["is_fraud"] = df["human_verdict"].map(FEEDBACK_VERDICTS)
+    return df
+
+
+def test_extended_encoders_keep_existing_codes():
+    encoders = {"merchant_category": fit_encoder(["Travel", "Gaming", "Fuel"])}
+    extended = extend_encoders(encoders, {"merchant_category": ["Gaming", "Crypto", "Arcade"]})
+    old, new = list(encoders["merchant_category"].classes_), list(extended["merchant_category"].classes_)
+    assert new[:len(old)] == old and new[len(old):] == ["Arcade", "Crypto"]
+
+    values = pd.Categorical(["Travel", "Unknown", "Fuel", "Crypto", "Nowhere"])
+    before = encode_categorical(values, encoders["merchant_category"])
+    after = encode_categorical(values, extended["merchant_category"])
+    assert np.array_equal(before[[0, 1, 2, 4]], after[[0, 1, 2, 4]])
+    assert after[3] == new.index("Crypto")
+    assert list(extended["merchant_category"].transform(["Crypto", "Travel"])) == [new.index("Crypto"), old.index("Travel")]
+
+    plan_config = {"encoding_suffix": "_code", "features": {"numerical": [], "categorical": ["merchant_category"]}}
+    plan = FeaturePlan(plan_config, extended)
+    assert plan.encode("merchant_category", "Gaming") == old.index("Gaming")
+    assert extend_encoders(encoders, {"merchant_category": ["Fuel"]})["merchant_category"] is encoders["merchant_category"]
+
+
+def test_rounds_grow_age_out_and_skip_seen_feedback(tmp_path, config, make_transactions):
+    make_transactions(2000, 0).to_csv(tmp_path / "txns.csv", index=False)
+    dataset = load_training_dataset(str(tmp_path / "txns.csv"), str(tmp_path / "cache"), config, report=lambda line: None)
+    bundle, _, _ = train_models(dataset, config, workers=1, report=lambda line: None)
+    base_trees = list(bundle["rf"].estimators_)
+
+    feedback = make_feedback(make_transactions, 400, 1, ("A", "B", "C", "D"))
+    state = {"round": 0, "tree_rounds": None, "seen": set()}
+    first = incremental_round(bundle, dataset, feedback, state, config, parent="v0001", report=lambda line: None)
+    rf = first["artifacts"]["rf"]
+    assert len(rf.estimators_) == 110 and rf.estimators_[:100] == base_trees
+    assert bundle["rf"].estimators_ == base_trees and bundle["rf"].n_estimators == 100
+    assert first["artifacts"]["rf_scaler"] is bundle["rf_scaler"] and first["artifacts"]["iso"] is bundle["iso"]
+    incremental = first["metadata"]["incremental"]
+    assert incremental["tree_rounds"] == [0] * 100 + [1] * 10 and incremental["retired_trees"] == 0
+    assert incremental["added_classes"] == {col: 1 for col in config["features"]["categorical"]}
+    assert 0 < first["metadata"]["feedback_rows"] < len(feedback)
+    assert first["metrics"]["candidate"]["rows"] == first["metrics"]["current"]["rows"]
+
+    # Same feedback again: everything trainable was seen by the parent
+    state = {"round": 1, "tree_rounds": incremental["tree_rounds"], "seen": set(incremental["feedback_keys"])}
+    assert incremental_round(first["artifacts"], dataset, feedback, state, config, report=lambda line: None) is None
+
+    # New feedback, round-0 trees due: ten swapped out, oldest first
+    aging = copy.deepcopy(config)
+    aging["incremental_training"]["retire_after_rounds"] = 2
+    second = incremental_round(first["artifacts"], dataset, pd.concat([feedback, make_feedback(make_transactions, 200, 2, "ABC")]),
+                               state, aging, parent="v0002", report=lambda line: None)
+    incremental = second["metadata"]["incremental"]
+    assert second["metadata"]["feedback_rows"] < 200 and incremental["retired_trees"] == 10
+    assert incremental["tree_rounds"] == [0] * 90 + [1] * 10 + [2] * 10
+    assert second["artifacts"]["rf"].estimators_[:100] == rf.estimators_[10:]
+    assert all(second["artifacts"]["encoders"][col] is first["artifacts"]["encoders"][col]
+               for col in config["features"]["categorical"])
+
+
+def test_gate_rejects_holdout_regressions(config):
+    inc_config = config["incremental_training"]
+    current = {"auc": 0.95, "recall": 0.80}
+    assert gate(current, {"auc": 0.949, "recall": 0.79}, inc_config) == []
+    assert len(gate(current, {"auc": 0.90, "recall": 0.70}, inc_config)) == 2
+    assert gate({"auc": None, "recall": 0.5}, {"auc": None, "recall": 0.5}, inc_config) == []
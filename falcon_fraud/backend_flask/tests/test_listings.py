@@ -0,0 +1,157 @@
+# tests/test_listings.py
+
+import random
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import Session
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import migrations
+from models import db, User, Transaction
+from utils.listings import (
+    pending_reviews, decode_cursor, encode_cursor, keyset_page, keyset_stream, parse_fields,
+    transactions_query, transaction_json, TRANSACTION_FIELDS,
+)
+
+START = datetime(2025, 7, 1, 9, 0)
+
+
+def make_db(tmp_path, n=120, seed=4):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    migrations.upgrade(engine)
+    rng = random.Random(seed)
+    with Session(engine) as session:
+        for u in range(1, 6):
+            session.add(User(id=u, name=f"user{u}", email=f"u{u}@example.com", password_hash="x", phone=f"90000{u}"))
+        for i in range(n):
+            session.add(Transaction(
+                user_id=rng.randint(1, 6),           # user 6 doesn't exist
+                amount=rng.randint(100, 100000),
+                details={"i": i},
+                status=rng.choice(["pending_admin_review", "approved", "blocked"]),
+                risk_score=rng.uniform(0, 100),
+                # Coarse timestamps so many rows tie on created_at
+                created_at=START + timedelta(minutes=rng.randint(0, 20)),
+            ))
+        session.commit()
+    return engine
+
+
+def expected(engine, **filters):
+    with Session(engine) as session:
+        txns = session.query(Transaction).filter_by(status="pending_admin_review").all()
+    keep = [
+        t for t in txns
+        if (filters.get("min_risk") is None or t.risk_score >= filters["min_risk"])
+        and (filters.get("max_amount") is None or t.amount <= filters["max_amount"])
+    ]
+    return [t.id for t in sorted(keep, key=lambda t: (t.created_at, t.id))]
+
+
+def walk(engine, limit, **filters):
+    ids, cursor, pages = [], None, 0
+    with Session(engine) as session:
+        while True:
+            rows, cursor = pending_reviews(session, cursor, limit, **filters)
+            ids += [r.id for r in rows]
+            pages += 1
+            if cursor is None:
+                return ids, pages
+
+
+def test_pages_cover_the_queue_once_in_order(tmp_path):
+    engine = make_db(tmp_path)
+    ids, pages = walk(engine, limit=7)
+    assert ids == expected(engine)
+    assert pages == len(ids) // 7 + 1
+
+    ids, _ = walk(engine, limit=5, min_risk=50, max_amount=50000)
+    assert ids == expected(engine, min_risk=50, max_amount=50000)
+
+    with Session(engine) as session:
+        rows, _ = pending_reviews(session, limit=500)
+    missing_user = [r for r in rows if r.user_found is None]
+    assert missing_user and all(r.user_name is None for r in missing_user)
+
+
+def test_one_query_per_page_and_index_in_place(tmp_path):
+    engine = make_db(tmp_path)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *a: statements.append(sql))
+    with Session(engine) as session:
+        rows, cursor = pending_reviews(session, limit=10)
+        pending_reviews(session, cursor, limit=10)
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 2
+
+    names = {ix["name"] for ix in inspect(engine).get_indexes("transactions")}
+    assert "ix_transactions_status_created_id" in names
+    with engine.connect() as conn:
+        plan = conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM transactions WHERE status = 'pending_admin_review' "
+            "AND (created_at, id) > ('2025-07-01', 0) ORDER BY created_at, id LIMIT 10"
+        )).all()
+    assert any("ix_transactions_status_created_id" in str(row) for row in plan)
+    assert not any("TEMP B-TREE" in str(row) for row in plan)
+
+
+def test_cursor_round_trip_and_garbage():
+    cursor = encode_cursor(datetime(2025, 7, 1, 9, 30, 0, 123456), 42)
+    assert decode_cursor(cursor) == (datetime(2025, 7, 1, 9, 30, 0, 123456), 42)
+    for bad in ["not-a-cursor", "W10", encode_cursor(datetime(2025, 7, 1), 1)[:-3]]:
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+
+
+def test_upgrade_adds_the_index_to_an_existing_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_transactions_status_created_id"))
+    assert migrations.upgrade(engine) == ["ix_transactions_status_created_id"]
+    assert migrations.upgrade(engine) == []
+
+
+def newest_first(engine, user_id=None):
+    with Session(engine) as session:
+        query = session.query(Transaction)
+        if user_id is not None:
+            query = query.filter_by(user_id=user_id)
+        return [t.id for t in sorted(query.all(), key=lambda t: (t.created_at, t.id), reverse=True)]
+
+
+def test_transaction_listing_pages_and_stream_agree(tmp_path):
+    engine = make_db(tmp_path)
+    cols = (Transaction.created_at, Transaction.id)
+    for user_id in (None, 3):
+        query = transactions_query(("id", "amount"), user_id)
+        with Session(engine) as session:
+            streamed = [list(chunk) for chunk in keyset_stream(session, query, *cols, descending=True, chunk_rows=8)]
+            paged, cursor = [], None
+            while True:
+                rows, cursor = keyset_page(session, query, *cols, cursor, 9, descending=True)
+                paged += [r.id for r in rows]
+                if cursor is None:
+                    break
+            # A stream can resume from a page cursor
+            first, cursor = keyset_page(session, query, *cols, None, 9, descending=True)
+            rest = [r.id for chunk in keyset_stream(session, query, *cols, cursor, descending=True) for r in chunk]
+        assert all(0 < len(chunk) <= 8 for chunk in streamed)
+        assert [r.id for chunk in streamed for r in chunk] == paged == newest_first(engine, user_id)
+        assert [r.id for r in first] + rest == paged
+
+
+def test_fields_projection(tmp_path):
+    default = ("id", "amount", "created_at")
+    assert parse_fields(None, TRANSACTION_FIELDS, default) == default
+    assert parse_fields("details, id,details", TRANSACTION_FIELDS, default) == ("details", "id")
+    with pytest.raises(ValueError):
+        parse_fields("id,password_hash", TRANSACTION_FIELDS, default)
+
+    engine = make_db(tmp_path, n=3)
+    with Session(engine) as session:
+        row = session.execute(transactions_query(("amount",))).first()
+    assert "details" not in row._fields
+    assert transaction_json(row, ("amount",)) == {"amount": str(row.amount)}
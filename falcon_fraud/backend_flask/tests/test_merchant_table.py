@@ -0,0 +1,67 @@
+# tests/test_merchant_table.py
+
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.merchant_table import MERCHANT_DTYPE, MerchantTable
+
+
+MERCHANTS = pd.DataFrame([
+    {"beneficiary_account": "67558956185", "merchant_category": "Travel", "device_type": "POS", "merchant_lat": 21.23, "merchant_lon": 81.63},
+    {"beneficiary_account": "ACC2002", "merchant_category": "Crypto", "device_type": "Mobile", "merchant_lat": 19.07, "merchant_lon": 72.87},
+    {"beneficiary_account": "67558956185", "merchant_category": "Gaming", "device_type": "ATM", "merchant_lat": 0.0, "merchant_lon": 0.0},
+])
+
+
+def test_lookup_returns_first_row():
+    table = MerchantTable.from_dataframe(MERCHANTS)
+    assert len(table) == 2
+
+    rec = table.lookup(67558956185)
+    assert tuple(rec) == ("Travel", "POS", 21.23, 81.63)
+    assert table.lookup("ACC2002").merchant_category == "Crypto"
+    assert table.lookup("ACC404") is None
+
+
+def test_missing_metadata_columns_use_defaults():
+    df = MERCHANTS[["beneficiary_account", "merchant_lat", "merchant_lon"]]
+    rec = MerchantTable.from_dataframe(df).lookup("ACC2002")
+    assert (rec.merchant_category, rec.device_type) == ("P2P", "Mobile")
+
+
+def test_save_load_roundtrip(tmp_path):
+    path = str(tmp_path / "merchant_table.npy")
+    MerchantTable.from_dataframe(MERCHANTS).save(path)
+
+    table = MerchantTable.load(path, mmap_mode="r")
+    assert isinstance(table.records, np.memmap)
+    assert tuple(table.lookup("67558956185")) == ("Travel", "POS", 21.23, 81.63)
+
+
+def test_tables_with_the_old_code_columns_still_load(tmp_path):
+    path = str(tmp_path / "merchant_table.npy")
+    old_dtype = np.dtype(MERCHANT_DTYPE.descr + [("merchant_category_code", "i4"), ("device_type_code", "i4")])
+    records = np.zeros(1, dtype=old_dtype)
+    records[0] = (b"ACC2002", b"Crypto", b"Mobile", 19.07, 72.87, 3, 1)
+    np.save(path, records)
+    assert tuple(MerchantTable.load(path).lookup("ACC2002")) == ("Crypto", "Mobile", 19.07, 72.87)
+
+
+def test_long_category_and_device_names_are_not_truncated():
+    df = pd.DataFrame([
+        {"beneficiary_account": "ACC3003", "merchant_category": "Travel & Hospitality - International Bookings",
+         "device_type": "Point-of-Sale Terminal", "merchant_lat": 12.97, "merchant_lon": 77.59},
+    ])
+    rec = MerchantTable.from_dataframe(pd.concat([MERCHANTS, df])).lookup("ACC3003")
+    assert rec.merchant_category == "Travel & Hospitality - International Bookings"
+    assert rec.device_type == "Point-of-Sale Terminal"
+
+
+def test_account_ids_longer_than_the_key_are_rejected():
+    df = MERCHANTS.assign(beneficiary_account="A" * 33)
+    with pytest.raises(ValueError, match="longer than 32 bytes"):
+        MerchantTable.from_dataframe(df)
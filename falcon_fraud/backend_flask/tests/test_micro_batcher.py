@@ -0,0 +1,82 @@
+# tests/test_micro_batcher.py
+
+import threading
+import time
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.micro_batcher import MicroBatcher
+
+
+def test_concurrent_callers_get_their_own_results():
+    seen_batches = []
+
+    def score(items):
+        seen_batches.append(len(items))
+        time.sleep(0.002)
+        return [x * 10 for x in items]
+
+    batcher = MicroBatcher(score, max_batch_size=8, max_wait_ms=5)
+    results = {}
+
+    def call(i):
+        results[i] = batcher.submit(i)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(40)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+
+    assert results == {i: i * 10 for i in range(40)}
+    assert max(seen_batches) <= 8
+    assert len(seen_batches) < 40
+    stats = batcher.stats()
+    assert stats["items"] == 40 and stats["batches"] == len(seen_batches)
+
+
+def test_idle_requests_are_not_delayed():
+    batcher = MicroBatcher(lambda items: items, max_batch_size=64, max_wait_ms=50)
+    start = time.perf_counter()
+    for i in range(5):
+        assert batcher.submit(i) == i
+    elapsed = time.perf_counter() - start
+    batcher.close()
+    assert batcher.window == 0.0
+    assert elapsed < 0.05
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    def score(items):
+        raise ValueError("model exploded")
+
+    batcher = MicroBatcher(score)
+    try:
+        batcher.submit(1)
+        assert False, "expected ValueError"
+    except ValueError as e:
+        assert "exploded" in str(e)
+    batcher.close()
+
+
+def test_short_results_fail_every_caller_in_the_batch():
+    # Drops the last item, so no caller may silently get None
+    batcher = MicroBatcher(lambda items: items[:-1], max_batch_size=8, max_wait_ms=200)
+    errors = []
+
+    def call(i):
+        try:
+            batcher.submit(i)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+    assert len(errors) == 4
+    assert all("results for a batch of" in e for e in errors)
@@ -0,0 +1,174 @@
+# tests/test_model_registry.py
+
+import errno
+import numpy as np
+import joblib
+import pytest
+import sys
+import os
+import yaml
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from sklearn.ensemble import RandomForestClassifier, IsolationForest
+from sklearn.preprocessing import LabelEncoder, MinMaxScaler, StandardScaler
+
+from utils.model_registry import ModelRegistry, ModelLoader, publish_artifacts
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "config", "features_config.yaml")
+with open(CONFIG_PATH) as f:
+    config = yaml.safe_load(f)
+
+NUMERICAL = config["features"]["numerical"]
+N_FEATURES = len(NUMERICAL) + len(config["features"]["categorical"])
+
+
+def write_bundle(directory, seed=0, always_fraud=False):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(400, N_FEATURES))
+    y = np.ones(400, dtype=int) if always_fraud else (X[:, 0] > 1.5).astype(int)
+    if always_fraud:
+        y[0] = 0
+        X[0] = 1e6
+    scaler = StandardScaler().fit(X)
+    iso = IsolationForest(n_estimators=5, random_state=seed).fit(scaler.transform(X))
+    encoders = {col: LabelEncoder().fit(["NEFT", "POS", "Travel", "Unknown"]) for col in config["features"]["categorical"]}
+    objects = {
+        "rf": RandomForestClassifier(n_estimators=5, random_state=seed).fit(scaler.transform(X), y),
+        "iso": iso,
+        "rf_scaler": scaler,
+        "iso_scaler": scaler,
+        "encoders": encoders,
+        "iso_risk_scaler": MinMaxScaler((0, 100)).fit(-iso.decision_function(scaler.transform(X)).reshape(-1, 1)),
+    }
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for key, obj in objects.items():
+        paths[key] = os.path.join(directory, key + ".pkl")
+        joblib.dump(obj, paths[key])
+    return paths
+
+
+def make_txn(i):
+    txn = {col: float(i % 3) for col in NUMERICAL}
+    txn.update({"transaction_type": "NEFT", "merchant_category": "Travel", "device_type": "POS"})
+    return txn
+
+
+def test_publish_activate_and_rollback(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    v1 = registry.bootstrap(write_bundle(str(tmp_path / "a")))
+    assert registry.bootstrap(write_bundle(str(tmp_path / "b"), seed=1)) == v1
+
+    v2 = registry.publish(write_bundle(str(tmp_path / "b"), seed=1), {"source": "test"})
+    assert registry.versions() == [v1, v2] and registry.current() == v1
+    assert registry.manifest(v2)["metadata"] == {"source": "test"}
+
+    rows = [make_txn(i) for i in range(20)]
+    loader = ModelLoader(registry, config, warmup_rows=lambda: rows)
+    loader.activate(registry.current())
+    old = loader.bundle
+    before = old.score_rows(rows)
+
+    loader.activate(v2)
+    assert loader.bundle.version == v2 and registry.current() == v2
+    # Requests that grabbed the old bundle keep getting its answers
+    assert all(np.array_equal(a, b) for a, b in zip(old.score_rows(rows), before))
+
+    loader.rollback()
+    assert loader.bundle.version == v1 and registry.current() == v1
+    assert [e["version"] for e in registry.history()] == [v1, v2, v1]
+
+
+def test_insane_bundle_is_rejected_and_old_one_keeps_serving(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    v1 = registry.bootstrap(write_bundle(str(tmp_path / "a")))
+    bad = registry.publish(write_bundle(str(tmp_path / "bad"), always_fraud=True))
+
+    loader = ModelLoader(registry, config, warmup_rows=lambda: [make_txn(i) for i in range(20)])
+    loader.activate(v1)
+    with pytest.raises(ValueError, match="as fraud"):
+        loader.activate(bad)
+    assert loader.bundle.version == v1 and registry.current() == v1
+    assert loader.status()["last_error"]["version"] == bad
+
+
+def test_repeated_rollbacks_walk_back_and_never_return_a_rolled_back_version(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    v1 = registry.bootstrap(write_bundle(str(tmp_path / "a")))
+    v2 = registry.publish(write_bundle(str(tmp_path / "b"), seed=1))
+    v3 = registry.publish(write_bundle(str(tmp_path / "c"), seed=2))
+    loader = ModelLoader(registry, config, warmup_rows=lambda: [make_txn(i) for i in range(20)])
+    for version in (v1, v2, v3):
+        loader.activate(version)
+
+    loader.rollback()
+    assert registry.current() == v2 and registry.previous() == v1
+    loader.rollback()
+    assert loader.bundle.version == v1 and registry.current() == v1
+    assert registry.previous() is None
+    with pytest.raises(ValueError, match="No previous"):
+        loader.rollback()
+
+    # Activating a rolled-back version again puts it back on the stack
+    loader.activate(v3)
+    assert registry.previous() == v1
+    assert registry.history()[-2]["rolled_back_from"] == v2
+
+
+def test_startup_falls_back_to_the_newest_bundle_that_loads(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    v1 = registry.bootstrap(write_bundle(str(tmp_path / "a")))
+    v2 = registry.publish(write_bundle(str(tmp_path / "b"), seed=1))
+    v3 = registry.publish(write_bundle(str(tmp_path / "c"), seed=2))
+    registry.activate(v3)
+    with open(registry.paths(v3)["rf_scaler"], "wb") as f:
+        f.write(b"not a pickle")
+
+    loader = ModelLoader(registry, config, warmup_rows=lambda: [make_txn(i) for i in range(20)])
+    loader.activate_first_loadable()
+    assert loader.bundle.version == v2 and registry.current() == v2
+    assert loader.status()["last_error"] is None and v3 in loader._failed
+    assert v1 in registry.versions()
+
+
+def test_publish_artifacts_replaces_part_of_the_current_bundle(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    script_config = dict(config, model_paths=write_bundle(str(tmp_path / "loose")))
+    other = write_bundle(str(tmp_path / "b"), seed=1)
+
+    # An empty registry first takes the loose pickles as the parent
+    version, warmup = publish_artifacts(registry, script_config, {"rf": joblib.load(other["rf"])}, {"source": "test"})
+    v1 = registry.versions()[0]
+    assert registry.versions() == [v1, version] and registry.current() == version == warmup["version"]
+    assert registry.manifest(version)["metadata"] == {"source": "test", "parent": v1}
+    files, parent_files = registry.manifest(version)["files"], registry.manifest(v1)["files"]
+    assert files["rf"]["sha256"] != parent_files["rf"]["sha256"]
+    assert all(files[k] == parent_files[k] for k in files if k != "rf")
+
+    # A bundle that fails warm-up is published but never becomes CURRENT
+    with pytest.raises(RuntimeError, match="failed warm-up"):
+        publish_artifacts(registry, script_config, {"iso_risk_scaler": "not a scaler"})
+    assert registry.current() == version and len(registry.versions()) == 3
+
+
+def test_workers_bootstrapping_together_share_one_version(tmp_path):
+    root = str(tmp_path / "registry")
+    # Another worker's bootstrap got its rename in but has not written CURRENT yet
+    other = ModelRegistry(root).publish(write_bundle(str(tmp_path / "a")), {"source": "bootstrap"}, version="v0001")
+    registry = ModelRegistry(root)
+    assert registry.bootstrap(write_bundle(str(tmp_path / "b"), seed=1)) == other == "v0001"
+    assert registry.versions() == ["v0001"] and registry.current() == "v0001"
+    assert not [name for name in os.listdir(root) if name.startswith(".staging-")]
+
+
+def test_publish_gives_up_on_errors_other_than_a_taken_name(tmp_path, monkeypatch):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    paths = write_bundle(str(tmp_path / "a"))
+
+    def rename(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "rename", rename)
+    with pytest.raises(OSError) as excinfo:
+        registry.publish(paths)
+    assert excinfo.value.errno == errno.EXDEV
+    assert os.listdir(registry.root) == []
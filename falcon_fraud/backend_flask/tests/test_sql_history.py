@@ -0,0 +1,146 @@
+# tests/test_sql_history.py
+
+import random
+import pandas as pd
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import mssql, mysql
+from types import SimpleNamespace
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import migrations
+from models import TxnHistoryEntry
+from utils.sql_history import SqlTxnHistory, _insert_ignore, enable_wal
+from utils.txn_history import HistoryStore, TxnHistory
+
+NOW = datetime(2025, 9, 1, 12, 0)
+
+
+def make_log(n=1500, days=40, seed=13):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        ts = NOW - timedelta(seconds=rng.randint(0, days * 86400))
+        rows.append({
+            "sender_account": f"S{rng.randint(1, 30)}",
+            "beneficiary_account": f"B{rng.randint(1, 20)}" if rng.random() > 0.02 else None,
+            "timestamp": ts.isoformat(),
+        })
+    rows.append({"sender_account": "S999", "beneficiary_account": "B999", "timestamp": "garbage"})
+    return pd.DataFrame(rows).sort_values("timestamp", ignore_index=True)
+
+
+def make_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.db'}")
+    enable_wal(engine)
+    return engine
+
+
+def assert_same_features(store, flat, now):
+    for s in list(range(0, 32)) + [999]:
+        sender = f"S{s}"
+        assert store.time_since_last_txn(sender, now) == flat.time_since_last_txn(sender, now)
+        for b in list(range(0, 22)) + [999]:
+            beneficiary = f"B{b}"
+            assert store.time_diff_mins(sender, beneficiary, now) == flat.time_diff_mins(sender, beneficiary, now)
+            assert store.is_new_beneficiary(sender, beneficiary) == flat.is_new_beneficiary(sender, beneficiary)
+            assert store.is_rapid_repeat(sender, beneficiary, now=now) == flat.is_rapid_repeat(sender, beneficiary, now=now)
+
+
+def test_sql_store_answers_like_the_in_memory_history(tmp_path):
+    df = make_log()
+    flat = TxnHistory.from_dataframe(df)
+    store = SqlTxnHistory(make_engine(tmp_path), batch_size=7, background=False)
+    store.ingest(df, source="seg-1", now=NOW)
+    assert_same_features(store, flat, NOW)
+
+    # Runtime adds, some still buffered when looked up
+    rng = random.Random(2)
+    for i in range(60):
+        ts = NOW + timedelta(minutes=i)
+        sender, beneficiary = f"S{rng.randint(1, 30)}", f"B{rng.randint(1, 20)}"
+        store.add(sender, beneficiary, ts)
+        flat.add(sender, beneficiary, ts)
+    assert store.stats()["pending"] > 0
+    assert_same_features(store, flat, NOW + timedelta(hours=1))
+    store.close()
+    assert store.stats()["pending"] == 0
+    assert_same_features(store, flat, NOW + timedelta(hours=1))
+
+
+def test_workers_share_one_history_and_replay_is_idempotent(tmp_path):
+    df = make_log()
+    engine = make_engine(tmp_path)
+    first = SqlTxnHistory(engine, replay_window_days=7, background=False)
+    second = SqlTxnHistory(make_engine(tmp_path), replay_window_days=7, background=False)
+
+    old = df[pd.to_datetime(df["timestamp"], errors="coerce") < NOW - timedelta(days=20)]
+    for store in (first, second):
+        store.ingest(old, source="seg-old", now=NOW)
+        store.ingest(df.drop(old.index), source="seg-recent", now=NOW)
+    assert first.finish_replay() == ["seg-old"]
+    assert second.replayed_sources() == {"seg-old"}
+    with engine.connect() as conn:
+        stored = conn.execute(text("SELECT count(*) FROM txn_history")).scalar()
+        mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+    assert mode == "wal"
+    # Rows without a beneficiary are deduplicated on replay too
+    assert stored == len(df)
+
+    first.add("S1", "B-new", NOW + timedelta(minutes=5))
+    assert second.is_new_beneficiary("S1", "B-new") == 1
+    first.flush()
+    assert second.is_new_beneficiary("S1", "B-new") == 0
+    assert second.time_diff_mins("S1", "B-new", NOW + timedelta(minutes=15)) == 10.0
+
+
+def test_mysql_inserts_ignore_and_other_dialects_fail_at_construction():
+    stmt = _insert_ignore(SimpleNamespace(dialect=mysql.dialect()), TxnHistoryEntry.__table__)
+    assert str(stmt.compile(dialect=mysql.dialect())).startswith("INSERT IGNORE INTO txn_history")
+    with pytest.raises(ValueError, match="not mssql"):
+        SqlTxnHistory(SimpleNamespace(dialect=mssql.dialect()))
+
+
+def test_history_store_is_abstract():
+    with pytest.raises(TypeError):
+        HistoryStore()
+
+
+def test_replaying_rows_without_a_beneficiary_is_a_no_op(tmp_path):
+    log = pd.DataFrame([
+        {"sender_account": "S1", "beneficiary_account": None, "timestamp": NOW.isoformat()},
+        {"sender_account": "S1", "beneficiary_account": float("nan"), "timestamp": (NOW - timedelta(hours=1)).isoformat()},
+        {"sender_account": "S1", "beneficiary_account": "B1", "timestamp": NOW.isoformat()},
+    ])
+    engine = make_engine(tmp_path)
+    store = SqlTxnHistory(engine, background=False)
+    for _ in range(3):
+        store.ingest(log, now=NOW)
+    store.add("S1", None, NOW)
+    store.flush()
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT beneficiary_account, ts FROM txn_history ORDER BY ts, beneficiary_account")).all()
+    assert [b for b, _ in rows] == ["", "", "B1"]
+    assert store.last_txn_time("S1") == NOW and store.is_new_beneficiary("S1", "B1") == 0
+
+
+def test_migration_drops_duplicate_null_beneficiaries(tmp_path):
+    engine = make_engine(tmp_path)
+    with engine.begin() as conn:
+        # The table as it was created while beneficiary_account was nullable
+        conn.execute(text(
+            "CREATE TABLE txn_history (id INTEGER PRIMARY KEY, sender_account VARCHAR(64) NOT NULL, "
+            "beneficiary_account VARCHAR(64), ts BIGINT NOT NULL)"
+        ))
+        conn.execute(text(
+            "INSERT INTO txn_history (sender_account, beneficiary_account, ts) VALUES "
+            "('S1', NULL, 1), ('S1', NULL, 1), ('S1', NULL, 2), ('S2', NULL, 1), ('S1', 'B1', 1), ('S1', NULL, 2)"
+        ))
+    migrations.upgrade(engine)
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, sender_account, beneficiary_account, ts FROM txn_history ORDER BY id")).all()
+    assert [tuple(r) for r in rows] == [(1, "S1", "", 1), (3, "S1", "", 2), (4, "S2", "", 1), (5, "S1", "B1", 1)]
+    assert migrations.upgrade(engine) == []
@@ -0,0 +1,108 @@
+# tests/test_tiered_history.py
+
+import multiprocessing
+import random
+import pandas as pd
+from datetime import datetime, timedelta
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.tiered_history import ColdHistory, TieredTxnHistory
+from utils.txn_history import TxnHistory
+
+NOW = datetime(2025, 9, 1, 12, 0)
+
+
+def make_log(n=3000, days=60, seed=11):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        ts = NOW - timedelta(seconds=rng.randint(0, days * 86400))
+        rows.append({
+            "sender_account": f"S{rng.randint(1, 40)}",
+            "beneficiary_account": f"B{rng.randint(1, 30)}" if rng.random() > 0.02 else None,
+            "timestamp": ts.isoformat(),
+        })
+    rows.append({"sender_account": "S999", "beneficiary_account": "B999", "timestamp": "garbage"})
+    return pd.DataFrame(rows).sort_values("timestamp", ignore_index=True)
+
+
+def assert_same_features(tiered, flat, now):
+    for s in list(range(0, 42)) + [999]:
+        sender = f"S{s}"
+        assert tiered.time_since_last_txn(sender, now) == flat.time_since_last_txn(sender, now)
+        for b in list(range(0, 32)) + [999]:
+            beneficiary = f"B{b}"
+            assert tiered.time_diff_mins(sender, beneficiary, now) == flat.time_diff_mins(sender, beneficiary, now)
+            assert tiered.is_new_beneficiary(sender, beneficiary) == flat.is_new_beneficiary(sender, beneficiary)
+
+
+def test_tiers_answer_like_a_flat_history(tmp_path):
+    df = make_log()
+    flat = TxnHistory.from_dataframe(df)
+    tiered = TieredTxnHistory(str(tmp_path / "cold"), hot_window_days=7, max_hot_rows=10 ** 6,
+                              evict_every=50, cold_partitions=4, cold_cache_partitions=2, background=False)
+    tiered.ingest(df, now=NOW)
+    assert 0 < tiered.hot.rows < len(df)
+    assert_same_features(tiered, flat, NOW)
+
+    # Runtime adds keep evicting rows as the window slides
+    rng = random.Random(5)
+    for i in range(400):
+        ts = NOW + timedelta(hours=i)
+        sender, beneficiary = f"S{rng.randint(1, 40)}", f"B{rng.randint(1, 30)}"
+        tiered.add(sender, beneficiary, ts)
+        flat.add(sender, beneficiary, ts)
+    assert tiered.evictions > 0
+    assert_same_features(tiered, flat, NOW + timedelta(hours=400))
+
+
+def test_memory_ceiling_evicts_inside_the_window(tmp_path):
+    df = make_log()
+    flat = TxnHistory.from_dataframe(df)
+    tiered = TieredTxnHistory(str(tmp_path / "cold"), hot_window_days=365, max_hot_rows=500,
+                              evict_every=10 ** 6, cold_partitions=4, background=False)
+    tiered.ingest(df, now=NOW)
+    assert tiered.hot.rows <= 500
+    assert_same_features(tiered, flat, NOW)
+
+
+def test_restart_skips_compacted_sources(tmp_path):
+    df = make_log()
+    old = df[pd.to_datetime(df["timestamp"], errors="coerce") < NOW - timedelta(days=30)]
+    recent = df.drop(old.index)
+    flat = TxnHistory.from_dataframe(df)
+    cold_dir = str(tmp_path / "cold")
+
+    first = TieredTxnHistory(cold_dir, hot_window_days=7, cold_partitions=4, background=False)
+    first.ingest(old, source="seg-old", now=NOW)
+    first.ingest(recent, source="seg-recent", now=NOW)
+    assert first.finish_replay() == ["seg-old"]
+
+    second = TieredTxnHistory(cold_dir, hot_window_days=7, cold_partitions=16, background=False)
+    assert second.cold.compacted_sources == {"seg-old"} and second.cold.n_partitions == 4
+    second.ingest(recent, source="seg-recent", now=NOW)
+    assert_same_features(second, flat, NOW)
+
+
+def merge_one_by_one(cold_dir, worker):
+    cold = ColdHistory(cold_dir, n_partitions=1)
+    for i in range(40):
+        cold.merge([(f"W{worker}S{i}", f"B{i}", 1000 + i)])
+    cold.mark_compacted([f"seg-{worker}"])
+
+
+def test_workers_sharing_a_cold_dir_keep_every_row(tmp_path):
+    cold_dir = str(tmp_path / "cold")
+    workers = [multiprocessing.get_context("fork").Process(target=merge_one_by_one, args=(cold_dir, w)) for w in range(4)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join(60)
+        assert p.exitcode == 0
+
+    cold = ColdHistory(cold_dir)
+    assert len(cold) == 4 * 40
+    assert cold.last_pair_us("W3S39", "B39") == 1039
+    assert cold.compacted_sources == {"seg-0", "seg-1", "seg-2", "seg-3"}
@@ -0,0 +1,65 @@
+# tests/test_training.py
+
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from sklearn.ensemble import RandomForestClassifier, IsolationForest
+from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from utils.dataset_cache import load_training_dataset
+from utils.training import train_models
+
+
+@pytest.fixture
+def dataset(tmp_path, config, make_transactions):
+    make_transactions(1500).to_csv(tmp_path / "txns.csv", index=False)
+    return load_training_dataset(str(tmp_path / "txns.csv"), str(tmp_path / "cache"), config, report=lambda line: None)
+
+
+def sequential_scripts(dataset):
+    """train_rf.py then train_iso.py, one step after another."""
+    labels = pd.DataFrame({"is_fraud": dataset.y})
+    df_fraud, df_legit_pool = labels[labels["is_fraud"] == 1], labels[labels["is_fraud"] == 0]
+    df_legit = df_legit_pool.sample(n=min(len(df_legit_pool), len(df_fraud) * 10), random_state=42)
+    sample = pd.concat([df_fraud, df_legit]).sample(frac=1, random_state=42).index.to_numpy()
+    X, y = dataset.features(sample), dataset.y[sample]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    rf_scaler = StandardScaler()
+    X_train_scaled = rf_scaler.fit_transform(X_train)
+    rf = RandomForestClassifier(n_estimators=100, max_depth=10, min_samples_split=10,
+                                min_samples_leaf=4, max_features=4, random_state=42).fit(X_train_scaled, y_train)
+    cv_score = cross_val_score(rf, X_train_scaled, y_train, cv=5).mean()
+
+    df_fraud = labels[labels["is_fraud"] == 1].sample(n=min(1000, len(df_fraud)), random_state=42)
+    df_legit = labels[labels["is_fraud"] == 0].sample(n=min(29000, len(df_legit_pool)), random_state=42)
+    iso_sample = pd.concat([df_fraud, df_legit]).sample(frac=1, random_state=42).index.to_numpy()
+    iso_scaler = StandardScaler()
+    X_iso_scaled = iso_scaler.fit_transform(dataset.features(iso_sample))
+    iso = IsolationForest(n_estimators=100, contamination=0.01, random_state=42).fit(X_iso_scaled)
+    risk_scaler = MinMaxScaler((0, 100)).fit(-iso.decision_function(X_iso_scaled).reshape(-1, 1))
+    return {"rf": rf, "rf_scaler": rf_scaler, "iso": iso, "iso_scaler": iso_scaler,
+            "iso_risk_scaler": risk_scaler}, cv_score
+
+
+def test_pool_training_matches_the_scripts(dataset, config):
+    expected, cv_score = sequential_scripts(dataset)
+    artifacts, metrics, stages = train_models(dataset, config, workers=2, report=lambda line: None)
+
+    X = np.random.default_rng(1).normal(size=(500, len(dataset.feature_cols)))
+    assert np.array_equal(artifacts["rf"].predict_proba(X), expected["rf"].predict_proba(X))
+    assert np.array_equal(artifacts["iso"].decision_function(X), expected["iso"].decision_function(X))
+    for key in ("rf_scaler", "iso_scaler"):
+        assert np.array_equal(artifacts[key].mean_, expected[key].mean_)
+        assert np.array_equal(artifacts[key].scale_, expected[key].scale_)
+    assert artifacts["iso_risk_scaler"].data_min_ == expected["iso_risk_scaler"].data_min_
+    assert artifacts["iso_risk_scaler"].data_max_ == expected["iso_risk_scaler"].data_max_
+    assert artifacts["encoders"] is dataset.label_encoders
+    assert metrics["cv_accuracy"] == cv_score
+
+    names = [stage["stage"] for stage in stages]
+    assert "RF fit" in names and "ISO fit + risk scaler" in names
+    assert [name for name in names if name.startswith("RF CV fold")] == [f"RF CV fold {k}" for k in range(1, 6)]
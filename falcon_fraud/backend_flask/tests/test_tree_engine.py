@@ -0,0 +1,80 @@
+# tests/test_tree_engine.py
+
+import numpy as np
+import joblib
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from sklearn.ensemble import RandomForestClassifier, IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+from utils.tree_engine import CompiledRandomForest, CompiledIsolationForest
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
+
+
+def make_data(n=2000, n_features=18, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(loc=50, scale=20, size=(n, n_features))
+    X[:, 3] = rng.integers(0, 5, n)  # a categorical-looking column with ties
+    y = (X[:, 0] + X[:, 3] * 10 + rng.normal(scale=10, size=n) > 80).astype(int)
+    return X, y
+
+
+def test_random_forest_is_bit_exact():
+    X, y = make_data()
+    scaler = StandardScaler().fit(X)
+    rf = RandomForestClassifier(n_estimators=30, max_depth=8, max_features=4, random_state=42)
+    rf.fit(scaler.transform(X), y)
+    X_new, _ = make_data(500, seed=1)
+    for fold in (True, False):
+        compiled = CompiledRandomForest(rf, scaler, fold_scaler=fold)
+        assert np.array_equal(compiled.predict_proba(X_new), rf.predict_proba(scaler.transform(X_new)))
+        assert np.array_equal(compiled.predict(X_new), rf.predict(scaler.transform(X_new)))
+        assert compiled.predict(X_new[0]).shape == (1,)
+
+
+def test_isolation_forest_with_feature_subsampling_is_bit_exact():
+    X, _ = make_data()
+    scaler = StandardScaler().fit(X)
+    iso = IsolationForest(n_estimators=40, max_features=0.5, contamination=0.01, random_state=42)
+    iso.fit(scaler.transform(X))
+    X_new, _ = make_data(500, seed=2)
+    compiled = CompiledIsolationForest(iso, scaler)
+    assert np.array_equal(compiled.decision_function(X_new), iso.decision_function(scaler.transform(X_new)))
+
+
+def test_shipped_iso_model_on_folded_thresholds():
+    iso = joblib.load(os.path.join(MODELS_DIR, "iso_forest_model.pkl"))
+    scaler = joblib.load(os.path.join(MODELS_DIR, "iso_scaler.pkl"))
+    compiled = CompiledIsolationForest(iso, scaler)
+
+    # Put each row exactly on, just above and just below a folded split
+    split = np.flatnonzero(np.isfinite(compiled.threshold))[:300]
+    X = np.tile(scaler.mean_, (len(split) * 3, 1))
+    for k, node in enumerate(split):
+        t, f = compiled.threshold[node], compiled.feature[node]
+        X[3 * k:3 * k + 3, f] = [t, np.nextafter(t, np.inf), np.nextafter(t, -np.inf)]
+
+    expected = iso.decision_function(scaler.transform(X))
+    assert np.array_equal(compiled.decision_function(X), expected)
+
+
+def test_save_load_memory_maps_arrays(tmp_path):
+    X, y = make_data()
+    scaler = StandardScaler().fit(X)
+    rf = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0).fit(scaler.transform(X), y)
+    iso = IsolationForest(n_estimators=10, max_features=0.5, random_state=0).fit(scaler.transform(X))
+    X_new, _ = make_data(200, seed=3)
+
+    for fold in (True, False):
+        compiled_rf = CompiledRandomForest(rf, scaler, fold_scaler=fold)
+        compiled_rf.save(str(tmp_path / f"rf{fold}"))
+        loaded_rf = CompiledRandomForest.load(str(tmp_path / f"rf{fold}"))
+        assert isinstance(loaded_rf.threshold, np.memmap)
+        assert np.array_equal(loaded_rf.predict_proba(X_new), compiled_rf.predict_proba(X_new))
+
+    compiled_iso = CompiledIsolationForest(iso, scaler)
+    compiled_iso.save(str(tmp_path / "iso"))
+    loaded_iso = CompiledIsolationForest.load(str(tmp_path / "iso"))
+    assert np.array_equal(loaded_iso.decision_function(X_new), iso.decision_function(scaler.transform(X_new)))
@@ -0,0 +1,83 @@
+# tests/test_txn_history.py
+
+import random
+import pandas as pd
+from datetime import datetime, timedelta
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.feature_engineering import (
+    get_time_diff_mins, get_time_since_last_txn, is_new_beneficiary, is_rapid_repeat
+)
+from utils.txn_history import TxnHistory, PendingHistory
+
+
+def make_log(n=500, seed=7):
+    rng = random.Random(seed)
+    start = datetime(2025, 7, 1, 9, 0)
+    rows = []
+    for _ in range(n):
+        ts = start + timedelta(seconds=rng.randint(0, 3 * 3600))
+        rows.append({
+            "sender_account": f"S{rng.randint(1, 15)}",
+            "beneficiary_account": f"B{rng.randint(1, 10)}",
+            "timestamp": ts.isoformat()
+        })
+    return pd.DataFrame(rows)
+
+
+def test_history_matches_dataframe_scans():
+    df = make_log()
+    history = TxnHistory.from_dataframe(df)
+    now = datetime(2025, 7, 1, 11, 30)
+    for s in range(0, 17):
+        for b in range(0, 12):
+            sender, beneficiary = f"S{s}", f"B{b}"
+            assert history.time_diff_mins(sender, beneficiary, now) == get_time_diff_mins(sender, beneficiary, df, now)
+            assert history.is_new_beneficiary(sender, beneficiary) == is_new_beneficiary(sender, beneficiary, df)
+            assert history.is_rapid_repeat(sender, beneficiary, now=now) == is_rapid_repeat(sender, beneficiary, df, now=now)
+        assert history.time_since_last_txn(f"S{s}", now) == get_time_since_last_txn(f"S{s}", df, now)
+
+
+def test_add_keeps_index_in_sync():
+    df = make_log(50)
+    history = TxnHistory.from_dataframe(df)
+    now = datetime(2025, 7, 1, 12, 5)
+    extra = [("S1", "B99", now - timedelta(minutes=m)) for m in (50, 2, 30)]
+    for sender, beneficiary, ts in extra:
+        history.add(sender, beneficiary, ts.isoformat())
+        df.loc[len(df)] = [sender, beneficiary, ts.isoformat()]
+
+    assert history.last_pair_time("S1", "B99") == now - timedelta(minutes=2)
+    assert history.count_pair_since("S1", "B99", now - timedelta(minutes=40)) == 2
+    assert history.is_rapid_repeat("S1", "B99", now=now)
+    assert history.time_since_last_txn("S1", now) == get_time_since_last_txn("S1", df, now)
+
+
+def test_empty_history():
+    history = TxnHistory.from_dataframe(pd.DataFrame(columns=["sender_account", "beneficiary_account", "timestamp"]))
+    now = datetime(2025, 7, 1)
+    assert history.time_since_last_txn("A1", now) == 0.0
+    assert history.time_diff_mins("A1", "B1", now) == 0.0
+    assert history.is_new_beneficiary("A1", "B1") == 1
+    assert not history.is_rapid_repeat("A1", "B1", now=now)
+
+
+def test_pending_rows_are_seen_but_not_committed():
+    df = make_log()
+    base, pending_part = df.iloc[:400], df.iloc[400:]
+    history = TxnHistory.from_dataframe(base)
+    pending = PendingHistory(history)
+    pending.ingest(pending_part)
+    full = TxnHistory.from_dataframe(df)
+    now = datetime(2025, 7, 1, 11, 30)
+    for s in range(0, 17):
+        for b in range(0, 12):
+            sender, beneficiary = f"S{s}", f"B{b}"
+            assert pending.time_diff_mins(sender, beneficiary, now) == full.time_diff_mins(sender, beneficiary, now)
+            assert pending.is_new_beneficiary(sender, beneficiary) == full.is_new_beneficiary(sender, beneficiary)
+            assert pending.count_pair_since(sender, beneficiary, now - timedelta(hours=1)) == \
+                full.count_pair_since(sender, beneficiary, now - timedelta(hours=1))
+        assert pending.time_since_last_txn(f"S{s}", now) == full.time_since_last_txn(f"S{s}", now)
+    assert len(history) == 400
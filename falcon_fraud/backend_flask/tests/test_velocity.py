@@ -0,0 +1,100 @@
+# tests/test_velocity.py
+
+import random
+import pandas as pd
+from datetime import datetime, timedelta
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.velocity import VelocityCounters, PendingVelocity
+
+WINDOWS = {"1m": 60, "1h": 3600, "24h": 86400}
+START = datetime(2025, 7, 1, 9, 0)
+
+
+def make_events(n=2000, seed=3):
+    rng = random.Random(seed)
+    events = []
+    for _ in range(n):
+        events.append((
+            f"S{rng.randint(1, 8)}",
+            f"B{rng.randint(1, 5)}",
+            START + timedelta(seconds=rng.randint(0, 2 * 86400)),
+            float(rng.randint(1, 5000)),
+        ))
+    return sorted(events, key=lambda e: e[2])
+
+
+def brute_force(events, key_fn, key, window_secs, at, n_buckets=60):
+    # Same bucketed window the counters use: the current bucket and the n-1 before it
+    width = window_secs / n_buckets
+    bucket = lambda ts: int((ts - datetime(1970, 1, 1)).total_seconds() // width)
+    lo, hi = bucket(at) - n_buckets + 1, bucket(at)
+    hits = [e for e in events if key_fn(e) == key and lo <= bucket(e[2]) <= hi]
+    return len(hits), sum(e[3] for e in hits)
+
+
+def test_counters_match_brute_force_windows():
+    events = make_events()
+    counters = VelocityCounters(WINDOWS, buckets_per_window=60, sweep_every=0)
+    seen = []
+    rng = random.Random(0)
+    for i, (sender, beneficiary, ts, amount) in enumerate(events):
+        if i % 50 == 0:
+            scope, key_fn, key = rng.choice([
+                ("sender", lambda e: e[0], sender),
+                ("beneficiary", lambda e: e[1], beneficiary),
+                ("pair", lambda e: (e[0], e[1]), (sender, beneficiary)),
+            ])
+            for window, secs in WINDOWS.items():
+                count, total = counters.get(scope, key, window, ts)
+                expected_count, expected_total = brute_force(seen, key_fn, key, secs, ts)
+                assert count == expected_count
+                assert abs(total - expected_total) < 1e-6
+        counters.add(sender, beneficiary, ts, amount)
+        seen.append((sender, beneficiary, ts, amount))
+
+
+def test_late_events_and_features():
+    counters = VelocityCounters({"1h": 3600}, buckets_per_window=60)
+    counters.add("S1", "B1", START + timedelta(minutes=30), 100)
+    counters.add("S1", "B1", START + timedelta(minutes=10), 50)      # late, still in window
+    counters.add("S1", "B2", START - timedelta(hours=2), 999)        # late, already expired
+    at = START + timedelta(minutes=31)
+    assert counters.features("S1", "B1", at, ["sender_txn_count_1h", "pair_amount_sum_1h"]) == {
+        "sender_txn_count_1h": 2, "pair_amount_sum_1h": 150.0
+    }
+    assert counters.count("pair", "S1", "B1", "1h", START + timedelta(minutes=75)) == 1
+
+
+def test_idle_keys_are_swept_and_replay_reads_the_log():
+    log = pd.DataFrame([
+        {"sender_account": f"S{i}", "beneficiary_account": "B1",
+         "timestamp": (START + timedelta(minutes=i)).isoformat(), "amount": "10"}
+        for i in range(10)
+    ] + [{"sender_account": "S0", "beneficiary_account": "B1", "timestamp": "not a date", "amount": ""}])
+    config = {"windows": {"1h": 3600}, "buckets_per_window": 60, "sweep_every": 1}
+    counters = VelocityCounters.from_dataframe(log, config)
+    assert counters.get("beneficiary", "B1", "1h", START + timedelta(minutes=10)) == (10, 100.0)
+
+    counters.add("S99", "B9", START + timedelta(hours=3))
+    # Only the newest transaction's sender, beneficiary and pair survive
+    assert len(counters) == 3
+
+
+def test_pending_counts_add_up_to_the_committed_ones():
+    events = make_events(600)
+    base = VelocityCounters(WINDOWS, buckets_per_window=60, sweep_every=0)
+    full = VelocityCounters(WINDOWS, buckets_per_window=60, sweep_every=0)
+    pending = PendingVelocity(base)
+    for k, (sender, beneficiary, ts, amount) in enumerate(events):
+        (base if k < 500 else pending).add(sender, beneficiary, ts, amount)
+        full.add(sender, beneficiary, ts, amount)
+    at = events[-1][2]
+    for s in range(1, 9):
+        for b in range(1, 6):
+            assert pending.features(f"S{s}", f"B{b}", at) == full.features(f"S{s}", f"B{b}", at)
+    # Nothing reached the base counters
+    assert sum(base.count("sender", f"S{s}", None, "24h", at) for s in range(1, 9)) < \
+        sum(full.count("sender", f"S{s}", None, "24h", at) for s in range(1, 9))
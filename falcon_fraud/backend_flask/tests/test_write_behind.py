@@ -0,0 +1,92 @@
+# tests/test_write_behind.py
+
+import threading
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine, event, select, func
+from sqlalchemy.exc import OperationalError
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from models import db, Notification, AdminAction
+from utils.write_behind import WriteBehindQueue
+
+
+def make_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    db.metadata.create_all(engine, tables=[Notification.__table__, AdminAction.__table__])
+    return engine
+
+
+def count_commits(engine):
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+    return commits
+
+
+def count(engine, model):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(model.__table__)).scalar()
+
+
+def test_rows_from_many_threads_share_commits(tmp_path):
+    engine = make_engine(tmp_path)
+    commits = count_commits(engine)
+    queue = WriteBehindQueue(engine, batch_size=50, flush_interval_secs=0.05)
+
+    def post(t):
+        for i in range(100):
+            queue.put(Notification.__table__, {"user_id": t, "message": f"txn {i}", "created_at": datetime.utcnow()})
+            if i % 10 == 0:
+                queue.put(AdminAction.__table__, {"admin_id": 1, "transaction_id": i, "action": "note"})
+
+    threads = [threading.Thread(target=post, args=(t,)) for t in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    queue.close()
+
+    assert count(engine, Notification) == 400
+    assert count(engine, AdminAction) == 40
+    # Both tables land in the same transactions, far fewer than one per row
+    assert len(commits) == queue.flushes and queue.flushes <= 440 // 50 + 10
+    assert queue.stats()["queued"] == 0 and queue.stats()["written"] == 440
+
+
+def test_a_bad_row_does_not_sink_its_batch(tmp_path):
+    engine = make_engine(tmp_path)
+    queue = WriteBehindQueue(engine, batch_size=1000, background=False)
+    queue.put(Notification.__table__, {"user_id": 1, "message": "ok"})
+    queue.put(Notification.__table__, {"user_id": 2, "message": None})    # NOT NULL
+    queue.put(Notification.__table__, {"user_id": 3, "message": "also ok", "read": True})
+    assert len(queue) == 3 and count(engine, Notification) == 0
+
+    assert queue.flush() == 2
+    assert queue.dropped == 1
+    assert count(engine, Notification) == 2
+
+
+def test_batches_wait_out_a_database_outage(tmp_path):
+    # The database directory does not exist yet: every connect fails
+    engine = create_engine(f"sqlite:///{tmp_path / 'down' / 'app.db'}")
+    queue = WriteBehindQueue(engine, batch_size=1000, flush_interval_secs=0.1, max_backoff_secs=0.3, background=False)
+    for i in range(3):
+        queue.put(Notification.__table__, {"user_id": i, "message": f"txn {i}"})
+
+    backoffs = []
+    for _ in range(3):
+        with pytest.raises(OperationalError):
+            queue.flush()
+        backoffs.append(queue.backoff_secs)
+    assert backoffs == [0.1, 0.2, 0.3]
+    assert len(queue) == 3 and queue.dropped == 0
+    queue.put(Notification.__table__, {"user_id": 3, "message": "txn 3"})
+
+    os.makedirs(tmp_path / "down")
+    db.metadata.create_all(engine, tables=[Notification.__table__])
+    assert queue.flush() == 4 and queue.backoff_secs == 0.0
+    with engine.connect() as conn:
+        users = conn.execute(select(Notification.__table__.c.user_id).order_by(Notification.__table__.c.id)).scalars()
+        assert list(users) == [0, 1, 2, 3]
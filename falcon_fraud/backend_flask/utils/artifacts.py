@@ -0,0 +1,142 @@
+"""Shared, memory-mapped model artifacts for multi-process serving.
+
+``build_compiled_models`` writes the flattened RF and IsolationForest arrays
+(see tree_engine) under one directory, tagged with a fingerprint of the
+pickles they were compiled from.  ``load_compiled_models`` maps them back
+read-only; when the pickles have changed since the build it returns None so
+the caller can recompile instead of serving stale trees.
+
+Read-only file mappings live in the page cache, so N workers that map the
+same files (whether forked from a ``--preload`` master or started fresh)
+hold one physical copy between them.  ``memory_report`` reads
+``/proc/self/smaps_rollup`` to show how much of a worker's RSS is shared.
+"""
+import hashlib
+import os
+import re
+
+from utils.tree_engine import CompiledRandomForest, CompiledIsolationForest
+
+RF_DIR = "rf"
+ISO_DIR = "iso"
+
+# Pickles each compiled forest is derived from
+SOURCES = {
+    RF_DIR: ("rf", "rf_scaler"),
+    ISO_DIR: ("iso", "iso_scaler"),
+}
+
+
+def fingerprint(paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_fingerprints(model_paths):
+    return {name: fingerprint([model_paths[key] for key in keys]) for name, keys in SOURCES.items()}
+
+
+def build_compiled_models(model_paths, artifacts_dir, fold_scalers=True):
+    import joblib
+
+    fingerprints = _source_fingerprints(model_paths)
+    rf = CompiledRandomForest(
+        joblib.load(model_paths["rf"]), joblib.load(model_paths["rf_scaler"]), fold_scaler=fold_scalers
+    )
+    rf.save(os.path.join(artifacts_dir, RF_DIR), fingerprint=fingerprints[RF_DIR])
+    iso = CompiledIsolationForest(
+        joblib.load(model_paths["iso"]), joblib.load(model_paths["iso_scaler"]), fold_scaler=fold_scalers
+    )
+    iso.save(os.path.join(artifacts_dir, ISO_DIR), fingerprint=fingerprints[ISO_DIR])
+    return rf, iso
+
+
+def load_compiled_models(model_paths, artifacts_dir, fold_scalers=True, mmap_mode="r"):
+    """(compiled_rf, compiled_iso) mapped from disk, or None if missing or stale."""
+    dirs = {name: os.path.join(artifacts_dir, name) for name in SOURCES}
+    if not all(os.path.exists(os.path.join(d, "meta.json")) for d in dirs.values()):
+        return None
+    fingerprints = _source_fingerprints(model_paths)
+    for name, d in dirs.items():
+        meta = CompiledRandomForest.read_meta(d)
+        if meta["fingerprint"] != fingerprints[name] or meta["folded"] != bool(fold_scalers):
+            return None
+    return (
+        CompiledRandomForest.load(dirs[RF_DIR], mmap_mode=mmap_mode),
+        CompiledIsolationForest.load(dirs[ISO_DIR], mmap_mode=mmap_mode),
+    )
+
+
+_SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty", "Anonymous")
+_SMAPS_LINE = re.compile(r"^(\w+):\s+(\d+) kB")
+_SMAPS_HEADER = re.compile(r"^[0-9a-f]+-[0-9a-f]+ \S+ \S+ \S+ \S+\s*(.*)$")
+
+
+def _read_smaps_rollup(path="/proc/self/smaps_rollup"):
+    totals = {}
+    with open(path) as f:
+        for line in f:
+            m = _SMAPS_LINE.match(line)
+            if m and m.group(1) in _SMAPS_FIELDS:
+                totals[m.group(1)] = int(m.group(2))
+    return totals
+
+
+def _mapped_file_usage(prefixes, path="/proc/self/smaps"):
+    """Rss/Pss (kB) of the file mappings whose path starts with one of prefixes."""
+    usage = {"Rss": 0, "Pss": 0, "mappings": 0}
+    current = None
+    with open(path) as f:
+        for line in f:
+            header = _SMAPS_HEADER.match(line)
+            if header:
+                name = header.group(1)
+                current = name if name.startswith(prefixes) else None
+                if current is not None:
+                    usage["mappings"] += 1
+                continue
+            if current is None:
+                continue
+            m = _SMAPS_LINE.match(line)
+            if m and m.group(1) in ("Rss", "Pss"):
+                usage[m.group(1)] += int(m.group(2))
+    return usage
+
+
+def memory_report(mapped_dirs=()):
+    """Resident vs shared memory of this process in MB.
+
+    ``pss_mb`` charges each shared page 1/N to each of the N processes
+    mapping it, so summing ``pss_mb`` over all workers gives their true
+    combined footprint.  ``artifacts`` covers the mappings under
+    ``mapped_dirs``.
+    """
+    report = {"pid": os.getpid()}
+    try:
+        totals = _read_smaps_rollup()
+    except OSError:
+        import resource
+        report["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        return report
+
+    mb = {k: round(v / 1024, 1) for k, v in totals.items()}
+    report.update(
+        rss_mb=mb.get("Rss", 0.0),
+        pss_mb=mb.get("Pss", 0.0),
+        shared_mb=round(mb.get("Shared_Clean", 0.0) + mb.get("Shared_Dirty", 0.0), 1),
+        private_mb=round(mb.get("Private_Clean", 0.0) + mb.get("Private_Dirty", 0.0), 1),
+        anonymous_mb=mb.get("Anonymous", 0.0),
+    )
+    if mapped_dirs:
+        prefixes = tuple(os.path.abspath(d) for d in mapped_dirs)
+        usage = _mapped_file_usage(prefixes)
+        report["artifacts"] = {
+            "mappings": usage["mappings"],
+            "rss_mb": round(usage["Rss"] / 1024, 1),
+            "pss_mb": round(usage["Pss"] / 1024, 1),
+        }
+    return report
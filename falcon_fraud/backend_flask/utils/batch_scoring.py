@@ -0,0 +1,238 @@
+"""Chunked, multi-process offline scoring of a transactions CSV.
+
+The input is read ``chunk_rows`` rows at a time, with fixed dtypes and
+only the columns scoring needs, and each chunk goes to a process pool
+whose workers load the model bundle once.  A worker writes its chunk as a
+part directory under ``output_dir`` (one .npy file per output column plus
+the chunk's review-queue rows) and renames it into place when complete.
+
+The parent commits parts in input order: it appends the part's review rows
+to the review-queue CSV, fsyncs it, and records in progress.json how many
+chunks are committed and how long the review file was at that point.
+After a crash, a rerun truncates the review file back to that length,
+reuses any part already on disk and reads on from the first uncommitted
+chunk.  At most ``workers * (in_flight + 1)`` chunks are in flight at
+once, so memory stays bounded however long the input is.
+"""
+import json
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from decision_logic import DECISIONS, GEO_ANOMALY_KM, RISK_LEVELS, decide_many
+from utils.model_registry import ModelBundle
+
+REVIEW_DECISION = DECISIONS.index("🔍 Send to Admin")
+PENDING_VERDICT = "🕒 Pending"
+PROGRESS_FILE = "progress.json"
+# Read when the input has it; the app derives it from live velocity counters
+RAPID_REPEAT_COLUMN = "is_rapid_repeat"
+
+
+def part_dir(output_dir, index):
+    return os.path.join(output_dir, f"part-{index:05d}")
+
+
+def _write_json_atomic(path, obj):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(obj, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+# 🔧 Per-worker state, set once by the pool initializer
+_worker = {}
+
+
+def _init_worker(paths, config):
+    # Chunks are far above compiled_max_rows, so skip mapping the compiled trees
+    config = {**config, "inference": {**config["inference"], "engine": "sklearn"}}
+    _worker["bundle"] = ModelBundle("batch", paths, None, config)
+    _worker["config"] = config
+
+
+def score_chunk(index, first_row, df, output_dir, passthrough):
+    """Score one chunk in a worker and write its part directory; returns (index, meta)."""
+    bundle = _worker["bundle"]
+    plan = bundle.feature_plan
+    X = plan.frame(df)
+    rf_pred, anomaly_scores, risk_scores = bundle.score_matrix(X)
+    risk_level, decision = decide_many(
+        rf_pred, risk_scores, X[:, plan.columns.index("amount")], _worker["config"],
+        geo_anomaly=X[:, plan.columns.index("geo_distance_km")] > GEO_ANOMALY_KM,
+        rapid_repeat=df[RAPID_REPEAT_COLUMN].fillna(0).to_numpy() != 0 if RAPID_REPEAT_COLUMN in df else None,
+        channel=df["transaction_type"].astype(object).to_numpy(),
+    )
+
+    final = part_dir(output_dir, index)
+    tmp = final + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    columns = {
+        "row": np.arange(first_row, first_row + len(df), dtype="i8"),
+        "rf_pred": rf_pred.astype("i1"),
+        "anomaly_score": anomaly_scores,
+        "risk_score": risk_scores,
+        "risk_level": risk_level,
+        "final_decision": decision,
+    }
+    for col in passthrough:
+        columns[col] = df[col].astype(str).to_numpy(dtype=str)
+    for name, values in columns.items():
+        np.save(os.path.join(tmp, name + ".npy"), values)
+
+    review = decision == REVIEW_DECISION
+    review_df = df[review].copy()
+    review_df["rf_pred"] = rf_pred[review]
+    review_df["risk_score"] = risk_scores[review]
+    review_df["risk_level"] = np.asarray(RISK_LEVELS)[risk_level[review]]
+    review_df["final_decision"] = DECISIONS[REVIEW_DECISION]
+    review_df["human_verdict"] = PENDING_VERDICT
+    review_df.to_csv(os.path.join(tmp, "review.csv"), index=False, header=False)
+
+    meta = {
+        "rows": len(df),
+        "review_rows": int(review.sum()),
+        "counts": dict(zip(DECISIONS, np.bincount(decision, minlength=len(DECISIONS)).tolist())),
+        "review_columns": list(review_df.columns),
+    }
+    _write_json_atomic(os.path.join(tmp, "meta.json"), meta)
+    shutil.rmtree(final, ignore_errors=True)
+    os.rename(tmp, final)
+    return index, meta
+
+
+def score_file(input_path, output_dir, review_path, paths, config, workers=None, restart=False, report=print):
+    """Score ``input_path`` into ``output_dir`` and ``review_path``; returns the final progress record.
+
+    ``paths`` are the model bundle files (same keys as config["model_paths"]).
+    A run over the same input, models and chunk size resumes where the last
+    one stopped; anything else needs ``restart=True``.
+    """
+    batch_config = config["batch_scoring"]
+    chunk_rows = batch_config["chunk_rows"]
+    workers = workers or batch_config["workers"] or os.cpu_count()
+    max_in_flight = workers * (batch_config["in_flight"] + 1)
+
+    numerical, categorical = config["features"]["numerical"], config["features"]["categorical"]
+    header = list(pd.read_csv(input_path, nrows=0).columns)
+    missing = [c for c in numerical + categorical if c not in header]
+    if missing:
+        raise ValueError(f"{input_path} is missing feature columns: {missing}")
+    passthrough = [c for c in batch_config["passthrough"] + [RAPID_REPEAT_COLUMN]
+                   if c in header and c not in numerical + categorical]
+    usecols = [c for c in header if c in numerical or c in categorical or c in passthrough]
+    dtype = {**{c: "float64" for c in numerical}, **{c: "category" for c in categorical},
+             **{c: str for c in passthrough if c != RAPID_REPEAT_COLUMN}}
+
+    stat = os.stat(input_path)
+    source = {
+        "input": os.path.abspath(input_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "chunk_rows": chunk_rows,
+        "models": {k: os.path.abspath(v) for k, v in sorted(paths.items())},
+    }
+    progress_path = os.path.join(output_dir, PROGRESS_FILE)
+    progress = _read_json(progress_path)
+    if progress is not None and progress["source"] != source and not restart:
+        raise RuntimeError(f"{output_dir} holds a run over a different input, models or chunk size; restart it")
+    if restart or progress is None or progress["source"] != source:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        os.makedirs(output_dir)
+        os.makedirs(os.path.dirname(os.path.abspath(review_path)), exist_ok=True)
+        open(review_path, "wb").close()
+        progress = {"source": source, "committed_chunks": 0, "review_bytes": 0, "rows": 0,
+                    "counts": dict.fromkeys(DECISIONS, 0), "complete": False}
+        _write_json_atomic(progress_path, progress)
+    if progress["complete"]:
+        report(f"✅ {input_path} already scored: {progress['rows']:,} rows")
+        return progress
+    if not os.path.exists(review_path) or os.path.getsize(review_path) < progress["review_bytes"]:
+        raise RuntimeError(f"{review_path} is shorter than {progress_path} records; restart the run")
+
+    start_chunk = progress["committed_chunks"]
+    if start_chunk:
+        report(f"↩️ Resuming at chunk {start_chunk} (row {start_chunk * chunk_rows:,})")
+    reader = pd.read_csv(input_path, usecols=usecols, dtype=dtype, chunksize=chunk_rows,
+                         skiprows=range(1, start_chunk * chunk_rows + 1))
+    finished, futures = {}, {}
+    started, scored = time.perf_counter(), 0
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(paths, config)) as pool, \
+            open(review_path, "ab") as review:
+        review.truncate(progress["review_bytes"])
+
+        def collect(done):
+            for future in done:
+                del futures[future]
+                index, meta = future.result()
+                finished[index] = meta
+
+        def commit():
+            nonlocal scored
+            while progress["committed_chunks"] in finished:
+                index = progress["committed_chunks"]
+                meta = finished.pop(index)
+                if progress["review_bytes"] == 0:
+                    review.write(pd.DataFrame(columns=meta["review_columns"]).to_csv(index=False).encode("utf-8"))
+                with open(os.path.join(part_dir(output_dir, index), "review.csv"), "rb") as f:
+                    shutil.copyfileobj(f, review)
+                review.flush()
+                os.fsync(review.fileno())
+                progress["committed_chunks"] = index + 1
+                progress["review_bytes"] = review.tell()
+                progress["rows"] += meta["rows"]
+                for decision, n in meta["counts"].items():
+                    progress["counts"][decision] += n
+                _write_json_atomic(progress_path, progress)
+                scored += meta["rows"]
+                rate = scored / max(time.perf_counter() - started, 1e-9)
+                report(f"📦 Chunk {index}: {progress['rows']:,} rows scored ({rate:,.0f} rows/s), "
+                       f"{meta['review_rows']:,} queued for review")
+
+        for index, chunk in enumerate(reader, start=start_chunk):
+            meta = _read_json(os.path.join(part_dir(output_dir, index), "meta.json"))
+            if meta is not None:
+                # Scored before a crash but never committed
+                finished[index] = meta
+            else:
+                futures[pool.submit(score_chunk, index, index * chunk_rows, chunk, output_dir, passthrough)] = index
+            del chunk
+            while len(futures) >= max_in_flight:
+                collect(wait(futures, return_when=FIRST_COMPLETED).done)
+            commit()
+        while futures:
+            collect(wait(futures, return_when=FIRST_COMPLETED).done)
+            commit()
+        commit()
+
+    progress["complete"] = True
+    _write_json_atomic(progress_path, progress)
+    report(f"✅ Scored {progress['rows']:,} rows in {time.perf_counter() - started:.1f}s: {progress['counts']}")
+    return progress
+
+
+def load_scored(output_dir, columns=("row", "risk_score", "final_decision")):
+    """The committed output columns of a run, concatenated across parts."""
+    progress = _read_json(os.path.join(output_dir, PROGRESS_FILE))
+    parts = [part_dir(output_dir, i) for i in range(progress["committed_chunks"])]
+    return {
+        col: np.concatenate([np.load(os.path.join(p, col + ".npy"), mmap_mode="r") for p in parts])
+        if parts else np.empty(0)
+        for col in columns
+    }
@@ -0,0 +1,259 @@
+"""Typed, columnar cache of a training CSV and its encoded feature matrix.
+
+The training scripts each re-parsed transactionsnew2.csv with default
+dtypes and redid the label encoding on every run.  load_training_dataset
+parses it once into ``<cache dir>/<csv stem>-<key>/``:
+
+  meta.json               rows, columns and their kinds, feature columns
+  columns/NNN.npy         one array per CSV column: numbers as parsed,
+                          text as int32 category codes (-1 = missing)
+  columns/NNN.cats.npy    the categories those codes index
+  X.npy                   encoded float32 feature matrix, rows x features
+  y.npy                   int8 labels
+  encoders.pkl            the LabelEncoders X was encoded with
+
+The key hashes the CSV's bytes together with the feature list, encoding
+suffix and label column, so changing any of them builds a new cache; an
+unchanged one is memory-mapped, not parsed.  Builds for older versions of
+the CSV are left in place, since another process may still be reading
+one; ``prune_dataset_cache`` (scripts/prune_dataset_cache.py) removes
+them.  Encoding follows the training scripts: missing values count as 0 (the string "0" in text
+columns) and every encoder has an "Unknown" class for values it never saw.
+"""
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+FORMAT_VERSION = 1
+MISSING_CATEGORY = "0"   # what fillna(0) + astype(str) made of a missing text value
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def dataset_key(csv_path, config, label):
+    """Cache key of ``csv_path`` under the config's feature list."""
+    inputs = {
+        "source": file_sha256(csv_path),
+        "numerical": config["features"]["numerical"],
+        "categorical": config["features"]["categorical"],
+        "encoding_suffix": config["encoding_suffix"],
+        "label": label,
+        "format": FORMAT_VERSION,
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def fit_encoder(categories):
+    """A LabelEncoder over ``categories`` plus Unknown, as the training scripts fit them."""
+    return LabelEncoder().fit([str(c) for c in categories] + ["Unknown"])
+
+
+def encode_categorical(values, encoder):
+    """float32 codes of a pandas Categorical under ``encoder``; unseen values get Unknown."""
+    classes = {str(c): i for i, c in enumerate(encoder.classes_)}
+    unknown = classes.get("Unknown", len(classes))
+    # One lookup per category; code -1 (missing) picks the last entry
+    lut = np.array([classes.get(str(c), unknown) for c in values.categories]
+                   + [classes.get(MISSING_CATEGORY, unknown)], dtype="f4")
+    return lut[np.asarray(values.codes)]
+
+
+def encode_frame(df, numerical, categorical, label_encoders):
+    """Encoded float32 feature matrix of a DataFrame of raw columns."""
+    X = np.empty((len(df), len(numerical) + len(categorical)), dtype="f4")
+    for i, col in enumerate(numerical):
+        X[:, i] = df[col].to_numpy(dtype="f8", na_value=0.0)
+    for i, col in enumerate(categorical):
+        values = df[col].array if isinstance(df[col].dtype, pd.CategoricalDtype) else _as_categorical(df[col])
+        X[:, len(numerical) + i] = encode_categorical(values, label_encoders[col])
+    return X
+
+
+def _as_categorical(series):
+    return pd.Categorical(series.astype(str).where(series.notna()))
+
+
+class TrainingDataset:
+    """A built cache directory; arrays are memory-mapped."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.meta = meta
+        self.rows = meta["rows"]
+        self.label = meta["label"]
+        self.numerical = meta["numerical"]
+        self.categorical = meta["categorical"]
+        self.feature_cols = meta["feature_cols"]
+        self.columns = [c["name"] for c in meta["columns"]]
+        self._columns = {c["name"]: c for c in meta["columns"]}
+        self.X = np.load(os.path.join(path, "X.npy"), mmap_mode="r")
+        self.y = np.load(os.path.join(path, "y.npy"), mmap_mode="r")
+        self.label_encoders = joblib.load(os.path.join(path, "encoders.pkl"))
+
+    def column(self, name):
+        """One CSV column: a NumPy array, or a pandas Categorical for text."""
+        info = self._columns[name]
+        base = os.path.join(self.path, "columns", info["file"])
+        values = np.load(base + ".npy", mmap_mode="r")
+        if info["kind"] == "categorical":
+            return pd.Categorical.from_codes(values, np.load(base + ".cats.npy"))
+        return values
+
+    def frame(self, columns=None):
+        """The CSV as a DataFrame with categorical dtypes, optionally only ``columns``."""
+        return pd.DataFrame({name: self.column(name) for name in columns or self.columns})
+
+    def features(self, rows=None, label_encoders=None):
+        """Encoded features of ``rows`` (default all) as a DataFrame named like the training columns.
+
+        With ``label_encoders`` other than the cache's (e.g. a saved model's),
+        the categorical columns are recoded from the cached categories.
+        """
+        X = self.X if rows is None else self.X[rows]
+        if label_encoders is not None and not self._same_encoders(label_encoders):
+            X = np.array(X)
+            for i, col in enumerate(self.categorical):
+                values = self.column(col)
+                if rows is not None:
+                    values = values[rows]
+                X[:, len(self.numerical) + i] = encode_categorical(values, label_encoders[col])
+        return pd.DataFrame(X, columns=self.feature_cols, copy=False)
+
+    def encode(self, df):
+        """Encoded features of other raw rows (e.g. feedback) with the cache's encoders."""
+        X = encode_frame(df, self.numerical, self.categorical, self.label_encoders)
+        return pd.DataFrame(X, columns=self.feature_cols, copy=False)
+
+    def _same_encoders(self, label_encoders):
+        return all(
+            list(map(str, label_encoders[col].classes_)) == list(map(str, self.label_encoders[col].classes_))
+            for col in self.categorical
+        )
+
+
+def build_dataset(csv_path, path, config, label):
+    numerical, categorical = config["features"]["numerical"], config["features"]["categorical"]
+    df = pd.read_csv(csv_path, low_memory=False)
+    missing = [c for c in numerical + categorical + [label] if c not in df.columns]
+    if missing:
+        raise ValueError(f"{csv_path} is missing columns: {missing}")
+
+    tmp = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(os.path.join(tmp, "columns"))
+    columns, label_encoders = [], {}
+    for i, name in enumerate(df.columns):
+        base = os.path.join(tmp, "columns", f"{i:03d}")
+        if name in categorical or (df[name].dtype == object and name not in numerical):
+            values = _as_categorical(df[name])
+            np.save(base + ".npy", values.codes.astype("i4"))
+            np.save(base + ".cats.npy", np.asarray(values.categories, dtype=str))
+            df[name] = values
+            kind = "categorical"
+        else:
+            np.save(base + ".npy", df[name].to_numpy())
+            kind = "numeric"
+        columns.append({"name": name, "file": f"{i:03d}", "kind": kind, "dtype": str(df[name].dtype)})
+    for col in categorical:
+        values = df[col].array
+        label_encoders[col] = fit_encoder(list(values.categories) + ([MISSING_CATEGORY] if (values.codes < 0).any() else []))
+
+    X = np.lib.format.open_memmap(os.path.join(tmp, "X.npy"), mode="w+", dtype="f4",
+                                  shape=(len(df), len(numerical) + len(categorical)))
+    X[:] = encode_frame(df, numerical, categorical, label_encoders)
+    X.flush()
+    del X
+    np.save(os.path.join(tmp, "y.npy"), df[label].fillna(0).to_numpy().astype("i1"))
+    joblib.dump(label_encoders, os.path.join(tmp, "encoders.pkl"))
+    meta = {
+        "source": os.path.abspath(csv_path),
+        "rows": len(df),
+        "label": label,
+        "numerical": numerical,
+        "categorical": categorical,
+        "feature_cols": numerical + [col + config["encoding_suffix"] for col in categorical],
+        "columns": columns,
+        "format": FORMAT_VERSION,
+    }
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    try:
+        os.rename(tmp, path)
+    except OSError:
+        # Another process built the same key first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _cache_path(csv_path, cache_dir, config, label):
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f"{stem}-{dataset_key(csv_path, config, label)}")
+
+
+def stale_builds(csv_path, cache_dir, config, label="is_fraud"):
+    """Builds of older versions of ``csv_path`` under the same label and feature list.
+
+    Only a build whose meta.json names this CSV, label and feature list
+    counts; caches of other files, labels or feature lists are never stale.
+    """
+    path = _cache_path(csv_path, cache_dir, config, label)
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    wanted = {
+        "source": os.path.abspath(csv_path),
+        "label": label,
+        "numerical": config["features"]["numerical"],
+        "categorical": config["features"]["categorical"],
+        "feature_cols": config["features"]["numerical"]
+        + [col + config["encoding_suffix"] for col in config["features"]["categorical"]],
+    }
+    stale = []
+    for candidate in sorted(glob.glob(os.path.join(cache_dir, f"{stem}-*"))):
+        if candidate == path or ".tmp-" in candidate:
+            continue
+        try:
+            with open(os.path.join(candidate, "meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if all(meta.get(key) == value for key, value in wanted.items()):
+            stale.append(candidate)
+    return stale
+
+
+def prune_dataset_cache(csv_path, cache_dir, config, label="is_fraud"):
+    """Remove stale_builds(); only run it while no training script is reading them."""
+    stale = stale_builds(csv_path, cache_dir, config, label)
+    for path in stale:
+        shutil.rmtree(path, ignore_errors=True)
+    return stale
+
+
+def load_training_dataset(csv_path, cache_dir, config, label="is_fraud", report=print):
+    """The cached dataset of ``csv_path``, built first if the CSV or the feature list changed."""
+    path = _cache_path(csv_path, cache_dir, config, label)
+    if not os.path.isdir(path):
+        report(f"🧱 Building dataset cache for {csv_path} in {path}")
+        start = time.perf_counter()
+        os.makedirs(cache_dir, exist_ok=True)
+        build_dataset(csv_path, path, config, label)
+        report(f"✅ Dataset cache built in {time.perf_counter() - start:.1f}s")
+        stale = stale_builds(csv_path, cache_dir, config, label)
+        if stale:
+            report(f"🧹 {len(stale)} build(s) of older versions of {csv_path} left in {cache_dir}; "
+                   "scripts/prune_dataset_cache.py removes them")
+    return TrainingDataset(path)
@@ -0,0 +1,63 @@
+"""Engine tuning for the app database, from the ``database`` config section.
+
+SQLite gets its settings as PRAGMAs on every new connection: WAL so
+readers never block the writer, synchronous=NORMAL (durable at each WAL
+checkpoint rather than each commit), a busy timeout instead of instant
+"database is locked" errors, a memory-mapped file and a larger page cache.
+Server databases (DATABASE_URL) get pool sizing instead, passed to
+create_engine through ``engine_options``.
+"""
+import weakref
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# engine -> {pragma: value}; one connect listener per engine reads it
+_pragmas = weakref.WeakKeyDictionary()
+
+
+def sqlite_pragmas(engine, pragmas):
+    """Set ``pragmas`` on every new connection of a SQLite ``engine``; later calls add to them."""
+    if engine.dialect.name != "sqlite":
+        return
+    if engine not in _pragmas:
+        _pragmas[engine] = {}
+
+        @event.listens_for(engine, "connect")
+        def _set_pragmas(dbapi_conn, _record):
+            cursor = dbapi_conn.cursor()
+            for name, value in _pragmas[engine].items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+    _pragmas[engine].update(pragmas)
+
+
+def profile_pragmas(sqlite_config):
+    return {
+        "journal_mode": sqlite_config["journal_mode"],
+        "synchronous": sqlite_config["synchronous"],
+        "busy_timeout": int(sqlite_config["busy_timeout_ms"]),
+        "mmap_size": int(sqlite_config["mmap_size_mb"]) * 2**20,
+        "cache_size": -int(sqlite_config["cache_size_mb"]) * 1024,  # negative: KiB rather than pages
+        "temp_store": sqlite_config["temp_store"],
+    }
+
+
+def engine_options(database_config, url):
+    """Keyword arguments for create_engine (SQLALCHEMY_ENGINE_OPTIONS)."""
+    if database_config["profile"] != "production" or make_url(url).get_backend_name() == "sqlite":
+        return {}
+    pool = database_config["pool"]
+    return {
+        "pool_size": pool["size"],
+        "max_overflow": pool["max_overflow"],
+        "pool_timeout": pool["timeout_secs"],
+        "pool_recycle": pool["recycle_secs"],
+        "pool_pre_ping": pool["pre_ping"],
+    }
+
+
+def apply_profile(engine, database_config):
+    """Register the profile's per-connection settings; call before the engine first connects."""
+    if database_config["profile"] == "production":
+        sqlite_pragmas(engine, profile_pragmas(database_config["sqlite"]))
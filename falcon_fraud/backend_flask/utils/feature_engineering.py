@@ -1,5 +1,6 @@
-from datetime import datetime
-from geopy.distance import geodesic
+from datetime import datetime, timedelta
+import pandas as pd
+from utils.geo import distance_km, cached_distance_km
 
 def get_timestamp():
     return datetime.utcnow()
@@ -7,9 +8,11 @@ def get_timestamp():
 def get_hour(timestamp):
     return timestamp.hour
 
-def get_geo_distance(coord1, coord2):
+def get_geo_distance(coord1, coord2, cached=False):
     try:
-        return geodesic(coord1, coord2).km
+        if cached:
+            return cached_distance_km(tuple(coord1), tuple(coord2))
+        return distance_km(coord1, coord2)
     except:
         return 0.0
 
@@ -19,3 +22,36 @@ def is_new_beneficiary(sender_account, beneficiary_account, txn_df):
         (txn_df["beneficiary_account"] == beneficiary_account)
     ]
     return 1 if prev.empty else 0
+
+# DataFrame-scan versions of the history features; the app serves these from
+# utils.txn_history.TxnHistory, which must stay equivalent to them.
+def get_time_since_last_txn(sender, txn_df, current_time):
+    user_txns = txn_df[txn_df["sender_account"] == sender]
+    if user_txns.empty:
+        return 0.0
+    last_time = pd.to_datetime(user_txns["timestamp"]).max()
+    delta = (current_time - last_time).total_seconds() / 60
+    return round(delta, 2)
+
+def get_time_diff_mins(sender, beneficiary, txn_df, current_time):
+    df = txn_df[
+        (txn_df["sender_account"] == sender) &
+        (txn_df["beneficiary_account"] == beneficiary)
+    ]
+    if df.empty:
+        return 0.0
+    last_time = pd.to_datetime(df["timestamp"]).max()
+    delta = (current_time - last_time).total_seconds() / 60
+    return round(delta, 2)
+
+def is_rapid_repeat(sender, beneficiary, df, threshold=3, minutes=60, now=None):
+    now = now or datetime.now()
+    if df.empty:
+        return False
+    timestamps = pd.to_datetime(df["timestamp"], errors="coerce")
+    recent = df[
+        (df["sender_account"] == sender) &
+        (df["beneficiary_account"] == beneficiary) &
+        (timestamps >= now - timedelta(minutes=minutes))
+    ]
+    return len(recent) >= threshold
@@ -0,0 +1,80 @@
+"""Precompiled feature assembly for the scoring path.
+
+A FeaturePlan is built once from features_config.yaml and the loaded label
+encoders.  It fixes the column order, turns every encoder into a plain
+dict with an Unknown fallback, and writes request values straight into a
+float64 NumPy row, so no DataFrame is built per request and the encoders
+are never mutated.
+"""
+import threading
+
+import numpy as np
+
+
+class FeaturePlan:
+    def __init__(self, config, label_encoders):
+        suffix = config["encoding_suffix"]
+        self.numerical = list(config["features"]["numerical"])
+        self.categorical = list(config["features"]["categorical"])
+        self.columns = self.numerical + [col + suffix for col in self.categorical]
+
+        self.code_maps = {}
+        self.unknown_codes = {}
+        for col in self.categorical:
+            classes = [str(c) for c in label_encoders[col].classes_]
+            codes = {c: i for i, c in enumerate(classes)}
+            self.code_maps[col] = codes
+            # Same code the old request path produced by appending "Unknown" to classes_
+            self.unknown_codes[col] = codes.get("Unknown", len(classes))
+
+        self._local = threading.local()
+
+    def encode(self, col, value):
+        if not isinstance(value, str):
+            return self.unknown_codes[col]
+        return self.code_maps[col].get(value, self.unknown_codes[col])
+
+    def _fill(self, out, data):
+        missing = [c for c in self.numerical if c not in data]
+        if missing:
+            raise KeyError(f"Missing features: {missing}")
+        for i, col in enumerate(self.numerical):
+            out[i] = data[col]
+        offset = len(self.numerical)
+        for i, col in enumerate(self.categorical):
+            out[offset + i] = self.encode(col, data.get(col, "Unknown"))
+        return out
+
+    def row(self, data):
+        """Features for one transaction as a (1, n_features) view of a per-thread buffer.
+
+        The buffer is reused by the next call on the same thread, so score it
+        (or copy it) before building another row.
+        """
+        buf = getattr(self._local, "buf", None)
+        if buf is None:
+            buf = self._local.buf = np.empty((1, len(self.columns)), dtype="f8")
+        self._fill(buf[0], data)
+        return buf
+
+    def matrix(self, rows):
+        X = np.empty((len(rows), len(self.columns)), dtype="f8")
+        for out, data in zip(X, rows):
+            self._fill(out, data)
+        return X
+
+    def frame(self, df):
+        """Features for a DataFrame of raw columns (offline scoring), one column at a time.
+
+        Missing numbers become 0 and missing categories Unknown.  Categorical
+        columns are best read with dtype "category", so each distinct value
+        is looked up once rather than once per row.
+        """
+        X = np.empty((len(df), len(self.columns)), dtype="f8")
+        for i, col in enumerate(self.numerical):
+            X[:, i] = df[col].to_numpy(dtype="f8", na_value=0.0)
+        offset = len(self.numerical)
+        for i, col in enumerate(self.categorical):
+            codes = df[col].map(self.code_maps[col]).astype("f8")
+            X[:, offset + i] = codes.to_numpy(na_value=self.unknown_codes[col])
+        return X
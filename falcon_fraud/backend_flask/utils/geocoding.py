@@ -0,0 +1,201 @@
+"""Deduplicated, cached, rate-limited merchant geocoding.
+
+add_merchant_coords.py used to geocode merchant by merchant, one second
+apart, although the query only ever depends on the city.  Here:
+
+  queries    built once per distinct city ("<CITY>, India", whitespace
+             collapsed), so 31k merchants need ~9.6k lookups
+  cache      append-only JSONL of every answered query; it is the
+             checkpoint, so an interrupted run resumes where it stopped
+             and reruns only look up cities not seen before.  Each record
+             names the geocoder that answered; coordinates are reused
+             whoever found them, but a "not found" only counts for the
+             geocoder that said it, so offline misses never keep
+             Nominatim from trying
+  lookups    a pluggable geocoder (``geocode(query) -> (lat, lon) | None``,
+             raising on transient errors) called from a thread pool, all
+             threads sharing one RateLimiter; errors are retried with
+             backoff and, if they persist, left out of the cache so the
+             next run tries again
+  output     merchants joined to the cache in one pass; no coordinates
+             (not found or failed) is 0.0, 0.0 as before
+
+NominatimGeocoder wraps geopy.  OfflineGeocoder answers from a local
+table, e.g. an existing merchant_metadata_enriched.csv, for tests and
+for runs without network access.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+NO_COORDS = (0.0, 0.0)
+
+
+def city_query(city):
+    """The geocoder query for a merchant city (missing city -> just the country)."""
+    if isinstance(city, str) and city.strip():
+        return " ".join(city.split()).upper() + ", India"
+    return "India"
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+class GeocodeCache:
+    """query -> (lat, lon) or None, persisted as one JSON line per answer of geocoder ``source``."""
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue   # a line cut short by a crash; the query is looked up again
+                    if record["found"]:
+                        self.entries[record["query"]] = (record["lat"], record["lon"])
+                    elif record.get("source") == source:
+                        self.entries[record["query"]] = None
+        elif os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        if self._file.tell() and not _ends_with_newline(path):
+            self._file.write("\n")   # start after the torn line, not inside it
+
+    def __contains__(self, query):
+        return query in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, query):
+        return self.entries.get(query)
+
+    def put(self, query, coords):
+        record = {"query": query, "source": self.source, "found": coords is not None}
+        record["lat"], record["lon"] = coords if coords is not None else (None, None)
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self.entries[query] = coords
+
+    def close(self):
+        self._file.close()
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate_per_sec apart across threads (0 = unlimited)."""
+
+    def __init__(self, rate_per_sec, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1.0 / rate_per_sec if rate_per_sec else 0.0
+        self.clock = clock
+        self.sleep = sleep
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = self.clock()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            self.sleep(slot - now)
+
+
+class NominatimGeocoder:
+    name = "nominatim"
+
+    def __init__(self, user_agent, domain="nominatim.openstreetmap.org", timeout_secs=10):
+        from geopy.geocoders import Nominatim
+        self._geolocator = Nominatim(user_agent=user_agent, domain=domain, timeout=timeout_secs)
+
+    def geocode(self, query):
+        location = self._geolocator.geocode(query)
+        return (location.latitude, location.longitude) if location else None
+
+
+class OfflineGeocoder:
+    """Answers from a query -> (lat, lon) table; ``latency_secs`` stands in for the network."""
+
+    name = "offline"
+
+    def __init__(self, table, latency_secs=0.0):
+        self.table = dict(table)
+        self.latency_secs = latency_secs
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_csv(cls, path, city_col="beneficiary_city", latency_secs=0.0):
+        """Table of an enriched merchant CSV: the first non-zero coordinates per city query."""
+        df = pd.read_csv(path, usecols=[city_col, "merchant_lat", "merchant_lon"])
+        df = df[(df["merchant_lat"] != 0) | (df["merchant_lon"] != 0)]
+        df = df.assign(query=df[city_col].map(city_query)).drop_duplicates("query")
+        return cls(zip(df["query"], zip(df["merchant_lat"], df["merchant_lon"])), latency_secs)
+
+    def geocode(self, query):
+        with self._lock:
+            self.calls += 1
+        if self.latency_secs:
+            time.sleep(self.latency_secs)
+        return self.table.get(query)
+
+
+def geocode_queries(queries, geocoder, cache, workers=4, rate_per_sec=1.0, retries=2, retry_missing=False,
+                    report=print):
+    """Look up every distinct query the cache cannot answer; returns run stats."""
+    start = time.perf_counter()
+    unique = list(dict.fromkeys(queries))
+    pending = [q for q in unique if q not in cache or (retry_missing and cache.get(q) is None)]
+    limiter = RateLimiter(rate_per_sec)
+    stats = {"queries": len(unique), "cached": len(unique) - len(pending), "found": 0, "not_found": 0, "errors": 0}
+    report(f"📍 {len(unique)} distinct queries, {stats['cached']} cached, {len(pending)} to look up "
+           f"on {workers} thread(s) at {rate_per_sec or 'unlimited'}/s")
+
+    def lookup(query):
+        for attempt in range(retries + 1):
+            limiter.wait()
+            try:
+                return geocoder.geocode(query), None
+            except Exception as e:
+                error = e
+                if attempt < retries:
+                    time.sleep(0.5 * 2 ** attempt)
+        return None, error
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(lookup, query): query for query in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            query = futures[future]
+            coords, error = future.result()
+            if error is not None:
+                stats["errors"] += 1
+                report(f"❌ Error geocoding '{query}': {error}")
+            else:
+                cache.put(query, coords)
+                stats["found" if coords is not None else "not_found"] += 1
+            if done % 500 == 0:
+                report(f"💾 {done}/{len(pending)} looked up")
+    stats["secs"] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def merchant_coordinates(merchants, cache, city_col="beneficiary_city"):
+    """``merchants`` with merchant_lat / merchant_lon from the cache (0.0 where there are none)."""
+    cities = merchants[city_col].astype(object)
+    queries = cities.map({city: city_query(city) for city in pd.unique(cities)})
+    coords = {q: cache.get(q) or NO_COORDS for q in pd.unique(queries)}
+    lat_lon = np.array([coords[q] for q in queries], dtype="f8").reshape(-1, 2)
+    return merchants.assign(merchant_lat=lat_lon[:, 0], merchant_lon=lat_lon[:, 1])
@@ -0,0 +1,232 @@
+"""Incremental RF retraining from admin feedback.
+
+retrain_with_feedback.py refits every model and encoder from scratch on
+the base data plus the feedback.  incremental_round starts from the
+active bundle instead:
+
+  encoders   extended, never refitted: existing classes keep their codes
+             and categories first seen in feedback are appended
+  trees      ``new_trees`` trees are grown (warm start) on the new
+             feedback plus a replay sample of the base training rows;
+             before that, up to as many trees ``retire_after_rounds``
+             rounds old are dropped, oldest first, keeping ``min_trees``,
+             and the forest is held within ``max_trees``
+  scalers    rf_scaler stays as it is, because the kept trees split on
+             its output; ISO, its scaler and the risk scaler carry over
+  gate       current and candidate RF are scored on rows neither trains
+             on: the test split of the base training sample plus a fixed
+             hash bucket of the feedback
+
+Feedback rows are keyed by a hash of their contents (a changed verdict
+is a new row).  The keys a round trained on go into its registry
+metadata, and a round skips every key recorded along its parent chain.
+"""
+import copy
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+from utils.dataset_cache import encode_frame
+from utils.training import SEED, rf_sample
+
+FEEDBACK_VERDICTS = {"✅ Not Fraud": 0, "❌ Fraud": 1}
+KEY_COLUMNS = ("transaction_id", "timestamp", "sender_account", "beneficiary_account")
+
+
+def load_feedback(path):
+    """Reviewed rows of the admin review file, with is_fraud from the human verdict."""
+    feedback = pd.read_csv(path, low_memory=False)
+    feedback = feedback[feedback["human_verdict"].isin(FEEDBACK_VERDICTS)].copy()
+    feedback["is_fraud"] = feedback["human_verdict"].map(FEEDBACK_VERDICTS).astype(int)
+    return feedback.reset_index(drop=True)
+
+
+def feedback_hashes(feedback, config):
+    """uint64 content hash of each feedback row (features, ids and verdict)."""
+    features = config["features"]
+    columns = [c for c in features["numerical"] + features["categorical"] + list(KEY_COLUMNS) + ["is_fraud"]
+               if c in feedback.columns]
+    return pd.util.hash_pandas_object(feedback[columns].astype(str), index=False).to_numpy()
+
+
+def extend_encoders(label_encoders, categories):
+    """Encoders with the unseen values of ``categories[col]`` appended after the existing classes.
+
+    Existing codes never move.  The classes are stored as an object array,
+    which sklearn (like FeaturePlan) maps through a dict, so they need not
+    stay sorted.  Encoders with nothing new are returned as they are.
+    """
+    extended = {}
+    for col, encoder in label_encoders.items():
+        classes = [str(c) for c in encoder.classes_]
+        new = sorted({str(c) for c in categories.get(col, ())} - set(classes))
+        if not new:
+            extended[col] = encoder
+            continue
+        extended[col] = LabelEncoder()
+        extended[col].classes_ = np.array(classes + new, dtype=object)
+    return extended
+
+
+def retire_trees(forest, tree_rounds, round_no, incoming, inc_config):
+    """Drop the oldest trees due for retirement before ``incoming`` new ones are added.
+
+    Returns the remaining trees' rounds and how many were dropped.
+    """
+    n = len(tree_rounds)
+    aged = sum(r <= round_no - inc_config["retire_after_rounds"] for r in tree_rounds)
+    # Aged trees are swapped out at most one for one, so the forest turns over gradually
+    drop = min(aged, incoming, max(0, n + incoming - inc_config["min_trees"]))
+    drop = min(n, max(drop, n + incoming - inc_config["max_trees"]))
+    forest.estimators_ = forest.estimators_[drop:]
+    forest.n_estimators = len(forest.estimators_)
+    return tree_rounds[drop:], drop
+
+
+def grow_trees(forest, X, y, n_new, round_no, sample_weight=None):
+    """Append ``n_new`` trees fitted on X, y; each round draws tree seeds from its own stream."""
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + n_new, random_state=SEED + round_no)
+    forest.fit(X, y, sample_weight=sample_weight)
+    forest.set_params(warm_start=False)
+    return forest
+
+
+def holdout_metrics(forest, X, y):
+    proba = forest.predict_proba(X)[:, list(forest.classes_).index(1)]
+    pred = (proba > 0.5).astype(int)
+    return {
+        "rows": int(len(y)),
+        "fraud_rows": int(y.sum()),
+        "auc": float(roc_auc_score(y, proba)) if 0 < y.sum() < len(y) else None,
+        "recall": float(recall_score(y, pred, zero_division=0)),
+        "precision": float(precision_score(y, pred, zero_division=0)),
+        "accuracy": float(accuracy_score(y, pred)),
+    }
+
+
+def gate(current, candidate, inc_config):
+    """Reasons the candidate may not replace the current RF (empty when it may)."""
+    reasons = []
+    if current["auc"] is not None and candidate["auc"] < current["auc"] - inc_config["max_auc_drop"]:
+        reasons.append(f"holdout AUC {candidate['auc']:.4f} vs {current['auc']:.4f}")
+    if candidate["recall"] < current["recall"] - inc_config["max_recall_drop"]:
+        reasons.append(f"holdout fraud recall {candidate['recall']:.4f} vs {current['recall']:.4f}")
+    return reasons
+
+
+def lineage(registry, version):
+    """Round, per-tree rounds and trained-on feedback keys of ``version``'s incremental history."""
+    state = {"round": 0, "tree_rounds": None, "seen": set()}
+    walk = version
+    while walk in registry.versions():
+        incremental = registry.manifest(walk)["metadata"].get("incremental")
+        if incremental is None:
+            break
+        if walk == version:
+            state["round"] = incremental["round"]
+            state["tree_rounds"] = incremental["tree_rounds"]
+        state["seen"].update(incremental["feedback_keys"])
+        walk = incremental["parent"]
+    return state
+
+
+def _split_feedback(feedback, config, seen):
+    inc_config = config["incremental_training"]
+    hashes = feedback_hashes(feedback, config)
+    keys = np.array([f"{h:016x}" for h in hashes])
+    holdout = hashes % 100 < round(inc_config["holdout_fraction"] * 100)
+    new = ~holdout & ~np.isin(keys, list(seen))
+    return keys, holdout, new
+
+
+def incremental_round(bundle, dataset, feedback, state, config, parent=None, report=print):
+    """One retraining round on top of ``bundle`` (artifacts keyed like config["model_paths"]).
+
+    ``state`` is the parent's ``lineage``.  Returns None when the feedback
+    holds nothing new, otherwise a dict with the candidate ``artifacts``,
+    registry ``metadata``, holdout ``metrics`` and the gate's ``reasons``.
+    """
+    inc_config = config["incremental_training"]
+    numerical, categorical = config["features"]["numerical"], config["features"]["categorical"]
+    start = time.perf_counter()
+    round_no = state["round"] + 1
+
+    keys, fb_holdout, fb_new = _split_feedback(feedback, config, state["seen"])
+    if not fb_new.any():
+        report("🟡 No new reviewed feedback since the current bundle")
+        return None
+
+    # 🔤 Encoders: append categories first seen in the feedback
+    rf_scaler, current_encoders = bundle["rf_scaler"], bundle["encoders"]
+    encoders = extend_encoders(current_encoders, {col: feedback[col].dropna().unique() for col in categorical})
+    added_classes = {col: len(encoders[col].classes_) - len(current_encoders[col].classes_) for col in categorical}
+
+    # 🔁 Replay from the base training split; the test split is for the gate
+    sample = rf_sample(dataset.y)
+    train_rows, test_rows = train_test_split(sample, test_size=0.2, random_state=SEED,
+                                             stratify=np.asarray(dataset.y[sample]))
+    rng = np.random.default_rng(SEED + round_no)
+    replay = np.sort(rng.choice(train_rows, size=min(inc_config["replay_rows"], len(train_rows)), replace=False))
+    holdout_rows = np.sort(test_rows[:inc_config["holdout_rows"]])
+
+    new_feedback = feedback[fb_new]
+    X = pd.concat([dataset.features(replay, label_encoders=encoders),
+                   pd.DataFrame(encode_frame(new_feedback, numerical, categorical, encoders), columns=dataset.feature_cols)],
+                  ignore_index=True)
+    y = np.concatenate([dataset.y[replay], new_feedback["is_fraud"].to_numpy()]).astype(int)
+    weights = np.concatenate([np.ones(len(replay)), np.full(len(new_feedback), float(inc_config["feedback_weight"]))])
+    if len(np.unique(y)) < 2:
+        raise ValueError("Round training rows hold a single class; raise replay_rows")
+
+    # 🌲 Age out, then grow
+    forest = copy.copy(bundle["rf"])
+    forest.estimators_ = list(forest.estimators_)
+    tree_rounds = state["tree_rounds"]
+    if tree_rounds is None or len(tree_rounds) != len(forest.estimators_):
+        tree_rounds = [0] * len(forest.estimators_)
+    tree_rounds, retired = retire_trees(forest, list(tree_rounds), round_no, inc_config["new_trees"], inc_config)
+    grow_trees(forest, rf_scaler.transform(X), y, inc_config["new_trees"], round_no, sample_weight=weights)
+    tree_rounds = tree_rounds + [round_no] * inc_config["new_trees"]
+
+    # 🚦 Gate: each model sees the holdout through its own encoders
+    holdout_feedback = feedback[fb_holdout]
+    y_holdout = np.concatenate([dataset.y[holdout_rows], holdout_feedback["is_fraud"].to_numpy()]).astype(int)
+
+    def holdout_matrix(label_encoders):
+        return rf_scaler.transform(pd.concat([
+            dataset.features(holdout_rows, label_encoders=label_encoders),
+            pd.DataFrame(encode_frame(holdout_feedback, numerical, categorical, label_encoders),
+                         columns=dataset.feature_cols),
+        ], ignore_index=True))
+
+    metrics = {
+        "current": holdout_metrics(bundle["rf"], holdout_matrix(current_encoders), y_holdout),
+        "candidate": holdout_metrics(forest, holdout_matrix(encoders), y_holdout),
+    }
+    reasons = gate(metrics["current"], metrics["candidate"], inc_config)
+    secs = time.perf_counter() - start
+    report(f"🌲 Round {round_no}: +{inc_config['new_trees']} trees, -{retired} retired, "
+           f"{len(forest.estimators_)} in the forest ({secs:.1f}s)")
+
+    artifacts = dict(bundle, rf=forest, encoders=encoders)
+    metadata = {
+        "source": "incremental_retrain",
+        "feedback_rows": int(fb_new.sum()),
+        "replay_rows": int(len(replay)),
+        "incremental": {
+            "round": round_no,
+            "parent": parent,
+            "added_trees": inc_config["new_trees"],
+            "retired_trees": retired,
+            "tree_rounds": tree_rounds,
+            "added_classes": added_classes,
+            "holdout": metrics,
+            "secs": round(secs, 3),
+            "feedback_keys": keys[fb_new].tolist(),
+        },
+    }
+    return {"artifacts": artifacts, "metadata": metadata, "metrics": metrics, "reasons": reasons, "secs": secs}
@@ -0,0 +1,130 @@
+"""Keyset-paginated listing queries for the admin and user API.
+
+A page is one query: the rows after the cursor in (created_at, id) order,
+``limit + 1`` of them so the extra row says whether there is a next page.
+The cursor is the (created_at, id) of the last row returned, so it stays
+valid while new rows arrive and, with an index whose trailing columns are
+(created_at, id), every page costs the same however deep it is or however
+long the list has grown.  OFFSET pagination would rescan all earlier rows.
+
+Unbounded listings are streamed instead: ``keyset_stream`` hands rows
+over a chunk at a time, so the caller can encode and send each chunk
+before the next is fetched.
+
+Cursors are opaque to clients: url-safe base64 of a small JSON array.
+"""
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import select, tuple_
+
+from models import Transaction, User
+
+
+def encode_cursor(created_at, row_id):
+    raw = json.dumps([created_at.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def _keyset(query, created_at_col, id_col, cursor, descending):
+    if cursor:
+        key, after = tuple_(created_at_col, id_col), tuple_(*decode_cursor(cursor))
+        query = query.where(key < after if descending else key > after)
+    if descending:
+        return query.order_by(created_at_col.desc(), id_col.desc())
+    return query.order_by(created_at_col, id_col)
+
+
+def keyset_page(session, query, created_at_col, id_col, cursor=None, limit=100, descending=False):
+    """Run one page of ``query``; returns (rows, next_cursor or None)."""
+    query = _keyset(query, created_at_col, id_col, cursor, descending)
+    rows = session.execute(query.limit(limit + 1)).all()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(last.created_at, last.id)
+
+
+def keyset_stream(session, query, created_at_col, id_col, cursor=None, descending=False, chunk_rows=1000):
+    """Every row after ``cursor``, as an iterator of lists of at most ``chunk_rows`` rows.
+
+    The query runs before this returns, so errors surface to the caller,
+    but rows are fetched from the driver one chunk at a time (yield_per,
+    a server-side cursor where the driver has one).
+    """
+    query = _keyset(query, created_at_col, id_col, cursor, descending)
+    result = session.execute(query.execution_options(yield_per=chunk_rows))
+    return result.partitions()
+
+
+def pending_reviews(session, cursor=None, limit=100, min_risk=None, max_risk=None,
+                    min_amount=None, max_amount=None):
+    """The admin review queue, oldest first, joined to the submitting user."""
+    query = (
+        select(
+            Transaction.id,
+            Transaction.amount,
+            Transaction.details,
+            Transaction.risk_score,
+            Transaction.created_at,
+            User.id.label("user_found"),
+            User.name.label("user_name"),
+            User.phone.label("user_phone"),
+        )
+        .outerjoin(User, User.id == Transaction.user_id)
+        .where(Transaction.status == "pending_admin_review")
+    )
+    if min_risk is not None:
+        query = query.where(Transaction.risk_score >= min_risk)
+    if max_risk is not None:
+        query = query.where(Transaction.risk_score <= max_risk)
+    if min_amount is not None:
+        query = query.where(Transaction.amount >= min_amount)
+    if max_amount is not None:
+        query = query.where(Transaction.amount <= max_amount)
+    return keyset_page(session, query, Transaction.created_at, Transaction.id, cursor, limit)
+
+
+TRANSACTION_FIELDS = ("id", "user_id", "amount", "status", "risk_score", "details", "created_at")
+
+
+def parse_fields(value, allowed, default):
+    """``?fields=a,b`` -> ("a", "b"); the large columns are only sent when named."""
+    if not value:
+        return default
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(",") if f.strip()))
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {unknown}")
+    return fields
+
+
+def transactions_query(fields, user_id=None):
+    """Select ``fields`` of transactions (plus the keyset columns), optionally for one user."""
+    names = dict.fromkeys(fields + ("id", "created_at"))
+    query = select(*(getattr(Transaction, name) for name in names))
+    if user_id is not None:
+        query = query.where(Transaction.user_id == user_id)
+    return query
+
+
+def transaction_json(row, fields):
+    out = {}
+    for name in fields:
+        value = getattr(row, name)
+        if name == "amount":
+            value = str(value)
+        elif name == "created_at":
+            value = value.isoformat()
+        out[name] = value
+    return out
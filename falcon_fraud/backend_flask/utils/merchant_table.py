@@ -0,0 +1,109 @@
+"""Packed merchant lookup table for infer_metadata.
+
+The merchant CSV is compiled once into a NumPy structured array sorted by
+account, so a request does a single ``searchsorted`` instead of scanning a
+DataFrame.  The table is saved as a plain ``.npy`` file next to a small JSON
+sidecar.  It holds the category and device strings only: /predict encodes
+them with whichever model bundle is live, so the table never goes stale
+when the encoders change.  The string fields are sized from the longest
+value in the data, so no category or device name is ever truncated.
+"""
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CATEGORY = "P2P"
+DEFAULT_DEVICE = "Mobile"
+
+ACCOUNT_BYTES = 32
+
+
+def merchant_dtype(category_bytes=32, device_bytes=16):
+    return np.dtype([
+        ("account", f"S{ACCOUNT_BYTES}"),
+        ("merchant_category", f"S{max(category_bytes, 1)}"),
+        ("device_type", f"S{max(device_bytes, 1)}"),
+        ("merchant_lat", "f8"),
+        ("merchant_lon", "f8"),
+    ])
+
+
+# Layout of tables built before the string fields were sized from the data
+MERCHANT_DTYPE = merchant_dtype()
+
+MerchantRecord = namedtuple("MerchantRecord", ["merchant_category", "device_type", "merchant_lat", "merchant_lon"])
+
+
+def _width(encoded):
+    return int(encoded.str.len().max()) if len(encoded) else 1
+
+
+def _meta_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+class MerchantTable:
+    def __init__(self, records):
+        self.records = records
+        self.keys = records["account"]
+
+    def __len__(self):
+        return len(self.records)
+
+    @classmethod
+    def from_dataframe(cls, merchant_df):
+        df = merchant_df.dropna(subset=["beneficiary_account"])
+        accounts = df["beneficiary_account"].astype(str).str.strip()
+        encoded = accounts.str.encode("utf-8")
+        too_long = accounts[encoded.str.len() > ACCOUNT_BYTES]
+        if not too_long.empty:
+            raise ValueError(f"Account ids longer than {ACCOUNT_BYTES} bytes: {too_long.iloc[0]}")
+
+        categories = (df["merchant_category"] if "merchant_category" in df else pd.Series(DEFAULT_CATEGORY, index=df.index))
+        devices = (df["device_type"] if "device_type" in df else pd.Series(DEFAULT_DEVICE, index=df.index))
+        categories = categories.fillna(DEFAULT_CATEGORY).astype(str).str.encode("utf-8")
+        devices = devices.fillna(DEFAULT_DEVICE).astype(str).str.encode("utf-8")
+
+        records = np.empty(len(df), dtype=merchant_dtype(_width(categories), _width(devices)))
+        records["account"] = encoded.to_numpy()
+        records["merchant_category"] = categories.to_numpy()
+        records["device_type"] = devices.to_numpy()
+        records["merchant_lat"] = pd.to_numeric(df["merchant_lat"], errors="coerce").fillna(0.0).to_numpy()
+        records["merchant_lon"] = pd.to_numeric(df["merchant_lon"], errors="coerce").fillna(0.0).to_numpy()
+
+        # Stable sort + keep first, matching the row a DataFrame filter + iloc[0] returns
+        records = records[np.argsort(records["account"], kind="stable")]
+        first = np.ones(len(records), dtype=bool)
+        first[1:] = records["account"][1:] != records["account"][:-1]
+        return cls(records[first])
+
+    @classmethod
+    def from_csv(cls, csv_path):
+        return cls.from_dataframe(pd.read_csv(csv_path, dtype={"beneficiary_account": str}))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.save(path, self.records)
+        with open(_meta_path(path), "w") as f:
+            json.dump({"rows": len(self)}, f, indent=2)
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        # Tables built with the old pre-encoded code columns still load; lookup ignores them
+        return cls(np.load(path, mmap_mode=mmap_mode))
+
+    def lookup(self, account):
+        key = str(account).strip().encode("utf-8")
+        idx = int(np.searchsorted(self.keys, key))
+        if idx >= len(self.keys) or self.keys[idx] != key:
+            return None
+        row = self.records[idx]
+        return MerchantRecord(
+            row["merchant_category"].decode("utf-8"),
+            row["device_type"].decode("utf-8"),
+            float(row["merchant_lat"]),
+            float(row["merchant_lon"])
+        )
@@ -0,0 +1,143 @@
+"""Adaptive micro-batching in front of the model scoring call.
+
+Request threads ``submit`` one item and block; a single worker thread
+collects whatever is queued, scores it with one vectorized call and hands
+each caller its own result.  The collection window adapts to load: when
+requests arrive one at a time the worker scores immediately (no added
+wait), and as observed batch sizes grow it waits up to ``max_wait_ms`` to
+fill batches of ``max_batch_size``.
+"""
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+
+class _Pending:
+    __slots__ = ("item", "enqueued", "event", "result", "error")
+
+    def __init__(self, item):
+        self.item = item
+        self.enqueued = time.perf_counter()
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    def __init__(self, score_fn, max_batch_size=64, max_wait_ms=2.0, ewma_alpha=0.2):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.ewma_alpha = ewma_alpha
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._ewma_batch = 1.0
+
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._size_hist = [0] * len(BATCH_SIZE_BUCKETS)
+        self._queue_times = deque(maxlen=10000)
+        self._score_times = deque(maxlen=10000)
+
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    @property
+    def window(self):
+        """Current collection window in seconds: 0 when idle, max_wait when saturated."""
+        return self.max_wait * min(1.0, max(0.0, (self._ewma_batch - 1.0) / 4.0))
+
+    def submit(self, item):
+        pending = _Pending(item)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.append(pending)
+            self._cond.notify()
+        pending.event.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _take(self, batch):
+        while self._queue and len(batch) < self.max_batch_size:
+            batch.append(self._queue.popleft())
+
+    def _collect(self):
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if self._closed and not self._queue:
+                return None
+            batch = []
+            self._take(batch)
+            window = self.window
+            if window > 0 and len(batch) < self.max_batch_size:
+                deadline = time.perf_counter() + window
+                while len(batch) < self.max_batch_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                    self._take(batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            try:
+                results = self.score_fn([p.item for p in batch])
+                if len(results) != len(batch):
+                    raise ValueError(f"score_fn returned {len(results)} results for a batch of {len(batch)}")
+                for p, result in zip(batch, results):
+                    p.result = result
+            except Exception as e:
+                for p in batch:
+                    p.error = e
+            finished = time.perf_counter()
+            self._record(batch, started, finished)
+            for p in batch:
+                p.event.set()
+
+    def _record(self, batch, started, finished):
+        size = len(batch)
+        self._ewma_batch += self.ewma_alpha * (size - self._ewma_batch)
+        with self._stats_lock:
+            self._batches += 1
+            self._items += size
+            bucket = next((i for i, b in enumerate(BATCH_SIZE_BUCKETS) if size <= b), len(BATCH_SIZE_BUCKETS) - 1)
+            self._size_hist[bucket] += 1
+            self._queue_times.extend(started - p.enqueued for p in batch)
+            self._score_times.append(finished - started)
+
+    def stats(self):
+        with self._stats_lock:
+            queue_ms = np.array(self._queue_times) * 1000
+            score_ms = np.array(self._score_times) * 1000
+            return {
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "batch_size_histogram": {f"<={b}": n for b, n in zip(BATCH_SIZE_BUCKETS, self._size_hist)},
+                "queue_ms_p50": round(float(np.percentile(queue_ms, 50)), 3) if len(queue_ms) else 0.0,
+                "queue_ms_p99": round(float(np.percentile(queue_ms, 99)), 3) if len(queue_ms) else 0.0,
+                "score_ms_p50": round(float(np.percentile(score_ms, 50)), 3) if len(score_ms) else 0.0,
+                "current_window_ms": round(self.window * 1000, 3),
+                "queued": len(self._queue),
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join(timeout=1.0)
@@ -0,0 +1,433 @@
+"""Versioned model bundles with hot-swap and rollback.
+
+Every retrain is published as one immutable directory holding the whole
+bundle the scoring path needs::
+
+    registry/
+      CURRENT                 # name of the active version
+      history.json            # every activation, oldest first
+      v0003/
+        manifest.json         # files + sha256, created_at, training metadata
+        rf_fraud_model.pkl  iso_forest_model.pkl  rf_scaler.pkl
+        iso_scaler.pkl  rf_label_encoders.pkl  iso_risk_scaler.pkl
+        compiled/             # memory-mapped tree arrays (see artifacts)
+
+Versions are staged under a temporary name and renamed into place, and
+CURRENT is replaced atomically, so a reader never sees half a bundle.
+
+``ModelLoader`` owns the bundle ``/predict`` scores with.  A new version is
+loaded, warmed up on recent transactions and sanity-checked on the calling
+thread while the old bundle keeps serving; only then is the single
+``loader.bundle`` reference swapped.  Requests read that reference once, so
+each one is scored entirely by either the old or the new bundle.  A poll
+thread picks up versions activated by other processes (the retrain script,
+sibling workers).
+"""
+import errno
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from utils.artifacts import build_compiled_models, load_compiled_models
+from utils.feature_plan import FeaturePlan
+from utils.tree_engine import CompiledRandomForest, CompiledIsolationForest
+
+# Same keys as config["model_paths"]
+BUNDLE_FILES = {
+    "rf": "rf_fraud_model.pkl",
+    "iso": "iso_forest_model.pkl",
+    "rf_scaler": "rf_scaler.pkl",
+    "iso_scaler": "iso_scaler.pkl",
+    "encoders": "rf_label_encoders.pkl",
+    "iso_risk_scaler": "iso_risk_scaler.pkl",
+}
+COMPILED_DIR = "compiled"
+BOOTSTRAP_VERSION = "v0001"
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class ModelRegistry:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def version_dir(self, version):
+        return os.path.join(self.root, version)
+
+    def paths(self, version):
+        return {key: os.path.join(self.version_dir(version), name) for key, name in BUNDLE_FILES.items()}
+
+    def compiled_dir(self, version):
+        return os.path.join(self.version_dir(version), COMPILED_DIR)
+
+    def versions(self):
+        return sorted(
+            name for name in os.listdir(self.root)
+            if name.startswith("v") and os.path.exists(os.path.join(self.root, name, "manifest.json"))
+        )
+
+    def manifest(self, version):
+        with open(os.path.join(self.version_dir(version), "manifest.json")) as f:
+            return json.load(f)
+
+    def current(self):
+        try:
+            with open(os.path.join(self.root, "CURRENT")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def history(self):
+        try:
+            with open(os.path.join(self.root, "history.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def publish(self, model_paths, metadata=None, fold_scalers=True, version=None):
+        """Copy one bundle of pickles into a new version directory; returns its name.
+
+        With ``version`` the bundle goes in under exactly that name, or is
+        discarded in favour of the one another process already put there.
+        """
+        staging = os.path.join(self.root, f".staging-{uuid.uuid4().hex}")
+        os.makedirs(staging)
+        try:
+            files = {}
+            for key, name in BUNDLE_FILES.items():
+                dest = os.path.join(staging, name)
+                shutil.copyfile(model_paths[key], dest)
+                files[key] = {"file": name, "sha256": _sha256(dest)}
+            staged_paths = {key: os.path.join(staging, name) for key, name in BUNDLE_FILES.items()}
+            build_compiled_models(staged_paths, os.path.join(staging, COMPILED_DIR), fold_scalers=fold_scalers)
+
+            with self._lock:
+                existing = self.versions()
+                number = int(existing[-1][1:]) + 1 if existing else 1
+                while True:
+                    name = version or f"v{number:04d}"
+                    manifest = {
+                        "version": name,
+                        "created_at": datetime.now(timezone.utc).isoformat(),
+                        "files": files,
+                        "metadata": metadata or {},
+                    }
+                    with open(os.path.join(staging, "manifest.json"), "w") as f:
+                        json.dump(manifest, f, indent=2)
+                    try:
+                        os.rename(staging, self.version_dir(name))
+                        return name
+                    except OSError as e:
+                        # Only "another process took this name first" is worth retrying
+                        if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                            raise
+                        if version is not None:
+                            shutil.rmtree(staging, ignore_errors=True)
+                            return version
+                        number += 1
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def activate(self, version, rolled_back_from=None):
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version: {version}")
+        with self._lock:
+            history = self.history()
+            entry = {"version": version, "activated_at": datetime.now(timezone.utc).isoformat()}
+            if rolled_back_from is not None:
+                entry["rolled_back_from"] = rolled_back_from
+            history.append(entry)
+            _write_atomic(os.path.join(self.root, "history.json"), json.dumps(history, indent=2))
+            _write_atomic(os.path.join(self.root, "CURRENT"), version)
+
+    def activation_stack(self):
+        """Versions in activation order with rolled-back ones popped off, and the set rolled back from.
+
+        An activation pushes its version; a rollback pops the version it
+        left.  Activating a rolled-back version explicitly clears its mark.
+        """
+        stack, rolled_back = [], set()
+        for entry in self.history():
+            version = entry["version"]
+            if "rolled_back_from" in entry:
+                rolled_back.add(entry["rolled_back_from"])
+                while stack and stack[-1] != version:
+                    stack.pop()
+                if not stack:
+                    stack.append(version)
+            else:
+                rolled_back.discard(version)
+                if not stack or stack[-1] != version:
+                    stack.append(version)
+        return stack, rolled_back
+
+    def previous(self):
+        """The version a rollback returns to: the newest one below the current on the stack,
+        never one that was rolled back from."""
+        current = self.current()
+        stack, rolled_back = self.activation_stack()
+        for version in reversed(stack):
+            if version != current and version not in rolled_back and version in self.versions():
+                return version
+        return None
+
+    def bootstrap(self, model_paths, fold_scalers=True):
+        """Publish the loose pickles as the first version if the registry is empty.
+
+        Workers starting together all stage a bundle, but only one rename to
+        BOOTSTRAP_VERSION wins; the others reuse it, so they all activate
+        the same version instead of one each.
+        """
+        if self.current() is None:
+            version = self.publish(model_paths, {"source": "bootstrap"}, fold_scalers=fold_scalers,
+                                   version=BOOTSTRAP_VERSION)
+            if self.current() is None:
+                self.activate(version)
+        return self.current()
+
+
+class ModelBundle:
+    def __init__(self, version, paths, compiled_dir, config):
+        self.version = version
+        self.paths = paths
+        self.config = config
+        inference_config = config["inference"]
+        self.compiled_max_rows = inference_config["compiled_max_rows"]
+
+        self.rf_scaler = joblib.load(paths["rf_scaler"])
+        self.iso_scaler = joblib.load(paths["iso_scaler"])
+        self.label_encoders = joblib.load(paths["encoders"])
+        self.iso_risk_scaler = joblib.load(paths["iso_risk_scaler"])
+        self.feature_plan = FeaturePlan(config, self.label_encoders)
+
+        self._sklearn_lock = threading.Lock()
+        self.rf_model = self.iso_model = None
+        self.compiled_rf = self.compiled_iso = None
+        if inference_config["engine"] == "compiled":
+            mmap_mode = "r" if inference_config["mmap_artifacts"] else None
+            fold = inference_config["fold_scalers"]
+            compiled = load_compiled_models(paths, compiled_dir, fold, mmap_mode=mmap_mode)
+            if compiled is not None:
+                self.compiled_rf, self.compiled_iso = compiled
+            else:
+                print(f"⚠️ Compiled artifacts for {version} missing or stale, compiling in-process")
+                rf_model, iso_model = self.sklearn_models()
+                self.compiled_rf = CompiledRandomForest(rf_model, self.rf_scaler, fold_scaler=fold)
+                self.compiled_iso = CompiledIsolationForest(iso_model, self.iso_scaler, fold_scaler=fold)
+        else:
+            self.sklearn_models()
+
+    def sklearn_models(self):
+        # Only needed for large batches when the compiled engine is mapped
+        with self._sklearn_lock:
+            if self.rf_model is None:
+                self.rf_model = joblib.load(self.paths["rf"])
+                self.iso_model = joblib.load(self.paths["iso"])
+        return self.rf_model, self.iso_model
+
+    def score_matrix(self, X):
+        if self.compiled_rf is not None and len(X) <= self.compiled_max_rows:
+            rf_preds = self.compiled_rf.predict(X).astype(int)
+            anomaly_scores = self.compiled_iso.decision_function(X)
+        else:
+            # sklearn's C loops win again on large batches
+            X = pd.DataFrame(X, columns=self.feature_plan.columns)
+            rf_model, iso_model = self.sklearn_models()
+            rf_preds = rf_model.predict(self.rf_scaler.transform(X)).astype(int)
+            anomaly_scores = iso_model.decision_function(self.iso_scaler.transform(X))
+        risk_scores = self.iso_risk_scaler.transform(-anomaly_scores.reshape(-1, 1)).ravel()
+        return rf_preds, anomaly_scores, risk_scores
+
+    def score_rows(self, rows):
+        plan = self.feature_plan
+        return self.score_matrix(plan.row(rows[0]) if len(rows) == 1 else plan.matrix(rows))
+
+    def warm_up(self, rows, max_positive_rate=1.0):
+        """Score recent rows singly and as a batch, then sanity-check the outputs.
+
+        Raises ValueError when the bundle should not go live.
+        """
+        if rows:
+            X = self.feature_plan.matrix(rows)
+        else:
+            X = np.asarray(self.iso_scaler.mean_, dtype="f8").reshape(1, -1)
+        if X.shape[1] != len(self.feature_plan.columns):
+            raise ValueError(f"{self.version}: scaler expects {X.shape[1]} features, plan has {len(self.feature_plan.columns)}")
+
+        for i in range(min(len(X), 32)):
+            self.score_matrix(X[i:i + 1])
+        rf_preds, anomaly_scores, risk_scores = self.score_matrix(X)
+
+        if not (np.isfinite(anomaly_scores).all() and np.isfinite(risk_scores).all()):
+            raise ValueError(f"{self.version}: non-finite scores during warm-up")
+        if not np.isin(rf_preds, [0, 1]).all():
+            raise ValueError(f"{self.version}: RF predicted classes other than 0/1")
+        positive_rate = float(rf_preds.mean())
+        if len(X) > 1 and positive_rate > max_positive_rate:
+            raise ValueError(f"{self.version}: flags {positive_rate:.0%} of recent transactions as fraud")
+        return {"rows": len(X), "positive_rate": round(positive_rate, 4), "mean_risk_score": round(float(risk_scores.mean()), 2)}
+
+
+class ModelLoader:
+    def __init__(self, registry, config, warmup_rows=None):
+        self.registry = registry
+        self.config = config
+        self.registry_config = config["model_registry"]
+        self.warmup_rows = warmup_rows or (lambda: [])
+
+        self.bundle = None
+        self.last_warmup = None
+        self.last_error = None
+        self._swap_lock = threading.Lock()
+        self._failed = set()
+        self._closed = threading.Event()
+        self._poller = None
+
+    def load(self, version):
+        bundle = ModelBundle(version, self.registry.paths(version), self.registry.compiled_dir(version), self.config)
+        warmup = bundle.warm_up(self.warmup_rows(), self.registry_config["max_positive_rate"])
+        return bundle, warmup
+
+    def activate(self, version, rolled_back_from=None):
+        """Load, warm up and check a version, then make it live here and in the registry."""
+        with self._swap_lock:
+            start = time.perf_counter()
+            try:
+                bundle, warmup = self.load(version)
+            except Exception as e:
+                self.last_error = {"version": version, "error": str(e)}
+                self._failed.add(version)
+                raise
+            if self.registry.current() != version:
+                self.registry.activate(version, rolled_back_from=rolled_back_from)
+            self.bundle = bundle
+            self.last_warmup = dict(warmup, version=version, load_secs=round(time.perf_counter() - start, 3))
+            self.last_error = None
+            self._failed.discard(version)
+            print(f"✅ Model bundle {version} live ({self.last_warmup})")
+            return self.last_warmup
+
+    def activate_first_loadable(self):
+        """Activate CURRENT or, if it does not load or warm up, the newest version that does.
+
+        A bundle that was activated but cannot be served must not keep the
+        app from booting; the fallback becomes CURRENT so restarts skip it.
+        """
+        current = self.registry.current()
+        candidates = [current] + [v for v in reversed(self.registry.versions()) if v != current]
+        for version in candidates:
+            try:
+                warmup = self.activate(version)
+            except Exception:
+                print(f"⚠️ Model bundle {version} failed to load")
+                traceback.print_exc()
+                continue
+            if version != current:
+                print(f"⚠️ CURRENT named {current}, fell back to {version}")
+            return warmup
+        raise RuntimeError(f"No model version in {self.registry.root} loads")
+
+    def rollback(self):
+        previous = self.registry.previous()
+        if previous is None:
+            raise ValueError("No previous model version to roll back to")
+        return self.activate(previous, rolled_back_from=self.registry.current())
+
+    def _poll(self):
+        while not self._closed.wait(self.registry_config["poll_interval_secs"]):
+            version = self.registry.current()
+            if version is None or version in self._failed:
+                continue
+            if self.bundle is not None and version == self.bundle.version:
+                continue
+            try:
+                self.activate(version)
+            except Exception:
+                print(f"⚠️ Model bundle {version} rejected, still serving {self.bundle.version if self.bundle else None}")
+                traceback.print_exc()
+
+    def start(self):
+        self._poller = threading.Thread(target=self._poll, daemon=True)
+        self._poller.start()
+
+    def close(self):
+        self._closed.set()
+        if self._poller is not None:
+            self._poller.join(timeout=1.0)
+
+    def status(self):
+        bundle = self.bundle
+        return {
+            "active": bundle.version if bundle else None,
+            "current": self.registry.current(),
+            "previous": self.registry.previous(),
+            "versions": self.registry.versions(),
+            "last_warmup": self.last_warmup,
+            "last_error": self.last_error,
+            "sklearn_loaded": bool(bundle and bundle.rf_model is not None),
+        }
+
+
+def publish_bundle(registry, model_paths, config, metadata=None, activate=True):
+    """Publish a bundle and, with ``activate``, make it CURRENT only after it loads and warms up here.
+
+    For the training scripts: a bundle the app could not serve never
+    becomes CURRENT.  Raises on a failed warm-up; the version stays
+    published but inactive.  Returns (version, warm-up stats or None).
+    """
+    version = registry.publish(model_paths, metadata, fold_scalers=config["inference"]["fold_scalers"])
+    if not activate:
+        return version, None
+    try:
+        warmup = ModelLoader(registry, config).activate(version)
+    except Exception as e:
+        raise RuntimeError(f"Model bundle {version} was published but failed warm-up, CURRENT unchanged: {e}") from e
+    return version, warmup
+
+
+def publish_artifacts(registry, config, artifacts, metadata=None, activate=True):
+    """Publish fitted ``artifacts`` (bundle key -> object) with the current bundle's other files.
+
+    The per-model training scripts replace part of a bundle; the rest is
+    copied from CURRENT (or the loose model_paths while the registry is
+    empty), so whatever they train is what the app serves next.
+    """
+    parent = registry.bootstrap(config["model_paths"], fold_scalers=config["inference"]["fold_scalers"])
+    staging_dir = tempfile.mkdtemp(prefix="publish-")
+    try:
+        paths = registry.paths(parent)
+        for key, obj in artifacts.items():
+            paths[key] = os.path.join(staging_dir, BUNDLE_FILES[key])
+            joblib.dump(obj, paths[key])
+        return publish_bundle(registry, paths, config, dict(metadata or {}, parent=parent), activate=activate)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
@@ -0,0 +1,315 @@
+"""Transaction history in the app's SQL database, shared by every worker.
+
+Rows live in the ``txn_history`` table (models.TxnHistoryEntry) as
+(sender, beneficiary, µs timestamp), with composite indexes on
+(sender, ts) and a unique one on (sender, beneficiary, ts).  Each of the
+four lookups is a single index probe:
+
+* last sender time    ORDER BY ts DESC LIMIT 1 on (sender, ts)
+* last pair time      ORDER BY ts DESC LIMIT 1 on (sender, beneficiary, ts)
+* pair seen           LIMIT 1 on (sender, beneficiary, ts)
+* pair count since    range count on (sender, beneficiary, ts)
+
+The statements are compiled once for the engine's dialect and executed
+straight on one DBAPI connection per process, so the driver's statement
+cache keeps them prepared and a lookup skips SQLAlchemy's per-execute work.
+
+``add`` buffers rows and a background thread inserts them in batches of
+``batch_size`` or every ``flush_interval_secs``.  Lookups also consult the
+rows this process has buffered, so a worker always sees its own writes and
+other workers see them within one flush interval.
+
+Replay is idempotent: inserts skip rows already present (the unique
+index), so overlapping replays from several workers starting at once are
+harmless.  A missing beneficiary is stored as NO_BENEFICIARY rather than
+NULL, since NULLs never collide in a unique index.  Sources whose rows are all older than ``replay_window_days``
+are recorded in ``txn_history_sources`` and skipped on the next start.
+"""
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import bindparam, func, insert, select
+
+from models import TxnHistoryEntry, TxnHistorySource
+from utils.txn_history import NO_BENEFICIARY, NO_TIME, HistoryStore, from_us, to_us, _parse_timestamp
+from utils.db_profile import sqlite_pragmas
+
+US_PER_DAY = 86400 * 1000000
+
+
+def enable_wal(engine, busy_timeout_ms=30000):
+    """Put SQLite connections of ``engine`` in WAL mode so readers never block the writer."""
+    sqlite_pragmas(engine, {"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": int(busy_timeout_ms)})
+
+
+def _insert_ignore(engine, table):
+    """INSERT that skips rows hitting a unique index; replay relies on it being idempotent."""
+    name = engine.dialect.name
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif name in ("mysql", "mariadb"):
+        return insert(table).prefix_with("IGNORE")
+    else:
+        raise ValueError(f"SQL transaction history supports sqlite, postgresql and mysql, not {name}; "
+                         "use history.backend: tiered")
+    return dialect_insert(table).on_conflict_do_nothing()
+
+
+class _Prepared:
+    """A Core statement compiled once, with its bind values laid out for the DBAPI."""
+
+    def __init__(self, stmt, dialect):
+        compiled = stmt.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+        self.sql = compiled.string
+        self.defaults = {name: bind.value for name, bind in compiled.binds.items()}
+        self.names = compiled.positiontup if compiled.positional else None
+
+    def args(self, params):
+        values = dict(self.defaults, **params)
+        if self.names is None:
+            return values
+        return tuple(values[name] for name in self.names)
+
+
+class SqlTxnHistory(HistoryStore):
+    def __init__(self, engine, replay_window_days=30, batch_size=500, flush_interval_secs=0.05,
+                 background=True):
+        self.engine = engine
+        # Fails here, before any table is created, on a dialect without INSERT-or-ignore
+        self._insert_rows = _insert_ignore(engine, TxnHistoryEntry.__table__)
+        self._insert_sources = _insert_ignore(engine, TxnHistorySource.__table__)
+        self.replay_window_us = int(replay_window_days * US_PER_DAY)
+        self.batch_size = batch_size
+        self.flush_interval_secs = flush_interval_secs
+        TxnHistoryEntry.__table__.create(engine, checkfirst=True)
+        TxnHistorySource.__table__.create(engine, checkfirst=True)
+
+        t = TxnHistoryEntry.__table__
+        sender, beneficiary = bindparam("sender"), bindparam("beneficiary")
+        pair = (t.c.sender_account == sender) & (t.c.beneficiary_account == beneficiary)
+        dialect = engine.dialect
+        self._q_last_sender = _Prepared(
+            select(t.c.ts).where(t.c.sender_account == sender).order_by(t.c.ts.desc()).limit(1), dialect
+        )
+        self._q_last_pair = _Prepared(select(t.c.ts).where(pair).order_by(t.c.ts.desc()).limit(1), dialect)
+        self._q_has_pair = _Prepared(select(t.c.id).where(pair).limit(1), dialect)
+        self._q_count_pair = _Prepared(
+            select(func.count()).select_from(t).where(pair & (t.c.ts >= bindparam("since"))), dialect
+        )
+        self._reader = None
+        self._reader_pid = None
+        self._read_lock = threading.Lock()
+
+        # Rows added here but not yet flushed: the buffer plus last-seen maps for lookups
+        self._pending = []
+        self._pending_senders = {}
+        self._pending_pairs = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.flushes = 0
+        self.flushed_rows = 0
+
+        self._replay_old = {}
+        self._closed = False
+        self._wake = threading.Event()
+        self._flusher = None
+        if background:
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
+
+    @classmethod
+    def from_config(cls, history_config, engine):
+        sql_config = history_config["sql"]
+        enable_wal(engine, sql_config["busy_timeout_ms"])
+        return cls(
+            engine,
+            replay_window_days=history_config["hot_window_days"],
+            batch_size=sql_config["batch_size"],
+            flush_interval_secs=sql_config["flush_interval_secs"],
+        )
+
+    # Replay
+    def replayed_sources(self):
+        with self.engine.connect() as conn:
+            return set(conn.execute(select(TxnHistorySource.source)).scalars())
+
+    def ingest(self, txn_df, source=None, now=None):
+        if txn_df.empty:
+            return
+        parsed = pd.to_datetime(txn_df["timestamp"], errors="coerce")
+        stamps = pd.Series(parsed.to_numpy(dtype="datetime64[us]").astype("i8"), index=txn_df.index)
+        stamps[parsed.isna()] = NO_TIME
+        # NaN accounts never compare equal in a pandas mask, so skip them here too
+        keep = txn_df["sender_account"].notna()
+        rows = pd.DataFrame({
+            "sender_account": txn_df.loc[keep, "sender_account"],
+            "beneficiary_account": txn_df.loc[keep, "beneficiary_account"].astype(object).fillna(NO_BENEFICIARY),
+            "ts": stamps[keep],
+        })
+        records = rows.to_dict("records")
+        with self.engine.begin() as conn:
+            for start in range(0, len(records), 50000):
+                conn.execute(self._insert_rows, records[start:start + 50000])
+
+        if source is not None:
+            cutoff = to_us(now or datetime.utcnow()) - self.replay_window_us
+            old = bool((rows["ts"] < cutoff).all())
+            self._replay_old[source] = self._replay_old.get(source, True) and old
+
+    def finish_replay(self):
+        """Record replayed sources that lie wholly outside the replay window."""
+        done = [source for source, all_old in self._replay_old.items() if all_old]
+        if done:
+            with self.engine.begin() as conn:
+                conn.execute(self._insert_sources, [{"source": s, "loaded_at": datetime.utcnow()} for s in done])
+        self._replay_old = {}
+        return done
+
+    # Runtime
+    def add(self, sender, beneficiary, timestamp):
+        """Buffer one transaction; returns its timestamp in µs (None if unparseable)."""
+        if pd.isna(sender):
+            return None
+        ts = timestamp if isinstance(timestamp, datetime) else _parse_timestamp(timestamp)
+        us = None if ts is None else to_us(ts)
+        has_beneficiary = not pd.isna(beneficiary)
+        with self._lock:
+            self._pending.append({
+                "sender_account": sender,
+                "beneficiary_account": beneficiary if has_beneficiary else NO_BENEFICIARY,
+                "ts": NO_TIME if us is None else us,
+            })
+            if us is not None and us > self._pending_senders.get(sender, NO_TIME):
+                self._pending_senders[sender] = us
+            if has_beneficiary:
+                pair = (sender, beneficiary)
+                self._pending_pairs[pair] = max(self._pending_pairs.get(pair, NO_TIME), NO_TIME if us is None else us)
+            full = len(self._pending) >= self.batch_size
+        if self._flusher is None:
+            if full:
+                self.flush()
+        elif full:
+            self._wake.set()
+        return us
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval_secs)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ History flush failed: {e}")
+
+    def flush(self):
+        """Insert the buffered rows in one transaction."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(self._insert_rows, rows)
+            except Exception:
+                with self._lock:
+                    self._pending = rows + self._pending
+                raise
+            # Committed rows are now visible in the table; drop them from the
+            # last-seen maps unless a newer add has replaced the entry
+            with self._lock:
+                for row in rows:
+                    sender, beneficiary, us = row["sender_account"], row["beneficiary_account"], row["ts"]
+                    if self._pending_senders.get(sender) == us:
+                        del self._pending_senders[sender]
+                    if self._pending_pairs.get((sender, beneficiary)) == us:
+                        del self._pending_pairs[(sender, beneficiary)]
+            self.flushes += 1
+            self.flushed_rows += len(rows)
+            return len(rows)
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=1.0)
+        self.flush()
+        with self._read_lock:
+            if self._reader is not None and self._reader_pid == os.getpid():
+                self._reader.close()
+            self._reader = None
+
+    # Lookups: this process's unflushed rows, then the table
+    def _scalar(self, query, **params):
+        with self._read_lock:
+            # Opened lazily and per process, so forked workers never share one
+            if self._reader is None or self._reader_pid != os.getpid():
+                self._reader = self.engine.raw_connection()
+                self._reader_pid = os.getpid()
+            cursor = self._reader.cursor()
+            try:
+                cursor.execute(query.sql, query.args(params))
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+            # Don't hold a read snapshot open between lookups
+            self._reader.rollback()
+        return None if row is None else row[0]
+
+    def last_txn_us(self, sender):
+        # Buffer first: a flush landing in between then shows up in the table
+        pending = self._pending_senders.get(sender)
+        us = self._scalar(self._q_last_sender, sender=sender)
+        if pending is not None and (us is None or pending > us):
+            us = pending
+        return None if us is None or us == NO_TIME else us
+
+    def last_pair_us(self, sender, beneficiary):
+        # Buffer first: a flush landing in between then shows up in the table
+        pending = self._pending_pairs.get((sender, beneficiary))
+        us = self._scalar(self._q_last_pair, sender=sender, beneficiary=beneficiary)
+        if pending is not None and (us is None or pending > us):
+            us = pending
+        return None if us is None or us == NO_TIME else us
+
+    def last_txn_time(self, sender):
+        us = self.last_txn_us(sender)
+        return None if us is None else from_us(us)
+
+    def last_pair_time(self, sender, beneficiary):
+        us = self.last_pair_us(sender, beneficiary)
+        return None if us is None else from_us(us)
+
+    def has_pair(self, sender, beneficiary):
+        if (sender, beneficiary) in self._pending_pairs:
+            return True
+        return self._scalar(self._q_has_pair, sender=sender, beneficiary=beneficiary) is not None
+
+    def count_pair_since(self, sender, beneficiary, since):
+        since_us = to_us(since)
+        # Counting is the one lookup a half-finished flush could get wrong
+        # (rows both committed and still buffered), so wait for it
+        with self._flush_lock:
+            count = self._scalar(self._q_count_pair, sender=sender, beneficiary=beneficiary, since=since_us)
+            with self._lock:
+                count += sum(
+                    1 for row in self._pending
+                    if row["sender_account"] == sender and row["beneficiary_account"] == beneficiary
+                    and row["ts"] >= since_us
+                )
+        return count
+
+    def stats(self):
+        return {
+            "backend": "sql",
+            "database": self.engine.url.render_as_string(hide_password=True),
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "batch_size": self.batch_size,
+            "flush_interval_secs": self.flush_interval_secs,
+        }
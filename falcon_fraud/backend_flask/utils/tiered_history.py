@@ -0,0 +1,415 @@
+"""Hot/cold tiered transaction history with a memory ceiling.
+
+The hot tier is a TxnHistory holding every row of the last
+``hot_window_days`` (and at most ``max_hot_rows`` rows).  Older rows are
+evicted to the cold tier, which keeps only what the history features can
+still ask about them: the last timestamp per sender and per
+(sender, beneficiary) pair.  Since time_since_last_txn, time_diff_mins and
+is_new_beneficiary only need "last seen" and "ever seen", the tiering is
+lossless for them; windowed counts (count_pair_since) only see the hot tier.
+
+Cold rows are partitioned by a CRC32 of the sender into ``cold_partitions``
+``.npy`` files, each a structured array sorted by (sender, beneficiary).
+A lookup maps one partition read-only and bisects it, and at most
+``cold_cache_partitions`` mappings are kept open.  The cold tier is only
+consulted when the hot tier has never seen the key, i.e. for senders idle
+for longer than the hot window and genuinely new pairs.
+
+Eviction runs on a background thread every ``evict_every`` adds, or as soon
+as the hot tier passes ``max_hot_rows``.  Evicted keys stay visible in a
+pending map until their cold partition has been rewritten.
+
+Several workers may share one cold dir, so every read-modify-write of a
+partition or of meta.json holds an exclusive ``flock`` on a ``.lock`` file
+next to it (POSIX only; elsewhere give each worker its own ``cold_dir``).
+"""
+import json
+import os
+import threading
+import uuid
+import zlib
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:   # Windows: no cross-process locking
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from utils.txn_history import NO_TIME, HistoryStore, TxnHistory, from_us, to_us
+
+US_PER_DAY = 86400 * 1000000
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive lock on ``path + ".lock"``, held across processes."""
+    if fcntl is None:
+        yield
+        return
+    with open(path + ".lock", "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _cold_dtype(sender_len, beneficiary_len):
+    return np.dtype([
+        ("sender", f"S{max(sender_len, 1)}"),
+        ("beneficiary", f"S{max(beneficiary_len, 1)}"),
+        ("has_beneficiary", "?"),
+        ("last_us", "i8"),
+    ])
+
+
+class ColdHistory:
+    def __init__(self, root, n_partitions=64, cache_partitions=64):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._meta_path = os.path.join(root, "meta.json")
+        with _file_lock(self._meta_path):
+            meta = self._read_meta()
+            # The partition count of an existing tier wins over the config
+            self.n_partitions = meta.get("n_partitions", n_partitions)
+            self.compacted_sources = set(meta.get("compacted_sources", []))
+            if not meta:
+                self._write_meta()
+        self.cache_partitions = cache_partitions
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _read_meta(self):
+        if not os.path.exists(self._meta_path):
+            return {}
+        with open(self._meta_path) as f:
+            return json.load(f)
+
+    def _write_meta(self):
+        tmp = f"{self._meta_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"n_partitions": self.n_partitions, "compacted_sources": sorted(self.compacted_sources)}, f, indent=2)
+        os.replace(tmp, self._meta_path)
+
+    def mark_compacted(self, sources):
+        # Re-read under the lock so sources another worker marked are kept
+        with self._write_lock, _file_lock(self._meta_path):
+            self.compacted_sources.update(self._read_meta().get("compacted_sources", []))
+            self.compacted_sources.update(sources)
+            self._write_meta()
+
+    def partition_of(self, sender):
+        return zlib.crc32(str(sender).encode("utf-8")) % self.n_partitions
+
+    def _path(self, partition):
+        return os.path.join(self.root, f"part-{partition:04d}.npy")
+
+    def _partition(self, partition):
+        with self._lock:
+            records = self._cache.get(partition)
+            if records is not None:
+                self._cache.move_to_end(partition)
+                return records
+        path = self._path(partition)
+        if not os.path.exists(path):
+            return None
+        records = np.load(path, mmap_mode="r")
+        with self._lock:
+            self._cache[partition] = records
+            while len(self._cache) > self.cache_partitions:
+                self._cache.popitem(last=False)
+        return records
+
+    def _sender_rows(self, sender):
+        records = self._partition(self.partition_of(sender))
+        if records is None or len(records) == 0:
+            return None
+        key = str(sender).encode("utf-8")
+        # bisect reads ~log2(n) elements of the mapped field; np.searchsorted
+        # would first copy the whole strided column
+        senders = records["sender"]
+        lo = bisect_left(senders, key)
+        hi = bisect_right(senders, key, lo)
+        return records[lo:hi] if hi > lo else None
+
+    def last_sender_us(self, sender):
+        rows = self._sender_rows(sender)
+        if rows is None:
+            return None
+        last = int(rows["last_us"].max())
+        return None if last == NO_TIME else last
+
+    def _pair_rows(self, sender, beneficiary):
+        rows = self._sender_rows(sender)
+        if rows is None:
+            return None
+        key = str(beneficiary).encode("utf-8")
+        lo = int(np.searchsorted(rows["beneficiary"], key, side="left"))
+        hi = int(np.searchsorted(rows["beneficiary"], key, side="right"))
+        rows = rows[lo:hi]
+        rows = rows[rows["has_beneficiary"]]
+        return rows if len(rows) else None
+
+    def last_pair_us(self, sender, beneficiary):
+        rows = self._pair_rows(sender, beneficiary)
+        if rows is None:
+            return None
+        last = int(rows["last_us"].max())
+        return None if last == NO_TIME else last
+
+    def has_pair(self, sender, beneficiary):
+        return self._pair_rows(sender, beneficiary) is not None
+
+    def merge(self, rows):
+        """Fold (sender, beneficiary or None, last_us or None) rows into the partitions."""
+        if not rows:
+            return 0
+        df = pd.DataFrame(rows, columns=["sender", "beneficiary", "last_us"])
+        return self.merge_frame(df)
+
+    def merge_frame(self, df):
+        if df.empty:
+            return 0
+        df = pd.DataFrame({
+            "sender": df["sender"].astype(str),
+            "beneficiary": df["beneficiary"].where(df["beneficiary"].notna(), "").astype(str),
+            "has_beneficiary": df["beneficiary"].notna(),
+            "last_us": pd.to_numeric(df["last_us"]).fillna(NO_TIME).astype("i8"),
+        })
+        df["partition"] = [self.partition_of(s) for s in df["sender"]]
+        with self._write_lock:
+            for partition, part in df.groupby("partition"):
+                self._merge_partition(partition, part.drop(columns="partition"))
+        return len(df)
+
+    def _merge_partition(self, partition, new):
+        path = self._path(partition)
+        with _file_lock(path):
+            self._rewrite_partition(path, new)
+        with self._lock:
+            self._cache.pop(partition, None)
+
+    def _rewrite_partition(self, path, new):
+        if os.path.exists(path):
+            old = np.load(path)
+            old = pd.DataFrame({
+                "sender": np.char.decode(old["sender"], "utf-8"),
+                "beneficiary": np.char.decode(old["beneficiary"], "utf-8"),
+                "has_beneficiary": old["has_beneficiary"],
+                "last_us": old["last_us"],
+            })
+            new = pd.concat([old, new], ignore_index=True)
+        merged = (
+            new.groupby(["sender", "beneficiary", "has_beneficiary"], sort=False)["last_us"].max().reset_index()
+        )
+        sender_b = merged["sender"].str.encode("utf-8")
+        beneficiary_b = merged["beneficiary"].str.encode("utf-8")
+        records = np.empty(len(merged), dtype=_cold_dtype(sender_b.str.len().max(), beneficiary_b.str.len().max()))
+        records["sender"] = sender_b.to_numpy()
+        records["beneficiary"] = beneficiary_b.to_numpy()
+        records["has_beneficiary"] = merged["has_beneficiary"].to_numpy()
+        records["last_us"] = merged["last_us"].to_numpy()
+        records = records[np.lexsort((records["beneficiary"], records["sender"]))]
+
+        tmp = f"{path[:-4]}.{uuid.uuid4().hex}.tmp.npy"
+        np.save(tmp, records)
+        os.replace(tmp, path)
+
+    def __len__(self):
+        return sum(
+            len(np.load(self._path(p), mmap_mode="r"))
+            for p in range(self.n_partitions) if os.path.exists(self._path(p))
+        )
+
+
+class TieredTxnHistory(HistoryStore):
+    def __init__(self, cold_dir, hot_window_days=30, max_hot_rows=2000000, evict_every=10000,
+                 cold_partitions=64, cold_cache_partitions=64, background=True):
+        self.hot = TxnHistory()
+        self.cold = ColdHistory(cold_dir, cold_partitions, cold_cache_partitions)
+        self.hot_window_us = int(hot_window_days * US_PER_DAY)
+        self.max_hot_rows = max_hot_rows
+        self.evict_every = evict_every
+
+        self._newest_us = None
+        self._adds = 0
+        self._pending_senders = {}
+        self._pending_pairs = {}
+        self._replay_old = {}
+        self._evict_lock = threading.Lock()
+        self.evictions = 0
+
+        self._closed = False
+        self._wake = threading.Event()
+        self._evictor = None
+        if background:
+            self._evictor = threading.Thread(target=self._evict_loop, daemon=True)
+            self._evictor.start()
+
+    @classmethod
+    def from_config(cls, history_config, root_dir="."):
+        return cls(
+            os.path.join(root_dir, history_config["cold_dir"]),
+            hot_window_days=history_config["hot_window_days"],
+            max_hot_rows=history_config["max_hot_rows"],
+            evict_every=history_config["evict_every"],
+            cold_partitions=history_config["cold_partitions"],
+            cold_cache_partitions=history_config["cold_cache_partitions"],
+        )
+
+    def _see(self, us):
+        if us is not None and (self._newest_us is None or us > self._newest_us):
+            self._newest_us = us
+
+    def hot_cutoff_us(self, now=None):
+        now_us = to_us(now) if now is not None else self._newest_us
+        if now_us is None:
+            return None
+        return now_us - self.hot_window_us
+
+    # Replay
+    def ingest(self, txn_df, source=None, now=None):
+        """Load one chunk of the txn log: old rows go straight to cold, the rest to hot."""
+        if txn_df.empty:
+            return
+        parsed = pd.to_datetime(txn_df["timestamp"], errors="coerce")
+        stamps = pd.Series(parsed.to_numpy(dtype="datetime64[us]").astype("i8"), index=txn_df.index)
+        cutoff = self.hot_cutoff_us(now or datetime.utcnow())
+        has_time = parsed.notna()
+        old = has_time & txn_df["sender_account"].notna() & (stamps < cutoff)
+
+        cold_rows = pd.DataFrame({
+            "sender": txn_df.loc[old, "sender_account"],
+            "beneficiary": txn_df.loc[old, "beneficiary_account"],
+            "last_us": stamps[old],
+        })
+        if not cold_rows.empty:
+            pair_last = cold_rows.dropna(subset=["beneficiary"]).groupby(["sender", "beneficiary"])["last_us"].max()
+            sender_last = cold_rows.groupby("sender")["last_us"].max()
+            self.cold.merge_frame(pd.concat([
+                pair_last.reset_index(),
+                sender_last.reset_index().assign(beneficiary=None),
+            ], ignore_index=True))
+
+        self.hot.ingest(txn_df.loc[~old])
+        hot_stamps = stamps[~old & has_time]
+        if len(hot_stamps):
+            self._see(int(hot_stamps.max()))
+        if source is not None:
+            self._replay_old[source] = self._replay_old.get(source, True) and bool(old[txn_df["sender_account"].notna()].all())
+        if self.hot.rows > self.max_hot_rows:
+            self.evict()
+
+    def replayed_sources(self):
+        return self.cold.compacted_sources
+
+    def finish_replay(self):
+        """Mark replayed sources whose rows all went to cold, so the next start skips them."""
+        done = [source for source, all_old in self._replay_old.items() if all_old]
+        if done:
+            self.cold.mark_compacted(done)
+        self._replay_old = {}
+        return done
+
+    # Runtime
+    def add(self, sender, beneficiary, timestamp):
+        self._see(self.hot.add(sender, beneficiary, timestamp))
+        self._adds += 1
+        if self._adds % self.evict_every == 0 or self.hot.rows > self.max_hot_rows:
+            if self._evictor is not None:
+                self._wake.set()
+            else:
+                self.evict()
+
+    def _evict_loop(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._closed:
+                return
+            try:
+                self.evict()
+            except Exception as e:
+                print(f"⚠️ History eviction failed: {e}")
+
+    def _publish_pending(self, evicted):
+        for sender, beneficiary, us in evicted:
+            if beneficiary is None:
+                self._pending_senders[sender] = us
+            else:
+                self._pending_pairs[(sender, beneficiary)] = us
+
+    def evict(self, now=None):
+        """Move rows out of the hot tier until it is inside both the window and the ceiling."""
+        with self._evict_lock:
+            cutoff = self.hot_cutoff_us(now)
+            if cutoff is None:
+                return 0
+            # Leave headroom below the ceiling so the next adds don't evict again at once
+            ceiling_cutoff = self.hot.cutoff_for(int(self.max_hot_rows * 0.9))
+            if ceiling_cutoff is not None and ceiling_cutoff > cutoff:
+                print(f"⚠️ Hot history above {self.max_hot_rows} rows, evicting rows newer than the "
+                      f"{self.hot_window_us // US_PER_DAY}-day window")
+                cutoff = ceiling_cutoff
+            evicted = self.hot.evict_before(cutoff, before_drop=self._publish_pending)
+            self.cold.merge(evicted)
+            for sender, beneficiary, us in evicted:
+                if beneficiary is None:
+                    if self._pending_senders.get(sender, us) == us:
+                        self._pending_senders.pop(sender, None)
+                elif self._pending_pairs.get((sender, beneficiary), us) == us:
+                    self._pending_pairs.pop((sender, beneficiary), None)
+            self.evictions += 1
+            return len(evicted)
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        if self._evictor is not None:
+            self._evictor.join(timeout=1.0)
+
+    # Lookups: hot, then evicted-but-not-yet-merged, then cold
+    def last_txn_time(self, sender):
+        us = self.hot.last_txn_us(sender)
+        if us is None:
+            us = self._pending_senders.get(sender)
+        if us is None:
+            us = self.cold.last_sender_us(sender)
+        return None if us is None else from_us(us)
+
+    def last_pair_time(self, sender, beneficiary):
+        us = self.hot.last_pair_us(sender, beneficiary)
+        if us is None:
+            us = self._pending_pairs.get((sender, beneficiary))
+        if us is None:
+            us = self.cold.last_pair_us(sender, beneficiary)
+        return None if us is None else from_us(us)
+
+    def has_pair(self, sender, beneficiary):
+        return (
+            self.hot.has_pair(sender, beneficiary)
+            or (sender, beneficiary) in self._pending_pairs
+            or self.cold.has_pair(sender, beneficiary)
+        )
+
+    def count_pair_since(self, sender, beneficiary, since):
+        return self.hot.count_pair_since(sender, beneficiary, since)
+
+    def stats(self):
+        return {
+            "backend": "tiered",
+            "hot_rows": self.hot.rows,
+            "max_hot_rows": self.max_hot_rows,
+            "hot_window_days": self.hot_window_us / US_PER_DAY,
+            "cold_partitions": self.cold.n_partitions,
+            "cold_partitions_cached": len(self.cold._cache),
+            "pending": len(self._pending_senders) + len(self._pending_pairs),
+            "evictions": self.evictions,
+        }
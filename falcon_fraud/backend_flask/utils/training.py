@@ -0,0 +1,175 @@
+"""One-pass training of the RF, IsolationForest and risk scaler bundle.
+
+train_models runs the steps of train_rf.py and train_iso.py, with the
+same samples, parameters and seeds, over one loaded dataset:
+
+  prepare RF    all fraud + up to 10x as many legit rows, 80/20
+                stratified split, StandardScaler
+  prepare ISO   1000 fraud + 29000 legit rows, StandardScaler
+  pool          the RF fit, the ISO fit with its risk scaler, and each
+                RF cross-validation fold, as separate process-pool tasks
+  evaluate      RF train/test accuracy and classification report
+
+The prepared matrices are saved once as .npy files that pool workers
+memory-map, so tasks ship paths rather than arrays.  Each fit runs
+single-threaded inside its task; the forests draw every tree's seed from
+random_state up front, so the models come out the same whatever the
+pool size.
+"""
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest, RandomForestClassifier
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+SEED = 42
+RF_PARAMS = dict(n_estimators=100, max_depth=10, min_samples_split=10, min_samples_leaf=4, max_features=4,
+                 random_state=SEED)
+ISO_PARAMS = dict(n_estimators=100, contamination=0.01, random_state=SEED)
+ISO_FRAUD_ROWS, ISO_LEGIT_ROWS = 1000, 29000
+
+
+def rf_sample(y):
+    """Row indexes of the RF training set: every fraud row and up to 10x as many legit ones, shuffled."""
+    labels = pd.DataFrame({"is_fraud": y})
+    df_fraud = labels[labels["is_fraud"] == 1]
+    df_legit_pool = labels[labels["is_fraud"] == 0]
+    desired_legit = min(len(df_legit_pool), len(df_fraud) * 10)
+    df_legit = df_legit_pool.sample(n=desired_legit, random_state=SEED)
+    return pd.concat([df_fraud, df_legit]).sample(frac=1, random_state=SEED).index.to_numpy()
+
+
+def iso_sample(y):
+    """Row indexes of the IsolationForest training set."""
+    labels = pd.DataFrame({"is_fraud": y})
+    df_fraud = labels[labels["is_fraud"] == 1]
+    df_legit = labels[labels["is_fraud"] == 0]
+    df_fraud = df_fraud.sample(n=min(ISO_FRAUD_ROWS, len(df_fraud)), random_state=SEED)
+    df_legit = df_legit.sample(n=min(ISO_LEGIT_ROWS, len(df_legit)), random_state=SEED)
+    return pd.concat([df_fraud, df_legit]).sample(frac=1, random_state=SEED).index.to_numpy()
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        yield
+        self.stages.append({"stage": name, "secs": round(time.perf_counter() - start, 3), "in": "main"})
+
+    def task(self, name, secs):
+        self.stages.append({"stage": name, "secs": round(secs, 3), "in": "pool"})
+
+
+# 🔧 Pool tasks: each loads what it needs from the shared .npy files
+
+def _load(paths, name):
+    return np.load(paths[name], mmap_mode="r")
+
+
+def _fit_rf(paths):
+    start = time.perf_counter()
+    model = RandomForestClassifier(**RF_PARAMS).fit(_load(paths, "X_train"), _load(paths, "y_train"))
+    return model, time.perf_counter() - start
+
+
+def _cv_fold(paths, train_rows, test_rows):
+    start = time.perf_counter()
+    X, y = _load(paths, "X_train"), _load(paths, "y_train")
+    model = RandomForestClassifier(**RF_PARAMS).fit(X[train_rows], y[train_rows])
+    return model.score(X[test_rows], y[test_rows]), time.perf_counter() - start
+
+
+def _fit_iso(paths):
+    start = time.perf_counter()
+    X = _load(paths, "X_iso")
+    model = IsolationForest(**ISO_PARAMS).fit(X)
+    # Raw anomaly scores, negated so higher means riskier, scaled to 0-100
+    risk_scaler = MinMaxScaler((0, 100)).fit(-model.decision_function(X).reshape(-1, 1))
+    iso_pred = np.where(model.predict(X) == -1, 1, 0)
+    return (model, risk_scaler, iso_pred), time.perf_counter() - start
+
+
+def train_models(dataset, config, workers=None, report=print):
+    """Fit the bundle from a dataset_cache.TrainingDataset.
+
+    Returns (artifacts keyed like config["model_paths"], metrics, timing stages).
+    """
+    training_config = config["training"]
+    workers = workers or training_config["workers"] or os.cpu_count()
+    timer = StageTimer()
+
+    with timer.stage("prepare RF data"):
+        sample = rf_sample(dataset.y)
+        X, y = dataset.features(sample), np.asarray(dataset.y[sample])
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=SEED, stratify=y)
+        rf_scaler = StandardScaler()
+        X_train_scaled = rf_scaler.fit_transform(X_train)
+        X_test_scaled = rf_scaler.transform(X_test)
+    with timer.stage("prepare ISO data"):
+        iso_rows = iso_sample(dataset.y)
+        iso_scaler = StandardScaler()
+        X_iso_scaled = iso_scaler.fit_transform(dataset.features(iso_rows))
+        y_iso = np.asarray(dataset.y[iso_rows])
+
+    work_dir = tempfile.mkdtemp(prefix="train-")
+    try:
+        paths = {}
+        for name, array in (("X_train", X_train_scaled), ("y_train", y_train), ("X_iso", X_iso_scaled)):
+            paths[name] = os.path.join(work_dir, name + ".npy")
+            np.save(paths[name], array)
+        # cross_val_score(cv=n) on a classifier: unshuffled stratified folds
+        folds = list(StratifiedKFold(training_config["cv_folds"]).split(X_train_scaled, y_train))
+
+        report(f"🧵 Fitting RF, ISO and {len(folds)} CV folds on {workers} worker(s)")
+        with timer.stage(f"fits + CV on {workers} worker(s)"), ProcessPoolExecutor(workers) as pool:
+            # Longest tasks first
+            rf_future = pool.submit(_fit_rf, paths)
+            fold_futures = [pool.submit(_cv_fold, paths, train, test) for train, test in folds]
+            iso_future = pool.submit(_fit_iso, paths)
+
+            rf_model, secs = rf_future.result()
+            timer.task("RF fit", secs)
+            cv_scores = []
+            for k, future in enumerate(fold_futures):
+                score, secs = future.result()
+                cv_scores.append(score)
+                timer.task(f"RF CV fold {k + 1}", secs)
+            (iso_model, risk_scaler, iso_pred), secs = iso_future.result()
+            timer.task("ISO fit + risk scaler", secs)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    with timer.stage("evaluate"):
+        test_pred = rf_model.predict(X_test_scaled)
+        metrics = {
+            "cv_accuracy": float(np.mean(cv_scores)),
+            "cv_scores": [float(s) for s in cv_scores],
+            "train_accuracy": float(accuracy_score(y_train, rf_model.predict(X_train_scaled))),
+            "test_accuracy": float(accuracy_score(y_test, test_pred)),
+            "classification_report": classification_report(y_test, test_pred),
+            "iso_accuracy": float(accuracy_score(y_iso, iso_pred)),
+            "iso_classification_report": classification_report(y_iso, iso_pred),
+            "rf_rows": int(len(sample)),
+            "iso_rows": int(len(iso_rows)),
+        }
+
+    artifacts = {
+        "rf": rf_model,
+        "rf_scaler": rf_scaler,
+        "encoders": dataset.label_encoders,
+        "iso": iso_model,
+        "iso_scaler": iso_scaler,
+        "iso_risk_scaler": risk_scaler,
+    }
+    return artifacts, metrics, timer.stages
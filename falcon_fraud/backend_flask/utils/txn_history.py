@@ -0,0 +1,304 @@
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+import threading
+
+import pandas as pd
+
+EPOCH = datetime(1970, 1, 1)
+US_PER_HOUR = 3600 * 1000000
+# Stored in place of an unparseable timestamp where a column can't be NULL
+NO_TIME = -2 ** 63
+# Stored in place of a missing beneficiary: NULLs never collide in a unique index
+NO_BENEFICIARY = ""
+
+
+def to_us(ts):
+    """Microseconds since the epoch for a naive (UTC) datetime."""
+    return (ts - EPOCH) // timedelta(microseconds=1)
+
+
+def from_us(us):
+    return EPOCH + timedelta(microseconds=int(us))
+
+
+def _parse_timestamp(value):
+    ts = pd.to_datetime(value, errors="coerce")
+    if pd.isna(ts):
+        return None
+    return ts.to_pydatetime()
+
+
+def timestamps_us(values):
+    """Vectorised to_us for a column of timestamps; unparseable ones give None."""
+    ts = pd.to_datetime(pd.Series(values), errors="coerce")
+    us = ts.to_numpy(dtype="datetime64[us]").astype("i8")
+    return [None if bad else int(v) for v, bad in zip(us, ts.isna().to_numpy())]
+
+
+class HistoryStore(ABC):
+    """Where the /predict history features come from.
+
+    Implementations provide ``add``, ``ingest``, ``last_txn_time``,
+    ``last_pair_time``, ``has_pair`` and ``count_pair_since``; the feature
+    helpers below are built on those four lookups.  ``replayed_sources``
+    names txn log sources the store already holds, so startup replay can
+    skip them, and ``finish_replay`` runs once that replay is done.
+    """
+
+    @abstractmethod
+    def add(self, sender, beneficiary, timestamp):
+        ...
+
+    @abstractmethod
+    def ingest(self, txn_df, source=None, now=None):
+        ...
+
+    def replayed_sources(self):
+        return set()
+
+    def finish_replay(self):
+        return []
+
+    @abstractmethod
+    def last_txn_time(self, sender):
+        ...
+
+    @abstractmethod
+    def last_pair_time(self, sender, beneficiary):
+        ...
+
+    @abstractmethod
+    def has_pair(self, sender, beneficiary):
+        ...
+
+    @abstractmethod
+    def count_pair_since(self, sender, beneficiary, since):
+        ...
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {}
+
+    # Drop-in equivalents of the feature_engineering helpers
+    def time_since_last_txn(self, sender, current_time):
+        last_time = self.last_txn_time(sender)
+        if last_time is None:
+            return 0.0
+        return round((current_time - last_time).total_seconds() / 60, 2)
+
+    def time_diff_mins(self, sender, beneficiary, current_time):
+        last_time = self.last_pair_time(sender, beneficiary)
+        if last_time is None:
+            return 0.0
+        return round((current_time - last_time).total_seconds() / 60, 2)
+
+    def is_new_beneficiary(self, sender, beneficiary):
+        return 0 if self.has_pair(sender, beneficiary) else 1
+
+    def is_rapid_repeat(self, sender, beneficiary, threshold=3, minutes=60, now=None):
+        now = now or datetime.now()
+        return self.count_pair_since(sender, beneficiary, now - timedelta(minutes=minutes)) >= threshold
+
+
+class TxnHistory(HistoryStore):
+    """In-memory index over the txn log for the /predict history features.
+
+    Timestamps are kept as sorted int64 microseconds in compact ``array``
+    buffers per sender and per (sender, beneficiary) pair, so last-seen
+    lookups are O(1), pair existence is a set lookup and counting inside a
+    time window is a bisect.  Results match the DataFrame scans in
+    utils.feature_engineering exactly.
+
+    ``evict_before`` drops everything older than a cutoff and returns the
+    last-seen summary of what it dropped, for utils.tiered_history.
+    """
+
+    def __init__(self):
+        self._by_sender = {}
+        self._by_pair = {}
+        self._pairs = set()
+        # Rows per hour, to pick an eviction cutoff for a memory ceiling
+        self._hour_counts = {}
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dataframe(cls, txn_df):
+        history = cls()
+        history.ingest(txn_df)
+        return history
+
+    def ingest(self, txn_df, source=None, now=None):
+        if txn_df.empty:
+            return
+        stamps = timestamps_us(txn_df["timestamp"])
+        with self._lock:
+            for sender, beneficiary, us in zip(txn_df["sender_account"], txn_df["beneficiary_account"], stamps):
+                self._insert(sender, beneficiary, us)
+
+    @staticmethod
+    def _append(index, key, us):
+        times = index.get(key)
+        if times is None:
+            times = index[key] = array("q")
+        # Appends from /predict arrive in time order, so this is the common path
+        if not times or times[-1] <= us:
+            times.append(us)
+        else:
+            insort(times, us)
+
+    def _insert(self, sender, beneficiary, us):
+        # NaN accounts never compare equal in a pandas mask, so skip them here too
+        if pd.isna(sender):
+            return None
+        has_beneficiary = not pd.isna(beneficiary)
+        if has_beneficiary:
+            self._pairs.add((sender, beneficiary))
+        if us is None:
+            return None
+        self._append(self._by_sender, sender, us)
+        if has_beneficiary:
+            self._append(self._by_pair, (sender, beneficiary), us)
+        hour = us // US_PER_HOUR
+        self._hour_counts[hour] = self._hour_counts.get(hour, 0) + 1
+        self.rows += 1
+        return us
+
+    def add(self, sender, beneficiary, timestamp):
+        """Index one transaction; returns its timestamp in µs (None if unparseable)."""
+        ts = timestamp if isinstance(timestamp, datetime) else _parse_timestamp(timestamp)
+        with self._lock:
+            return self._insert(sender, beneficiary, None if ts is None else to_us(ts))
+
+    def last_txn_us(self, sender):
+        times = self._by_sender.get(sender)
+        return times[-1] if times else None
+
+    def last_pair_us(self, sender, beneficiary):
+        times = self._by_pair.get((sender, beneficiary))
+        return times[-1] if times else None
+
+    def last_txn_time(self, sender):
+        us = self.last_txn_us(sender)
+        return None if us is None else from_us(us)
+
+    def last_pair_time(self, sender, beneficiary):
+        us = self.last_pair_us(sender, beneficiary)
+        return None if us is None else from_us(us)
+
+    def has_pair(self, sender, beneficiary):
+        return (sender, beneficiary) in self._pairs
+
+    def count_pair_since(self, sender, beneficiary, since):
+        times = self._by_pair.get((sender, beneficiary))
+        if not times:
+            return 0
+        return len(times) - bisect_left(times, to_us(since))
+
+    def stats(self):
+        return {"backend": "memory", "rows": self.rows}
+
+    # Eviction
+    def cutoff_for(self, max_rows):
+        """Earliest hour boundary (µs) that leaves at most ``max_rows`` rows."""
+        excess = self.rows - max_rows
+        if excess <= 0:
+            return None
+        for hour in sorted(self._hour_counts):
+            excess -= self._hour_counts[hour]
+            if excess <= 0:
+                return (hour + 1) * US_PER_HOUR
+        return max(self._hour_counts, default=0) * US_PER_HOUR + US_PER_HOUR
+
+    def evict_before(self, cutoff_us, before_drop=None):
+        """Drop rows older than ``cutoff_us``.
+
+        Returns (sender, beneficiary, last_us) rows, beneficiary None for the
+        sender-level entry, covering every key that lost timestamps.  Pairs
+        that only ever appeared without a timestamp are returned with
+        last_us None once their sender has no hot rows left.
+        ``before_drop(evicted)`` runs under the lock before anything is
+        removed, so the caller can publish the summary without a gap.
+        """
+        with self._lock:
+            senders = [(s, t, bisect_left(t, cutoff_us)) for s, t in self._by_sender.items()]
+            senders = [(s, t, k) for s, t, k in senders if k]
+            pairs = [(p, t, bisect_left(t, cutoff_us)) for p, t in self._by_pair.items()]
+            pairs = [(p, t, k) for p, t, k in pairs if k]
+            gone = {s for s, t, k in senders if k == len(t)}
+            timeless = [
+                p for p in self._pairs
+                if p not in self._by_pair and (p[0] not in self._by_sender or p[0] in gone)
+            ]
+
+            evicted = [(s, None, t[k - 1]) for s, t, k in senders]
+            evicted += [(p[0], p[1], t[k - 1]) for p, t, k in pairs]
+            evicted += [(p[0], p[1], None) for p in timeless]
+            if before_drop is not None:
+                before_drop(evicted)
+
+            for sender, times, k in senders:
+                for us in times[:k]:
+                    hour = us // US_PER_HOUR
+                    left = self._hour_counts[hour] - 1
+                    if left:
+                        self._hour_counts[hour] = left
+                    else:
+                        del self._hour_counts[hour]
+                self.rows -= k
+                if k == len(times):
+                    del self._by_sender[sender]
+                else:
+                    del times[:k]
+            for pair, times, k in pairs:
+                if k == len(times):
+                    del self._by_pair[pair]
+                    self._pairs.discard(pair)
+                else:
+                    del times[:k]
+            for pair in timeless:
+                self._pairs.discard(pair)
+        return evicted
+
+    def __len__(self):
+        return self.rows
+
+
+def _latest(*times):
+    times = [t for t in times if t is not None]
+    return max(times) if times else None
+
+
+class PendingHistory(HistoryStore):
+    """Rows not yet committed to ``base``, layered over it.
+
+    /predict/batch adds each prepared item here, so later items in the
+    batch see it exactly as they would after a single /predict call, and
+    only adds the items to ``base`` once the whole batch has been scored.
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self.pending = TxnHistory()
+
+    def add(self, sender, beneficiary, timestamp):
+        return self.pending.add(sender, beneficiary, timestamp)
+
+    def ingest(self, txn_df, source=None, now=None):
+        self.pending.ingest(txn_df)
+
+    def last_txn_time(self, sender):
+        return _latest(self.base.last_txn_time(sender), self.pending.last_txn_time(sender))
+
+    def last_pair_time(self, sender, beneficiary):
+        return _latest(self.base.last_pair_time(sender, beneficiary), self.pending.last_pair_time(sender, beneficiary))
+
+    def has_pair(self, sender, beneficiary):
+        return self.pending.has_pair(sender, beneficiary) or self.base.has_pair(sender, beneficiary)
+
+    def count_pair_since(self, sender, beneficiary, since):
+        return self.base.count_pair_since(sender, beneficiary, since) + self.pending.count_pair_since(sender, beneficiary, since)
@@ -0,0 +1,188 @@
+"""Append-only, segmented transaction log.
+
+Each /predict call appends one CSV line to the current segment instead of
+rewriting the whole log.  Segments live in one directory and are named
+``txn_log-YYYYMMDD-NNNN.csv`` so that a lexical sort is also replay order.
+
+Crash-safety guarantees:
+
+* Every record is written with a single ``write`` call and flushed to the OS
+  before ``append`` returns, so a crash of the Flask process loses nothing
+  that was acknowledged.
+* Records reach stable storage on ``fsync``, which runs every
+  ``fsync_every`` records, every ``fsync_interval_secs`` seconds (background
+  thread), on rotation and on ``close``.  A power loss or kernel crash can
+  drop at most the records appended since the last fsync.
+* A writer never appends to an existing segment; each start opens a fresh
+  one.  A torn final line left by a crash is therefore only ever at the end
+  of a closed segment, and ``replay_txn_log`` discards it.
+"""
+import csv
+import io
+import os
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+TXN_LOG_COLUMNS = [
+    "sender_account", "beneficiary_account", "timestamp", "beneficiary_name",
+    "beneficiary_branch", "beneficiary_bank_name", "sender_name", "amount"
+]
+
+SEGMENT_PREFIX = "txn_log-"
+
+
+def _segment_paths(log_dir):
+    if not os.path.isdir(log_dir):
+        return []
+    names = sorted(n for n in os.listdir(log_dir) if n.startswith(SEGMENT_PREFIX) and n.endswith(".csv"))
+    return [os.path.join(log_dir, n) for n in names]
+
+
+def _read_segment(path):
+    with open(path, "rb") as f:
+        raw = f.read()
+    # Drop a torn last record left by a crash mid-write
+    if raw and not raw.endswith(b"\n"):
+        raw = raw[:raw.rfind(b"\n") + 1]
+    if not raw.strip():
+        return None
+    return pd.read_csv(io.BytesIO(raw), dtype=str, keep_default_na=False, na_values=[""])
+
+
+def iter_txn_log(log_dir, legacy_path=None, columns=TXN_LOG_COLUMNS, skip=(), chunksize=500000):
+    """Yield (source, DataFrame) chunks of the legacy CSV and then every segment.
+
+    ``source`` is the file's basename; sources listed in ``skip`` are not
+    read.  Segments are at most max_segment_mb, so memory stays bounded by
+    one chunk however long the log is.
+    """
+    if legacy_path and os.path.exists(legacy_path) and os.path.basename(legacy_path) not in skip:
+        for chunk in pd.read_csv(legacy_path, dtype=str, keep_default_na=False, na_values=[""], chunksize=chunksize):
+            if not chunk.empty:
+                yield os.path.basename(legacy_path), chunk.reindex(columns=columns)
+    for path in _segment_paths(log_dir):
+        if os.path.basename(path) in skip:
+            continue
+        df = _read_segment(path)
+        if df is not None and not df.empty:
+            yield os.path.basename(path), df.reindex(columns=columns)
+
+
+def replay_txn_log(log_dir, legacy_path=None, columns=TXN_LOG_COLUMNS):
+    """Rebuild the txn log DataFrame from the legacy CSV plus all segments."""
+    frames = [df for _, df in iter_txn_log(log_dir, legacy_path, columns)]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+class TxnLogWriter:
+    def __init__(self, log_dir, columns=TXN_LOG_COLUMNS, fsync_every=100,
+                 fsync_interval_secs=1.0, max_segment_bytes=64 * 1024 * 1024,
+                 rotate_daily=True):
+        self.log_dir = log_dir
+        self.columns = list(columns)
+        self.fsync_every = fsync_every
+        self.fsync_interval_secs = fsync_interval_secs
+        self.max_segment_bytes = max_segment_bytes
+        self.rotate_daily = rotate_daily
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._segment_date = None
+        self._segment_bytes = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._closed = False
+
+        os.makedirs(log_dir, exist_ok=True)
+        self._open_segment()
+
+        if fsync_interval_secs:
+            self._syncer = threading.Thread(target=self._sync_loop, daemon=True)
+            self._syncer.start()
+
+    @property
+    def segment_path(self):
+        return self._path if self._file else None
+
+    def _next_segment_path(self, day):
+        prefix = f"{SEGMENT_PREFIX}{day}-"
+        seqs = [
+            int(os.path.basename(p)[len(prefix):-4])
+            for p in _segment_paths(self.log_dir)
+            if os.path.basename(p).startswith(prefix)
+        ]
+        return os.path.join(self.log_dir, f"{prefix}{max(seqs, default=0) + 1:04d}.csv")
+
+    def _open_segment(self):
+        day = datetime.utcnow().strftime("%Y%m%d")
+        while True:
+            path = self._next_segment_path(day)
+            try:
+                # O_EXCL: a writer in another process that picked the same number first wins
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+                break
+            except FileExistsError:
+                continue
+        self._file = open(fd, "a", newline="", encoding="utf-8")
+        self._path = path
+        self._segment_date = day
+        self._segment_bytes = 0
+        self._write_line(self.columns)
+        self._sync()
+
+    def _write_line(self, values):
+        buf = io.StringIO()
+        csv.writer(buf, lineterminator="\n").writerow(values)
+        line = buf.getvalue()
+        self._file.write(line)
+        self._file.flush()
+        self._segment_bytes += len(line.encode("utf-8"))
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _needs_rotation(self):
+        if self._segment_bytes >= self.max_segment_bytes:
+            return True
+        return self.rotate_daily and datetime.utcnow().strftime("%Y%m%d") != self._segment_date
+
+    def _rotate(self):
+        self._sync()
+        self._file.close()
+        self._open_segment()
+
+    def append(self, row):
+        values = ["" if row.get(c) is None else row.get(c) for c in self.columns]
+        with self._lock:
+            if self._needs_rotation():
+                self._rotate()
+            self._write_line(values)
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                self._sync()
+
+    def flush(self):
+        with self._lock:
+            if self._unsynced and not self._closed:
+                self._sync()
+
+    def _sync_loop(self):
+        while not self._closed:
+            time.sleep(self.fsync_interval_secs)
+            if self._unsynced and time.monotonic() - self._last_sync >= self.fsync_interval_secs:
+                self.flush()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._sync()
+            self._file.close()
+            self._closed = True
@@ -0,0 +1,216 @@
+"""Sliding-window velocity counters per sender, beneficiary and pair.
+
+Every window (e.g. 1m / 1h / 24h) is split into ``buckets_per_window``
+time buckets.  Each key keeps, per window, a deque of only its non-empty
+buckets ``[bucket, count, amount_sum]`` plus running totals, so
+
+* ``add`` is O(1): bump the newest bucket or append one, and expire buckets
+  that slid out of the window from the left;
+* a query is O(1) amortised: expire, then read the running totals;
+* memory per key is bounded by the buckets it actually used in the last
+  window, and keys idle for longer than the longest window are swept.
+
+A window covers the current bucket and the ``buckets_per_window - 1``
+before it, so counts are exact to within one bucket width (1 s for a
+60-bucket 1 min window, 24 min for a 60-bucket 24 h window).
+
+Feature names are ``{scope}_txn_count_{window}`` and
+``{scope}_amount_sum_{window}``, e.g. ``sender_amount_sum_24h``.
+"""
+from collections import deque
+from datetime import datetime
+import threading
+
+import pandas as pd
+
+SCOPES = ("sender", "beneficiary", "pair")
+EPOCH = datetime(1970, 1, 1)
+
+
+def _seconds(ts):
+    if ts.tzinfo is not None:
+        ts = ts.replace(tzinfo=None) - ts.utcoffset()
+    return (ts - EPOCH).total_seconds()
+
+
+class _Window:
+    __slots__ = ("buckets", "count", "total")
+
+    def __init__(self):
+        self.buckets = deque()
+        self.count = 0
+        self.total = 0.0
+
+    def expire(self, bucket, n_buckets):
+        oldest = bucket - n_buckets + 1
+        buckets = self.buckets
+        while buckets and buckets[0][0] < oldest:
+            _, count, total = buckets.popleft()
+            self.count -= count
+            self.total -= total
+        if not buckets:
+            # Drop float drift once the window is empty
+            self.count, self.total = 0, 0.0
+
+    def add(self, bucket, amount, n_buckets):
+        buckets = self.buckets
+        if buckets and bucket < buckets[-1][0]:
+            # Late event: drop it if it is already outside the window
+            if bucket <= buckets[-1][0] - n_buckets:
+                return
+            for entry in reversed(buckets):
+                if entry[0] == bucket:
+                    entry[1] += 1
+                    entry[2] += amount
+                    break
+                if entry[0] < bucket:
+                    buckets.insert(buckets.index(entry) + 1, [bucket, 1, amount])
+                    break
+            else:
+                buckets.appendleft([bucket, 1, amount])
+        elif buckets and bucket == buckets[-1][0]:
+            buckets[-1][1] += 1
+            buckets[-1][2] += amount
+        else:
+            buckets.append([bucket, 1, amount])
+            self.expire(bucket, n_buckets)
+        self.count += 1
+        self.total += amount
+
+    def newest(self):
+        return self.buckets[-1][0] if self.buckets else None
+
+
+class VelocityCounters:
+    def __init__(self, windows, buckets_per_window=60, sweep_every=10000):
+        self.windows = {name: float(secs) for name, secs in windows.items()}
+        self.n_buckets = buckets_per_window
+        self.widths = {name: secs / buckets_per_window for name, secs in self.windows.items()}
+        self.sweep_every = sweep_every
+        self._keys = {scope: {} for scope in SCOPES}
+        self._adds = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, velocity_config):
+        return cls(
+            velocity_config["windows"],
+            buckets_per_window=velocity_config["buckets_per_window"],
+            sweep_every=velocity_config["sweep_every"]
+        )
+
+    @classmethod
+    def from_dataframe(cls, txn_df, velocity_config):
+        counters = cls.from_config(velocity_config)
+        counters.ingest(txn_df)
+        return counters
+
+    def ingest(self, txn_df, since=None):
+        """Replay txn log rows; rows before ``since`` can't be in any window and are skipped."""
+        if txn_df.empty:
+            return
+        timestamps = pd.to_datetime(txn_df["timestamp"], errors="coerce")
+        keep = timestamps.notna() & txn_df["sender_account"].notna()
+        if since is not None:
+            keep &= timestamps >= since
+        if not keep.any():
+            return
+        txn_df, timestamps = txn_df[keep], timestamps[keep]
+        if "amount" in txn_df:
+            amounts = pd.to_numeric(txn_df["amount"], errors="coerce").fillna(0.0)
+        else:
+            amounts = pd.Series(0.0, index=txn_df.index)
+        for sender, beneficiary, ts, amount in zip(txn_df["sender_account"], txn_df["beneficiary_account"], timestamps, amounts):
+            self.add(sender, None if pd.isna(beneficiary) else beneficiary, ts.to_pydatetime(), amount)
+
+    @property
+    def longest_window_secs(self):
+        return max(self.windows.values())
+
+    def feature_names(self):
+        return [
+            f"{scope}_{kind}_{window}"
+            for scope in SCOPES for window in self.windows for kind in ("txn_count", "amount_sum")
+        ]
+
+    @staticmethod
+    def _scope_keys(sender, beneficiary):
+        keys = [("sender", sender)]
+        if beneficiary is not None:
+            keys += [("beneficiary", beneficiary), ("pair", (sender, beneficiary))]
+        return keys
+
+    def add(self, sender, beneficiary, timestamp, amount=0.0):
+        secs = _seconds(timestamp)
+        amount = float(amount or 0.0)
+        with self._lock:
+            for scope, key in self._scope_keys(sender, beneficiary):
+                windows = self._keys[scope].get(key)
+                if windows is None:
+                    windows = self._keys[scope][key] = {name: _Window() for name in self.windows}
+                for name, window in windows.items():
+                    window.add(int(secs // self.widths[name]), amount, self.n_buckets)
+            self._adds += 1
+            if self.sweep_every and self._adds % self.sweep_every == 0:
+                self._sweep(secs)
+
+    def _sweep(self, now_secs):
+        for keys in self._keys.values():
+            idle = [
+                key for key, windows in keys.items()
+                if all(w.newest() is None or w.newest() <= now_secs // self.widths[name] - self.n_buckets
+                       for name, w in windows.items())
+            ]
+            for key in idle:
+                del keys[key]
+
+    def get(self, scope, key, window, at):
+        """(count, amount_sum) for one key over one window ending at ``at``."""
+        with self._lock:
+            windows = self._keys[scope].get(key)
+            if windows is None:
+                return 0, 0.0
+            w = windows[window]
+            w.expire(int(_seconds(at) // self.widths[window]), self.n_buckets)
+            return w.count, w.total
+
+    def count(self, scope, sender, beneficiary, window, at):
+        key = {"sender": sender, "beneficiary": beneficiary, "pair": (sender, beneficiary)}[scope]
+        return self.get(scope, key, window, at)[0]
+
+    def features(self, sender, beneficiary, at, names=None):
+        """Velocity feature values for one transaction, before it is added."""
+        wanted = set(names) if names is not None else None
+        values = {}
+        for scope, key in self._scope_keys(sender, beneficiary):
+            for window in self.windows:
+                count_name = f"{scope}_txn_count_{window}"
+                sum_name = f"{scope}_amount_sum_{window}"
+                if wanted is not None and count_name not in wanted and sum_name not in wanted:
+                    continue
+                count, total = self.get(scope, key, window, at)
+                values[count_name] = count
+                values[sum_name] = round(total, 2)
+        if wanted is not None:
+            values = {k: v for k, v in values.items() if k in wanted}
+        return values
+
+    def __len__(self):
+        return sum(len(keys) for keys in self._keys.values())
+
+
+class PendingVelocity(VelocityCounters):
+    """Counts not yet committed to ``base``, added on top of its counts.
+
+    Uses the same windows and bucket widths as ``base``, so the sums are
+    exactly what ``base`` would report had the pending rows been added to it.
+    """
+
+    def __init__(self, base):
+        super().__init__(base.windows, buckets_per_window=base.n_buckets, sweep_every=0)
+        self.base = base
+
+    def get(self, scope, key, window, at):
+        count, total = super().get(scope, key, window, at)
+        base_count, base_total = self.base.get(scope, key, window, at)
+        return base_count + count, base_total + total
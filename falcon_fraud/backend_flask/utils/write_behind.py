@@ -0,0 +1,181 @@
+"""Write-behind queue for side-effect rows (notifications, audit records).
+
+Request handlers ``put`` plain row dicts for a table and return without
+touching the database.  One background thread drains the queue: every
+``flush_interval_secs``, or as soon as ``batch_size`` rows are waiting, it
+inserts everything queued as one multi-row INSERT per table inside a
+single transaction, so many requests share one commit (group commit).
+
+Durability: a queued row is acknowledged before it is stored, so a crash
+loses at most the rows queued since the last flush; ``close`` (registered
+with atexit) drains the queue on a clean shutdown.  Rows whose durability
+matters belong in the caller's own unit of work instead.  ``put`` blocks
+once ``max_queue`` rows are waiting, so a stalled database slows requests
+down rather than growing the queue without bound.
+
+A batch that fails because the database is unreachable (OperationalError,
+or a DBAPIError that invalidated the connection) goes back to the front of
+the queue and the drain loop retries it with exponential backoff, up to
+``max_backoff_secs`` between attempts.  Any other failure is a data error:
+the batch is retried row by row, so one bad row is logged and dropped
+without taking the rest of the batch with it.
+"""
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+
+def is_connection_error(e):
+    """True when ``e`` means the database is unreachable rather than the rows being bad."""
+    return isinstance(e, OperationalError) or (isinstance(e, DBAPIError) and e.connection_invalidated)
+
+
+class WriteBehindQueue:
+    def __init__(self, engine, batch_size=200, flush_interval_secs=0.1, max_queue=10000, max_backoff_secs=5.0,
+                 background=True):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval_secs = flush_interval_secs
+        self.max_queue = max_queue
+        self.max_backoff_secs = max_backoff_secs
+        self.backoff_secs = 0.0
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self.flushes = 0
+        self.written = 0
+        self.dropped = 0
+        self.requeued = 0
+        self.last_flush_ms = 0.0
+
+        self._worker = None
+        if background:
+            self._worker = threading.Thread(target=self._drain_loop, daemon=True)
+            self._worker.start()
+
+    @classmethod
+    def from_config(cls, write_behind_config, engine):
+        return cls(
+            engine,
+            batch_size=write_behind_config["batch_size"],
+            flush_interval_secs=write_behind_config["flush_interval_secs"],
+            max_queue=write_behind_config["max_queue"],
+            max_backoff_secs=write_behind_config["max_backoff_secs"],
+        )
+
+    def put(self, table, row):
+        """Queue one row (a column -> value dict) for ``table``."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("write-behind queue is closed")
+            while len(self._queue) >= self.max_queue and self._worker is not None:
+                self._cond.wait()
+            self._queue.append((table, row))
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+        if self._worker is None and len(self._queue) >= self.batch_size:
+            self.flush()
+
+    def _drain_loop(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._queue) < self.batch_size:
+                    self._cond.wait(self.flush_interval_secs)
+                closed = self._closed
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Write-behind flush failed: {e}")
+                time.sleep(self.backoff_secs or self.flush_interval_secs)
+                if closed:
+                    return   # close() makes the last attempt
+            if closed and not self._queue:
+                return
+
+    def _requeue(self, batch, error):
+        """Put ``batch`` back at the front of the queue and back off before the next attempt."""
+        with self._cond:
+            self._queue.extendleft(reversed(batch))
+        self.requeued += len(batch)
+        self.backoff_secs = min(max(self.backoff_secs * 2, self.flush_interval_secs), self.max_backoff_secs)
+        print(f"⚠️ Database unreachable ({error}), {len(batch)} rows requeued, retrying in {self.backoff_secs:.2f}s")
+
+    def flush(self):
+        """Insert everything queued so far in one transaction; returns the row count."""
+        with self._flush_lock:
+            with self._cond:
+                batch = list(self._queue)
+                self._queue.clear()
+                self._cond.notify_all()
+            if not batch:
+                return 0
+            # One executemany per table and column set
+            by_table = {}
+            for table, row in batch:
+                by_table.setdefault((table, tuple(sorted(row))), []).append(row)
+
+            start = time.perf_counter()
+            try:
+                with self.engine.begin() as conn:
+                    for (table, _), rows in by_table.items():
+                        conn.execute(insert(table), rows)
+                written = len(batch)
+            except Exception as e:
+                if is_connection_error(e):
+                    self._requeue(batch, e)
+                    raise
+                print(f"⚠️ Write-behind batch of {len(batch)} rows failed ({e}), retrying row by row")
+                written = self._insert_one_by_one(batch)
+            self.backoff_secs = 0.0
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+            self.flushes += 1
+            self.written += written
+            return written
+
+    def _insert_one_by_one(self, batch):
+        written = 0
+        for i, (table, row) in enumerate(batch):
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(insert(table), [row])
+                written += 1
+            except Exception as e:
+                if is_connection_error(e):
+                    # The database went away mid-batch: keep this row and the rest
+                    self.written += written
+                    self._requeue(batch[i:], e)
+                    raise
+                self.dropped += 1
+                print(f"⚠️ Dropping {table.name} row {row}: {e}")
+        return written
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout=5.0)
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"⚠️ Write-behind queue closed with {len(self._queue)} rows unwritten: {e}")
+
+    def __len__(self):
+        return len(self._queue)
+
+    def stats(self):
+        return {
+            "queued": len(self._queue),
+            "flushes": self.flushes,
+            "written": self.written,
+            "dropped": self.dropped,
+            "requeued": self.requeued,
+            "backoff_secs": self.backoff_secs,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "batch_size": self.batch_size,
+            "flush_interval_secs": self.flush_interval_secs,
+        }
@@ -0,0 +1,104 @@
+# benchmarks/bench_analytics_rollups.py
+#
+# Latency of /api/admin/analytics/time-trends and /top-risky-users as the
+# transactions table grows: the old full-table GROUP BYs vs reads of the
+# rollup tables (90 days of history, 10k users).  Also the price on the
+# write side: one committed transaction insert with and without
+# record_transaction.
+#
+#   python benchmarks/bench_analytics_rollups.py [sizes...]
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, desc, func, insert
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_flask")))
+import migrations
+from models import Transaction
+from utils.analytics import rebuild_rollups, record_transaction, time_trends, top_risky_users
+
+SIZES = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+START = datetime(2025, 4, 1)
+DAYS = 90
+REPEATS = 5
+WRITES = 500
+
+
+def fill(engine, n):
+    step = DAYS * 86400 / n
+    with engine.begin() as conn:
+        for offset in range(0, n, 100_000):
+            conn.execute(insert(Transaction), [
+                {"user_id": (i * 7919) % 10_000 + 1, "amount": 100 + i % 5000, "details": {"channel": "UPI"},
+                 "status": ("approved", "blocked", "pending_admin_review")[i % 3], "risk_score": (i * 37) % 100,
+                 "created_at": START + timedelta(seconds=i * step)}
+                for i in range(offset, min(offset + 100_000, n))
+            ])
+        rebuild_rollups(conn)
+
+
+def old_queries(session):
+    trends = session.query(
+        func.date(Transaction.created_at).label('date'),
+        func.avg(Transaction.risk_score).label('avg_risk_score'),
+        func.count(Transaction.id).label('txn_count')
+    ).group_by(func.date(Transaction.created_at)).order_by('date').all()
+    users = session.query(
+        Transaction.user_id,
+        func.count(Transaction.id).label('high_risk_count')
+    ).filter(Transaction.risk_score >= 80).group_by(Transaction.user_id).order_by(desc('high_risk_count')).limit(10).all()
+    return trends, users
+
+
+def rollup_queries(session):
+    return time_trends(session), top_risky_users(session)
+
+
+def timed(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def write_ms(engine, record):
+    def write():
+        for i in range(WRITES):
+            with Session(engine) as session:
+                txn = Transaction(user_id=i % 100 + 1, amount=100, details={"channel": "UPI"}, status="approved",
+                                  risk_score=(i * 37) % 100, created_at=datetime.utcnow())
+                session.add(txn)
+                if record:
+                    record_transaction(session, txn)
+                session.commit()
+    return timed(write, 1) / WRITES
+
+
+def main():
+    db_dir = tempfile.mkdtemp(prefix="analytics-rollups-")
+    try:
+        print(f"{'rows':>10} {'full scan ms':>13} {'rollups ms':>11} {'insert ms':>10} {'+rollups ms':>12}")
+        for n in SIZES:
+            engine = create_engine(f"sqlite:///{os.path.join(db_dir, f'app-{n}.db')}")
+            migrations.upgrade(engine)
+            fill(engine, n)
+            with Session(engine) as session:
+                old = timed(lambda: old_queries(session), REPEATS)
+                new = timed(lambda: rollup_queries(session), REPEATS)
+            plain, recorded = write_ms(engine, False), write_ms(engine, True)
+            print(f"{n:>10,} {old:>13,.1f} {new:>11.2f} {plain:>10.2f} {recorded:>12.2f}")
+            engine.dispose()
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/bench_batch_predict.py
+#
+# Throughput of /predict (one request per transaction) vs /predict/batch.
+# Start the backend first:  cd backend_flask && python app.py
+#
+#   python benchmarks/bench_batch_predict.py [n_transactions]
+
+import json
+import os
+import random
+import sys
+import time
+
+import requests
+
+API_URL = "http://localhost:5000/predict"
+PAYLOAD_DIR = os.path.join(os.path.dirname(__file__), "..", "backend_flask", "tests", "test_payloads")
+BATCH_SIZES = [100, 500, 1000]
+
+
+def make_transactions(n, seed=42):
+    rng = random.Random(seed)
+    base = []
+    for name in ["legit_txn", "fraud_txn", "geo_anomaly", "rapid_repeat"]:
+        with open(os.path.join(PAYLOAD_DIR, f"{name}.json")) as f:
+            base.append(json.load(f))
+    txns = []
+    for i in range(n):
+        txn = dict(rng.choice(base))
+        txn["amount"] = rng.choice([150, 900, 4000, 25000, 250000])
+        txn["sender_account"] = f"BENCH{rng.randint(1, 500)}"
+        txn["test_mode"] = True
+        txns.append(txn)
+    return txns
+
+
+def bench_single(txns):
+    session = requests.Session()
+    start = time.perf_counter()
+    for txn in txns:
+        session.post(API_URL, json=txn).raise_for_status()
+    return len(txns) / (time.perf_counter() - start)
+
+
+def bench_batch(txns, batch_size):
+    session = requests.Session()
+    start = time.perf_counter()
+    for i in range(0, len(txns), batch_size):
+        session.post(API_URL + "/batch", json=txns[i:i + batch_size]).raise_for_status()
+    return len(txns) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    txns = make_transactions(n)
+    print(f"/predict          {bench_single(txns):>10.1f} txn/s")
+    for size in BATCH_SIZES:
+        print(f"/predict/batch {size:>4} {bench_batch(txns, size):>8.1f} txn/s")
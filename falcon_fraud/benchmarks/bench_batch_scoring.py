@@ -0,0 +1,150 @@
+# benchmarks/bench_batch_scoring.py
+#
+# Peak memory and throughput of offline scoring as the input CSV grows:
+#
+#   whole file   the old predict_combine.py: read_csv of everything,
+#                fillna, row-wise apply of the decision rules
+#   chunked      utils.batch_scoring.score_file on a process pool
+#
+# Each mode runs in its own process.  "peak MB" is that process's peak
+# RSS; for chunked, "worker MB" is the largest scoring worker's.  The
+# models are a 100-tree RF and ISO fitted on synthetic rows.
+#
+#   python benchmarks/bench_batch_scoring.py [sizes...]   # default 100k 1M
+
+import multiprocessing as mp
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import yaml
+from sklearn.ensemble import IsolationForest, RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder, MinMaxScaler, StandardScaler
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_flask")))
+from decision_logic import GEO_ANOMALY_KM, decide_one
+from utils.batch_scoring import score_file
+
+SIZES = [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000]
+CATEGORIES = ["NEFT", "RTGS", "IMPS", "UPI", "POS", "Travel", "Gaming"]
+
+with open(os.path.join(os.path.dirname(__file__), "..", "backend_flask", "config", "features_config.yaml")) as f:
+    config = yaml.safe_load(f)
+NUMERICAL, CATEGORICAL = config["features"]["numerical"], config["features"]["categorical"]
+SUFFIX = config["encoding_suffix"]
+
+
+def make_frame(n, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({col: rng.normal(size=n).round(4) for col in NUMERICAL})
+    df["amount"] = rng.integers(100, 300_000, size=n)
+    for col in CATEGORICAL:
+        df[col] = rng.choice(CATEGORIES, size=n)
+    df.insert(0, "transaction_id", [f"T{i:09d}" for i in range(n)])
+    df["sender_account"] = [f"S{i % 50_000:08d}" for i in range(n)]
+    df["beneficiary_account"] = [f"B{(i * 7919) % 200_000:08d}" for i in range(n)]
+    return df
+
+
+def write_csv(path, n):
+    for offset in range(0, n, 250_000):
+        make_frame(min(250_000, n - offset), offset).to_csv(path, mode="a", header=offset == 0, index=False)
+
+
+def write_bundle(directory):
+    df = make_frame(20_000, -1 % 2**32)
+    encoders = {col: LabelEncoder().fit(CATEGORIES) for col in CATEGORICAL}
+    X = df[NUMERICAL].copy()
+    for col in CATEGORICAL:
+        X[col + SUFFIX] = encoders[col].transform(df[col])
+    scaler = StandardScaler().fit(X)
+    iso = IsolationForest(n_estimators=100, random_state=0).fit(scaler.transform(X))
+    objects = {
+        "rf": RandomForestClassifier(n_estimators=100, max_depth=12, random_state=0).fit(
+            scaler.transform(X), (df["amount"] > 150_000) ^ (df["hour"] > 1.5)),
+        "iso": iso, "rf_scaler": scaler, "iso_scaler": scaler, "encoders": encoders,
+        "iso_risk_scaler": MinMaxScaler((0, 100)).fit(-iso.decision_function(scaler.transform(X)).reshape(-1, 1)),
+    }
+    paths = {}
+    for key, obj in objects.items():
+        paths[key] = os.path.join(directory, key + ".pkl")
+        joblib.dump(obj, paths[key])
+    return paths
+
+
+def whole_file(csv_path, paths, review_path):
+    df = pd.read_csv(csv_path)
+    df.fillna(0, inplace=True)
+    encoders = joblib.load(paths["encoders"])
+    for col in CATEGORICAL:
+        df[col + SUFFIX] = encoders[col].transform(df[col])
+    X = df[NUMERICAL + [col + SUFFIX for col in CATEGORICAL]]
+    df["rf_pred"] = joblib.load(paths["rf"]).predict(joblib.load(paths["rf_scaler"]).transform(X))
+    anomaly_scores = joblib.load(paths["iso"]).decision_function(joblib.load(paths["iso_scaler"]).transform(X))
+    df["risk_score"] = joblib.load(paths["iso_risk_scaler"]).transform(-anomaly_scores.reshape(-1, 1)).flatten()
+    decided = df.apply(lambda row: decide_one(
+        row["rf_pred"], row["risk_score"], row["amount"], config, geo_anomaly=row["geo_distance_km"] > GEO_ANOMALY_KM,
+        channel=row["transaction_type"]), axis=1)
+    df["risk_level"] = [risk_level for risk_level, _ in decided]
+    df["final_decision"] = [decision for _, decision in decided]
+    admin_df = df[df["final_decision"] == "🔍 Send to Admin"].copy()
+    admin_df["human_verdict"] = "🕒 Pending"
+    admin_df.to_csv(review_path, index=False)
+
+
+def proc_status_mb(key):
+    # VmHWM, unlike ru_maxrss, isn't inherited from the parent across exec
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(key + ":"):
+                return int(line.split()[1]) / 1024
+
+
+def run(mode, csv_path, paths, work_dir, results):
+    start = time.perf_counter()
+    if mode == "whole file":
+        whole_file(csv_path, paths, os.path.join(work_dir, "review-old.csv"))
+        worker_mb = 0.0
+    else:
+        score_file(csv_path, os.path.join(work_dir, "scored"), os.path.join(work_dir, "review-new.csv"),
+                   paths, config, restart=True, report=lambda line: None)
+        worker_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    results.put((proc_status_mb("VmHWM"), worker_mb, time.perf_counter() - start))
+
+
+def main():
+    ctx = mp.get_context("spawn")
+    work_dir = tempfile.mkdtemp(prefix="batch-scoring-")
+    try:
+        paths = write_bundle(work_dir)
+        print(f"workers: {config['batch_scoring']['workers'] or os.cpu_count()}, "
+              f"chunk_rows: {config['batch_scoring']['chunk_rows']:,}")
+        print(f"{'rows':>10} {'CSV MB':>7} {'mode':<11} {'peak MB':>8} {'worker MB':>10} {'total s':>8} {'rows/s':>9}")
+        for n in SIZES:
+            csv_path = os.path.join(work_dir, f"txns-{n}.csv")
+            write_csv(csv_path, n)
+            size_mb = os.path.getsize(csv_path) / 2**20
+            for mode in ("whole file", "chunked"):
+                results = ctx.Queue()
+                proc = ctx.Process(target=run, args=(mode, csv_path, paths, work_dir, results))
+                proc.start()
+                peak, worker_mb, elapsed = results.get()
+                proc.join()
+                print(f"{n:>10,} {size_mb:>7.0f} {mode:<11} {peak:>8.0f} {worker_mb:>10.0f} {elapsed:>8.1f} {n / elapsed:>9,.0f}")
+            with open(os.path.join(work_dir, "review-old.csv"), "rb") as old, \
+                    open(os.path.join(work_dir, "review-new.csv"), "rb") as new:
+                old_rows, new_rows = old.read().count(b"\n"), new.read().count(b"\n")
+            print(f"{'':>10} review rows: whole file {old_rows - 1:,}, chunked {new_rows - 1:,}")
+            os.remove(csv_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
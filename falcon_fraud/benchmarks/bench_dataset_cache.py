@@ -0,0 +1,90 @@
+# benchmarks/bench_dataset_cache.py
+#
+# What each training script paid to get its feature matrix, as the
+# source CSV grows:
+#
+#   parse+encode   the old way: read_csv with default dtypes, fillna,
+#                  astype(str) and LabelEncoder per categorical column
+#   cold build     load_training_dataset on a new CSV (parse once, write
+#                  the columnar cache and the float32 matrix)
+#   warm load      load_training_dataset on an unchanged CSV: hash the
+#                  file, memory-map the arrays, gather every row
+#
+#   python benchmarks/bench_dataset_cache.py [sizes...]   # default 200k 1M
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import yaml
+from sklearn.preprocessing import LabelEncoder
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_flask")))
+from utils.dataset_cache import load_training_dataset
+
+SIZES = [int(a) for a in sys.argv[1:]] or [200_000, 1_000_000]
+
+with open(os.path.join(os.path.dirname(__file__), "..", "backend_flask", "config", "features_config.yaml")) as f:
+    config = yaml.safe_load(f)
+NUMERICAL, CATEGORICAL = config["features"]["numerical"], config["features"]["categorical"]
+SUFFIX = config["encoding_suffix"]
+
+
+def write_csv(path, n):
+    for offset in range(0, n, 250_000):
+        rows = min(250_000, n - offset)
+        rng = np.random.default_rng(offset)
+        df = pd.DataFrame({col: rng.normal(size=rows).round(4) for col in NUMERICAL})
+        df["transaction_type"] = rng.choice(["NEFT", "RTGS", "IMPS", "UPI"], size=rows)
+        df["merchant_category"] = rng.choice(["Travel", "Gaming", "Grocery", "Fuel", "Electronics"], size=rows)
+        df["device_type"] = rng.choice(["POS", "Mobile", "ATM", "Web"], size=rows)
+        df["transaction_id"] = [f"T{i:09d}" for i in range(offset, offset + rows)]
+        df["timestamp"] = pd.Timestamp("2025-01-01") + pd.to_timedelta(np.arange(offset, offset + rows), unit="s")
+        df["beneficiary_account"] = [f"B{(i * 7919) % 200_000:08d}" for i in range(offset, offset + rows)]
+        df["is_fraud"] = (rng.random(rows) < 0.02).astype(int)
+        df.to_csv(path, mode="a", header=offset == 0, index=False)
+
+
+def parse_and_encode(csv_path):
+    df = pd.read_csv(csv_path)
+    df.fillna(0, inplace=True)
+    for col in CATEGORICAL:
+        df[col] = df[col].astype(str)
+        unique_values = df[col].unique().tolist()
+        if "Unknown" not in unique_values:
+            unique_values.append("Unknown")
+        df[col + SUFFIX] = LabelEncoder().fit(unique_values).transform(df[col])
+    return df[NUMERICAL + [col + SUFFIX for col in CATEGORICAL]], df["is_fraud"]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    work_dir = tempfile.mkdtemp(prefix="dataset-cache-")
+    try:
+        print(f"{'rows':>10} {'CSV MB':>7} {'parse+encode s':>15} {'cold build s':>13} {'warm load s':>12} {'speedup':>8}")
+        for n in SIZES:
+            csv_path, cache_dir = os.path.join(work_dir, f"txns-{n}.csv"), os.path.join(work_dir, "cache")
+            write_csv(csv_path, n)
+            old, (X_old, _) = timed(lambda: parse_and_encode(csv_path))
+            cold, _ = timed(lambda: load_training_dataset(csv_path, cache_dir, config, report=lambda line: None))
+            warm, X_new = timed(lambda: load_training_dataset(
+                csv_path, cache_dir, config, report=lambda line: None).features(np.arange(n)))
+            assert np.array_equal(X_new.to_numpy(), X_old.to_numpy(dtype="f4"))
+            size_mb = os.path.getsize(csv_path) / 2**20
+            print(f"{n:>10,} {size_mb:>7.0f} {old:>15.2f} {cold:>13.2f} {warm:>12.2f} {old / warm:>7.0f}x")
+            os.remove(csv_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_decision_logic.py
+#
+# Rows per second of the decision rules (RBI limits, risk level, final
+# decision, ₹50 lakh override) over synthetic model outputs:
+#
+#   scalar       decide_one per row, as app.py's decide() used to run
+#   vectorized   decide_many over the whole arrays
+#
+#   python benchmarks/bench_decision_logic.py [sizes...]   # default 10k 100k 1M
+
+import os
+import sys
+import time
+
+import numpy as np
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_flask")))
+from decision_logic import decide_many, decide_one
+
+SIZES = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+CHANNELS = np.array(["NEFT", "RTGS", "IMPS", "UPI"])
+
+with open(os.path.join(os.path.dirname(__file__), "..", "backend_flask", "config", "features_config.yaml")) as f:
+    config = yaml.safe_load(f)
+
+
+def make_inputs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return (
+        rng.integers(0, 2, n),
+        rng.uniform(0, 100, n),
+        np.where(rng.random(n) < 0.8, rng.uniform(0, 5000, n), rng.uniform(0, 6_000_000, n)),
+        rng.random(n) < 0.1,
+        rng.random(n) < 0.1,
+        CHANNELS[rng.integers(0, len(CHANNELS), n)],
+    )
+
+
+def scalar(rf_pred, risk_score, amount, geo_anomaly, rapid_repeat, channel):
+    return [
+        decide_one(r, s, a, config, geo_anomaly=g, rapid_repeat=q, channel=c)
+        for r, s, a, g, q, c in zip(rf_pred.tolist(), risk_score.tolist(), amount.tolist(),
+                                    geo_anomaly.tolist(), rapid_repeat.tolist(), channel.tolist())
+    ]
+
+
+def vectorized(rf_pred, risk_score, amount, geo_anomaly, rapid_repeat, channel):
+    return decide_many(rf_pred, risk_score, amount, config, geo_anomaly=geo_anomaly,
+                       rapid_repeat=rapid_repeat, channel=channel)
+
+
+def rows_per_sec(fn, inputs, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(*inputs)
+        best = min(best, time.perf_counter() - start)
+    return len(inputs[0]) / best
+
+
+def main():
+    print(f"{'rows':>10} {'scalar rows/s':>14} {'vector rows/s':>14} {'speedup':>8}")
+    for n in SIZES:
+        inputs = make_inputs(n)
+        old = rows_per_sec(scalar, inputs, 1 if n >= 1_000_000 else 3)
+        new = rows_per_sec(vectorized, inputs, 5)
+        print(f"{n:>10,} {old:>14,.0f} {new:>14,.0f} {new / old:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
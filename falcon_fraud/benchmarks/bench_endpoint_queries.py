@@ -0,0 +1,188 @@
+# benchmarks/bench_endpoint_queries.py
+#
+# EXPLAIN QUERY PLAN and latency of the database query behind each API
+# endpoint, before and after the schema index set and engine profile:
+#
+#   before   only primary keys and unique email/phone, driver-default
+#            PRAGMAs, and the full-table aggregations the analytics
+#            endpoints used to run
+#   after    migrations.upgrade's indexes and rollups, the production
+#            profile from config/features_config.yaml
+#
+# Seeds one SQLite file (N transactions, as many notifications, N/5 OTP
+# sessions, N/10 admin actions, 20k users), then copies it and strips the
+# secondary indexes for "before".
+#
+#   python benchmarks/bench_endpoint_queries.py [transactions]   # default 500000
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import yaml
+from sqlalchemy import create_engine, desc, event, func, insert, inspect, select, text
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_flask")))
+import migrations
+from models import AdminAction, Notification, OTPSession, Transaction, User, promoted_details
+from utils.analytics import rebuild_rollups, time_trends, top_risky_beneficiaries, top_risky_users
+from utils.db_profile import apply_profile
+from utils.listings import keyset_page, pending_reviews, transactions_query
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+N_USERS = 20_000
+START = datetime(2025, 4, 1)
+NOW = START + timedelta(days=90)
+REPEATS = 5
+CHUNK = 100_000
+
+with open(os.path.join(os.path.dirname(__file__), "..", "backend_flask", "config", "features_config.yaml")) as f:
+    DATABASE_CONFIG = yaml.safe_load(f)["database"]
+
+
+def seed(engine):
+    step = 90 * 86400 / N
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": u, "name": f"user{u}", "email": f"u{u}@example.com", "password_hash": "x",
+             "role": "user", "phone": str(9000000000 + u)}
+            for u in range(1, N_USERS + 1)
+        ])
+        for offset in range(0, N, CHUNK):
+            txns, notes = [], []
+            for i in range(offset, min(offset + CHUNK, N)):
+                created = START + timedelta(seconds=i * step)
+                user_id = (i * 7919) % N_USERS + 1
+                details = {"beneficiaryAccount": f"ACC{(i * 104729) % 50_000}", "senderAccount": f"S{user_id}",
+                           "channel": ("UPI", "NEFT", "IMPS", "RTGS")[i % 4], "ifsc": "HDFC0001234"}
+                txns.append({"user_id": user_id, "amount": 100 + i % 5000, "details": details,
+                             "status": ("approved", "approved", "blocked", "pending_admin_review")[i % 4],
+                             "risk_score": (i * 37) % 100, "created_at": created, **promoted_details(details)})
+                notes.append({"user_id": user_id, "message": "Transaction approved. Risk Score: 12.50",
+                              "created_at": created})
+            conn.execute(insert(Transaction), txns)
+            conn.execute(insert(Notification), notes)
+        conn.execute(insert(OTPSession), [
+            {"user_id": i % N_USERS + 1, "otp": f"{(i * 7919) % 1_000_000:06d}", "used": i % 3 != 0,
+             "expires_at": START + timedelta(seconds=i * 5 * 90 * 86400 / N + 300)}
+            for i in range(N // 5)
+        ])
+        conn.execute(insert(AdminAction), [
+            {"admin_id": 1, "transaction_id": i * 10 + 4, "action": "approved", "note": "",
+             "timestamp": START + timedelta(seconds=i * 10 * 90 * 86400 / N)}
+            for i in range(N // 10)
+        ])
+        rebuild_rollups(conn)
+
+
+def strip_indexes(engine):
+    with engine.begin() as conn:
+        for table in inspect(engine).get_table_names():
+            for index in inspect(engine).get_indexes(table):
+                if not index["name"].startswith("sqlite_"):
+                    conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+
+
+def old_time_trends(session):
+    return session.query(
+        func.date(Transaction.created_at).label('date'),
+        func.avg(Transaction.risk_score).label('avg_risk_score'),
+        func.count(Transaction.id).label('txn_count')
+    ).group_by(func.date(Transaction.created_at)).order_by('date').all()
+
+
+def old_top_risky_users(session):
+    return session.query(
+        Transaction.user_id,
+        func.count(Transaction.id).label('high_risk_count')
+    ).filter(Transaction.risk_score >= 80).group_by(Transaction.user_id).order_by(desc('high_risk_count')).limit(10).all()
+
+
+USER_FIELDS = ('id', 'amount', 'status', 'risk_score', 'created_at')
+ALL_FIELDS = ('id', 'user_id', 'amount', 'status', 'risk_score', 'created_at')
+
+# endpoint -> (before, after); one callable when the query didn't change
+QUERIES = {
+    "POST /api/login (user by phone)": lambda s: s.execute(select(User).where(User.phone == "9000012345")).first(),
+    "POST /api/verify-otp": lambda s: s.execute(select(OTPSession).where(
+        OTPSession.user_id == 4242, OTPSession.otp == "123456", OTPSession.used.is_(False),
+        OTPSession.expires_at > NOW)).first(),
+    "GET /api/notifications/<user>": lambda s: s.execute(select(Notification).where(
+        Notification.user_id == 4242).order_by(Notification.created_at.desc()).limit(10)).all(),
+    "GET /api/transactions?user_id=&limit=100": lambda s: keyset_page(
+        s, transactions_query(USER_FIELDS, 4242), Transaction.created_at, Transaction.id, None, 100, descending=True),
+    "GET /api/all-transactions?limit=100": lambda s: keyset_page(
+        s, transactions_query(ALL_FIELDS), Transaction.created_at, Transaction.id, None, 100, descending=True),
+    "GET /api/admin/pending-reviews": lambda s: pending_reviews(s, limit=100),
+    "POST /api/admin/review (txn by id)": lambda s: s.get(Transaction, N // 2),
+    "GET /api/admin/audit-log": lambda s: s.execute(
+        select(AdminAction).order_by(AdminAction.timestamp.desc()).limit(100)).all(),
+    "GET /api/admin/analytics/geo": lambda s: s.execute(
+        select(Transaction).order_by(Transaction.created_at.desc()).limit(200)).all(),
+    "GET /api/admin/analytics/time-trends": (old_time_trends, time_trends),
+    "GET /api/admin/analytics/top-risky-users": (old_top_risky_users, top_risky_users),
+    "GET /api/admin/analytics/top-risky-beneficiaries": top_risky_beneficiaries,
+}
+
+
+def measure(engine, fn):
+    """(best ms, EXPLAIN QUERY PLAN of every statement ``fn`` runs)."""
+    statements = []
+    record = lambda conn, cursor, sql, params, *a: statements.append((sql, params))
+    event.listen(engine, "before_cursor_execute", record)
+    with Session(engine) as session:
+        fn(session)
+    event.remove(engine, "before_cursor_execute", record)
+    best = float("inf")
+    for _ in range(REPEATS):
+        with Session(engine) as session:
+            start = time.perf_counter()
+            fn(session)
+            best = min(best, time.perf_counter() - start)
+    plans = []
+    with engine.connect() as conn:
+        for sql, params in statements:
+            rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params).all()
+            plans.append("; ".join(row[-1] for row in rows))
+    return best * 1000, " | ".join(plans)
+
+
+def main():
+    db_dir = tempfile.mkdtemp(prefix="endpoint-queries-")
+    try:
+        after_path, before_path = os.path.join(db_dir, "after.db"), os.path.join(db_dir, "before.db")
+        engine = create_engine(f"sqlite:///{after_path}")
+        migrations.upgrade(engine)
+        start = time.perf_counter()
+        seed(engine)
+        engine.dispose()
+        print(f"Seeded {N:,} transactions in {time.perf_counter() - start:.0f}s")
+        shutil.copy(after_path, before_path)
+        before = create_engine(f"sqlite:///{before_path}")
+        strip_indexes(before)
+        after = create_engine(f"sqlite:///{after_path}")
+        apply_profile(after, DATABASE_CONFIG)
+        with after.connect() as conn:
+            conn.exec_driver_sql("ANALYZE")
+
+        rows = []
+        for name, query in QUERIES.items():
+            old, new = query if isinstance(query, tuple) else (query, query)
+            rows.append((name, measure(before, old), measure(after, new)))
+
+        print(f"\n{'endpoint':<48} {'before ms':>10} {'after ms':>9} {'speedup':>8}")
+        for name, (old_ms, _), (new_ms, _) in rows:
+            print(f"{name:<48} {old_ms:>10.2f} {new_ms:>9.2f} {old_ms / new_ms:>7.0f}x")
+        print()
+        for name, (_, old_plan), (_, new_plan) in rows:
+            print(f"{name}\n  before: {old_plan}\n  after:  {new_plan}")
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/bench_incremental_retrain.py
+#
+# Time to a new model bundle once admin feedback comes in, on synthetic
+# data:
+#
+#   full refit     what retrain_with_feedback.py does: base rows + feedback,
+#                  refit RF (100 trees) and IsolationForest from scratch
+#   incremental    utils.incremental.incremental_round on the current
+#                  bundle: replay sample + new feedback, new trees, holdout
+#                  gate against the current RF
+#
+#   python benchmarks/bench_incremental_retrain.py [rows]   # default 200000
+
+import copy
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import yaml
+from sklearn.ensemble import IsolationForest, RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_flask")))
+from utils.dataset_cache import load_training_dataset
+from utils.incremental import FEEDBACK_VERDICTS, incremental_round
+from utils.training import ISO_PARAMS, RF_PARAMS, iso_sample, rf_sample, train_models
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+FEEDBACK_ROWS = 3000
+
+with open(os.path.join(os.path.dirname(__file__), "..", "backend_flask", "config", "features_config.yaml")) as f:
+    config = yaml.safe_load(f)
+
+
+def make_frame(n, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({col: rng.normal(size=n).round(4) for col in config["features"]["numerical"]})
+    for col in config["features"]["categorical"]:
+        df[col] = rng.choice(["NEFT", "UPI", "IMPS", "RTGS", "POS"], size=n)
+    df["is_fraud"] = ((df["amount"] + df["hour"] > 2.2) | (rng.random(n) < 0.02)).astype(int)
+    return df
+
+
+def full_refit(dataset, feedback):
+    features = pd.concat([dataset.features(), dataset.encode(feedback)], ignore_index=True)
+    y = np.concatenate([dataset.y, feedback["is_fraud"].to_numpy()])
+    sample = rf_sample(y)
+    X_train, _, y_train, _ = train_test_split(features.loc[sample], y[sample], test_size=0.2, random_state=42, stratify=y[sample])
+    RandomForestClassifier(**RF_PARAMS).fit(StandardScaler().fit_transform(X_train), y_train)
+    X_iso = StandardScaler().fit_transform(features.loc[iso_sample(y)])
+    iso = IsolationForest(**ISO_PARAMS).fit(X_iso)
+    MinMaxScaler((0, 100)).fit(-iso.decision_function(X_iso).reshape(-1, 1))
+
+
+def main():
+    work_dir = tempfile.mkdtemp(prefix="incremental-retrain-")
+    try:
+        csv_path = os.path.join(work_dir, "txns.csv")
+        make_frame(N, 0).to_csv(csv_path, index=False)
+        dataset = load_training_dataset(csv_path, os.path.join(work_dir, "cache"), config, report=lambda line: None)
+        bundle, _, _ = train_models(dataset, config, workers=1, report=lambda line: None)
+        feedback = make_frame(FEEDBACK_ROWS, 1)
+        feedback["human_verdict"] = np.where(feedback["is_fraud"] == 1, "❌ Fraud", "✅ Not Fraud")
+        assert set(feedback["human_verdict"]) <= set(FEEDBACK_VERDICTS)
+
+        start = time.perf_counter()
+        full_refit(dataset, feedback)
+        full = time.perf_counter() - start
+
+        state = {"round": 0, "tree_rounds": None, "seen": set()}
+        start = time.perf_counter()
+        result = incremental_round(copy.copy(bundle), dataset, feedback, state, config, report=lambda line: None)
+        incremental = time.perf_counter() - start
+
+        print(f"{N:,} base rows, {FEEDBACK_ROWS:,} feedback rows\n")
+        print(f"{'mode':<14} {'secs':>8} {'speedup':>8}")
+        print(f"{'full refit':<14} {full:>8.1f} {1:>7.1f}x")
+        print(f"{'incremental':<14} {incremental:>8.1f} {full / incremental:>7.1f}x")
+        print()
+        for name, metrics in result["metrics"].items():
+            print(f"  {name:<10} holdout AUC {metrics['auc']:.4f}  recall {metrics['recall']:.4f}  "
+                  f"precision {metrics['precision']:.4f}")
+        print(f"  gate: {'; '.join(result['reasons']) or 'passes'}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/bench_micro_batching.py
+#
+# p50/p99 latency and throughput of single-row scoring under concurrent
+# callers, with and without the MicroBatcher in front of the models.
+#
+#   python benchmarks/bench_micro_batching.py [threads] [requests_per_thread]
+
+import os
+import sys
+import threading
+import time
+import warnings
+
+import joblib
+import numpy as np
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_flask")))
+from utils.micro_batcher import MicroBatcher
+from utils.tree_engine import CompiledRandomForest, CompiledIsolationForest
+
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+with open("backend_flask/config/features_config.yaml") as f:
+    config = yaml.safe_load(f)
+paths = config["model_paths"]
+iso_scaler = joblib.load(paths["iso_scaler"])
+compiled_rf = CompiledRandomForest(joblib.load(paths["rf"]), joblib.load(paths["rf_scaler"]))
+compiled_iso = CompiledIsolationForest(joblib.load(paths["iso"]), iso_scaler)
+risk_scaler = joblib.load(paths["iso_risk_scaler"])
+
+
+def score_rows(rows):
+    X = np.vstack(rows)
+    rf_preds = compiled_rf.predict(X)
+    anomaly = compiled_iso.decision_function(X)
+    risk = risk_scaler.transform(-anomaly.reshape(-1, 1)).ravel()
+    return list(zip(rf_preds, risk))
+
+
+def run(n_threads, per_thread, submit):
+    rng = np.random.default_rng(0)
+    rows = iso_scaler.mean_ + rng.normal(size=(n_threads * per_thread, len(iso_scaler.mean_))) * iso_scaler.scale_
+    latencies = [[] for _ in range(n_threads)]
+
+    def worker(t):
+        for i in range(per_thread):
+            row = rows[t * per_thread + i].reshape(1, -1)
+            start = time.perf_counter()
+            submit(row)
+            latencies[t].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(n_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    lat = np.array([x for per in latencies for x in per]) * 1000
+    return np.percentile(lat, 50), np.percentile(lat, 99), len(lat) / elapsed
+
+
+if __name__ == "__main__":
+    n_threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    micro = config["micro_batching"]
+
+    print(f"{n_threads} threads x {per_thread} requests")
+    print(f"{'mode':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'txn/s':>9}")
+    p50, p99, tps = run(n_threads, per_thread, lambda row: score_rows([row])[0])
+    print(f"{'direct':>10} {p50:>9.2f} {p99:>9.2f} {tps:>9.0f}")
+
+    batcher = MicroBatcher(score_rows, max_batch_size=micro["max_batch_size"], max_wait_ms=micro["max_wait_ms"])
+    p50, p99, tps = run(n_threads, per_thread, batcher.submit)
+    stats = batcher.stats()
+    batcher.close()
+    print(f"{'batched':>10} {p50:>9.2f} {p99:>9.2f} {tps:>9.0f}")
+    print(f"avg batch size {stats['avg_batch_size']}, queue p50/p99 {stats['queue_ms_p50']}/{stats['queue_ms_p99']} ms")
@@ -0,0 +1,90 @@
+# benchmarks/bench_pending_reviews.py
+#
+# Latency of /api/admin/pending-reviews' query work as the queue grows:
+# the old "load every pending row, then User.query.get per row" path vs one
+# keyset page (first page and a page deep in the queue).  The old path is
+# skipped above 10k rows, where it runs for minutes.
+#
+#   python benchmarks/bench_pending_reviews.py [sizes...]
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_flask")))
+import migrations
+from models import User, Transaction
+from utils.listings import pending_reviews, encode_cursor
+
+SIZES = [int(a) for a in sys.argv[1:]] or [100, 10_000, 1_000_000]
+N_USERS = 10_000
+START = datetime(2025, 7, 1)
+REPEATS = 20
+
+
+def fill(engine, n_pending):
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": u, "name": f"user{u}", "email": f"u{u}@example.com", "password_hash": "x", "phone": str(9000000000 + u)}
+            for u in range(1, N_USERS + 1)
+        ])
+        # As many settled transactions again, so the status filter has work to do
+        for offset in range(0, 2 * n_pending, 100_000):
+            conn.execute(insert(Transaction), [
+                {
+                    "user_id": i % N_USERS + 1,
+                    "amount": 100 + i % 5000,
+                    "details": {"beneficiaryAccount": f"ACC{i % 20000}"},
+                    "status": "pending_admin_review" if i % 2 == 0 else "approved",
+                    "risk_score": (i * 37) % 100,
+                    "created_at": START + timedelta(seconds=i),
+                }
+                for i in range(offset, min(offset + 100_000, 2 * n_pending))
+            ])
+
+
+def old_path(session):
+    reviews = []
+    for txn in session.query(Transaction).filter_by(status="pending_admin_review").all():
+        user = session.get(User, txn.user_id)
+        reviews.append((txn.id, user.name if user else "Unknown"))
+    return reviews
+
+
+def timed(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    db_dir = tempfile.mkdtemp(prefix="pending-reviews-")
+    try:
+        print(f"{'pending rows':>12} {'old ms':>10} {'page 1 ms':>10} {'deep page ms':>13} {'filtered ms':>12}")
+        for n in SIZES:
+            engine = create_engine(f"sqlite:///{os.path.join(db_dir, f'app-{n}.db')}")
+            migrations.upgrade(engine)
+            fill(engine, n)
+            deep = encode_cursor(START + timedelta(seconds=n), n)
+            with Session(engine) as session:
+                old = f"{timed(lambda: old_path(session), 1):>10,.1f}" if n <= 10_000 else f"{'-':>10}"
+                first = timed(lambda: pending_reviews(session, limit=100), REPEATS)
+                deep_ms = timed(lambda: pending_reviews(session, deep, limit=100), REPEATS)
+                filtered = timed(lambda: pending_reviews(session, limit=100, min_risk=90, max_amount=1000), REPEATS)
+            print(f"{n:>12,} {old} {first:>10.2f} {deep_ms:>13.2f} {filtered:>12.2f}")
+            engine.dispose()
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_shared_memory.py
+#
+# Per-worker and combined memory of N worker processes that each load the
+# scoring artifacts the old way (joblib pickles + merchant DataFrame) vs
+# memory-mapped (compiled trees + packed merchant table).
+#
+#   python benchmarks/bench_shared_memory.py [n_workers]   # after the app has seeded the registry
+
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_flask")))
+
+N_WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+
+with open("backend_flask/config/features_config.yaml") as f:
+    config = yaml.safe_load(f)
+
+
+def worker(mode, table_path, ready, done, reports):
+    import joblib
+    import numpy as np
+    import pandas as pd
+    from utils.artifacts import load_compiled_models, memory_report
+    from utils.merchant_table import MerchantTable
+    from utils.model_registry import ModelRegistry
+
+    registry = ModelRegistry(config["model_registry"]["root"])
+    version = registry.current()
+    paths, artifacts_dir = registry.paths(version), registry.compiled_dir(version)
+    if mode == "pickle":
+        models = (joblib.load(paths["rf"]), joblib.load(paths["iso"]))
+        merchants = pd.read_csv(config["data_paths"]["merchant_metadata"])
+        n_features = models[0].n_features_in_
+    else:
+        models = load_compiled_models(paths, artifacts_dir, config["inference"]["fold_scalers"])
+        merchants = MerchantTable.load(table_path, mmap_mode="r")
+        # Touch every page once, as live traffic eventually would
+        for forest in models:
+            for name in forest._arrays:
+                np.asarray(getattr(forest, name)).sum()
+        merchants.records["merchant_lat"].sum()
+        n_features = models[0].n_features
+    models[0].predict(np.zeros((1, n_features)))
+
+    ready.put(os.getpid())
+    done.wait()
+    reports.put(memory_report([artifacts_dir, os.path.dirname(table_path)]))
+
+
+def run(mode, table_path):
+    ctx = mp.get_context("spawn")
+    ready, reports, done = ctx.Queue(), ctx.Queue(), ctx.Event()
+    procs = [ctx.Process(target=worker, args=(mode, table_path, ready, done, reports)) for _ in range(N_WORKERS)]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        ready.get()
+    # Measure only once every worker holds its artifacts, so PSS splits shared pages N ways
+    done.set()
+    results = [reports.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return results
+
+
+if __name__ == "__main__":
+    from utils.merchant_table import MerchantTable
+
+    table_path = config["data_paths"]["merchant_table"]
+    tmp = None
+    if not os.path.exists(table_path):
+        tmp = tempfile.TemporaryDirectory()
+        table_path = os.path.join(tmp.name, "merchant_table.npy")
+        MerchantTable.from_csv(config["data_paths"]["merchant_metadata"]).save(table_path)
+
+    print(f"{N_WORKERS} workers")
+    print(f"{'mode':<8} {'rss/worker':>11} {'pss/worker':>11} {'shared':>8} {'artifacts rss':>14} {'total pss':>10}")
+    for mode in ("pickle", "mmap"):
+        results = run(mode, table_path)
+        rss = sum(r["rss_mb"] for r in results) / len(results)
+        pss = sum(r["pss_mb"] for r in results)
+        shared = sum(r["shared_mb"] for r in results) / len(results)
+        mapped = sum(r["artifacts"]["rss_mb"] for r in results) / len(results)
+        print(f"{mode:<8} {rss:>9.1f}MB {pss / len(results):>9.1f}MB {shared:>6.1f}MB {mapped:>12.1f}MB {pss:>8.1f}MB")
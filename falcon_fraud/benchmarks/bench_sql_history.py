@@ -0,0 +1,143 @@
+# benchmarks/bench_sql_history.py
+#
+# Per-transaction cost of the four history lookups (time_since_last_txn,
+# time_diff_mins, is_new_beneficiary, is_rapid_repeat) served by the
+# in-process DataFrame scans in utils.feature_engineering vs SqlTxnHistory
+# on a WAL-mode SQLite file, at 1k, 100k and 10M logged rows.  Each size
+# and store runs in a fresh process; the SQL side also reports load and
+# buffered add throughput.
+#
+#   python benchmarks/bench_sql_history.py [sizes...]
+
+import multiprocessing as mp
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_flask")))
+from utils.feature_engineering import (
+    get_time_diff_mins, get_time_since_last_txn, is_new_beneficiary, is_rapid_repeat
+)
+from utils.sql_history import SqlTxnHistory, enable_wal
+
+SIZES = [int(a) for a in sys.argv[1:]] or [1_000, 100_000, 10_000_000]
+CHUNK = 1_000_000
+NOW = datetime(2025, 9, 1)
+
+
+def chunks(n_rows):
+    rng = np.random.default_rng(0)
+    n_senders = max(n_rows // 20, 10)
+    start = np.datetime64(NOW - timedelta(days=90), "us")
+    step = 90 * 86400 * 10 ** 6 // n_rows
+    for offset in range(0, n_rows, CHUNK):
+        n = min(CHUNK, n_rows - offset)
+        senders = rng.integers(0, n_senders, n)
+        yield pd.DataFrame({
+            "sender_account": pd.Series(senders).astype(str).radd("S").to_numpy(),
+            "beneficiary_account": pd.Series((senders * 7 + rng.integers(0, 10, n)) % n_senders).astype(str).radd("B").to_numpy(),
+            "timestamp": start + (np.arange(offset, offset + n) * step).astype("timedelta64[us]"),
+        })
+
+
+def probe_keys(n_rows, count):
+    rng = np.random.default_rng(1)
+    n_senders = max(n_rows // 20, 10)
+    keys = []
+    for s in rng.integers(0, n_senders, count):
+        # Half known pairs, half new beneficiaries
+        b = (s * 7 + 3) % n_senders if len(keys) % 2 == 0 else n_senders + s
+        keys.append((f"S{s}", f"B{b}"))
+    return keys
+
+
+def time_lookups(lookup, keys):
+    samples = []
+    for key in keys:
+        start = time.perf_counter()
+        lookup(*key)
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1] if len(samples) >= 100 else samples[-1]
+
+
+def run_dataframe(n_rows, results):
+    txn_df = pd.concat(chunks(n_rows), ignore_index=True)
+
+    def lookup(sender, beneficiary):
+        get_time_since_last_txn(sender, txn_df, NOW)
+        get_time_diff_mins(sender, beneficiary, txn_df, NOW)
+        is_new_beneficiary(sender, beneficiary, txn_df)
+        is_rapid_repeat(sender, beneficiary, txn_df, now=NOW)
+
+    keys = probe_keys(n_rows, {1_000: 1000, 100_000: 100}.get(n_rows, 10))
+    results.put({"lookup_us": time_lookups(lookup, keys)})
+
+
+def run_sql(n_rows, db_dir, results):
+    db_path = os.path.join(db_dir, f"history-{n_rows}.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    enable_wal(engine)
+    store = SqlTxnHistory(engine, replay_window_days=0)
+    start = time.perf_counter()
+    for i, chunk in enumerate(chunks(n_rows)):
+        store.ingest(chunk, source=f"chunk-{i}", now=NOW)
+    load_secs = time.perf_counter() - start
+
+    def lookup(sender, beneficiary):
+        store.time_since_last_txn(sender, NOW)
+        store.time_diff_mins(sender, beneficiary, NOW)
+        store.is_new_beneficiary(sender, beneficiary)
+        store.is_rapid_repeat(sender, beneficiary, now=NOW)
+
+    lookup_us = time_lookups(lookup, probe_keys(n_rows, 2000))
+
+    adds = 20_000
+    start = time.perf_counter()
+    for i in range(adds):
+        store.add(f"S{i % 997}", f"B{i % 89}", NOW + timedelta(microseconds=i))
+    store.close()
+    add_secs = time.perf_counter() - start
+    results.put({
+        "lookup_us": lookup_us,
+        "load_rows_per_sec": n_rows / load_secs,
+        "add_rows_per_sec": adds / add_secs,
+        "db_mb": sum(os.path.getsize(p) for p in (db_path, db_path + "-wal") if os.path.exists(p)) / 1e6,
+    })
+
+
+def in_child(target, *args):
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=target, args=args + (results,))
+    proc.start()
+    result = results.get()
+    proc.join()
+    return result
+
+
+def main():
+    db_dir = tempfile.mkdtemp(prefix="sql-history-")
+    try:
+        print(f"{'rows':>12}  {'store':<10} {'p50 µs/txn':>11} {'p99 µs/txn':>11}  notes")
+        for n_rows in SIZES:
+            df = in_child(run_dataframe, n_rows)
+            sql = in_child(run_sql, n_rows, db_dir)
+            print(f"{n_rows:>12,}  {'dataframe':<10} {df['lookup_us'][0]:>11,.0f} {df['lookup_us'][1]:>11,.0f}")
+            print(f"{n_rows:>12,}  {'sql':<10} {sql['lookup_us'][0]:>11,.0f} {sql['lookup_us'][1]:>11,.0f}  "
+                  f"load {sql['load_rows_per_sec']:,.0f} rows/s, add {sql['add_rows_per_sec']:,.0f} rows/s, "
+                  f"db {sql['db_mb']:,.1f} MB")
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/bench_stream_transactions.py
+#
+# Peak memory and time of /api/all-transactions' query-and-encode work as
+# the table grows:
+#
+#   load all     the old path: ORM .all(), a dict per row, one json.dumps
+#   stream       yield_per chunks encoded and dropped one at a time
+#   stream+det   the same with ?fields=...,details
+#
+# Each mode runs in its own process; "base MB" is its RSS once the engine
+# is up, "peak MB" its peak RSS, "first ms" the time to the first chunk
+# of output.
+#
+#   python benchmarks/bench_stream_transactions.py [sizes...]
+
+import json
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_flask")))
+import migrations
+from models import Transaction
+from utils.listings import keyset_stream, transactions_query, transaction_json
+
+SIZES = [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000]
+START = datetime(2025, 7, 1)
+FIELDS = ("id", "user_id", "amount", "status", "risk_score", "created_at")
+
+
+def fill(engine, n):
+    with engine.begin() as conn:
+        for offset in range(0, n, 100_000):
+            conn.execute(insert(Transaction), [
+                {
+                    "user_id": i % 10_000 + 1,
+                    "amount": 100 + i % 5000,
+                    "details": {
+                        "beneficiaryAccount": f"ACC{i % 20000:012d}", "beneficiaryCustomerName": f"Customer {i % 20000}",
+                        "ifsc": "HDFC0001234", "channel": "UPI", "remarks": "monthly rent and utilities",
+                        "sender_lat": 19.07, "sender_lon": 72.87, "device_id": f"dev-{i % 5000}",
+                    },
+                    "status": "approved",
+                    "risk_score": (i * 37) % 100,
+                    "created_at": START + timedelta(seconds=i),
+                }
+                for i in range(offset, min(offset + 100_000, n))
+            ])
+
+
+def load_all(session, out):
+    txns = session.query(Transaction).order_by(Transaction.created_at.desc()).all()
+    out(json.dumps([
+        {"id": t.id, "user_id": t.user_id, "amount": str(t.amount), "status": t.status,
+         "risk_score": t.risk_score, "details": t.details, "created_at": t.created_at.isoformat()}
+        for t in txns
+    ]))
+
+
+def stream(session, out, fields):
+    chunks = keyset_stream(session, transactions_query(fields), Transaction.created_at, Transaction.id,
+                           descending=True, chunk_rows=1000)
+    out("[")
+    for rows in chunks:
+        out(",".join(json.dumps(transaction_json(row, fields)) for row in rows))
+    out("]")
+
+
+def proc_status_mb(key):
+    # VmHWM, unlike ru_maxrss, isn't inherited from the parent across exec
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(key + ":"):
+                return int(line.split()[1]) / 1024
+
+
+def run(path, mode, results):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.connect():
+        pass
+    base = proc_status_mb("VmRSS")
+    first, written = [], [0]
+
+    def out(text):
+        if not first and len(text) > 1:
+            first.append(time.perf_counter())
+        written[0] += len(text)
+
+    start = time.perf_counter()
+    with Session(engine) as session:
+        if mode == "load all":
+            load_all(session, out)
+        else:
+            stream(session, out, FIELDS + (("details",) if mode == "stream+det" else ()))
+    elapsed = time.perf_counter() - start
+    results.put((base, proc_status_mb("VmHWM"), (first[0] - start) * 1000, elapsed, written[0] / 2**20))
+
+
+def main():
+    ctx = mp.get_context("spawn")
+    db_dir = tempfile.mkdtemp(prefix="stream-txns-")
+    try:
+        print(f"{'rows':>10} {'mode':<11} {'base MB':>8} {'peak MB':>8} {'first ms':>9} {'total s':>8} {'body MB':>8}")
+        for n in SIZES:
+            path = os.path.join(db_dir, f"app-{n}.db")
+            engine = create_engine(f"sqlite:///{path}")
+            migrations.upgrade(engine)
+            fill(engine, n)
+            engine.dispose()
+            for mode in ("load all", "stream", "stream+det"):
+                results = ctx.Queue()
+                proc = ctx.Process(target=run, args=(path, mode, results))
+                proc.start()
+                base, peak, first_ms, elapsed, body = results.get()
+                proc.join()
+                print(f"{n:>10,} {mode:<11} {base:>8.1f} {peak:>8.1f} {first_ms:>9.1f} {elapsed:>8.2f} {body:>8.1f}")
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# benchmarks/bench_tiered_history.py
+#
+# Replays a synthetic txn log (default 10M rows over 180 days) into the
+# tiered history and reports replay time, resident memory, cold-tier size
+# and lookup latency for hot hits, cold hits and unseen pairs.  --flat also
+# loads the same rows into a single in-memory TxnHistory for comparison.
+#
+#   python benchmarks/bench_tiered_history.py [rows] [--flat]
+
+import ctypes
+import gc
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_flask")))
+from utils.artifacts import memory_report
+from utils.tiered_history import TieredTxnHistory
+from utils.txn_history import TxnHistory
+
+args = [a for a in sys.argv[1:] if not a.startswith("--")]
+N_ROWS = int(args[0]) if args else 10_000_000
+FLAT = "--flat" in sys.argv
+CHUNK = 1_000_000
+DAYS = 180
+N_SENDERS = 500_000
+N_BENEFICIARIES = 200_000
+NOW = datetime(2025, 9, 1)
+
+with open("backend_flask/config/features_config.yaml") as f:
+    history_config = yaml.safe_load(f)["history"]
+
+
+def chunks():
+    rng = np.random.default_rng(0)
+    start = np.datetime64(NOW - timedelta(days=DAYS), "us")
+    step = DAYS * 86400 * 10 ** 6 // N_ROWS
+    for offset in range(0, N_ROWS, CHUNK):
+        n = min(CHUNK, N_ROWS - offset)
+        # Time-ordered like the real log, with Zipf-ish skew towards busy senders
+        ts = start + (np.arange(offset, offset + n) * step).astype("timedelta64[us]")
+        senders = np.minimum(rng.zipf(1.3, n), N_SENDERS)
+        beneficiaries = (senders * 7 + rng.integers(0, 20, n)) % N_BENEFICIARIES
+        yield pd.DataFrame({
+            "sender_account": pd.Series(senders).astype(str).radd("S").to_numpy(),
+            "beneficiary_account": pd.Series(beneficiaries).astype(str).radd("B").to_numpy(),
+            "timestamp": ts.astype(str),
+        })
+
+
+def timed_lookups(history, keys, now):
+    start = time.perf_counter()
+    for sender, beneficiary in keys:
+        history.time_since_last_txn(sender, now)
+        history.time_diff_mins(sender, beneficiary, now)
+        history.is_new_beneficiary(sender, beneficiary)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+def settled_rss():
+    gc.collect()
+    try:
+        # Hand freed chunk buffers back to the OS so RSS reflects live data
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except OSError:
+        pass
+    return memory_report()["rss_mb"]
+
+
+def run(mode, cold_dir, results):
+    base = settled_rss()
+    if mode == "tiered":
+        history = TieredTxnHistory(
+            cold_dir,
+            hot_window_days=history_config["hot_window_days"],
+            max_hot_rows=history_config["max_hot_rows"],
+            evict_every=history_config["evict_every"],
+            cold_partitions=history_config["cold_partitions"],
+            cold_cache_partitions=history_config["cold_cache_partitions"],
+            background=False,
+        )
+    else:
+        history = TxnHistory()
+    start = time.perf_counter()
+    peak = base
+    for i, chunk in enumerate(chunks()):
+        if mode == "tiered":
+            history.ingest(chunk, source=f"chunk-{i}", now=NOW)
+        else:
+            history.ingest(chunk)
+        peak = max(peak, memory_report()["rss_mb"])
+    result = {
+        "replay_secs": time.perf_counter() - start,
+        "rss_mb": settled_rss() - base,
+        "peak_mb": peak - base,
+        "hot_rows": history.hot.rows if mode == "tiered" else history.rows,
+    }
+    if mode == "tiered":
+        result["cold_keys"] = len(history.cold)
+        result["cold_mb"] = sum(os.path.getsize(os.path.join(cold_dir, n)) for n in os.listdir(cold_dir)) / 1e6
+
+    rng = np.random.default_rng(1)
+    hot_keys = [(f"S{s}", f"B{(s * 7) % N_BENEFICIARIES}") for s in rng.integers(1, 50, 2000)]
+    idle_keys = [(f"S{s}", f"B{(s * 7 + 3) % N_BENEFICIARIES}") for s in rng.integers(N_SENDERS // 2, N_SENDERS, 2000)]
+    new_keys = [(f"S{s}", f"BX{s}") for s in rng.integers(1, N_SENDERS, 2000)]
+    result["lookups_us"] = {
+        label: timed_lookups(history, keys, NOW)
+        for label, keys in (("hot hit", hot_keys), ("idle sender", idle_keys), ("unseen pair", new_keys))
+    }
+    results.put(result)
+
+
+def in_child(mode, cold_dir):
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=run, args=(mode, cold_dir, results))
+    proc.start()
+    result = results.get()
+    proc.join()
+    return result
+
+
+def main():
+    cold_dir = tempfile.mkdtemp(prefix="cold-history-")
+    try:
+        print(f"{N_ROWS:,} rows over {DAYS} days, hot window {history_config['hot_window_days']} days, "
+              f"max_hot_rows {history_config['max_hot_rows']:,}")
+        for mode in (["tiered", "flat"] if FLAT else ["tiered"]):
+            r = in_child(mode, cold_dir)
+            print(f"{mode:<7} replay {r['replay_secs']:7.1f} s ({N_ROWS / r['replay_secs']:,.0f} rows/s)   "
+                  f"memory {r['rss_mb']:7.1f} MB (peak {r['peak_mb']:.1f} MB)   hot rows {r['hot_rows']:,}")
+            if mode == "tiered":
+                print(f"        cold tier {r['cold_keys']:,} keys, {r['cold_mb']:.1f} MB on disk")
+            for label, us in r["lookups_us"].items():
+                print(f"        lookup {label:<12} {us:7.1f} µs / txn (3 features)")
+    finally:
+        shutil.rmtree(cold_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_top_beneficiaries.py
+#
+# Latency of /api/admin/analytics/top-risky-beneficiaries' query work as
+# the table grows (about a fifth of the rows score >= 80):
+#
+#   counter    the old path: load every high-risk ORM row, read the account
+#              out of details, Counter.most_common(10)
+#   group by   top_risky_beneficiaries, on the promoted, indexed column
+#
+# Both are checked to return the same top 10.
+#
+#   python benchmarks/bench_top_beneficiaries.py [sizes...]
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_flask")))
+import migrations
+from models import Transaction, promoted_details
+from utils.analytics import top_risky_beneficiaries
+
+SIZES = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+START = datetime(2025, 7, 1)
+REPEATS = 5
+
+
+def fill(engine, n):
+    with engine.begin() as conn:
+        for offset in range(0, n, 100_000):
+            rows = []
+            for i in range(offset, min(offset + 100_000, n)):
+                # A few hot beneficiaries over a long tail
+                account = i % 40 if i % 3 == 0 else (i * 7919) % 20_000
+                details = {"beneficiaryAccount": f"ACC{account}", "senderAccount": f"S{i % 9000}",
+                           "channel": "UPI", "ifsc": "HDFC0001234"}
+                rows.append({"user_id": i % 1000 + 1, "amount": 100 + i % 5000, "details": details,
+                             "status": "approved", "risk_score": (i * 37) % 100,
+                             "created_at": START + timedelta(seconds=i), **promoted_details(details)})
+            conn.execute(insert(Transaction), rows)
+
+
+def counter_path(session):
+    # id order, the table scan the old query got before risk_score was indexed
+    txns = session.query(Transaction).filter(Transaction.risk_score >= 80).order_by(Transaction.id).all()
+    return Counter(t.details.get("beneficiaryAccount", "Unknown") for t in txns if t.details).most_common(10)
+
+
+def timed(fn, repeats):
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    db_dir = tempfile.mkdtemp(prefix="top-beneficiaries-")
+    try:
+        print(f"{'rows':>10} {'counter ms':>11} {'group by ms':>12} {'speedup':>8}")
+        for n in SIZES:
+            engine = create_engine(f"sqlite:///{os.path.join(db_dir, f'app-{n}.db')}")
+            migrations.upgrade(engine)
+            fill(engine, n)
+            with Session(engine) as session:
+                old_ms, old = timed(lambda: counter_path(session), 1 if n > 100_000 else REPEATS)
+                new_ms, new = timed(lambda: [tuple(r) for r in top_risky_beneficiaries(session)], REPEATS)
+            assert old == new, (old, new)
+            print(f"{n:>10,} {old_ms:>11,.1f} {new_ms:>12,.1f} {old_ms / new_ms:>7.0f}x")
+            engine.dispose()
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
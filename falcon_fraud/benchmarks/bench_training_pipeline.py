@@ -0,0 +1,90 @@
+# benchmarks/bench_training_pipeline.py
+#
+# Wall time of training the model bundle on synthetic data:
+#
+#   sequential     the train_rf.py + train_iso.py steps one after another,
+#                  cross_val_score folds run serially
+#   pool xN        utils.training.train_models on N workers (1 and every
+#                  core), with the per-stage timings it reports
+#
+# The forests come out identical in every mode; the checks at the end
+# fail loudly if they don't.
+#
+#   python benchmarks/bench_training_pipeline.py [rows]   # default 50000
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import yaml
+from sklearn.ensemble import IsolationForest, RandomForestClassifier
+from sklearn.model_selection import cross_val_score, train_test_split
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_flask")))
+from utils.dataset_cache import load_training_dataset
+from utils.training import ISO_PARAMS, RF_PARAMS, iso_sample, rf_sample, train_models
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+
+with open(os.path.join(os.path.dirname(__file__), "..", "backend_flask", "config", "features_config.yaml")) as f:
+    config = yaml.safe_load(f)
+
+
+def write_csv(path, n):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({col: rng.normal(size=n).round(4) for col in config["features"]["numerical"]})
+    for col in config["features"]["categorical"]:
+        df[col] = rng.choice(["NEFT", "UPI", "IMPS", "RTGS", "POS"], size=n)
+    df["is_fraud"] = ((df["amount"] + df["hour"] > 2.2) | (rng.random(n) < 0.02)).astype(int)
+    df.to_csv(path, index=False)
+
+
+def sequential(dataset):
+    sample = rf_sample(dataset.y)
+    X, y = dataset.features(sample), np.asarray(dataset.y[sample])
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    X_train_scaled = StandardScaler().fit_transform(X_train)
+    rf = RandomForestClassifier(**RF_PARAMS).fit(X_train_scaled, y_train)
+    cross_val_score(rf, X_train_scaled, y_train, cv=5).mean()
+    X_iso = StandardScaler().fit_transform(dataset.features(iso_sample(dataset.y)))
+    iso = IsolationForest(**ISO_PARAMS).fit(X_iso)
+    MinMaxScaler((0, 100)).fit(-iso.decision_function(X_iso).reshape(-1, 1))
+    return rf, iso
+
+
+def main():
+    work_dir = tempfile.mkdtemp(prefix="training-pipeline-")
+    try:
+        csv_path = os.path.join(work_dir, "txns.csv")
+        write_csv(csv_path, N)
+        dataset = load_training_dataset(csv_path, os.path.join(work_dir, "cache"), config, report=lambda line: None)
+        probe = np.random.default_rng(1).normal(size=(2000, len(dataset.feature_cols)))
+
+        start = time.perf_counter()
+        rf, iso = sequential(dataset)
+        base = time.perf_counter() - start
+        print(f"{N:,} rows, {os.cpu_count()} core(s)\n")
+        print(f"{'mode':<14} {'wall s':>8} {'speedup':>8}")
+        print(f"{'sequential':<14} {base:>8.1f} {1:>7.1f}x")
+
+        for workers in sorted({1, os.cpu_count()}):
+            start = time.perf_counter()
+            artifacts, _, stages = train_models(dataset, config, workers=workers, report=lambda line: None)
+            elapsed = time.perf_counter() - start
+            print(f"{f'pool x{workers}':<14} {elapsed:>8.1f} {base / elapsed:>7.1f}x")
+            assert np.array_equal(artifacts["rf"].predict_proba(probe), rf.predict_proba(probe))
+            assert np.array_equal(artifacts["iso"].decision_function(probe), iso.decision_function(probe))
+        print("\nstages of the last pool run:")
+        for stage in stages:
+            print(f"  {stage['stage']:<30} {stage['in']:<5} {stage['secs']:>7.2f}s")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_tree_engine.py
+#
+# Latency of sklearn vs the compiled tree evaluator for RF + IsolationForest
+# at several batch sizes, on the production model files.
+#
+#   python benchmarks/bench_tree_engine.py
+
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_flask")))
+from utils.tree_engine import CompiledRandomForest, CompiledIsolationForest
+
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+BATCH_SIZES = [1, 10, 100, 500, 1000, 5000]
+
+with open("backend_flask/config/features_config.yaml") as f:
+    config = yaml.safe_load(f)
+paths = config["model_paths"]
+
+rf_model = joblib.load(paths["rf"])
+iso_model = joblib.load(paths["iso"])
+rf_scaler = joblib.load(paths["rf_scaler"])
+iso_scaler = joblib.load(paths["iso_scaler"])
+
+start = time.perf_counter()
+compiled_rf = CompiledRandomForest(rf_model, rf_scaler)
+compiled_iso = CompiledIsolationForest(iso_model, iso_scaler)
+print(f"Compiled both forests in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+rng = np.random.default_rng(0)
+X_all = iso_scaler.mean_ + rng.normal(size=(max(BATCH_SIZES), len(iso_scaler.mean_))) * iso_scaler.scale_
+
+
+def sklearn_score(X):
+    rf_model.predict(rf_scaler.transform(X))
+    iso_model.decision_function(iso_scaler.transform(X))
+
+
+def compiled_score(X):
+    compiled_rf.predict(X)
+    compiled_iso.decision_function(X)
+
+
+def timeit(fn, X):
+    reps = max(3, 2000 // len(X))
+    start = time.perf_counter()
+    for _ in range(reps):
+        fn(X)
+    return (time.perf_counter() - start) / reps
+
+
+print(f"{'rows':>6} {'sklearn (ms)':>13} {'compiled (ms)':>14} {'speedup':>8}")
+for n in BATCH_SIZES:
+    X = X_all[:n]
+    assert np.array_equal(compiled_iso.decision_function(X), iso_model.decision_function(iso_scaler.transform(X)))
+    sk, comp = timeit(sklearn_score, X), timeit(compiled_score, X)
+    print(f"{n:>6} {sk * 1000:>13.2f} {comp * 1000:>14.2f} {sk / comp:>7.1f}x")
@@ -0,0 +1,64 @@
+# benchmarks/bench_txn_log.py
+#
+# Per-request cost of persisting one txn log row as the log grows:
+# the old "append to txn_df + rewrite txn_log.csv" path vs TxnLogWriter.
+#
+#   python benchmarks/bench_txn_log.py
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_flask")))
+from utils.txn_log import TXN_LOG_COLUMNS, TxnLogWriter
+
+SIZES = [1_000, 10_000, 100_000]
+SAMPLES = 50
+
+
+def make_row(i):
+    ts = datetime(2025, 7, 1) + timedelta(seconds=i)
+    return {
+        "sender_account": f"SNDR{i % 5000}",
+        "beneficiary_account": f"ACC{i % 20000}",
+        "timestamp": ts.isoformat(),
+        "beneficiary_name": "",
+        "beneficiary_branch": "",
+        "beneficiary_bank_name": "",
+        "sender_name": ""
+    }
+
+
+def bench_rewrite(size, tmp):
+    path = os.path.join(tmp, "txn_log.csv")
+    txn_df = pd.DataFrame([make_row(i) for i in range(size)], columns=TXN_LOG_COLUMNS)
+    start = time.perf_counter()
+    for i in range(SAMPLES):
+        txn_df.loc[len(txn_df)] = make_row(size + i)
+        txn_df.to_csv(path, index=False)
+    return (time.perf_counter() - start) / SAMPLES
+
+
+def bench_append(size, tmp):
+    writer = TxnLogWriter(os.path.join(tmp, "segments"), fsync_interval_secs=0)
+    for i in range(size):
+        writer.append(make_row(i))
+    start = time.perf_counter()
+    for i in range(SAMPLES):
+        writer.append(make_row(size + i))
+    elapsed = (time.perf_counter() - start) / SAMPLES
+    writer.close()
+    return elapsed
+
+
+if __name__ == "__main__":
+    print(f"{'rows':>10} {'rewrite (ms)':>14} {'append (ms)':>13}")
+    for size in SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            rewrite = bench_rewrite(size, tmp)
+            append = bench_append(size, tmp)
+        print(f"{size:>10} {rewrite * 1000:>14.3f} {append * 1000:>13.3f}")
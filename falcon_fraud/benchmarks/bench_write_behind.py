@@ -0,0 +1,97 @@
+# benchmarks/bench_write_behind.py
+#
+# Commits and POSTs per second for the persistence half of
+# /api/transactions under concurrent requests (scoring excluded):
+#
+#   two commits   the old path: commit the Transaction, then the Notification
+#   one commit    Transaction and Notification in one unit of work
+#   write-behind  commit the Transaction, queue the Notification
+#
+# Runs against a fresh SQLite file per mode; --wal switches it to WAL.
+#
+#   python benchmarks/bench_write_behind.py [threads] [posts_per_thread] [--wal]
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend_flask")))
+from models import db, User, Transaction, Notification
+from utils.sql_history import enable_wal
+from utils.write_behind import WriteBehindQueue
+
+args = [a for a in sys.argv[1:] if not a.startswith("--")]
+THREADS = int(args[0]) if args else 8
+PER_THREAD = int(args[1]) if len(args) > 1 else 200
+WAL = "--wal" in sys.argv
+
+
+def post(engine, queue, mode, user_id, i):
+    with Session(engine) as session:
+        txn = Transaction(user_id=user_id, amount=1500, details={"beneficiaryAccount": f"ACC{i}"},
+                          status="approved", risk_score=12.5)
+        session.add(txn)
+        values = {"user_id": user_id, "message": "Transaction approved. Risk Score: 12.50",
+                  "created_at": datetime.utcnow()}
+        if mode == "two commits":
+            session.commit()
+            session.add(Notification(**values))
+        elif mode == "one commit":
+            session.add(Notification(**values))
+        session.commit()
+        if mode == "write-behind":
+            queue.put(Notification.__table__, values)
+
+
+def run(mode, db_dir):
+    engine = create_engine(f"sqlite:///{os.path.join(db_dir, mode.replace(' ', '-') + '.db')}")
+    if WAL:
+        enable_wal(engine)
+    db.metadata.create_all(engine, tables=[User.__table__, Transaction.__table__, Notification.__table__])
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+    queue = WriteBehindQueue(engine) if mode == "write-behind" else None
+    latencies = [[] for _ in range(THREADS)]
+
+    def worker(t):
+        for i in range(PER_THREAD):
+            start = time.perf_counter()
+            post(engine, queue, mode, t + 1, i)
+            latencies[t].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(THREADS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    if queue is not None:
+        queue.close()
+    lat = np.array([x for per in latencies for x in per]) * 1000
+    posts = THREADS * PER_THREAD
+    print(f"{mode:<13} {posts / elapsed:>9,.0f} {len(commits) / elapsed:>11,.0f} {len(commits) / posts:>12.2f} "
+          f"{np.percentile(lat, 50):>8.2f} {np.percentile(lat, 99):>8.2f}")
+
+
+def main():
+    db_dir = tempfile.mkdtemp(prefix="write-behind-")
+    try:
+        print(f"{THREADS} threads x {PER_THREAD} POSTs, journal {'WAL' if WAL else 'default'}")
+        print(f"{'mode':<13} {'POSTs/s':>9} {'commits/s':>11} {'commits/POST':>12} {'p50 ms':>8} {'p99 ms':>8}")
+        for mode in ("two commits", "one commit", "write-behind"):
+            run(mode, db_dir)
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
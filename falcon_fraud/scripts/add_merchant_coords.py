@@ -1,81 +1,66 @@
-import pandas as pd
-from geopy.geocoders import Nominatim
-import time
+# scripts/add_merchant_coords.py
+#
+# Add merchant_lat / merchant_lon to every beneficiary account in the
+# training data (utils/geocoding.py): one lookup per distinct city, answers
+# kept in an append-only geocode cache that doubles as the checkpoint, the
+# lookups on a thread pool under one rate limit.  Interrupt it at any
+# point; the next run only looks up what the cache does not hold yet.
+#
+#   python scripts/add_merchant_coords.py [--geocoder nominatim|offline] [--workers N]
+#                                         [--rate R] [--retry-missing]
+
+import argparse
 import os
+import sys
+import yaml
+
+sys.path.insert(0, "backend_flask")
+from utils.dataset_cache import load_training_dataset
+from utils.geocoding import GeocodeCache, NominatimGeocoder, OfflineGeocoder, city_query, geocode_queries, merchant_coordinates
 
-# Load the full transactions dataset
-df = pd.read_csv("transactionsnew2.csv")
+# 🔧 Load config
+with open("backend_flask/config/features_config.yaml", "r") as f:
+    config = yaml.safe_load(f)
+geo_config = config["geocoding"]
 
-# Extract unique merchants
-merchant_df = df[[
+parser = argparse.ArgumentParser(description="Geocode merchant cities into merchant_metadata_enriched.csv")
+parser.add_argument("--geocoder", choices=["nominatim", "offline"], default=geo_config["geocoder"])
+parser.add_argument("--workers", type=int, default=geo_config["workers"])
+parser.add_argument("--rate", type=float, help="lookups per second, 0 = unlimited (default: config, or 0 offline)")
+parser.add_argument("--retry-missing", action="store_true", help="look up cached 'not found' cities again")
+args = parser.parse_args()
+
+# 📄 Unique merchants from the dataset cache
+cache_config = config["dataset_cache"]
+dataset = load_training_dataset(cache_config["source"], cache_config["dir"], config, label=cache_config["label"])
+merchant_df = dataset.frame([
     "beneficiary_account",
     "beneficiary_branch_name",
     "beneficiary_city",
     "beneficiary_bank_name"
-]].drop_duplicates(subset=["beneficiary_account"])
-
-# Output path
-output_path = "backend_flask/merchant_metadata_enriched.csv"
+]).drop_duplicates(subset=["beneficiary_account"])
 
-# If enriched file already exists, resume from there
-if os.path.exists(output_path):
-    enriched_df = pd.read_csv(output_path)
-    processed_accounts = set(enriched_df["beneficiary_account"])
-    print(f"🔁 Resuming — {len(processed_accounts)} accounts already processed.")
+# 🌍 Geocode the distinct cities the cache cannot answer yet
+if args.geocoder == "offline":
+    geocoder = OfflineGeocoder.from_csv(geo_config["offline_table"])
+    rate = args.rate or 0
 else:
-    enriched_df = pd.DataFrame(columns=[
-        "beneficiary_account", "beneficiary_branch_name",
-        "beneficiary_city", "beneficiary_bank_name",
-        "merchant_lat", "merchant_lon"
-    ])
-    processed_accounts = set()
-
-# Init geolocator
-geolocator = Nominatim(user_agent="falcon_fraud_geocoder")
-
-def get_coords(branch, city, bank):
-    parts = [p for p in [city, "India"] if p and str(p).strip()]
-    query = ", ".join(parts)
-    print(f"📍 Geocoding query: '{query}'")
-    try:
-        location = geolocator.geocode(query)
-        if location:
-            return (location.latitude, location.longitude)
-        else:
-            return (0.0, 0.0)
-    except Exception as e:
-        print(f"❌ Error geocoding '{query}': {e}")
-        return (0.0, 0.0)
-
-batch = []
-for idx, row in merchant_df.iterrows():
-    acc = row["beneficiary_account"]
-    if acc in processed_accounts:
-        continue
-
-    lat, lon = get_coords(row["beneficiary_branch_name"], row["beneficiary_city"], row["beneficiary_bank_name"])
-
-    enriched_row = {
-        "beneficiary_account": acc,
-        "beneficiary_branch_name": row["beneficiary_branch_name"],
-        "beneficiary_city": row["beneficiary_city"],
-        "beneficiary_bank_name": row["beneficiary_bank_name"],
-        "merchant_lat": lat,
-        "merchant_lon": lon
-    }
-
-    enriched_df = pd.concat([enriched_df, pd.DataFrame([enriched_row])], ignore_index=True)
-
-    processed_accounts.add(acc)
-
-    print(f"✅ Geocoded {acc}: ({lat}, {lon})")
-    time.sleep(1)
-
-    # Save every 10 rows
-    if len(enriched_df) % 10 == 0:
-        enriched_df.to_csv(output_path, index=False)
-        print("💾 Auto-saved progress...")
+    geocoder = NominatimGeocoder(geo_config["user_agent"], geo_config["domain"], geo_config["timeout_secs"])
+    rate = geo_config["rate_per_sec"] if args.rate is None else args.rate
+cache = GeocodeCache(geo_config["cache_path"], geocoder.name)
+queries = [city_query(city) for city in merchant_df["beneficiary_city"].astype(object).unique()]
+stats = geocode_queries(queries, geocoder, cache, workers=args.workers, rate_per_sec=rate,
+                        retries=geo_config["retries"], retry_missing=args.retry_missing)
+cache.close()
+print(f"✅ {stats}")
 
-# Final save
-enriched_df.to_csv(output_path, index=False)
-print("✅ All merchant coordinates saved!")
+# 💾 Write the enriched merchants in one go
+output_path = config["data_paths"]["merchant_metadata"]
+enriched_df = merchant_coordinates(merchant_df, cache)
+tmp_path = output_path + ".tmp"
+enriched_df.to_csv(tmp_path, index=False)
+os.replace(tmp_path, output_path)
+missing = int(((enriched_df["merchant_lat"] == 0) & (enriched_df["merchant_lon"] == 0)).sum())
+print(f"✅ {len(enriched_df)} merchants saved to {output_path} ({missing} without coordinates)")
+if stats["errors"]:
+    print(f"⚠️ {stats['errors']} queries failed; run again to retry them")
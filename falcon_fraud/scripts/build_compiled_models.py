@@ -0,0 +1,35 @@
+# scripts/build_compiled_models.py
+#
+# Rebuild the memory-mapped tree artifacts of a registry version, e.g.
+# after changing inference.fold_scalers.  New versions get theirs when
+# they are published, so this is rarely needed.
+#
+#   python scripts/build_compiled_models.py [version]   # default: CURRENT
+
+import os
+import sys
+import time
+import yaml
+
+sys.path.insert(0, "backend_flask")
+from utils.artifacts import build_compiled_models
+from utils.model_registry import ModelRegistry
+
+# 🔧 Load config
+with open("backend_flask/config/features_config.yaml", "r") as f:
+    config = yaml.safe_load(f)
+
+registry = ModelRegistry(config["model_registry"]["root"])
+version = sys.argv[1] if len(sys.argv) > 1 else registry.current()
+if version is None:
+    sys.exit("❌ Registry is empty; start the app or run retrain_with_feedback.py first")
+artifacts_dir = registry.compiled_dir(version)
+
+start = time.perf_counter()
+rf, iso = build_compiled_models(registry.paths(version), artifacts_dir, fold_scalers=config["inference"]["fold_scalers"])
+size = sum(
+    os.path.getsize(os.path.join(root, name))
+    for root, _, names in os.walk(artifacts_dir) for name in names
+)
+print(f"✅ Compiled {rf.n_trees} RF trees and {iso.n_trees} ISO trees for {version} into {artifacts_dir} "
+      f"in {time.perf_counter() - start:.2f}s ({size / 1e6:.1f} MB)")
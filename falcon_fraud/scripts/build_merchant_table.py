@@ -0,0 +1,25 @@
+# scripts/build_merchant_table.py
+#
+# Compile merchant_metadata_enriched.csv into the packed lookup table
+# that backend_flask/app.py loads at startup.
+
+import os
+import sys
+import time
+import yaml
+
+sys.path.insert(0, "backend_flask")
+from utils.merchant_table import MerchantTable
+
+# 🔧 Load config
+with open("backend_flask/config/features_config.yaml", "r") as f:
+    config = yaml.safe_load(f)
+
+csv_path = config["data_paths"]["merchant_metadata"]
+table_path = config["data_paths"]["merchant_table"]
+
+start = time.perf_counter()
+table = MerchantTable.from_csv(csv_path)
+table.save(table_path)
+print(f"✅ Packed {len(table)} merchants into {table_path} in {time.perf_counter() - start:.2f}s "
+      f"({os.path.getsize(table_path) / 1e6:.1f} MB)")
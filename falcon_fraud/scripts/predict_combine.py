@@ -1,87 +1,61 @@
-import pandas as pd
-import joblib
-import numpy as np
-import yaml
-from sklearn.preprocessing import MinMaxScaler
+# scripts/predict_combine.py
+#
+# Score a transactions CSV offline and export the ones that need a human
+# to the admin review queue.  The file is read in chunks and scored on a
+# process pool, so memory stays flat however large it is; per-row outputs
+# land as .npy column parts under batch_scoring.output_dir.  Rerunning
+# after a crash picks up at the first chunk that wasn't committed.
+#
+#   python scripts/predict_combine.py [input.csv] [--version V] [--workers N]
+#                                     [--chunk-rows N] [--restart]
+#
+# Models come from the registry's CURRENT version (or --version), falling
+# back to config model_paths when the registry is empty.
+#
+# ⚠️ Decisions follow the app's rules (decision_logic.decide_many), so the
+# review queue is no longer "predicted fraud, not high risk, ≤ ₹1 lakh":
+# ≥ ₹50 lakh always goes to review, RBI channel-limit breaches and
+# predicted fraud with a geo anomaly (> 200 km) or a rapid repeat are
+# blocked instead.  Exports from before that change select a different
+# set; keep that in mind when comparing feedback rounds, since the review
+# file feeds retrain_with_feedback.py and retrain_incremental.py.
+
+import argparse
+import sys
 import yaml
 
+sys.path.insert(0, "backend_flask")
+from utils.batch_scoring import score_file
+from utils.model_registry import ModelRegistry
+
 # 🔧 Load config
 with open("backend_flask/config/features_config.yaml", "r") as f:
     config = yaml.safe_load(f)
-
-# 📄 Load raw transaction data
-df = pd.read_csv("transactionsnew2.csv")
-df.fillna(0, inplace=True)
-
-# 🔁 Encode categorical features
-label_encoders = joblib.load(config["model_paths"]["encoders"])
-for col in config["features"]["categorical"]:
-    le = label_encoders[col]
-    df[col + config["encoding_suffix"]] = le.transform(df[col])
-
-# ✅ Select features
-feature_cols = (
-    config["features"]["numerical"] +
-    [col + config["encoding_suffix"] for col in config["features"]["categorical"]]
-)
-X = df[feature_cols]
-
-# 📦 Load models and scalers
-rf_model = joblib.load(config["model_paths"]["rf"])
-iso_model = joblib.load(config["model_paths"]["iso"])
-rf_scaler = joblib.load(config["model_paths"]["rf_scaler"])
-iso_scaler = joblib.load(config["model_paths"]["iso_scaler"])
-
-# 📊 Scale
-X_rf_scaled = rf_scaler.transform(X)
-X_iso_scaled = iso_scaler.transform(X)
-
-# 🔮 Predict
-df["rf_pred"] = rf_model.predict(X_rf_scaled)
-anomaly_scores = iso_model.decision_function(X_iso_scaled)
-reshaped_scores = -anomaly_scores.reshape(-1, 1)
-risk_scaler = joblib.load(config["model_paths"]["iso_risk_scaler"])
-df["risk_score"] = risk_scaler.transform(reshaped_scores).flatten()
-
-
-print("⚠️ Sample anomaly scores (ISO):", anomaly_scores[:5])
-print("📈 Inverted scores:", reshaped_scores[:5])
-print("🔥 Final risk scores:", df["risk_score"].head().tolist())
-
-
-
-
-# 🎯 Assign risk level
-def assign_risk(score, config):
-    if score < config["decision_logic"]["review_threshold"]:
-        return "✅ Low Risk"
-    elif score < config["decision_logic"]["block_threshold"]:
-        return "⚠️ Medium Risk"
-    else:
-        return "❌ High Risk"
-
-df["risk_level"] = df["risk_score"].apply(lambda score: assign_risk(score, config))
-
-
-# 🧠 Final decision logic
-def final_decision(rf_pred, risk_level, amount):
-    if risk_level == "❌ High Risk":
-        return "🚫 Block & Review"
-    if rf_pred == 1 and amount > 100000:
-        return "🚫 Block & Review"
-    if rf_pred == 1:
-        return "🔍 Send to Admin"
-    return "✅ Auto-approved"
-
-
-df["final_decision"] = df.apply(lambda row: final_decision(row["rf_pred"], row["risk_level"], row["amount"]), axis=1)
-
-# 📁 Filter transactions for manual review
-admin_df = df[df["final_decision"] == "🔍 Send to Admin"].copy()
-admin_df["human_verdict"] = "🕒 Pending"
-
-# 💾 Save to feedback folder
-admin_df.to_csv("feedback/admin_review_transactions.csv", index=False)
-print("✅ Exported flagged transactions for admin review.")
-
-print(df["final_decision"].value_counts())
+batch_config = config["batch_scoring"]
+
+parser = argparse.ArgumentParser(description="Chunked offline scoring into the admin review queue")
+parser.add_argument("input", nargs="?", default="transactionsnew2.csv")
+parser.add_argument("--version", help="registry version to score with (default: CURRENT)")
+parser.add_argument("--workers", type=int, default=batch_config["workers"], help="0 = one per CPU")
+parser.add_argument("--chunk-rows", type=int, default=batch_config["chunk_rows"])
+parser.add_argument("--output", default=batch_config["output_dir"])
+parser.add_argument("--review", default=batch_config["review_path"])
+parser.add_argument("--restart", action="store_true", help="discard a previous run's progress")
+args = parser.parse_args()
+config["batch_scoring"] = {**batch_config, "chunk_rows": args.chunk_rows}
+
+# 📦 Pick the model bundle
+registry = ModelRegistry(config["model_registry"]["root"])
+version = args.version or registry.current()
+paths = registry.paths(version) if version else config["model_paths"]
+print(f"📦 Scoring {args.input} with {version or 'config model_paths'}")
+
+try:
+    progress = score_file(args.input, args.output, args.review, paths, config,
+                          workers=args.workers, restart=args.restart)
+except RuntimeError as e:
+    sys.exit(f"❌ {e} (--restart)")
+
+print(f"✅ Exported flagged transactions for admin review to {args.review}")
+for decision, count in progress["counts"].items():
+    print(f"{decision:<20} {count:>12,}")
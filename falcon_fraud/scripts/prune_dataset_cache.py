@@ -0,0 +1,25 @@
+# scripts/prune_dataset_cache.py
+#
+# Remove dataset cache builds of older versions of the training CSV.  The
+# training scripts never delete them themselves, since another one may
+# still be reading an older build; run this while none of them is.  Builds
+# of other files, labels or feature lists are left alone.
+#
+#   python scripts/prune_dataset_cache.py [input.csv]   # default: dataset_cache.source
+
+import sys
+import yaml
+
+sys.path.insert(0, "backend_flask")
+from utils.dataset_cache import prune_dataset_cache
+
+# 🔧 Load config
+with open("backend_flask/config/features_config.yaml", "r") as f:
+    config = yaml.safe_load(f)
+cache_config = config["dataset_cache"]
+
+csv_path = sys.argv[1] if len(sys.argv) > 1 else cache_config["source"]
+removed = prune_dataset_cache(csv_path, cache_config["dir"], config, label=cache_config["label"])
+for path in removed:
+    print(f"🧹 Removed {path}")
+print(f"✅ Pruned {len(removed)} stale build(s) of {csv_path} from {cache_config['dir']}")
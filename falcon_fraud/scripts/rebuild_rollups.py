@@ -0,0 +1,31 @@
+# scripts/rebuild_rollups.py
+#
+# Regenerate the admin analytics rollup tables from the transactions table,
+# e.g. after transactions were edited outside the app.  The app keeps them
+# current itself, and seeds them when it first creates them.
+#
+#   python scripts/rebuild_rollups.py [database_url]   # default: DATABASE_URL, else the app's SQLite file
+
+import os
+import sys
+import time
+
+from sqlalchemy import create_engine, func, select
+
+sys.path.insert(0, "backend_flask")
+import migrations
+from models import DailyStatusRollup, UserRiskRollup
+from utils.analytics import rebuild_rollups
+
+url = sys.argv[1] if len(sys.argv) > 1 else os.environ.get(
+    "DATABASE_URL", "sqlite:///backend_flask/instance/fraud_detection.db"
+)
+engine = create_engine(url)
+migrations.upgrade(engine)
+
+start = time.perf_counter()
+with engine.begin() as conn:
+    rebuild_rollups(conn)
+    days = conn.execute(select(func.count(func.distinct(DailyStatusRollup.day)))).scalar()
+    users = conn.execute(select(func.count()).select_from(UserRiskRollup)).scalar()
+print(f"✅ Rebuilt rollups for {days} days and {users} high-risk users in {time.perf_counter() - start:.2f}s")
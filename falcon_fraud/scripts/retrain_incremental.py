@@ -0,0 +1,74 @@
+# scripts/retrain_incremental.py
+#
+# One incremental retraining round from admin feedback (utils/incremental.py):
+# new RF trees on the verdicts the active bundle has not trained on plus a
+# replay sample of the base data, the oldest trees aged out, encoders
+# extended without renumbering.  The candidate is published to the model
+# registry and activated only if it holds up against the current RF on
+# the holdout; retrain_with_feedback.py remains the full refit.
+#
+#   python scripts/retrain_incremental.py [--dry-run] [--no-activate]
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import joblib
+import yaml
+
+sys.path.insert(0, "backend_flask")
+from utils.dataset_cache import load_training_dataset
+from utils.incremental import incremental_round, lineage, load_feedback
+from utils.model_registry import ModelRegistry, publish_bundle
+
+# 🔧 Load config
+with open("backend_flask/config/features_config.yaml", "r") as f:
+    config = yaml.safe_load(f)
+
+parser = argparse.ArgumentParser(description="Incremental RF retraining from admin feedback")
+parser.add_argument("--dry-run", action="store_true", help="train and evaluate, publish nothing")
+parser.add_argument("--no-activate", action="store_true", help="publish the candidate without activating it")
+args = parser.parse_args()
+
+# 📦 Start from the active bundle (the loose pickles seed an empty registry)
+registry = ModelRegistry(config["model_registry"]["root"])
+parent = registry.bootstrap(config["model_paths"], fold_scalers=config["inference"]["fold_scalers"])
+parent_paths = registry.paths(parent)
+bundle = {key: joblib.load(path) for key, path in parent_paths.items()}
+state = lineage(registry, parent)
+
+# 📄 Base data (dataset cache) + reviewed feedback
+cache_config = config["dataset_cache"]
+dataset = load_training_dataset(cache_config["source"], cache_config["dir"], config, label=cache_config["label"])
+feedback = load_feedback(config["batch_scoring"]["review_path"])
+print(f"📄 {len(feedback)} reviewed feedback rows, bundle {parent} at round {state['round']}")
+
+result = incremental_round(bundle, dataset, feedback, state, config, parent=parent)
+if result is None:
+    sys.exit(0)
+
+print(json.dumps(result["metrics"], indent=2))
+if result["reasons"]:
+    print("❌ Candidate rejected: " + "; ".join(result["reasons"]))
+    sys.exit(1)
+if args.dry_run:
+    print("✅ Candidate passes the holdout gate (dry run, nothing published)")
+    sys.exit(0)
+
+# 💾 Only the RF and the encoders change; the rest is copied from the parent
+staging_dir = tempfile.mkdtemp(prefix="retrain-incremental-")
+paths = dict(parent_paths)
+for key in ("rf", "encoders"):
+    paths[key] = os.path.join(staging_dir, os.path.basename(parent_paths[key]))
+    joblib.dump(result["artifacts"][key], paths[key])
+try:
+    version, _ = publish_bundle(registry, paths, config, metadata=result["metadata"], activate=not args.no_activate)
+finally:
+    shutil.rmtree(staging_dir, ignore_errors=True)
+if args.no_activate:
+    print(f"✅ Published model bundle {version} (not activated; current: {parent}).")
+else:
+    print(f"✅ Published and activated model bundle {version} (previous: {parent}).")
+    print("   Roll back with POST /admin/models/rollback")
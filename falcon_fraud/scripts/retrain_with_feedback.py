@@ -1,18 +1,31 @@
+import numpy as np
 import pandas as pd
 import joblib
 import yaml
 from sklearn.ensemble import RandomForestClassifier, IsolationForest
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 import os
+import shutil
+import sys
+import tempfile
 from sklearn.preprocessing import MinMaxScaler
 
+sys.path.insert(0, "backend_flask")
+from utils.dataset_cache import load_training_dataset
+from utils.model_registry import ModelRegistry, publish_bundle
+
 # Load config
 with open("backend_flask/config/features_config.yaml", "r") as f:
     config = yaml.safe_load(f)
 
-# Load base + feedback data
-base = pd.read_csv("transactionsnew2.csv")
+# New pickles are staged here and published to the registry as one bundle
+staging_dir = tempfile.mkdtemp(prefix="retrain-")
+bundle_paths = {k: os.path.join(staging_dir, os.path.basename(v)) for k, v in config["model_paths"].items()}
+
+# Load base (from the dataset cache) + feedback data
+cache_config = config["dataset_cache"]
+dataset = load_training_dataset(cache_config["source"], cache_config["dir"], config, label=cache_config["label"])
 feedback = pd.read_csv("feedback/admin_review_transactions.csv")
 
 # Only take those with human verdict
@@ -21,27 +34,11 @@ feedback = feedback[feedback["human_verdict"].isin(["✅ Not Fraud", "❌ Fraud"
 # Map human verdict to is_fraud
 feedback["is_fraud"] = feedback["human_verdict"].map({"✅ Not Fraud": 0, "❌ Fraud": 1})
 
-# Combine
-df = pd.concat([base, feedback], ignore_index=True)
-
-# Encode
-label_encoders = {}
-for col in config["features"]["categorical"]:
-    le = LabelEncoder()
-    df[col] = df[col].astype(str)
-    unique_vals = df[col].unique().tolist()
-    if "Unknown" not in unique_vals:
-        unique_vals.append("Unknown")
-    le.fit(unique_vals)
-    df[col + config["encoding_suffix"]] = le.transform(df[col])
-    label_encoders[col] = le
-
-
-# Feature selection
-feature_cols = (
-    config["features"]["numerical"] +
-    [col + config["encoding_suffix"] for col in config["features"]["categorical"]]
-)
+# Combine; feedback rows are encoded with the base encoders (unseen values -> Unknown)
+label_encoders = dataset.label_encoders
+features = pd.concat([dataset.features(), dataset.encode(feedback)], ignore_index=True)
+df = pd.DataFrame({"is_fraud": np.concatenate([dataset.y, feedback["is_fraud"].to_numpy()])})
+
 df_fraud = df[df["is_fraud"] == 1]
 df_legit_pool = df[df["is_fraud"] == 0]
 
@@ -50,10 +47,9 @@ df_legit = df_legit_pool.sample(n=desired_legit, random_state=42)
 
 df_rf = pd.concat([df_fraud, df_legit]).sample(frac=1, random_state=42)
 
-X = df_rf[feature_cols]
+X = features.loc[df_rf.index]
 y = df_rf["is_fraud"]
 
-
 # --- Random Forest Retrain ---
 X_train, X_test, y_train, y_test = train_test_split(
     X, y, test_size=0.2, stratify=y, random_state=42
@@ -68,9 +64,9 @@ rf_model = RandomForestClassifier(n_estimators=100, max_depth=10, min_samples_sp
 rf_model.fit(X_train_scaled, y_train)
 
 # Save RF model
-joblib.dump(rf_model, config["model_paths"]["rf"])
-joblib.dump(rf_scaler, config["model_paths"]["rf_scaler"])
-joblib.dump(label_encoders, config["model_paths"]["encoders"])
+joblib.dump(rf_model, bundle_paths["rf"])
+joblib.dump(rf_scaler, bundle_paths["rf_scaler"])
+joblib.dump(label_encoders, bundle_paths["encoders"])
 print("✅ Random Forest retrained and saved.")
 
 # --- Isolation Forest Retrain ---
@@ -78,7 +74,7 @@ df_fraud = df[df["is_fraud"] == 1].sample(n=min(1000, len(df[df["is_fraud"] == 1
 df_legit = df[df["is_fraud"] == 0].sample(n=min(29000, len(df[df["is_fraud"] == 0])), random_state=42)
 df_iso = pd.concat([df_fraud, df_legit]).sample(frac=1, random_state=42)
 
-X_iso = df_iso[feature_cols]
+X_iso = features.loc[df_iso.index]
 
 iso_scaler = StandardScaler()
 X_iso_scaled = iso_scaler.fit_transform(X_iso)
@@ -87,13 +83,28 @@ iso_model = IsolationForest(n_estimators=100, contamination=0.01, random_state=4
 iso_model.fit(X_iso_scaled)
 
 # Save ISO model + scaler
-joblib.dump(iso_model, config["model_paths"]["iso"])
-joblib.dump(iso_scaler, config["model_paths"]["iso_scaler"])
+joblib.dump(iso_model, bundle_paths["iso"])
+joblib.dump(iso_scaler, bundle_paths["iso_scaler"])
 
 # Risk score scaling
 raw_scores = -iso_model.decision_function(X_iso_scaled).reshape(-1, 1)
 risk_scaler = MinMaxScaler((0, 100))
 risk_scaler.fit(raw_scores)
-joblib.dump(risk_scaler, config["model_paths"]["iso_risk_scaler"])
+joblib.dump(risk_scaler, bundle_paths["iso_risk_scaler"])
 
 print("✅ Isolation Forest retrained and saved.")
+
+# --- Publish + activate; running apps hot-swap to it after warm-up ---
+registry = ModelRegistry(config["model_registry"]["root"])
+previous = registry.current()
+try:
+    version, _ = publish_bundle(
+        registry,
+        bundle_paths,
+        config,
+        metadata={"source": "retrain_with_feedback", "feedback_rows": len(feedback), "rf_rows": len(df_rf), "iso_rows": len(df_iso)}
+    )
+finally:
+    shutil.rmtree(staging_dir, ignore_errors=True)
+print(f"✅ Published and activated model bundle {version} (previous: {previous}).")
+print("   Roll back with POST /admin/models/rollback")
@@ -0,0 +1,100 @@
+# scripts/train_models.py
+#
+# Train the whole model bundle in one run: RF, IsolationForest and the ISO
+# risk scaler over a single load of the dataset cache, with the model fits
+# and the RF CV folds side by side on a process pool.  Samples, parameters
+# and seeds are those of train_rf.py + train_iso.py, so the models match
+# what running those one after the other produced.
+#
+# The bundle is published into the model registry and activated once it
+# loads and warms up (with --save-loose it goes to config model_paths
+# instead, which the app only serves while the registry is empty), and a
+# per-stage timing report goes to training.report_path.
+#
+#   python scripts/train_models.py [--workers N] [--save-loose]
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import joblib
+import yaml
+
+sys.path.insert(0, "backend_flask")
+from utils.dataset_cache import load_training_dataset
+from utils.model_registry import ModelRegistry, publish_bundle
+from utils.training import train_models
+
+# 🔧 Load config
+with open("backend_flask/config/features_config.yaml", "r") as f:
+    config = yaml.safe_load(f)
+training_config = config["training"]
+
+parser = argparse.ArgumentParser(description="Train RF + ISO + risk scaler as one pipeline")
+parser.add_argument("--workers", type=int, default=training_config["workers"], help="0 = one per CPU")
+parser.add_argument("--save-loose", action="store_true",
+                    help="write to model_paths instead of publishing to the model registry")
+args = parser.parse_args()
+
+started = time.perf_counter()
+
+# 📄 Load the dataset once for every stage
+load_start = time.perf_counter()
+cache_config = config["dataset_cache"]
+dataset = load_training_dataset(cache_config["source"], cache_config["dir"], config, label=cache_config["label"])
+load_secs = time.perf_counter() - load_start
+
+artifacts, metrics, stages = train_models(dataset, config, workers=args.workers)
+stages.insert(0, {"stage": "load dataset", "secs": round(load_secs, 3), "in": "main"})
+
+print(f"Cross-Validation Accuracy: {metrics['cv_accuracy']:.4f}")
+print(f"Train Accuracy: {metrics['train_accuracy']:.4f}")
+print(f"Test Accuracy: {metrics['test_accuracy']:.4f}")
+print("Classification Report:\n", metrics["classification_report"])
+print("ISO Accuracy:", metrics["iso_accuracy"])
+print("ISO Classification Report:\n", metrics["iso_classification_report"])
+
+# 💾 Save
+save_start = time.perf_counter()
+if args.save_loose:
+    paths = config["model_paths"]
+else:
+    staging_dir = tempfile.mkdtemp(prefix="train-")
+    paths = {k: os.path.join(staging_dir, os.path.basename(v)) for k, v in config["model_paths"].items()}
+for key, obj in artifacts.items():
+    joblib.dump(obj, paths[key])
+if args.save_loose:
+    print("✅ RF, ISO, scalers, risk scaler and encoders saved to model_paths.")
+else:
+    registry = ModelRegistry(config["model_registry"]["root"])
+    try:
+        version, _ = publish_bundle(
+            registry,
+            paths,
+            config,
+            metadata={"source": "train_models", "rf_rows": metrics["rf_rows"], "iso_rows": metrics["iso_rows"]}
+        )
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    print(f"✅ Published and activated model bundle {version}.")
+stages.append({"stage": "save", "secs": round(time.perf_counter() - save_start, 3), "in": "main"})
+
+# ⏱️ Timing report
+total = time.perf_counter() - started
+report = {
+    "workers": args.workers or os.cpu_count(),
+    "total_secs": round(total, 3),
+    "stages": stages,
+    "metrics": {k: v for k, v in metrics.items() if not k.endswith("classification_report")},
+}
+os.makedirs(os.path.dirname(training_config["report_path"]), exist_ok=True)
+with open(training_config["report_path"], "w") as f:
+    json.dump(report, f, indent=2)
+print(f"\n{'stage':<32} {'in':<5} {'secs':>8}")
+for stage in stages:
+    print(f"{stage['stage']:<32} {stage['in']:<5} {stage['secs']:>8.2f}")
+print(f"{'total (wall)':<32} {'':<5} {total:>8.2f}")
+print(f"⏱️ Timing report written to {training_config['report_path']}")
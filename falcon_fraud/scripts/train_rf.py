@@ -1,53 +1,39 @@
 import pandas as pd
 import numpy as np
-import joblib
 import yaml
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import os
+import sys
+
+sys.path.insert(0, "backend_flask")
+from utils.dataset_cache import load_training_dataset
+from utils.model_registry import ModelRegistry, publish_artifacts
 
 # Load config
 with open("backend_flask/config/features_config.yaml", "r") as f:
     config = yaml.safe_load(f)
 
-# Load data
-df = pd.read_csv("transactionsnew2.csv")
-df_fraud = df[df['is_fraud'] == 1]
-df_legit_pool = df[df['is_fraud'] == 0]
+# 📄 Load the typed, pre-encoded dataset (parsed once, rebuilt when the CSV or feature list changes)
+cache_config = config["dataset_cache"]
+dataset = load_training_dataset(cache_config["source"], cache_config["dir"], config, label=cache_config["label"])
+
+# Sample on the labels alone, then gather those rows of the encoded matrix
+labels = pd.DataFrame({"is_fraud": dataset.y})
+df_fraud = labels[labels['is_fraud'] == 1]
+df_legit_pool = labels[labels['is_fraud'] == 0]
 
 desired_legit = min(len(df_legit_pool), len(df_fraud) * 10)
 df_legit = df_legit_pool.sample(n=desired_legit, random_state=42)
 
-df = pd.concat([df_fraud, df_legit]).sample(frac=1, random_state=42)
-
-
-df.fillna(0, inplace=True)
-
-# Encode categorical
-label_encoders = {}
-for col in config["features"]["categorical"]:
-    le = LabelEncoder()
-    df[col] = df[col].astype(str)
+sample = pd.concat([df_fraud, df_legit]).sample(frac=1, random_state=42).index.to_numpy()
 
-    # Ensure 'Unknown' is part of classes
-    unique_values = df[col].unique().tolist()
-    if "Unknown" not in unique_values:
-        unique_values.append("Unknown")
-
-    le.fit(unique_values)
-    df[col + config["encoding_suffix"]] = le.transform(df[col])
-    label_encoders[col] = le
-
-
-# Select features
-feature_cols = (
-    config["features"]["numerical"] +
-    [col + config["encoding_suffix"] for col in config["features"]["categorical"]]
-)
-X = df[feature_cols]
-y = df["is_fraud"]
+# Encoders cover every category in the dataset, plus Unknown
+label_encoders = dataset.label_encoders
+X = dataset.features(sample)
+y = labels["is_fraud"].to_numpy()[sample]
 
 # Train-test split
 X_train, X_test, y_train, y_test = train_test_split(
@@ -73,8 +59,10 @@ print(f"Train Accuracy: {accuracy_score(y_train, model.predict(X_train_scaled)):
 print(f"Test Accuracy: {accuracy_score(y_test, model.predict(X_test_scaled)):.4f}")
 print("Classification Report:\n", classification_report(y_test, model.predict(X_test_scaled)))
 
-# Save
-joblib.dump(model, config["model_paths"]["rf"])
-joblib.dump(scaler, config["model_paths"]["rf_scaler"])
-joblib.dump(label_encoders, config["model_paths"]["encoders"])
-print("✅ RF Model, Scaler, Encoders saved.")
+# Publish with the current ISO, ISO scaler and risk scaler, activated once it warms up
+registry = ModelRegistry(config["model_registry"]["root"])
+version, _ = publish_artifacts(
+    registry, config, {"rf": model, "rf_scaler": scaler, "encoders": label_encoders},
+    metadata={"source": "train_rf", "rf_rows": len(sample)}
+)
+print(f"✅ RF Model, Scaler, Encoders published and activated as model bundle {version}.")
@@ -1,34 +1,31 @@
 # scripts/train_risk_scaler.py
 
 import joblib
-import pandas as pd
 import yaml
-import os
+import sys
 from sklearn.preprocessing import MinMaxScaler
 
+sys.path.insert(0, "backend_flask")
+from utils.dataset_cache import load_training_dataset
+from utils.model_registry import ModelRegistry, publish_artifacts
+
 # 🔧 Load config
 with open("backend_flask/config/features_config.yaml", "r") as f:
     config = yaml.safe_load(f)
 
-# Load the features
-df = pd.read_csv("transactionsnew2.csv")
-df.fillna(0, inplace=True)
-
-# Preprocess
-label_encoders = joblib.load(config["model_paths"]["encoders"])
-for col in config["features"]["categorical"]:
-    le = label_encoders[col]
-    df[col + config["encoding_suffix"]] = le.transform(df[col])
+# 📄 Load the typed, pre-encoded dataset (parsed once, rebuilt when the CSV or feature list changes)
+cache_config = config["dataset_cache"]
+dataset = load_training_dataset(cache_config["source"], cache_config["dir"], config, label=cache_config["label"])
 
-feature_cols = (
-    config["features"]["numerical"] +
-    [col + config["encoding_suffix"] for col in config["features"]["categorical"]]
-)
-X = df[feature_cols]
+# Encode with the encoders of the bundle the app serves
+registry = ModelRegistry(config["model_registry"]["root"])
+bundle_paths = registry.paths(registry.bootstrap(config["model_paths"], fold_scalers=config["inference"]["fold_scalers"]))
+label_encoders = joblib.load(bundle_paths["encoders"])
+X = dataset.features(label_encoders=label_encoders)
 
 # Load ISO model and scaler
-iso_model = joblib.load(config["model_paths"]["iso"])
-iso_scaler = joblib.load(config["model_paths"]["iso_scaler"])
+iso_model = joblib.load(bundle_paths["iso"])
+iso_scaler = joblib.load(bundle_paths["iso_scaler"])
 X_iso_scaled = iso_scaler.transform(X)
 
 # Get raw anomaly scores
@@ -39,8 +36,7 @@ reshaped = anomaly_scores.reshape(-1, 1)
 risk_scaler = MinMaxScaler(feature_range=(0, 100))
 risk_scaler.fit(reshaped)
 
-# Save it
-output_path = os.path.join("backend-flask", "models", "iso_risk_scaler.pkl")
-joblib.dump(risk_scaler, output_path)
+# Publish it with the rest of that bundle
+version, _ = publish_artifacts(registry, config, {"iso_risk_scaler": risk_scaler}, metadata={"source": "train_risk_scaler"})
 
-print("✅ Risk scaler trained and saved to", output_path)
+print("✅ Risk scaler trained, published and activated as model bundle", version)
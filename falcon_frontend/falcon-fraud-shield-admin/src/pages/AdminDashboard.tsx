@@ -39,7 +39,7 @@ export default function AdminDashboard() {
 
   const fetchAllTransactions = async () => {
     try {
-      const response = await fetch("http://localhost:5000/api/all-transactions");
+      const response = await fetch("http://localhost:5000/api/all-transactions?fields=id,user_id,amount,status,risk_score,created_at,details");
       if (response.ok) {
         const txs = await response.json();
         // Map riskLevel for analytics
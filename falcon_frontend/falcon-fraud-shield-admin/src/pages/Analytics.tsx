@@ -34,7 +34,7 @@ const Analytics = () => {
 
   const fetchAllTransactions = async () => {
     try {
-      const response = await fetch("http://localhost:5000/api/all-transactions");
+      const response = await fetch("http://localhost:5000/api/all-transactions?fields=id,user_id,amount,status,risk_score,created_at,details");
       if (response.ok) {
         const txs = await response.json();
         setAllTransactions(
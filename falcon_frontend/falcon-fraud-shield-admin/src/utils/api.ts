@@ -2,12 +2,27 @@
 
 const API_BASE_URL = 'http://localhost:5000';
 
+// The endpoint returns one keyset page at a time (at most listings.max_limit
+// rows) and the cursor for the next one in X-Next-Cursor; follow it so the
+// dashboard still shows the whole queue.
+const PENDING_REVIEWS_PAGE_SIZE = 500;
+
 export async function getPendingReviews() {
-    const response = await fetch(`${API_BASE_URL}/api/admin/pending-reviews`);
-    if (!response.ok) {
-        throw new Error('Failed to fetch pending reviews');
-    }
-    return await response.json();
+    const reviews = [];
+    let cursor: string | null = null;
+    do {
+        const params = new URLSearchParams({ limit: String(PENDING_REVIEWS_PAGE_SIZE) });
+        if (cursor) {
+            params.set('cursor', cursor);
+        }
+        const response = await fetch(`${API_BASE_URL}/api/admin/pending-reviews?${params}`);
+        if (!response.ok) {
+            throw new Error('Failed to fetch pending reviews');
+        }
+        reviews.push(...(await response.json()));
+        cursor = response.headers.get('X-Next-Cursor');
+    } while (cursor);
+    return reviews;
 }
 
 export async function reviewTransaction(data: {
@@ -18,7 +18,7 @@ const Transactions = () => {
 
   const fetchUserTransactions = async (userId: number) => {
     try {
-      const response = await fetch(`http://localhost:5000/api/transactions?user_id=${userId}`);
+      const response = await fetch(`http://localhost:5000/api/transactions?user_id=${userId}&fields=id,amount,status,risk_score,created_at,details`);
       if (response.ok) {
         const transactions = await response.json();
         setHistory(transactions);